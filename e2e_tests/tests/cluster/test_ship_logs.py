@@ -1,3 +1,5 @@
+import gzip
+import inspect
 import io
 import json
 import logging
@@ -12,10 +14,12 @@ import tempfile
 import textwrap
 import threading
 import time
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 import pytest
 
+from determined.launch import wrap_rank
+
 here = os.path.dirname(__file__)
 static_srv = os.path.join(here, "../../../master/static/srv")
 old = sys.path
@@ -39,6 +43,11 @@ class ShipLogServer:
         self.reject_logs = reject_logs
         self.quit = False
         self.logs: List[str] = []
+        # Every log shipped, with its metadata.
+        self.records: List[Dict[str, Any]] = []
+        # How many connections logs were shipped over, and the Content-Encoding of each request.
+        self.log_connections = 0
+        self.encodings: List[str] = []
 
         self.listener = socket.socket()
         self.listener.bind(("127.0.0.1", 0))
@@ -74,8 +83,13 @@ class ShipLogServer:
                         return
                     if self.ctx:
                         s = self.ctx.wrap_socket(s, server_side=True)
+                    # Don't let a keep-alive connection keep us from quitting.
+                    s.settimeout(0.1)
                     try:
-                        self.serve_one_request(s)
+                        shipped_logs = False
+                        while self.serve_one_request(s):
+                            shipped_logs = True
+                        self.log_connections += shipped_logs
                     except Exception:
                         logging.error("error reading request", exc_info=True)
                 finally:
@@ -83,43 +97,59 @@ class ShipLogServer:
         except Exception:
             logging.error("server crashed", exc_info=True)
 
-    def serve_one_request(self, s: socket.socket) -> None:
+    def recv(self, s: socket.socket) -> bytes:
+        while not self.quit:
+            try:
+                return s.recv(4096)
+            except socket.timeout:
+                pass
+        return b""
+
+    def serve_one_request(self, s: socket.socket) -> bool:
+        """
+        Serve one request, and return whether the connection is kept alive after posting logs.
+        """
         # Receive headers.
         hdrs = b""
         while b"\r\n\r\n" not in hdrs:
-            buf = s.recv(4096)
+            buf = self.recv(s)
             if not buf:
                 # EOF
-                return
+                return False
             hdrs += buf
         # Detect the initial GET /api/v1/me probe.
         if hdrs.startswith(b"GET"):
-            s.sendall(b"HTTP/1.1 200 OK\r\n\r\n")
-            return
+            s.sendall(b"HTTP/1.1 200 OK\r\nConnection: close\r\n\r\n")
+            return False
         # Are we supposed to misbehave?
         if self.reject_logs:
-            s.sendall(b"HTTP/1.1 500 No! I don't wanna!\r\n\r\n")
-            return
-        # Receive body until we have valid json.
+            s.sendall(b"HTTP/1.1 500 No! I don't wanna!\r\nConnection: close\r\n\r\n")
+            return False
+        # Receive the body.
         hdrs, body = hdrs.split(b"\r\n\r\n", maxsplit=1)
-        while True:
-            try:
-                jbody = json.loads(body)
-                break
-            except json.decoder.JSONDecodeError:
-                # Must not have the full body yet.
-                pass
-            buf = s.recv(4096)
+        headers = {}
+        for line in hdrs.decode("utf8").split("\r\n")[1:]:
+            key, value = line.split(":", maxsplit=1)
+            headers[key.strip().lower()] = value.strip()
+        while len(body) < int(headers["content-length"]):
+            buf = self.recv(s)
             if not buf:
                 # EOF
-                return
+                return False
             body += buf
+        encoding = headers.get("content-encoding", "identity")
+        self.encodings.append(encoding)
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        jbody = json.loads(body)
 
         # Remember the logs we saw.
+        self.records.extend(jbody["logs"])
         self.logs.extend(j["log"] for j in jbody["logs"])
 
         # Send a response.
-        s.sendall(b"HTTP/1.1 200 OK\r\n\r\n")
+        s.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+        return True
 
     def master_url(self) -> str:
         return f"http://127.0.0.1:{self.port}"
@@ -145,12 +175,13 @@ class TestShipLogs:
         log_wait_time: float = 30,
         cert_name: str = "",
         cert_file: str = "",
+        metadata: Optional[Dict[str, str]] = None,
     ) -> int:
         exit_code = ship_logs.main(
             master_url=master_url,
             cert_name=cert_name,
             cert_file=cert_file,
-            metadata={},
+            metadata=metadata or {},
             token="token",
             emit_stdout_logs=False,
             cmd=cmd,
@@ -330,21 +361,28 @@ class TestShipLogs:
         cmd = mkcmd(
             """
             # ONLY STANDARD LIBRARY IMPORTS ARE ALLOWED
+            import base64
+            import collections
             import datetime
+            import gzip
+            import http.client
             import io
             import json
             import logging
             import os
             import queue
             import re
+            import shutil
             import signal
             import ssl
             import subprocess
             import sys
+            import tempfile
             import threading
             import time
             import traceback
             import typing
+            import urllib.parse
             import urllib.request
             # END OF STANDARD LIBRARY IMPORTS
 
@@ -425,6 +463,47 @@ class TestShipLogs:
             subprocess.run(fullcmd, env=env, check=True)
             assert srv.logs == ["hello world\n"], srv.logs
 
+    @pytest.mark.e2e_cpu
+    def test_batches_are_gzipped_with_metadata(self) -> None:
+        cmd = mkcmd(
+            """
+            import sys
+            print("[rank=1] INFO: hi", file=sys.stdout, flush=True)
+            print("bye", file=sys.stderr, flush=True)
+            """
+        )
+        # Per-log fields take precedence over the metadata.
+        metadata = {"task_id": "task", "source": "task", "log": "not a log"}
+        with ShipLogServer() as srv:
+            exit_code = self.run_ship_logs(srv.master_url(), cmd, metadata=metadata)
+        assert exit_code == 0, exit_code
+        assert srv.encodings and set(srv.encodings) == {"gzip"}, srv.encodings
+        records = sorted(srv.records, key=lambda r: str(r["stdtype"]))
+        assert [set(r) for r in records] == [
+            {"timestamp", "stdtype", "task_id", "source", "log"},
+            {"timestamp", "stdtype", "task_id", "source", "log", "rank_id", "level"},
+        ], records
+        assert records[1]["rank_id"] == 1 and records[1]["level"] == "LOG_LEVEL_INFO", records
+        assert [r["log"] for r in records] == ["bye\n", "hi\n"], records
+        assert all(r["task_id"] == "task" for r in records), records
+
+    @pytest.mark.e2e_cpu
+    def test_connection_is_kept_alive(self) -> None:
+        # Enough lines for several batches.
+        n = 3 * ship_logs.LOG_BATCH_MAX_SIZE
+        cmd = mkcmd(
+            f"""
+            for i in range({n}):
+                print(i)
+            """
+        )
+        with ShipLogServer() as srv:
+            exit_code = self.run_ship_logs(srv.master_url(), cmd)
+        assert exit_code == 0, exit_code
+        assert srv.logs == [f"{i}\n" for i in range(n)]
+        assert len(srv.encodings) >= 3, srv.encodings
+        assert srv.log_connections == 1, srv.log_connections
+
     @pytest.mark.e2e_cpu
     def test_escape_hatch(self) -> None:
         # Create a temporary directory to catch our escape-hatch logs
@@ -450,6 +529,42 @@ class TestShipLogs:
             shutil.rmtree(tmp)
 
 
+class TestSpillQueue:
+    @pytest.mark.e2e_cpu
+    def test_batches_spill_in_order(self) -> None:
+        q = ship_logs.SpillQueue(max_memory=1, max_spill_bytes=10)
+        assert q.put(b"a")
+        assert q.put(b"bbbb")
+        assert q.spill_dir is not None and os.listdir(q.spill_dir) == ["0"]
+        # Batches beyond the spill limit are dropped.
+        assert not q.put(b"c" * 7)
+        assert q.put(b"d" * 6)
+        assert q.get() == b"a"
+        # Memory freed up, but the batch must still be shipped after the spilled ones.
+        assert q.put(b"e")
+        assert q.get() == b"bbbb"
+        assert q.get() == b"d" * 6
+        assert os.listdir(q.spill_dir) == []
+        assert q.put(b"f" * 10)
+        q.close()
+        assert q.get() == b"e"
+        assert q.get() == b"f" * 10
+        assert q.get() is None
+        q.cleanup()
+        assert not os.path.exists(q.spill_dir)
+
+    @pytest.mark.e2e_cpu
+    def test_get_waits_for_batches(self) -> None:
+        q = ship_logs.SpillQueue(max_memory=1, max_spill_bytes=0)
+        got: List[Optional[bytes]] = []
+        t = threading.Thread(target=lambda: got.extend([q.get(), q.get()]))
+        t.start()
+        q.put(b"a")
+        q.close()
+        t.join(timeout=5)
+        assert got == [b"a", None], got
+
+
 class TestReadNewlinesOrCarriageReturns:
     # read_newlines_or_carriage_returns is designed to read from filedescriptors resulting from
     # subprocess.Popen(bufsize=0).stdout, and different kinds of filehandles can result in slightly
@@ -538,3 +653,11 @@ class TestReadNewlinesOrCarriageReturns:
         line = next(reader)
         assert line == exp_2, line
         p.wait()
+
+    @pytest.mark.e2e_cpu
+    def test_same_as_wrap_rank(self) -> None:
+        # ship_logs.py can't import the determined library, so the line splitter is duplicated.
+        assert ship_logs.READ_SIZE == wrap_rank.READ_SIZE
+        for fn in ("read_line_batches", "read_newlines_or_carriage_returns"):
+            source = inspect.getsource(getattr(ship_logs, fn))
+            assert source == inspect.getsource(getattr(wrap_rank, fn)), fn
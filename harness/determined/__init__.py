@@ -1,27 +1,64 @@
+from typing import TYPE_CHECKING
+
 from determined.__version__ import __version__
-from determined._experiment_config import ExperimentConfig
-from determined._info import RendezvousInfo, TrialInfo, ResourcesInfo, ClusterInfo, get_cluster_info
-from determined._import import import_from_path
-from determined import core
-from determined._env_context import EnvContext
-from determined._trial_context import TrialContext
-from determined._trial import LegacyTrial
-from determined._trial_controller import (
-    _DistributedBackend,
-    TrialController,
-)
-from determined._execution import (
-    _catch_sys_exit,
-    _make_test_experiment_config,
-    _make_local_execution_env,
-    _get_gpus,
-    _make_local_execution_exp_config,
-    _local_execution_manager,
-    _load_trial_for_checkpoint_export,
-    InvalidHP,
+from determined._import import import_from_path, lazy_getattr
+
+if TYPE_CHECKING:
+    from determined._experiment_config import ExperimentConfig
+    from determined._info import (
+        RendezvousInfo,
+        TrialInfo,
+        ResourcesInfo,
+        ClusterInfo,
+        get_cluster_info,
+    )
+    from determined import core
+    from determined._env_context import EnvContext
+    from determined._trial_context import TrialContext
+    from determined._trial import LegacyTrial
+    from determined._trial_controller import (
+        _DistributedBackend,
+        TrialController,
+    )
+    from determined._execution import (
+        _catch_sys_exit,
+        _make_test_experiment_config,
+        _make_local_execution_env,
+        _get_gpus,
+        _make_local_execution_exp_config,
+        _local_execution_manager,
+        _load_trial_for_checkpoint_export,
+        InvalidHP,
+    )
+    from determined import errors
+    from determined import util
+
+# Everything else, including submodules, is imported on first use, so that programs which only
+# need part of determined, like the `det` CLI, do not pay for importing all of it.
+__getattr__ = lazy_getattr(
+    __name__,
+    {
+        "ExperimentConfig": "determined._experiment_config",
+        "RendezvousInfo": "determined._info",
+        "TrialInfo": "determined._info",
+        "ResourcesInfo": "determined._info",
+        "ClusterInfo": "determined._info",
+        "get_cluster_info": "determined._info",
+        "EnvContext": "determined._env_context",
+        "TrialContext": "determined._trial_context",
+        "LegacyTrial": "determined._trial",
+        "_DistributedBackend": "determined._trial_controller",
+        "TrialController": "determined._trial_controller",
+        "_catch_sys_exit": "determined._execution",
+        "_make_test_experiment_config": "determined._execution",
+        "_make_local_execution_env": "determined._execution",
+        "_get_gpus": "determined._execution",
+        "_make_local_execution_exp_config": "determined._execution",
+        "_local_execution_manager": "determined._execution",
+        "_load_trial_for_checkpoint_export": "determined._execution",
+        "InvalidHP": "determined._execution",
+    },
 )
-from determined import errors
-from determined import util
 
 # LOG_FORMAT is the standard format for use with the logging module, which is required for the
 # WebUI's log viewer to filter logs by log level.
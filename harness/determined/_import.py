@@ -1,8 +1,10 @@
 import contextlib
+import importlib
+import importlib.util
 import os
 import sys
 from importlib import machinery
-from typing import Iterator, Set, no_type_check
+from typing import Any, Callable, Dict, Iterator, Set, no_type_check
 
 
 class NoCachePathFinder(machinery.PathFinder):
@@ -133,3 +135,27 @@ def import_from_path(path: os.PathLike) -> Iterator:
         sys.path = old_sys_path
         # Restore local directory modules to sys.modules.
         sys.modules.update(popped_modules)
+
+
+def lazy_getattr(package: str, attrs: Dict[str, str]) -> Callable[[str], Any]:
+    """
+    Return a module-level __getattr__ (PEP 562) for package, which imports each attribute in attrs
+    from the module it maps to on first use, and each submodule of package on first use.
+
+    This keeps importing a package cheap when only some of its contents are needed, like the
+    determined package for the `det` CLI.
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = attrs.get(name)
+        if module_name is not None:
+            value = getattr(importlib.import_module(module_name), name)
+            setattr(sys.modules[package], name, value)
+            return value
+        module_name = f"{package}.{name}"
+        if name.startswith("__") or importlib.util.find_spec(module_name) is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        # Importing a submodule sets it as an attribute of its package.
+        return importlib.import_module(module_name)
+
+    return __getattr__
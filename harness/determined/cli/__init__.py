@@ -1,32 +1,53 @@
-from determined.cli._util import (
-    output_format_args,
-    make_pagination_args,
-    default_pagination_args,
-    setup_session,
-    require_feature_flag,
-    login_sdk_client,
-    print_launch_warnings,
-    wait_ntsc_ready,
-    warn,
-)
-from determined.cli import (
-    agent,
-    checkpoint,
-    cli,
-    command,
-    experiment,
-    master,
-    model,
-    notebook,
-    project,
-    rbac,
-    remote,
-    render,
-    resources,
-    shell,
-    template,
-    tensorboard,
-    trial,
-    user,
-    workspace,
+from typing import TYPE_CHECKING
+
+from determined._import import lazy_getattr
+
+if TYPE_CHECKING:
+    from determined.cli._util import (
+        output_format_args,
+        make_pagination_args,
+        default_pagination_args,
+        setup_session,
+        require_feature_flag,
+        login_sdk_client,
+        print_launch_warnings,
+        wait_ntsc_ready,
+        warn,
+    )
+    from determined.cli import (
+        agent,
+        checkpoint,
+        cli,
+        command,
+        experiment,
+        master,
+        model,
+        notebook,
+        project,
+        rbac,
+        remote,
+        render,
+        resources,
+        shell,
+        template,
+        tensorboard,
+        trial,
+        user,
+        workspace,
+    )
+
+# Command modules are imported on first use, so that `det` only imports the command it runs.
+__getattr__ = lazy_getattr(
+    __name__,
+    {
+        "output_format_args": "determined.cli._util",
+        "make_pagination_args": "determined.cli._util",
+        "default_pagination_args": "determined.cli._util",
+        "setup_session": "determined.cli._util",
+        "require_feature_flag": "determined.cli._util",
+        "login_sdk_client": "determined.cli._util",
+        "print_launch_warnings": "determined.cli._util",
+        "wait_ntsc_ready": "determined.cli._util",
+        "warn": "determined.cli._util",
+    },
 )
@@ -82,7 +82,7 @@ def make_pagination_args(
     return res
 
 
-default_pagination_args = make_pagination_args()
+default_pagination_args: List[declarative_argparse.Arg] = make_pagination_args()
 
 
 def login_sdk_client(func: Callable[[argparse.Namespace], Any]) -> Callable[..., Any]:
@@ -1,132 +1,29 @@
 import hashlib
+import importlib
 import os
+import shlex
 import socket
 import ssl
 import sys
-from argparse import (
-    ArgumentDefaultsHelpFormatter,
-    ArgumentError,
-    ArgumentParser,
-    FileType,
-    Namespace,
-)
-from typing import List, Sequence, Union, cast
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentError, ArgumentParser
+from typing import List, Optional, Sequence, Union, cast
 
 import argcomplete
-import argcomplete.completers
-import requests
-import tabulate
-from OpenSSL import SSL, crypto
 from termcolor import colored
 
 import determined
-import determined.cli
-from determined.cli import render
-from determined.cli.agent import args_description as agent_args_description
-from determined.cli.checkpoint import args_description as checkpoint_args_description
-from determined.cli.dev import args_description as dev_args_description
-from determined.cli.experiment import args_description as experiment_args_description
-from determined.cli.job import args_description as job_args_description
-from determined.cli.master import args_description as master_args_description
-from determined.cli.model import args_description as model_args_description
-from determined.cli.notebook import args_description as notebook_args_description
-from determined.cli.oauth import args_description as oauth_args_description
-from determined.cli.project import args_description as project_args_description
-from determined.cli.rbac import args_description as rbac_args_description
-from determined.cli.remote import args_description as remote_args_description
-from determined.cli.resource_pool import args_description as resource_pool_args_description
-from determined.cli.resources import args_description as resources_args_description
-from determined.cli.shell import args_description as shell_args_description
-from determined.cli.sso import args_description as auth_args_description
-from determined.cli.task import args_description as task_args_description
-from determined.cli.template import args_description as template_args_description
-from determined.cli.tensorboard import args_description as tensorboard_args_description
-from determined.cli.top_arg_descriptions import deploy_cmd
-from determined.cli.trial import args_description as trial_args_description
-from determined.cli.user import args_description as user_args_description
-from determined.cli.user_groups import args_description as user_groups_args_description
-from determined.cli.version import args_description as version_args_description
-from determined.cli.version import check_version
-from determined.cli.workspace import args_description as workspace_args_description
-from determined.common import api, yaml
-from determined.common.api import authentication, bindings, certs
-from determined.common.check import check_not_none
+from determined.cli.top_arg_descriptions import command_modules, deploy_cmd
 from determined.common.declarative_argparse import (
     Arg,
     ArgsDescription,
-    Cmd,
     add_args,
     generate_aliases,
 )
-from determined.common.util import (
-    chunks,
-    debug_mode,
-    get_default_master_address,
-    safe_load_yaml_with_exceptions,
-)
+from determined.common.util import chunks, debug_mode, get_default_master_address
 from determined.errors import EnterpriseOnlyError
 
 from .errors import CliError, FeatureFlagDisabled
 
-
-@authentication.required
-def preview_search(args: Namespace) -> None:
-    experiment_config = safe_load_yaml_with_exceptions(args.config_file)
-    args.config_file.close()
-
-    if "searcher" not in experiment_config:
-        print("Experiment configuration must have 'searcher' section")
-        sys.exit(1)
-    r = api.post(args.master, "searcher/preview", json=experiment_config)
-    j = r.json()
-
-    def to_full_name(kind: str) -> str:
-        try:
-            # The unitless searcher case, for masters newer than 0.17.6.
-            length = int(kind)
-            return f"train for {length}"
-        except ValueError:
-            pass
-        if kind[-1] == "R":
-            return "train {} records".format(kind[:-1])
-        if kind[-1] == "B":
-            return "train {} batch(es)".format(kind[:-1])
-        if kind[-1] == "E":
-            return "train {} epoch(s)".format(kind[:-1])
-        if kind == "V":
-            return "validation"
-        raise ValueError("unexpected kind: {}".format(kind))
-
-    def render_sequence(sequence: List[str]) -> str:
-        if not sequence:
-            return "N/A"
-        instructions = []
-        current = sequence[0]
-        count = 0
-        for k in sequence:
-            if k != current:
-                instructions.append("{} x {}".format(count, to_full_name(current)))
-                current = k
-                count = 1
-            else:
-                count += 1
-        instructions.append("{} x {}".format(count, to_full_name(current)))
-        return ", ".join(instructions)
-
-    headers = ["Trials", "Breakdown"]
-    values = [
-        (count, render_sequence(operations.split())) for operations, count in j["results"].items()
-    ]
-
-    print(colored("Using search configuration:", "green"))
-    yml = yaml.YAML()
-    yml.indent(mapping=2, sequence=4, offset=2)
-    yml.dump(experiment_config["searcher"], sys.stdout)
-    print()
-    print("This search will create a total of {} trial(s).".format(sum(j["results"].values())))
-    print(tabulate.tabulate(values, headers, tablefmt="presto"), flush=False)
-
-
 args_description = [
     Arg("-u", "--user", help="run as the given user", metavar="username", default=None),
     Arg(
@@ -143,42 +40,63 @@ args_description = [
         help="print CLI version and exit",
         version="%(prog)s {}".format(determined.__version__),
     ),
-    Cmd(
-        "preview-search",
-        preview_search,
-        "preview search",
-        [Arg("config_file", type=FileType("r"), help="experiment config file (.yaml)")],
-    ),
     deploy_cmd,
 ]  # type: ArgsDescription
 
-all_args_description: ArgsDescription = (
-    args_description
-    + experiment_args_description
-    + checkpoint_args_description
-    + master_args_description
-    + model_args_description
-    + agent_args_description
-    + notebook_args_description
-    + job_args_description
-    + resources_args_description
-    + resource_pool_args_description
-    + project_args_description
-    + shell_args_description
-    + task_args_description
-    + template_args_description
-    + tensorboard_args_description
-    + trial_args_description
-    + remote_args_description
-    + user_args_description
-    + user_groups_args_description
-    + rbac_args_description
-    + version_args_description
-    + workspace_args_description
-    + auth_args_description
-    + oauth_args_description
-    + dev_args_description
-)
+# Global options which take a value, as in `det -m <address> experiment list`.
+_options_with_values = ["-u", "--user", "-m", "--master"]
+
+
+def _command_words(args: List[str]) -> List[str]:
+    """
+    Return the words of the command line being run or, when called by argcomplete for shell
+    completion, the complete words of the command line being completed.
+    """
+    if "_ARGCOMPLETE" not in os.environ:
+        return args
+    line = os.environ.get("COMP_LINE", "")
+    line = line[: int(os.environ.get("COMP_POINT", len(line)))]
+    try:
+        words = shlex.split(line)
+    except ValueError:
+        # An unterminated quote in the word being completed.
+        words = line.split()
+    if words and not line[-1:].isspace():
+        # Drop the word being completed, which is incomplete.
+        words.pop()
+    return words[1:]
+
+
+def _find_command(words: List[str]) -> Optional[str]:
+    """Return the top-level command in the words of a command line, if there is one yet."""
+    it = iter(words)
+    for word in it:
+        if not word.startswith("-"):
+            return word
+        # argparse also accepts unambiguous prefixes of long options.
+        if "=" not in word and any(
+            word == opt or (word.startswith("--") and opt.startswith(word))
+            for opt in _options_with_values
+        ):
+            next(it, None)
+    return None
+
+
+def _args_description_for(command: Optional[str]) -> ArgsDescription:
+    """
+    Return the arguments of the top-level command named command, along with stand-ins for every
+    other top-level command, importing only the module which defines command.
+    """
+    description = list(args_description)
+    for module, stubs in command_modules.items():
+        if command is not None and any(
+            command in (main_name, *aliases)
+            for main_name, aliases in (generate_aliases(stub.name) for stub in stubs)
+        ):
+            description += importlib.import_module(module).args_description
+        else:
+            description += stubs
+    return description
 
 
 def make_parser() -> ArgumentParser:
@@ -204,17 +122,17 @@ def main(
         # Magic incantation to make a Windows 10 cmd.exe process color-related ANSI escape codes.
         os.system("")
 
-    # TODO: we lazily import "det deploy" but in the future we'd want to lazily import everything.
     parser = make_parser()
 
+    words = _command_words(args)
     full_cmd, aliases = generate_aliases(deploy_cmd.name)
-    is_deploy_cmd = len(args) > 0 and any(args[0] == alias for alias in [*aliases, full_cmd])
+    is_deploy_cmd = len(words) > 0 and any(words[0] == alias for alias in [*aliases, full_cmd])
     if is_deploy_cmd:
         from determined.deploy.cli import args_description as deploy_args_description
 
         add_args(parser, [deploy_args_description])
     else:
-        add_args(parser, all_args_description)
+        add_args(parser, _args_description_for(_find_command(words)))
 
     try:
         argcomplete.autocomplete(parser)
@@ -226,6 +144,15 @@ def main(
             parser.print_usage()
             parser.exit(2, "{}: no subcommand specified\n".format(parser.prog))
 
+        # Imported only now, so that `det --help` and shell completion do not have to.
+        import requests
+
+        from determined.cli import render
+        from determined.cli.version import check_version
+        from determined.common import api
+        from determined.common.api import bindings, certs
+        from determined.common.check import check_not_none
+
         try:
             # For `det deploy`, skip interaction with master.
             if is_deploy_cmd:
@@ -245,6 +172,8 @@ def main(
                 addr = api.parse_master_address(parsed_args.master)
                 check_not_none(addr.hostname)
                 check_not_none(addr.port)
+                from OpenSSL import SSL, crypto
+
                 try:
                     ctx = SSL.Context(SSL.TLSv1_2_METHOD)
                     conn = SSL.Connection(ctx, socket.socket())
@@ -431,7 +431,7 @@ def describe(args: Namespace) -> None:
                 experimentId=exp_id,
             )
 
-        resps = api.read_paginated(get_with_offset)
+        resps = api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
         return [t for r in resps for t in r.trials]
 
     trials_for_experiment = {exp.id: get_all_trials(exp.id) for exp in exps}
@@ -467,7 +467,7 @@ def describe(args: Namespace) -> None:
                 limit=500,
             )
 
-        resps = api.read_paginated(get_with_offset)
+        resps = api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
         return [w for r in resps for w in r.workloads]
 
     all_workloads = {
@@ -722,7 +722,12 @@ def list_experiments(args: Namespace) -> None:
             users=None if args.all else [authentication.must_cli_auth().get_session_user()],
         )
 
-    resps = api.read_paginated(get_with_offset, offset=args.offset, pages=args.pages)
+    resps = api.read_paginated(
+        get_with_offset,
+        offset=args.offset,
+        pages=args.pages,
+        concurrency=api.PAGE_CONCURRENCY,
+    )
     all_experiments = [e for r in resps for e in r.experiments]
 
     def format_experiment(e: bindings.v1Experiment) -> List[Any]:
@@ -813,7 +818,12 @@ def list_trials(args: Namespace) -> None:
             limit=args.limit,
         )
 
-    resps = api.read_paginated(get_with_offset, offset=args.offset, pages=args.pages)
+    resps = api.read_paginated(
+        get_with_offset,
+        offset=args.offset,
+        pages=args.pages,
+        concurrency=api.PAGE_CONCURRENCY,
+    )
     all_trials = [t for r in resps for t in r.trials]
 
     headers = ["Trial ID", "State", "H-Params", "Started", "Ended", "# of Batches"]
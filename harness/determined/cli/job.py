@@ -38,7 +38,12 @@ def ls(args: Namespace) -> None:
             orderBy=order_by,
         )
 
-    paginated_resps = api.read_paginated(get_with_offset, offset=args.offset, pages=args.pages)
+    paginated_resps = api.read_paginated(
+        get_with_offset,
+        offset=args.offset,
+        pages=args.pages,
+        concurrency=api.PAGE_CONCURRENCY,
+    )
     jobs = [j for r in paginated_resps for j in parse_jobv2_resp(r)]
 
     if args.yaml or args.json:
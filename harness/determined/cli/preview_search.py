@@ -0,0 +1,79 @@
+import sys
+from argparse import FileType, Namespace
+from typing import Any, List
+
+import tabulate
+from termcolor import colored
+
+from determined.common import api, yaml
+from determined.common.api import authentication
+from determined.common.declarative_argparse import Arg, Cmd
+from determined.common.util import safe_load_yaml_with_exceptions
+
+
+@authentication.required
+def preview_search(args: Namespace) -> None:
+    experiment_config = safe_load_yaml_with_exceptions(args.config_file)
+    args.config_file.close()
+
+    if "searcher" not in experiment_config:
+        print("Experiment configuration must have 'searcher' section")
+        sys.exit(1)
+    r = api.post(args.master, "searcher/preview", json=experiment_config)
+    j = r.json()
+
+    def to_full_name(kind: str) -> str:
+        try:
+            # The unitless searcher case, for masters newer than 0.17.6.
+            length = int(kind)
+            return f"train for {length}"
+        except ValueError:
+            pass
+        if kind[-1] == "R":
+            return "train {} records".format(kind[:-1])
+        if kind[-1] == "B":
+            return "train {} batch(es)".format(kind[:-1])
+        if kind[-1] == "E":
+            return "train {} epoch(s)".format(kind[:-1])
+        if kind == "V":
+            return "validation"
+        raise ValueError("unexpected kind: {}".format(kind))
+
+    def render_sequence(sequence: List[str]) -> str:
+        if not sequence:
+            return "N/A"
+        instructions = []
+        current = sequence[0]
+        count = 0
+        for k in sequence:
+            if k != current:
+                instructions.append("{} x {}".format(count, to_full_name(current)))
+                current = k
+                count = 1
+            else:
+                count += 1
+        instructions.append("{} x {}".format(count, to_full_name(current)))
+        return ", ".join(instructions)
+
+    headers = ["Trials", "Breakdown"]
+    values = [
+        (count, render_sequence(operations.split())) for operations, count in j["results"].items()
+    ]
+
+    print(colored("Using search configuration:", "green"))
+    yml = yaml.YAML()
+    yml.indent(mapping=2, sequence=4, offset=2)
+    yml.dump(experiment_config["searcher"], sys.stdout)
+    print()
+    print("This search will create a total of {} trial(s).".format(sum(j["results"].values())))
+    print(tabulate.tabulate(values, headers, tablefmt="presto"), flush=False)
+
+
+args_description: List[Any] = [
+    Cmd(
+        "preview-search",
+        preview_search,
+        "preview search",
+        [Arg("config_file", type=FileType("r"), help="experiment config file (.yaml)")],
+    ),
+]
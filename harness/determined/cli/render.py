@@ -17,15 +17,16 @@ import os
 import pathlib
 import sys
 from datetime import timezone
-from typing import Any, Dict, Iterable, List, Optional, Sequence, TextIO, Union
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, TextIO, Union
 
 import dateutil.parser
-import tabulate
 import termcolor
 
 from determined import util as det_util
 from determined.common import util
-from determined.experimental import Model, Project
+
+if TYPE_CHECKING:
+    from determined.experimental import Model, Project
 
 # Avoid reporting BrokenPipeError when piping `tabulate` output through
 # a filter like `head`.
@@ -44,6 +45,8 @@ def render_table(
     # Only display selected columns
     values = select_values(values, headers)
 
+    import tabulate
+
     print(tabulate.tabulate(values, headers, tablefmt=table_fmt), flush=False)
 
 
@@ -110,6 +113,8 @@ def render_objects(
                 yield value
 
     values = [_coerce(renderable) for renderable in values]
+    import tabulate
+
     print(tabulate.tabulate(values, headers, tablefmt=table_fmt), flush=False)
 
 
@@ -161,6 +166,8 @@ def tabulate_or_csv(
         writer.writerow(headers)
         writer.writerows(values)
     else:
+        import tabulate
+
         # Tabulate needs to accept dict[str, str], but mypy thinks it cannot, so
         # we suppress that error.
         print(
@@ -298,7 +305,7 @@ def report_job_launched(_type: str, _id: str) -> None:
     print(termcolor.colored(msg, "green"))
 
 
-def model_to_json(model: Model) -> Dict[str, Any]:
+def model_to_json(model: "Model") -> Dict[str, Any]:
     """Convert a Model to a bindings-style to_json dict."""
     return {
         "name": model.name,
@@ -311,7 +318,7 @@ def model_to_json(model: Model) -> Dict[str, Any]:
     }
 
 
-def project_to_json(project: Project) -> Dict[str, Any]:
+def project_to_json(project: "Project") -> Dict[str, Any]:
     """Convert a Project to a bindings-style to_json dict."""
     return {
         "archived": project.archived,
@@ -1,3 +1,6 @@
+from argparse import SUPPRESS
+from typing import Dict, List
+
 from determined.common.declarative_argparse import Cmd
 
 deploy_cmd = Cmd(
@@ -6,3 +9,47 @@ deploy_cmd = Cmd(
     "manage deployments",
     [],
 )
+
+# Stand-ins for the top-level commands, by the module which defines them.  Importing every command
+# module makes `det` slow to start, so only the module of the command being run is imported; these
+# stand-ins, which must match the real commands' names and help, fill in for the others in
+# `det --help` and in shell completion of command names.
+command_modules: Dict[str, List[Cmd]] = {
+    "determined.cli.agent": [
+        Cmd("a|gent", None, "manage agents", []),
+        Cmd("s|lot", None, "manage slots", []),
+    ],
+    "determined.cli.checkpoint": [Cmd("c|heckpoint", None, "manage checkpoints", [])],
+    "determined.cli.dev": [Cmd("dev", None, SUPPRESS, [])],
+    "determined.cli.experiment": [Cmd("e|xperiment", None, "manage experiments", [])],
+    "determined.cli.job": [Cmd("j|ob", None, "manage jobs", [])],
+    "determined.cli.master": [Cmd("master", None, "manage master", [])],
+    "determined.cli.model": [Cmd("m|odel", None, "manage models", [])],
+    "determined.cli.notebook": [Cmd("notebook", None, "manage notebooks", [])],
+    "determined.cli.oauth": [Cmd("oauth", None, "manage OAuth", [])],
+    "determined.cli.preview_search": [Cmd("preview-search", None, "preview search", [])],
+    "determined.cli.project": [Cmd("p|roject", None, "manage projects", [])],
+    "determined.cli.rbac": [Cmd("rbac", None, "manage roles based access controls", [])],
+    "determined.cli.remote": [Cmd("command cmd", None, "manage commands", [])],
+    "determined.cli.resource_pool": [Cmd("resource-pool rp", None, "manage resource pools", [])],
+    "determined.cli.resources": [
+        Cmd("res|ources", None, "query historical resource allocation", [])
+    ],
+    "determined.cli.shell": [Cmd("shell", None, "manage shells", [])],
+    "determined.cli.sso": [Cmd("auth", None, "manage auth", [])],
+    "determined.cli.task": [
+        Cmd(
+            "task",
+            None,
+            "manage tasks (commands, experiments, notebooks, shells, tensorboards)",
+            [],
+        )
+    ],
+    "determined.cli.template": [Cmd("template tpl", None, "manage config templates", [])],
+    "determined.cli.tensorboard": [Cmd("tensorboard", None, "manage TensorBoard instances", [])],
+    "determined.cli.trial": [Cmd("t|rial", None, "manage trials", [])],
+    "determined.cli.user": [Cmd("u|ser", None, "manage users", [])],
+    "determined.cli.user_groups": [Cmd("user-group", None, "manage user groups", [])],
+    "determined.cli.version": [Cmd("version", None, "show version information", [])],
+    "determined.cli.workspace": [Cmd("w|orkspace", None, "manage workspaces", [])],
+}
@@ -106,7 +106,12 @@ def describe_trial(args: Namespace) -> None:
             includeBatchMetrics=args.metrics,
         )
 
-    resps = api.read_paginated(get_with_offset, offset=args.offset, pages=args.pages)
+    resps = api.read_paginated(
+        get_with_offset,
+        offset=args.offset,
+        pages=args.pages,
+        concurrency=api.PAGE_CONCURRENCY,
+    )
     workloads = [w for r in resps for w in r.workloads]
 
     if args.json:
@@ -1,9 +1,18 @@
+from typing import TYPE_CHECKING
+
 try:
     from ruamel import yaml
 except ModuleNotFoundError:
     # Inexplicably, sometimes ruamel.yaml is pacakged as ruamel_yaml instead.
     import ruamel_yaml as yaml  # type: ignore
 
+from determined._import import lazy_getattr
 from determined.common import util
-from determined.common import api, check, constants, context, requests, storage
-from determined.common._logging import set_logger
+from determined.common import check, constants
+
+if TYPE_CHECKING:
+    from determined.common import api, context, requests, storage
+    from determined.common._logging import set_logger
+
+# api, context, requests, and storage are imported on first use; see determined/__init__.py.
+__getattr__ = lazy_getattr(__name__, {"set_logger": "determined.common._logging"})
@@ -1,6 +1,7 @@
 from determined.common.api import authentication, errors, metric, request, bindings
 from determined.common.api._session import Session
 from determined.common.api._util import (
+    PAGE_CONCURRENCY,
     PageOpts,
     default_retry,
     get_ntsc_details,
@@ -1,13 +1,26 @@
+import threading
+from http import cookiejar
 from typing import Any, Dict, Optional
 
 import requests
 import urllib3
 
+import determined.common.requests
 from determined.common import util
 from determined.common.api import authentication, certs, request
 
 
 class Session:
+    """
+    A connection to the master, used by every bindings call.
+
+    Each Session keeps a pool of HTTP connections to the master, which are kept alive and reused
+    across calls, so that most calls skip the TCP and TLS handshakes.  A Session may be used from
+    several threads at once; pool_maxsize is the number of connections it keeps open, and should be
+    at least the number of threads making calls concurrently.  pool_connections is the number of
+    hosts it keeps connections to, which only matters when following redirects to other hosts.
+    """
+
     def __init__(
         self,
         master: Optional[str],
@@ -15,12 +28,47 @@ class Session:
         auth: Optional[authentication.Authentication],
         cert: Optional[certs.Cert],
         max_retries: Optional[urllib3.util.retry.Retry] = None,
+        pool_connections: int = requests.adapters.DEFAULT_POOLSIZE,
+        pool_maxsize: int = requests.adapters.DEFAULT_POOLSIZE,
     ) -> None:
         self._master = master or util.get_default_master_address()
         self._user = user
         self._auth = auth
         self._cert = cert
         self._max_retries = max_retries
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        # One requests session per server_hostname, since that is fixed when it is created.
+        self._http_sessions: "Dict[Optional[str], determined.common.requests.Session]" = {}
+        self._http_lock = threading.Lock()
+
+    def _http_session(self) -> "determined.common.requests.Session":
+        # Like request.do_request(), fall back to the cli cert, which may be set after creation.
+        cert = self._cert if self._cert is not None else certs.cli_cert
+        server_hostname = cert.name if cert else None
+        http = self._http_sessions.get(server_hostname)
+        if http is None:
+            with self._http_lock:
+                http = self._http_sessions.get(server_hostname)
+                if http is None:
+                    http = determined.common.requests.Session(
+                        server_hostname,
+                        self._max_retries,
+                        pool_connections=self._pool_connections,
+                        pool_maxsize=self._pool_maxsize,
+                    )
+                    # Keep calls independent of each other, as if each had its own session.
+                    http.cookies.set_policy(cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                    self._http_sessions[server_hostname] = http
+        return http
+
+    def close(self) -> None:
+        """Close the connections kept by this Session.  It may still be used afterwards."""
+        with self._http_lock:
+            http_sessions = list(self._http_sessions.values())
+            self._http_sessions.clear()
+        for http in http_sessions:
+            http.close()
 
     def _do_request(
         self,
@@ -46,6 +94,7 @@ class Session:
             timeout=timeout,
             stream=stream,
             max_retries=self._max_retries,
+            session=self._http_session(),
         )
 
     def get(
@@ -109,4 +158,6 @@ class Session:
             auth=self._auth,
             cert=self._cert,
             max_retries=retry,
+            pool_connections=self._pool_connections,
+            pool_maxsize=self._pool_maxsize,
         )
@@ -1,5 +1,8 @@
+import collections
+import concurrent.futures
 import enum
-from typing import Callable, Iterator, Optional, Tuple, TypeVar, Union
+import itertools
+from typing import Callable, Deque, Generator, Iterator, Optional, Tuple, TypeVar, Union
 
 import urllib3
 
@@ -20,6 +23,11 @@ RETRY_STATUSES = [502, 503, 504]  # Bad Gateway, Service Unavailable, Gateway Ti
 # Default max number of times to retry a request.
 MAX_RETRIES = 5
 
+# The number of pages fetched at once by callers of read_paginated which read every page anyway.
+# This is well under the default pool_maxsize of a Session, so that every request reuses a
+# connection.
+PAGE_CONCURRENCY = 4
+
 
 # Not that read_paginated requires the output of get_with_offset to be a Paginated type to work.
 # The Paginated union type is generated based on response objects with a .pagination attribute.
@@ -34,22 +42,89 @@ WARNING_MESSAGE_MAP = {
 }
 
 
+def _pagination(resp: T) -> Tuple[Optional[int], int, int]:
+    """Return the startIndex, endIndex and total of a page."""
+    pagination = resp.pagination
+    assert pagination is not None
+    assert pagination.endIndex is not None
+    assert pagination.total is not None
+    return pagination.startIndex, pagination.endIndex, pagination.total
+
+
 def read_paginated(
     get_with_offset: Callable[[int], T],
     offset: int = 0,
     pages: PageOpts = PageOpts.all,
+    concurrency: int = 1,
 ) -> Iterator[T]:
+    """
+    Yield the pages of a paginated API, in order, calling get_with_offset with the offset of each.
+
+    By default, each page is only fetched once the previous one has been consumed.  With a
+    concurrency greater than one, once the first page tells how many records there are, the
+    following pages are fetched ahead of the consumer, up to concurrency of them at once.  Pages are
+    still yielded in order, each as soon as it arrives, so that the consumer may process one page
+    while the next ones are in flight.
+    """
     while True:
         resp = get_with_offset(offset)
-        pagination = resp.pagination
-        assert pagination is not None
-        assert pagination.endIndex is not None
-        assert pagination.total is not None
+        start, end, total = _pagination(resp)
         yield resp
-        if pagination.endIndex >= pagination.total or pages == PageOpts.single:
+        if end >= total or pages == PageOpts.single:
             break
-        assert pagination.endIndex is not None
-        offset = pagination.endIndex
+        offset = end
+        if concurrency > 1 and start is not None and end > start:
+            next_offset = yield from _read_ahead(
+                get_with_offset, end, end - start, total, concurrency
+            )
+            if next_offset is None:
+                break
+            offset = next_offset
+
+
+def _read_ahead(
+    get_with_offset: Callable[[int], T],
+    offset: int,
+    page_size: int,
+    total: int,
+    concurrency: int,
+) -> Generator[T, None, Optional[int]]:
+    """
+    Yield the pages from offset up to total, fetching up to concurrency pages at once, and return
+    None once the last page has been yielded.
+
+    Records may be added or removed while they are read, in which case some page will not be the
+    one expected.  Every page up to and including that one is still the page that reading one page
+    at a time would have fetched, so it is yielded, the rest are discarded, and the offset to
+    continue reading from is returned.
+    """
+    offsets = iter(range(offset, total, page_size))
+    with concurrent.futures.ThreadPoolExecutor(
+        concurrency, thread_name_prefix="read-paginated"
+    ) as pool:
+        window: Deque[Tuple[int, "concurrent.futures.Future[T]"]] = collections.deque(
+            (o, pool.submit(get_with_offset, o)) for o in itertools.islice(offsets, concurrency)
+        )
+        try:
+            while window:
+                expected_start, future = window.popleft()
+                resp = future.result()
+                start, end, resp_total = _pagination(resp)
+                yield resp
+                if end >= resp_total:
+                    return None
+                if (
+                    resp_total != total
+                    or start != expected_start
+                    or end != expected_start + page_size
+                ):
+                    return end
+                for o in itertools.islice(offsets, 1):
+                    window.append((o, pool.submit(get_with_offset, o)))
+        finally:
+            for _, future in window:
+                future.cancel()
+    return None
 
 
 def default_retry(max_retries: int = MAX_RETRIES) -> urllib3.util.retry.Retry:
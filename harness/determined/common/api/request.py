@@ -98,7 +98,13 @@ def do_request(
     stream: bool = False,
     timeout: Optional[Union[Tuple, float]] = None,
     max_retries: Optional[urllib3.util.retry.Retry] = None,
+    session: "Optional[determined.common.requests.Session]" = None,
 ) -> requests.Response:
+    """
+    Send a request to the master.  If session is provided, it is used to make the request, and it
+    must have been created with the server_hostname and max_retries implied by cert and
+    max_retries.  Otherwise, the request is made through a new Session.
+    """
     if headers is None:
         h: Dict[str, str] = {}
     else:
@@ -151,6 +157,7 @@ def do_request(
             timeout=timeout,
             server_hostname=cert.name if cert else None,
             max_retries=max_retries,
+            session=session,
         )
     except requests.exceptions.SSLError:
         raise
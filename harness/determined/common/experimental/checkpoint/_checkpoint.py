@@ -13,6 +13,7 @@ from determined import errors
 from determined.common import api, constants, storage
 from determined.common.api import bindings
 from determined.common.experimental import metrics
+from determined.common.experimental.checkpoint import _master_download
 from determined.common.storage import shared
 
 logger = logging.getLogger("determined.client")
@@ -238,7 +239,7 @@ class Checkpoint:
                 self._download_direct(checkpoint_storage, local_ckpt_dir)
 
             elif mode == DownloadMode.MASTER:
-                self._download_via_master(self._session, self.uuid, local_ckpt_dir)
+                self._download_files_via_master(local_ckpt_dir)
 
             elif mode == DownloadMode.AUTO:
                 self._download_auto(checkpoint_storage, local_ckpt_dir)
@@ -269,7 +270,7 @@ class Checkpoint:
 
             logger.info("Unable to download directly, proxying download through master")
             try:
-                self._download_via_master(self._session, self.uuid, local_ckpt_dir)
+                self._download_files_via_master(local_ckpt_dir)
             except Exception as e:
                 raise errors.MultipleDownloadsFailed(
                     "Auto checkpoint download mode was enabled. "
@@ -323,7 +324,46 @@ class Checkpoint:
                     ", {} found instead".format(checkpoint_storage["type"])
                 )
 
-            manager.download(self.uuid, str(local_ckpt_dir))
+            # Wrapping is harmless for regular checkpoints, and needed for content-addressed ones.
+            storage.ContentAddressedStorageManager(manager).download(self.uuid, str(local_ckpt_dir))
+
+    def _download_files_via_master(self, local_ckpt_dir: pathlib.Path) -> None:
+        """
+        Downloads a checkpoint through the master one file at a time, several at once, resuming
+        any earlier download which was interrupted.  Falls back to downloading the checkpoint as a
+        single archive if the master does not serve single files, or for checkpoints without
+        recorded resources.
+
+        Content-addressed checkpoints cannot be downloaded through the master, which only sees
+        their manifests, not the blobs holding their files.
+        """
+        if self.training is not None:
+            checkpoint_storage = self.training.experiment_config.get("checkpoint_storage") or {}
+            if checkpoint_storage.get("content_addressed"):
+                raise self._content_addressed_error()
+        if self.resources:
+            try:
+                _master_download.download(self._session, self.uuid, self.resources, local_ckpt_dir)
+                return
+            except api.errors.NotFoundException as e:
+                # Older masters do not serve single files, and content-addressed checkpoints are
+                # not stored by file path.
+                logger.info(f"Unable to download single checkpoint files ({e}), downloading all")
+                _master_download.remove_partial(self.resources, local_ckpt_dir)
+        self._download_via_master(self._session, self.uuid, local_ckpt_dir)
+        # Content-addressed checkpoints written with a checkpoint_storage passed to core.init()
+        # are only recognizable by their manifests.
+        manifest_dir = local_ckpt_dir.joinpath(storage.content_addressed.MANIFEST_DIR)
+        if manifest_dir.exists():
+            shutil.rmtree(manifest_dir, ignore_errors=True)
+            raise self._content_addressed_error()
+
+    def _content_addressed_error(self) -> errors.ProxiedDownloadFailed:
+        return errors.ProxiedDownloadFailed(
+            f"checkpoint {self.uuid} is stored content-addressed, and cannot be downloaded through "
+            "the master; download it with mode=DownloadMode.DIRECT from a machine with access to "
+            "checkpoint storage"
+        )
 
     @staticmethod
     def _download_via_master(sess: api.Session, uuid: str, local_ckpt_dir: pathlib.Path) -> None:
@@ -0,0 +1,247 @@
+import concurrent.futures
+import logging
+import os
+import pathlib
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import requests
+
+from determined import errors
+from determined.common import api
+from determined.common.storage import cloud
+
+logger = logging.getLogger("determined.client")
+
+# The number of files, or parts of large files, downloaded through the master at once.  This is
+# under the default pool_maxsize of an api.Session, so that every request reuses a connection.
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 3
+
+# The bytes read from a response at once.  If the connection drops, the bytes of the last read are
+# lost, and downloaded again.
+CHUNK_SIZE = 1024 * 1024
+
+# Files are downloaded to a .partial file, renamed once complete.  Large files are downloaded in
+# parts, the start of each part being appended to a .parts file once the part is written.
+PARTIAL_SUFFIX = ".partial"
+PARTS_SUFFIX = ".parts"
+
+# Checkpoint.download() skips downloading to a directory with one of these files, so they are
+# downloaded after every other file.
+MARKER_FILES = ("metadata.json", "MLmodel")
+
+# A file to download and, for large files, the byte range [start, end) of one part of it.
+Job = Tuple[str, Optional[Tuple[int, int]]]
+
+
+def _is_retryable(e: Exception) -> bool:
+    return not isinstance(
+        e,
+        (
+            api.errors.NotFoundException,
+            api.errors.ForbiddenException,
+            api.errors.UnauthenticatedException,
+        ),
+    )
+
+
+class _Download:
+    def __init__(
+        self,
+        sess: api.Session,
+        uuid: str,
+        sizes: Dict[str, int],
+        dst: pathlib.Path,
+        part_size: int,
+        multipart_threshold: int,
+    ) -> None:
+        self._sess = sess
+        self._uuid = uuid
+        self._sizes = sizes
+        self._dst = dst
+        self._part_size = part_size
+        self._multipart_threshold = multipart_threshold
+        self._lock = threading.Lock()
+        # The parts of each large file which are still to be downloaded.
+        self._pending_parts: Dict[str, Set[int]] = {}
+
+    def _path(self, name: str, suffix: str = "") -> pathlib.Path:
+        return self._dst.joinpath(name + suffix)
+
+    def plan(self, names: List[str]) -> List[Job]:
+        """Return the jobs left to download the files, resuming any partial downloads."""
+        jobs: List[Job] = []
+        for name in names:
+            size = self._sizes[name]
+            path = self._path(name)
+            if path.exists() and path.stat().st_size == size:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if size < self._multipart_threshold or self._part_size <= 0:
+                jobs.append((name, None))
+                continue
+
+            partial = self._path(name, PARTIAL_SUFFIX)
+            parts = self._path(name, PARTS_SUFFIX)
+            done: Set[int] = set()
+            if partial.exists() and partial.stat().st_size == size and parts.exists():
+                done = {int(line) for line in parts.read_text().split()}
+            else:
+                with partial.open("wb") as f:
+                    f.truncate(size)
+                parts.write_text("")
+            pending = set(range(0, size, self._part_size)) - done
+            self._pending_parts[name] = pending
+            if not pending:
+                self._finish(name)
+            for start in sorted(pending):
+                jobs.append((name, (start, min(start + self._part_size, size))))
+        return jobs
+
+    def _get(self, name: str, start: int, end: Optional[int]) -> requests.Response:
+        headers = {}
+        if start > 0 or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end - 1}"
+        return self._sess.get(
+            f"/checkpoints/{self._uuid}/file",
+            params={"path": name},
+            headers=headers,
+            stream=True,
+        )
+
+    def _finish(self, name: str) -> None:
+        partial = self._path(name, PARTIAL_SUFFIX)
+        size = partial.stat().st_size
+        if size != self._sizes[name]:
+            raise errors.ProxiedDownloadFailed(
+                f"downloaded {size} bytes of {name}, but the checkpoint records {self._sizes[name]}"
+            )
+        partial.replace(self._path(name))
+        parts = self._path(name, PARTS_SUFFIX)
+        if parts.exists():
+            parts.unlink()
+
+    def download(self, job: Job) -> None:
+        name, byte_range = job
+        if byte_range is None:
+            self._download_file(name)
+        else:
+            self._download_part(name, *byte_range)
+
+    def _download_file(self, name: str) -> None:
+        partial = self._path(name, PARTIAL_SUFFIX)
+        size = self._sizes[name]
+        # Resume a partial download, unless it is somehow longer than the file.
+        start = partial.stat().st_size if partial.exists() else 0
+        if start > size:
+            start = 0
+        if start < size:
+            resp = self._get(name, start, None)
+            with resp, partial.open("r+b" if start else "wb") as f:
+                if resp.status_code != 206:
+                    # The whole file was sent.
+                    f.truncate(0)
+                f.seek(0, os.SEEK_END)
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+        elif not partial.exists():
+            partial.touch()
+        self._finish(name)
+
+    def _download_part(self, name: str, start: int, end: int) -> None:
+        resp = self._get(name, start, end)
+        with resp, self._path(name, PARTIAL_SUFFIX).open("r+b") as f:
+            if resp.status_code != 206:
+                raise errors.ProxiedDownloadFailed(
+                    f"expected bytes {start}-{end - 1} of {name}, got status {resp.status_code}"
+                )
+            f.seek(start)
+            for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+            if f.tell() != end:
+                raise IOError(f"downloaded {f.tell() - start} bytes of a {end - start}-byte part")
+        with self._lock:
+            with self._path(name, PARTS_SUFFIX).open("a") as parts:
+                parts.write(f"{start}\n")
+            pending = self._pending_parts[name]
+            pending.discard(start)
+            if not pending:
+                self._finish(name)
+
+
+def _run(download: _Download, jobs: List[Job], concurrency: int, retries: int) -> None:
+    """Run the jobs concurrently, retrying each, and stop starting new ones after a failure."""
+    failed = threading.Event()
+
+    def with_retries(job: Job) -> None:
+        attempt = 0
+        while not failed.is_set():
+            try:
+                download.download(job)
+                return
+            except Exception as e:
+                attempt += 1
+                if attempt > retries or not _is_retryable(e):
+                    failed.set()
+                    raise
+                delay = min(0.5 * 2 ** (attempt - 1), 8.0)
+                logger.debug(f"failed to download {job} ({e}), retrying in {delay}s")
+                time.sleep(delay)
+
+    first_failure: Optional[BaseException] = None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(with_retries, job) for job in jobs]
+        for future in concurrent.futures.as_completed(futures):
+            e = future.exception()
+            if e is not None and first_failure is None:
+                first_failure = e
+    if first_failure is not None:
+        raise first_failure
+
+
+def download(
+    sess: api.Session,
+    uuid: str,
+    resources: Dict[str, str],
+    dst: pathlib.Path,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    retries: int = DEFAULT_RETRIES,
+    part_size: int = cloud.DEFAULT_PART_SIZE,
+    multipart_threshold: int = cloud.DEFAULT_MULTIPART_THRESHOLD,
+) -> None:
+    """
+    Download the files of a checkpoint through the master, one request per file or per part of a
+    large file, several at once.
+
+    resources maps the path of each file in the checkpoint to its size, as recorded by the master;
+    directories end with "/".  A download which was interrupted is resumed: complete files are
+    skipped, partial files are continued from where they stopped, and only the missing parts of
+    large files are downloaded.  Every file is checked against its recorded size.
+    """
+    sizes: Dict[str, int] = {}
+    for name, size in resources.items():
+        # Keep every file within dst.
+        if os.path.isabs(name) or ".." in pathlib.PurePosixPath(name).parts:
+            raise errors.ProxiedDownloadFailed(f"invalid path in checkpoint resources: {name}")
+        if name.endswith("/"):
+            dst.joinpath(name).mkdir(parents=True, exist_ok=True)
+        else:
+            sizes[name] = int(size)
+    dst.mkdir(parents=True, exist_ok=True)
+
+    d = _Download(sess, uuid, sizes, dst, part_size, multipart_threshold)
+    markers = [name for name in sorted(sizes) if name in MARKER_FILES]
+    others = [name for name in sorted(sizes) if name not in MARKER_FILES]
+    for names in (others, markers):
+        _run(d, d.plan(names), concurrency, retries)
+
+
+def remove_partial(resources: Dict[str, str], dst: pathlib.Path) -> None:
+    """Remove the partial downloads of the files of a checkpoint, if any."""
+    for name in resources:
+        for suffix in (PARTIAL_SUFFIX, PARTS_SUFFIX):
+            path = dst.joinpath(name + suffix)
+            if path.is_file():
+                path.unlink()
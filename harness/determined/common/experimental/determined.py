@@ -129,7 +129,7 @@ class Determined:
                 offset=offset,
             )
 
-        resps = api.read_paginated(get_with_offset)
+        resps = api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
 
         users = []
         for r in resps:
@@ -251,7 +251,8 @@ class Determined:
             )
 
         bindings_exps: Iterable[bindings.v1Experiment] = itertools.chain.from_iterable(
-            r.experiments for r in api.read_paginated(get_with_offset)
+            r.experiments
+            for r in api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
         )
         return [experiment.Experiment._from_bindings(b, self._session) for b in bindings_exps]
 
@@ -283,7 +284,8 @@ class Determined:
             return bindings.get_GetWorkspaces(self._session, offset=offset)
 
         iter_workspaces = itertools.chain.from_iterable(
-            r.workspaces for r in api.read_paginated(get_with_offset)
+            r.workspaces
+            for r in api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
         )
         return [workspace.Workspace._from_bindings(w, self._session) for w in iter_workspaces]
 
@@ -464,7 +466,7 @@ class Determined:
             )
 
         bindings_models: Iterable[bindings.v1Model] = itertools.chain.from_iterable(
-            r.models for r in api.read_paginated(get_with_offset)
+            r.models for r in api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
         )
 
         return [model.Model._from_bindings(m, self._session) for m in bindings_models]
@@ -503,6 +503,7 @@ class Experiment:
         resps = api.read_paginated(
             get_with_offset=get_with_offset,
             pages=api.PageOpts.single if max_results else api.PageOpts.all,
+            concurrency=api.PAGE_CONCURRENCY,
         )
 
         return [
@@ -553,7 +554,7 @@ class Experiment:
                 states=[bindings.checkpointv1State.COMPLETED],
             )
 
-        resps = api.read_paginated(get_with_offset)
+        resps = api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
 
         checkpoints = [
             checkpoint.Checkpoint._from_bindings(c, self._session)
@@ -295,7 +295,8 @@ class Model:
             )
 
         bindings_models: Iterable[bindings.v1ModelVersion] = itertools.chain.from_iterable(
-            r.modelVersions for r in api.read_paginated(get_with_offset)
+            r.modelVersions
+            for r in api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
         )
         return [ModelVersion._from_bindings(m, self._session) for m in bindings_models]
 
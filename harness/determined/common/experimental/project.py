@@ -78,7 +78,8 @@ class Project:
             )
 
         exp_bindings = itertools.chain.from_iterable(
-            r.experiments for r in api.read_paginated(get_with_offset)
+            r.experiments
+            for r in api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
         )
         return [experiment.Experiment._from_bindings(exp, self._session) for exp in exp_bindings]
 
@@ -79,7 +79,7 @@ class ResourcePool:
                 resourcePoolName=self.name,
             )
 
-        resps = api.read_paginated(get_with_offset)
+        resps = api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
         workspace_names = [
             workspace.Workspace(session=self._session, workspace_id=w).name
             for r in resps
@@ -247,6 +247,7 @@ class Trial:
         resps = api.read_paginated(
             get_with_offset=get_trial_checkpoints,
             pages=api.PageOpts.single if max_results else api.PageOpts.all,
+            concurrency=api.PAGE_CONCURRENCY,
         )
 
         return [
@@ -408,7 +409,7 @@ class Trial:
                 offset=offset,
             )
 
-        resps = api.read_paginated(get_trial_checkpoints)
+        resps = api.read_paginated(get_trial_checkpoints, concurrency=api.PAGE_CONCURRENCY)
 
         checkpoints = [
             checkpoint.Checkpoint._from_bindings(c, self._session)
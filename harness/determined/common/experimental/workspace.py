@@ -72,7 +72,7 @@ class Workspace:
                 workspaceId=self.id,
             )
 
-        resps = api.read_paginated(get_with_offset)
+        resps = api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
         resource_pool_names = [
             rp for r in resps if r.resourcePools is not None for rp in r.resourcePools
         ]
@@ -138,7 +138,8 @@ class Workspace:
             )
 
         bindings_projects: Iterable[bindings.v1Project] = itertools.chain.from_iterable(
-            r.projects for r in api.read_paginated(get_with_offset)
+            r.projects
+            for r in api.read_paginated(get_with_offset, concurrency=api.PAGE_CONCURRENCY)
         )
 
         return [project.Project._from_bindings(p, self._session) for p in bindings_projects]
@@ -1,5 +1,6 @@
 """
-A drop-in replacement for requests.request() which supports server name overriding.
+A drop-in replacement for requests.request() which supports server name overriding and reusing a
+persistent Session.
 """
 from typing import Any, Optional
 
@@ -22,21 +23,53 @@ class HTTPAdapter(requests.adapters.HTTPAdapter):
 
 
 class Session(requests.sessions.Session):
+    """
+    A requests.Session with HTTPAdapters for server name overriding and retries.
+
+    Connections are kept alive and reused by later requests through the same Session.
+    pool_connections is the number of hosts to keep connections to, and pool_maxsize is the number
+    of connections to keep to each host, which bounds how many threads can make requests through the
+    Session concurrently without opening throwaway connections.
+    """
+
     def __init__(
-        self, server_hostname: Optional[str], max_retries: Optional[urllib3.util.retry.Retry]
+        self,
+        server_hostname: Optional[str],
+        max_retries: Optional[urllib3.util.retry.Retry],
+        pool_connections: int = requests.adapters.DEFAULT_POOLSIZE,
+        pool_maxsize: int = requests.adapters.DEFAULT_POOLSIZE,
     ) -> None:
         super().__init__()
-        if max_retries is None:
-            # Override the https adapter.
-            self.mount("https://", HTTPAdapter(server_hostname))
-        else:
-            self.mount("https://", HTTPAdapter(server_hostname, max_retries=max_retries))
-            self.mount("http://", requests.adapters.HTTPAdapter(max_retries=max_retries))
+        # requests.adapters.HTTPAdapter's default max_retries is 0.
+        retries = 0 if max_retries is None else max_retries
+        self.mount(
+            "https://",
+            HTTPAdapter(
+                server_hostname,
+                max_retries=retries,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+            ),
+        )
+        self.mount(
+            "http://",
+            requests.adapters.HTTPAdapter(
+                max_retries=retries, pool_connections=pool_connections, pool_maxsize=pool_maxsize
+            ),
+        )
 
 
-def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+def request(
+    method: str, url: str, session: Optional[Session] = None, **kwargs: Any
+) -> requests.Response:
+    """
+    Make a request through session, or through a new Session if session is None.  The
+    server_hostname and max_retries kwargs are only used for a new Session.
+    """
     server_hostname = kwargs.pop("server_hostname", None)
     max_retries = kwargs.pop("max_retries", None)
+    if session is not None:
+        return session.request(method=method, url=url, **kwargs)
     with Session(server_hostname, max_retries) as session:
         out = session.request(method=method, url=url, **kwargs)  # type: requests.Response
         return out
@@ -3,15 +3,19 @@ import uuid
 from typing import Any, Dict, Optional, Type
 
 from determined.common.storage.base import StorageManager, Paths, Selector, from_string
-from determined.common.storage.cloud import CloudStorageManager
+from determined.common.storage.cloud import ByteRange, CloudStorageManager
 from determined.common.storage.azure import AzureStorageManager
 from determined.common.storage.gcs import GCSStorageManager
 from determined.common.storage.s3 import S3StorageManager
 from determined.common.storage.shared import SharedFSStorageManager
 from determined.common.storage.directory import DirectoryStorageManager
+from determined.common.storage.content_addressed import ContentAddressedStorageManager
+from determined.common.storage.cached import CachedStorageManager
 
 __all__ = [
     "AzureStorageManager",
+    "CachedStorageManager",
+    "ContentAddressedStorageManager",
     "DirectoryStorageManager",
     "GCSStorageManager",
     "S3StorageManager",
@@ -34,6 +38,9 @@ def build(config: Dict[str, Any], container_path: Optional[str]) -> StorageManag
     Return a checkpoint manager defined by the value of the `type` key in
     the configuration dictionary. Throws a `TypeError` if no storage manager
     with `type` is defined.
+
+    If the optional `content_addressed` key is true, the storage manager is wrapped in a
+    `ContentAddressedStorageManager`, which stores each unique file only once across checkpoints.
     """
     if "type" not in config:
         raise ValueError("Missing 'type' parameter of storage configuration")
@@ -56,6 +63,7 @@ def build(config: Dict[str, Any], container_path: Optional[str]) -> StorageManag
     config.pop("save_experiment_best", None)
     config.pop("save_trial_best", None)
     config.pop("save_trial_latest", None)
+    content_addressed = config.pop("content_addressed", False)
 
     # For shared_fs maintain backwards compatibility by folding old keys into
     # storage_path.
@@ -77,12 +85,16 @@ def build(config: Dict[str, Any], container_path: Optional[str]) -> StorageManag
     config.pop("checkpoint_path", None)
 
     try:
-        return subclass.from_config(config, container_path)
+        manager = subclass.from_config(config, container_path)
     except TypeError as e:
         raise TypeError(
             "Failed to instantiate {} checkpoint storage: {}".format(identifier, str(e))
         )
 
+    if content_addressed:
+        return ContentAddressedStorageManager(manager)
+    return manager
+
 
 def validate_manager(manager: StorageManager) -> None:
     """
@@ -1,7 +1,7 @@
 import logging
 import os
 import tempfile
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 from determined import errors
 from determined.common import storage, util
@@ -36,6 +36,17 @@ class AzureStorageManager(storage.CloudStorageManager):
         )
         self.container = container if not container.endswith("/") else container[:-1]
 
+    def _is_retryable(self, e: Exception) -> bool:
+        import azure.core.exceptions
+
+        return not isinstance(
+            e,
+            (
+                azure.core.exceptions.ClientAuthenticationError,
+                azure.core.exceptions.ResourceNotFoundError,
+            ),
+        )
+
     @util.preserve_random_state
     def upload(
         self, src: Union[str, os.PathLike], dst: str, paths: Optional[storage.Paths] = None
@@ -43,7 +54,8 @@ class AzureStorageManager(storage.CloudStorageManager):
         src = os.fspath(src)
         logger.info(f"Uploading to Azure Blob Storage: {dst}")
         upload_paths = paths if paths is not None else self._list_directory(src)
-        for rel_path in sorted(upload_paths):
+
+        def upload_one(rel_path: str) -> None:
             # Use posixpath so that we always use forward slashes, even on Windows.
             container_blob = posixpath.join(self.container, dst, rel_path)
 
@@ -59,6 +71,8 @@ class AzureStorageManager(storage.CloudStorageManager):
 
             self.client.put(blob_dir, blob_base, abs_path)
 
+        self._transfer("upload", upload_one, sorted(upload_paths))
+
     @util.preserve_random_state
     def download(
         self,
@@ -69,26 +83,40 @@ class AzureStorageManager(storage.CloudStorageManager):
         dst = os.fspath(dst)
         logger.info(f"Downloading {src} from Azure Blob Storage")
         found = False
-        for blob in self.client.list_files(self.container, file_prefix=src):
-            found = True
-            relname = os.path.relpath(blob, src)
-            if blob.endswith("/"):
-                relname = os.path.join(relname, "")
-            if selector is not None and not selector(relname):
-                continue
-            _dst = os.path.join(dst, relname)
-            dst_dir = os.path.dirname(_dst)
-            os.makedirs(dst_dir, exist_ok=True)
-
-            # Only create empty directory for keys that end with "/".
-            if blob.endswith("/"):
-                os.makedirs(_dst, exist_ok=True)
-                continue
 
+        def list_files() -> Iterator[Tuple[str, str, storage.ByteRange]]:
+            nonlocal found
+            for blob, size in self.client.list_files(self.container, file_prefix=src).items():
+                found = True
+                relname = os.path.relpath(blob, src)
+                if blob.endswith("/"):
+                    relname = os.path.join(relname, "")
+                if selector is not None and not selector(relname):
+                    continue
+                _dst = os.path.join(dst, relname)
+                dst_dir = os.path.dirname(_dst)
+                os.makedirs(dst_dir, exist_ok=True)
+
+                # Only create empty directory for keys that end with "/".
+                if blob.endswith("/"):
+                    os.makedirs(_dst, exist_ok=True)
+                    continue
+
+                for byte_range in self._download_parts(size, _dst):
+                    yield blob, _dst, byte_range
+
+        def download_one(item: Tuple[str, str, storage.ByteRange]) -> None:
+            blob, _dst, byte_range = item
             # Use posixpath so that we always use forward slashes, even on Windows.
             container_blob = posixpath.join(self.container, blob)
             blob_dir, blob_base = posixpath.split(container_blob)
-            self.client.get(blob_dir, blob_base, _dst)
+            if byte_range is None:
+                self.client.get(blob_dir, blob_base, _dst)
+                return
+            with self._open_part(_dst, byte_range) as f:
+                self.client.get_range(blob_dir, blob_base, f, *byte_range)
+
+        self._transfer("download", download_one, list_files())
 
         if not found:
             raise errors.CheckpointNotFound(f"Did not find checkpoint {src} in Azure Blob Storage")
@@ -108,6 +136,8 @@ class AzureStorageManager(storage.CloudStorageManager):
                     resources[obj.replace(f"{storage_prefix}/", "")] = objects[obj]
                     del objects[obj]
 
-        self.client.delete_files(self.container, list(objects))
+        self._transfer(
+            "delete", lambda blob: self.client.delete(self.container, blob), list(objects)
+        )
 
         return resources
@@ -1,6 +1,6 @@
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import BinaryIO, Dict, List, Optional, Union
 
 from determined.common import util
 
@@ -64,11 +64,26 @@ class AzureStorageClient(object):
             stream = self.client.get_blob_client(container_name, blob_name).download_blob()
             stream.readinto(file)
 
+    @util.preserve_random_state
+    def get_range(
+        self, container_name: str, blob_name: str, file: BinaryIO, start: int, end: int
+    ) -> None:
+        """Download bytes [start, end) of the specified blob to an open file."""
+        stream = self.client.get_blob_client(container_name, blob_name).download_blob(
+            offset=start, length=end - start
+        )
+        stream.readinto(file)
+
+    @util.preserve_random_state
+    def delete(self, container_name: str, blob_name: str) -> None:
+        """Delete the specified blob in the specified container."""
+        self.client.get_blob_client(container_name, blob_name).delete_blob()
+
     @util.preserve_random_state
     def delete_files(self, container_name: str, files: List[str]) -> None:
         """Deletes the specified files from the specified container."""
         for file in files:
-            self.client.get_blob_client(container_name, file).delete_blob()
+            self.delete(container_name, file)
 
     @util.preserve_random_state
     def list_files(
@@ -0,0 +1,328 @@
+import contextlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+from typing import IO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from determined import util
+from determined.common import storage
+
+logger = logging.getLogger("determined.common.storage.cached")
+
+# Layout of the cache directory.  Each cached checkpoint is a directory named by its storage_id,
+# containing the checkpoint's files and a record of their sizes.  Entries are built in the temp
+# directory and renamed into place, so a directory with a record is always a complete entry.
+_FILES_DIR = "files"
+_RECORD_FILE = "record.json"
+_TEMP_DIR = ".tmp"
+_LOCK_FILE = ".lock"
+
+DEFAULT_CACHE_SIZE = 20 * 1024**3
+
+# Returns the resources (file sizes) recorded by the master for a checkpoint, if known.
+ResourcesGetter = Callable[[str], Optional[Dict[str, int]]]
+
+
+def _file_sizes(resources: Dict[str, int]) -> Dict[str, int]:
+    """Drop directories from a resources dict; they have no size to check."""
+    return {k: v for k, v in resources.items() if not k.endswith("/")}
+
+
+class CachedStorageManager(storage.StorageManager):
+    """
+    Wrap another StorageManager with a node-local cache of checkpoints, bounded to max_size bytes.
+
+    Checkpoints are added to the cache when they are downloaded in full, and when they are written
+    with store_path(), so that a trial which is paused and resumed on the same node, or a trial
+    which warm-starts from a checkpoint already used on that node, reads it from local disk.  When
+    the cache is full, the least recently used checkpoints are evicted.
+
+    Before a cached checkpoint is used, the sizes of its files are checked against the sizes
+    recorded when it was cached, and, if get_resources is provided, against the resources recorded
+    by the master.  Checkpoints written with store_path() are only used once they have been checked
+    against the master's resources, since a sharded checkpoint is written in parts by several nodes.
+
+    The cache directory may be shared by every process on a node.  Processes coordinate with file
+    locks, and a checkpoint is never evicted while it is in use by restore_path().  Paths yielded by
+    restore_path() point into the cache, so they must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        inner: storage.StorageManager,
+        cache_dir: str,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        get_resources: Optional[ResourcesGetter] = None,
+    ) -> None:
+        super().__init__(cache_dir)
+        self._inner = inner
+        self._max_size = max_size
+        self._get_resources = get_resources
+
+    def _entry_dir(self, storage_id: str) -> str:
+        return os.path.join(self._base_path, storage_id)
+
+    def _mkdtemp(self) -> str:
+        temp_dir = os.path.join(self._base_path, _TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        return tempfile.mkdtemp(dir=temp_dir)
+
+    @contextlib.contextmanager
+    def _cache_lock(self) -> Iterator[None]:
+        """Serialize changes to the set of entries, across every process sharing the cache."""
+        import fcntl
+
+        os.makedirs(self._base_path, exist_ok=True)
+        with open(os.path.join(self._base_path, _LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _expected_resources(self, storage_id: str) -> Optional[Dict[str, int]]:
+        if self._get_resources is None:
+            return None
+        resources = self._get_resources(storage_id)
+        return None if resources is None else _file_sizes(resources)
+
+    def _pin(self, storage_id: str, expected: Optional[Dict[str, int]]) -> Optional[IO]:
+        """
+        Find a valid entry for storage_id, and hold a shared lock on it so that it is not evicted
+        until the returned file is closed.  Invalid entries are removed.
+        """
+        import fcntl
+
+        record_path = os.path.join(self._entry_dir(storage_id), _RECORD_FILE)
+        # Take the shared lock under the cache lock, so the entry cannot be evicted in between.
+        with self._cache_lock():
+            try:
+                f = open(record_path)
+            except FileNotFoundError:
+                return None
+            fcntl.flock(f, fcntl.LOCK_SH)
+
+        try:
+            record = json.load(f)
+            files_dir = os.path.join(self._entry_dir(storage_id), _FILES_DIR)
+            actual = _file_sizes(self._list_directory(files_dir))
+            if actual != record["resources"]:
+                reason = "files were modified"
+            elif expected is not None and actual != expected:
+                reason = "files do not match the checkpoint's recorded resources"
+            elif expected is None and not record["complete"]:
+                reason = "checkpoint was stored by this node and cannot be checked"
+            else:
+                # Mark the entry as recently used.
+                os.utime(record_path)
+                return f
+        except Exception:
+            f.close()
+            raise
+
+        f.close()
+        logger.info(f"Not using cached checkpoint {storage_id}: {reason}")
+        with self._cache_lock():
+            self._remove(storage_id)
+        return None
+
+    def _remove(self, storage_id: str) -> bool:
+        """Remove an entry, unless it is in use.  Call with the cache lock held."""
+        import fcntl
+
+        entry_dir = self._entry_dir(storage_id)
+        try:
+            f = open(os.path.join(entry_dir, _RECORD_FILE))
+        except FileNotFoundError:
+            return True
+        with f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            # Move the entry out of the way first, so it disappears all at once.
+            trash = self._mkdtemp()
+            os.rename(entry_dir, os.path.join(trash, storage_id))
+        util.rmtree_nfs_safe(trash, ignore_errors=True)
+        return True
+
+    def _entries(self) -> List[Tuple[float, str, int]]:
+        """Return (last use, storage_id, size) for every entry.  Call with the cache lock held."""
+        out = []
+        for name in os.listdir(self._base_path):
+            record_path = os.path.join(self._base_path, name, _RECORD_FILE)
+            try:
+                with open(record_path) as f:
+                    size = sum(json.load(f)["resources"].values())
+                out.append((os.path.getmtime(record_path), name, size))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        return out
+
+    def _commit(self, storage_id: str, temp: str, complete: bool) -> bool:
+        """
+        Turn a temp directory containing checkpoint files into the cache entry for storage_id,
+        evicting least recently used entries to make room.  Returns False if there was no room; the
+        temp directory is left for the caller to clean up.
+        """
+        resources = _file_sizes(self._list_directory(os.path.join(temp, _FILES_DIR)))
+        size = sum(resources.values())
+        if size > self._max_size:
+            logger.info(
+                f"Not caching checkpoint {storage_id}: its {size} bytes exceed the cache size of "
+                f"{self._max_size} bytes"
+            )
+            return False
+
+        with open(os.path.join(temp, _RECORD_FILE), "w") as f:
+            json.dump({"resources": resources, "complete": complete}, f)
+
+        with self._cache_lock():
+            if not self._remove(storage_id):
+                # Someone is using the existing entry; leave it alone.
+                return False
+            used = 0
+            for last_use, other_id, other_size in sorted(self._entries(), reverse=True):
+                if used + other_size + size <= self._max_size or not self._remove(other_id):
+                    used += other_size
+                else:
+                    logger.debug(f"Evicted checkpoint {other_id} from the cache")
+            if used + size > self._max_size:
+                logger.info(f"Not caching checkpoint {storage_id}: the cache is full")
+                return False
+            os.rename(temp, self._entry_dir(storage_id))
+        return True
+
+    @contextlib.contextmanager
+    def _cached(self, storage_id: str, fill: bool) -> Iterator[Optional[str]]:
+        """
+        Yield the files directory of a valid cache entry for storage_id, or None if there is none.
+
+        With fill=True, a missing checkpoint is downloaded in full first.  If it does not fit in the
+        cache, the downloaded files are still yielded, and deleted afterwards.
+        """
+        if "/" in storage_id or storage_id.startswith("."):
+            # Not a checkpoint's storage_id.
+            yield None
+            return
+
+        expected = self._expected_resources(storage_id)
+        pin = self._pin(storage_id, expected)
+        if pin is not None:
+            logger.info(f"Using cached checkpoint {storage_id}")
+            with pin:
+                yield os.path.join(self._entry_dir(storage_id), _FILES_DIR)
+            return
+
+        if not fill or (expected is not None and sum(expected.values()) > self._max_size):
+            yield None
+            return
+
+        temp = self._mkdtemp()
+        try:
+            self._inner.download(storage_id, os.path.join(temp, _FILES_DIR))
+            downloaded = _file_sizes(self._list_directory(os.path.join(temp, _FILES_DIR)))
+            if expected is not None and downloaded != expected:
+                logger.warning(
+                    f"Downloaded checkpoint {storage_id} does not match its recorded resources; "
+                    "not caching it"
+                )
+            elif self._commit(storage_id, temp, complete=True):
+                pin = self._pin(storage_id, None)
+                if pin is None:
+                    # Another process evicted it already; the caller must download it directly.
+                    yield None
+                    return
+                with pin:
+                    yield os.path.join(self._entry_dir(storage_id), _FILES_DIR)
+                return
+            yield os.path.join(temp, _FILES_DIR)
+        finally:
+            util.rmtree_nfs_safe(temp, ignore_errors=True)
+
+    @staticmethod
+    def _copy_selected(src: str, dst: str, selector: Optional[storage.Selector]) -> None:
+        for path in sorted(CachedStorageManager._list_directory(src)):
+            if selector is not None and not selector(path):
+                continue
+            if path.endswith("/"):
+                os.makedirs(os.path.join(dst, path), exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(os.path.join(dst, path)), exist_ok=True)
+            shutil.copyfile(os.path.join(src, path), os.path.join(dst, path))
+
+    def _store_temp(self, dst: str) -> str:
+        # Like other storage managers, return the same path to every local worker for the same dst.
+        return os.path.join(self._base_path, _TEMP_DIR, f"store-{dst}")
+
+    def pre_store_path(self, dst: str) -> pathlib.Path:
+        # Write checkpoints inside the cache, so post_store_path() can add them without copying.
+        path = os.path.join(self._store_temp(dst), _FILES_DIR)
+        os.makedirs(path, exist_ok=True)
+        return pathlib.Path(path)
+
+    def post_store_path(self, src: Union[str, os.PathLike], dst: str) -> None:
+        src = os.fspath(src)
+        if src != os.path.join(self._store_temp(dst), _FILES_DIR):
+            # Not from pre_store_path().
+            try:
+                self._inner.upload(src, dst)
+            finally:
+                util.rmtree_nfs_safe(src, ignore_errors=True)
+            return
+        temp = os.path.dirname(src)
+        try:
+            self._inner.upload(src, dst)
+            self._commit(dst, temp, complete=False)
+        finally:
+            util.rmtree_nfs_safe(temp, ignore_errors=True)
+
+    def store_path_is_direct_access(self) -> bool:
+        return False
+
+    @contextlib.contextmanager
+    def restore_path(
+        self, src: str, selector: Optional[storage.Selector] = None
+    ) -> Iterator[pathlib.Path]:
+        with self._cached(src, fill=selector is None) as files:
+            if files is None:
+                with self._inner.restore_path(src, selector) as path:
+                    yield path
+            elif selector is None:
+                yield pathlib.Path(files)
+            else:
+                temp = self._mkdtemp()
+                try:
+                    self._copy_selected(files, temp, selector)
+                    yield pathlib.Path(temp)
+                finally:
+                    util.rmtree_nfs_safe(temp, ignore_errors=True)
+
+    def upload(
+        self, src: Union[str, os.PathLike], dst: str, paths: Optional[storage.Paths] = None
+    ) -> None:
+        # Not cached: src belongs to the caller, and copying it would slow down every upload.
+        self._inner.upload(src, dst, paths)
+
+    def download(
+        self,
+        src: str,
+        dst: Union[str, os.PathLike],
+        selector: Optional[storage.Selector] = None,
+    ) -> None:
+        dst = os.fspath(dst)
+        with self._cached(src, fill=selector is None) as files:
+            if files is None:
+                self._inner.download(src, dst, selector)
+            else:
+                self._copy_selected(files, dst, selector)
+
+    def delete(self, tgt: str, globs: List[str]) -> Dict[str, int]:
+        resources = self._inner.delete(tgt, globs)
+        if "/" not in tgt and not tgt.startswith("."):
+            with self._cache_lock():
+                self._remove(tgt)
+        return resources
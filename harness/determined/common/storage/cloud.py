@@ -1,13 +1,70 @@
+import concurrent.futures
 import contextlib
+import logging
 import os
 import pathlib
-from typing import Iterator, Optional, Union
+import threading
+import time
+from typing import IO, Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar, Union
 
 from determined import util
 from determined.common import storage
 
+logger = logging.getLogger("determined.common.storage")
+
+T = TypeVar("T")
+
+# The default number of objects transferred concurrently by cloud storage managers.  Transfers are
+# almost always latency-bound rather than bandwidth-bound for checkpoints with many small files, so
+# this is much larger than the number of cpus.  It can be overridden per-container with the
+# DET_STORAGE_TRANSFER_CONCURRENCY environment variable, or per-manager by setting
+# CloudStorageManager.transfer_concurrency.
+DEFAULT_TRANSFER_CONCURRENCY = 16
+DEFAULT_TRANSFER_RETRIES = 3
+
+# Objects at least this large are downloaded as several concurrent ranged requests of
+# DEFAULT_PART_SIZE bytes each, rather than as one stream.  Single streams from object stores are
+# usually limited to well under the bandwidth available to a node.
+DEFAULT_MULTIPART_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+
+# A byte range [start, end) of an object, or None for the whole object.
+ByteRange = Optional[Tuple[int, int]]
+
+
+def _transfer_concurrency_from_env() -> int:
+    value = os.environ.get("DET_STORAGE_TRANSFER_CONCURRENCY")
+    if value is None:
+        return DEFAULT_TRANSFER_CONCURRENCY
+    try:
+        concurrency = int(value)
+    except ValueError:
+        concurrency = 0
+    if concurrency < 1:
+        logger.warning(
+            f"DET_STORAGE_TRANSFER_CONCURRENCY must be a positive integer, not {value!r}; "
+            f"using the default of {DEFAULT_TRANSFER_CONCURRENCY}"
+        )
+        return DEFAULT_TRANSFER_CONCURRENCY
+    return concurrency
+
 
 class CloudStorageManager(storage.StorageManager):
+    """
+    Base class for object-store-backed storage managers.
+
+    In addition to implementing store_path and restore_path in terms of upload and download,
+    CloudStorageManager provides a bounded-concurrency transfer engine (see _transfer) which
+    subclasses use to upload, download, and delete many objects at once.
+    """
+
+    def __init__(self, base_path: str) -> None:
+        super().__init__(base_path)
+        self.transfer_concurrency = _transfer_concurrency_from_env()
+        self.transfer_retries = DEFAULT_TRANSFER_RETRIES
+        self.multipart_threshold = DEFAULT_MULTIPART_THRESHOLD
+        self.part_size = DEFAULT_PART_SIZE
+
     @contextlib.contextmanager
     def restore_path(
         self, src: str, selector: Optional[storage.Selector] = None
@@ -33,3 +90,105 @@ class CloudStorageManager(storage.StorageManager):
 
     def store_path_is_direct_access(self) -> bool:
         return False
+
+    def _is_retryable(self, e: Exception) -> bool:
+        """
+        Decide if a failed transfer of a single object should be retried.  Subclasses should
+        return False for errors which will never succeed, like authorization failures.
+        """
+        return True
+
+    def _download_parts(self, size: int, dst: str) -> Iterator[ByteRange]:
+        """
+        Plan the download of an object of the given size to dst.
+
+        Small objects are downloaded whole, so this yields just None.  For objects of at least
+        self.multipart_threshold bytes, dst is created at its full size and one byte range is
+        yielded per self.part_size bytes; each range should be downloaded with _open_part(), so
+        that the parts can be transferred concurrently, like separate objects.
+        """
+        if size < self.multipart_threshold or self.part_size <= 0:
+            yield None
+            return
+        with open(dst, "wb") as f:
+            f.truncate(size)
+        for start in range(0, size, self.part_size):
+            yield start, min(start + self.part_size, size)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _open_part(dst: str, byte_range: Tuple[int, int]) -> Iterator[IO[bytes]]:
+        """
+        Open a file created by _download_parts() for writing one part of it, and check that the
+        whole part was written.
+        """
+        start, end = byte_range
+        with open(dst, "r+b") as f:
+            f.seek(start)
+            yield f
+            if f.tell() != end:
+                raise IOError(f"downloaded {f.tell() - start} bytes of a {end - start}-byte part")
+
+    def _transfer(self, action: str, fn: Callable[[T], None], items: Iterable[T]) -> None:
+        """
+        Call fn(item) for every item, using up to self.transfer_concurrency threads.
+
+        Each item is retried up to self.transfer_retries times, with exponential backoff, as long
+        as self._is_retryable() allows it.  After the first item fails permanently, no new items
+        are started.  Once all in-flight items are finished, every failure is logged together and
+        the first failure is re-raised, so that callers can still handle backend-specific
+        exceptions as if the transfer had been done serially.
+        """
+
+        # Set after the first permanent failure, so that no new items are started.
+        failed = threading.Event()
+
+        def with_retries(item: T) -> bool:
+            attempt = 0
+            while not failed.is_set():
+                try:
+                    fn(item)
+                    return True
+                except Exception as e:
+                    attempt += 1
+                    if attempt > self.transfer_retries or not self._is_retryable(e):
+                        failed.set()
+                        raise
+                    delay = min(0.5 * 2 ** (attempt - 1), 8.0)
+                    logger.debug(f"failed to {action} {item} ({e}), retrying in {delay}s")
+                    time.sleep(delay)
+            return False
+
+        failures: Dict[str, Exception] = {}
+        first_failure: Optional[Exception] = None
+        count = 0
+        skipped = 0
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, self.transfer_concurrency)
+        ) as pool:
+            futures: Dict[concurrent.futures.Future, T] = {}
+            for item in items:
+                if failed.is_set():
+                    break
+                futures[pool.submit(with_retries, item)] = item
+                count += 1
+            for future in concurrent.futures.as_completed(futures):
+                e = future.exception()
+                if e is None:
+                    skipped += 0 if future.result() else 1
+                    continue
+                assert isinstance(e, Exception), e
+                desc = str(futures[future])
+                failures[desc if len(desc) <= 100 else desc[:97] + "..."] = e
+                if first_failure is None:
+                    first_failure = e
+
+        if first_failure is None:
+            return
+
+        summary = "\n".join(f"    {item}: {e}" for item, e in sorted(failures.items()))
+        logger.error(
+            f"failed to {action} {len(failures)} of {count} objects "
+            f"({skipped} skipped):\n{summary}"
+        )
+        raise first_failure
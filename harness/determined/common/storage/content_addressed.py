@@ -0,0 +1,332 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from determined import errors, util
+from determined.common import storage
+from determined.common import util as common_util
+
+logger = logging.getLogger("determined.common.storage.content_addressed")
+
+# Names used inside of the wrapped storage manager.  Checkpoints contain only manifest files, which
+# point at blobs stored once per unique file content.  Every checkpoint referencing a blob leaves an
+# empty ref file at .det-refs/<hash>/<storage_id>, so that a blob may be deleted when the last
+# checkpoint referencing it is deleted.
+MANIFEST_DIR = ".det-manifests"
+BLOB_PREFIX = ".det-blobs"
+REF_PREFIX = ".det-refs"
+_BLOB_NAME = "blob"
+
+# A manifest maps file paths to (sha256, size) and lists directories.
+_Manifest = Tuple[Dict[str, Tuple[str, int]], Set[str]]
+
+
+def _hash_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _is_manifest_path(path: str) -> bool:
+    return path == MANIFEST_DIR + "/" or path.startswith(MANIFEST_DIR + "/")
+
+
+def _read_manifest_dir(manifest_dir: str) -> Tuple[_Manifest, List[str]]:
+    """
+    Merge every manifest part in a downloaded manifest directory.  Sharded uploads write one part
+    per uploading rank.
+    """
+    files: Dict[str, Tuple[str, int]] = {}
+    dirs: Set[str] = set()
+    names = sorted(os.listdir(manifest_dir))
+    for name in names:
+        with open(os.path.join(manifest_dir, name)) as f:
+            part = json.load(f)
+        if part.get("version") != 1:
+            raise ValueError(f"unsupported checkpoint manifest version: {part.get('version')}")
+        files.update({k: (v[0], v[1]) for k, v in part["files"].items()})
+        dirs.update(part["dirs"])
+    return (files, dirs), names
+
+
+class ContentAddressedStorageManager(storage.CloudStorageManager):
+    """
+    Wrap another StorageManager to store each unique file content only once.
+
+    Uploading a checkpoint hashes every file, uploads only blobs which are not already in storage,
+    and writes a manifest under the checkpoint's storage_id pointing at the blobs.  Checkpoints
+    which share most of their files with previous checkpoints (frozen weights, tokenizer files,
+    unchanged optimizer shards) therefore only write the files that changed.
+
+    Downloading and deleting understand both content-addressed and regular checkpoints, so it is
+    always safe to wrap a storage manager for reading or garbage collection.
+
+    Blobs are reference counted by storing an empty ref object per (blob, checkpoint) pair.  Refs
+    are written before blobs are uploaded, and blobs are deleted only after their last ref is gone.
+    Object stores offer no transactions, so a blob may still be lost if a checkpoint is deleted at
+    the same moment that another process uploads a new checkpoint sharing that blob.  Within a
+    Determined cluster this does not happen, since checkpoints are only garbage-collected after the
+    trials which wrote them have stopped.
+    """
+
+    def __init__(self, inner: storage.StorageManager, temp_dir: Optional[str] = None) -> None:
+        super().__init__(temp_dir if temp_dir is not None else tempfile.gettempdir())
+        self._inner = inner
+        # While in batch_releases(), the storage_ids whose refs to each blob are yet to be dropped.
+        self._pending_releases: Optional[Dict[str, Set[str]]] = None
+        self._pending_releases_lock = threading.Lock()
+
+    def _is_retryable(self, e: Exception) -> bool:
+        if isinstance(self._inner, storage.CloudStorageManager):
+            return self._inner._is_retryable(e)
+        return True
+
+    def _mkdtemp(self) -> str:
+        os.makedirs(self._base_path, exist_ok=True)
+        return tempfile.mkdtemp(dir=self._base_path)
+
+    def _blob_exists(self, digest: str) -> bool:
+        tmp = self._mkdtemp()
+        try:
+            # Select nothing; we only want to know if the listing is empty.
+            self._inner.download(f"{BLOB_PREFIX}/{digest}", tmp, selector=lambda _: False)
+            return True
+        except errors.CheckpointNotFound:
+            return False
+        finally:
+            util.rmtree_nfs_safe(tmp, ignore_errors=True)
+
+    def _upload_manifest(self, dst: str, manifest: _Manifest) -> None:
+        files, dirs = manifest
+        part = {
+            "version": 1,
+            "files": {k: list(v) for k, v in sorted(files.items())},
+            "dirs": sorted(dirs),
+        }
+        part_path = f"{MANIFEST_DIR}/{uuid.uuid4()}.json"
+        tmp = self._mkdtemp()
+        try:
+            os.makedirs(os.path.join(tmp, MANIFEST_DIR))
+            with open(os.path.join(tmp, part_path), "w") as f:
+                json.dump(part, f)
+            self._inner.upload(tmp, dst, paths={part_path})
+        finally:
+            util.rmtree_nfs_safe(tmp, ignore_errors=True)
+
+    def _load_manifest(self, storage_id: str) -> Optional[Tuple[_Manifest, List[str]]]:
+        tmp = self._mkdtemp()
+        try:
+            # Only list the manifest directory, which is cheap to find empty, rather than the whole
+            # checkpoint, since regular checkpoints are then listed again to be deleted.
+            self._inner.download(f"{storage_id}/{MANIFEST_DIR}", tmp)
+            if not os.listdir(tmp):
+                return None
+            return _read_manifest_dir(tmp)
+        except errors.CheckpointNotFound:
+            return None
+        finally:
+            util.rmtree_nfs_safe(tmp, ignore_errors=True)
+
+    @common_util.preserve_random_state
+    def upload(
+        self, src: Union[str, os.PathLike], dst: str, paths: Optional[storage.Paths] = None
+    ) -> None:
+        src = os.fspath(src)
+        if paths is None:
+            paths = set(self._list_directory(src))
+        logger.info(f"Uploading content-addressed checkpoint: {dst}")
+
+        dirs = {p for p in paths if p.endswith("/")}
+        files: Dict[str, Tuple[str, int]] = {}
+
+        def hash_one(rel_path: str) -> None:
+            abs_path = os.path.join(src, rel_path)
+            files[rel_path] = (_hash_file(abs_path), os.path.getsize(abs_path))
+
+        self._transfer("hash", hash_one, sorted(p for p in paths if not p.endswith("/")))
+
+        # Pick one local file for each unique blob.
+        sources = {digest: rel_path for rel_path, (digest, _) in sorted(files.items())}
+
+        tmp = self._mkdtemp()
+        try:
+            # Write refs before anything else, so that a concurrent delete of another checkpoint
+            # sharing these blobs will not delete them.  Directory entries are omitted from the
+            # uploaded paths here, since they would only add empty marker objects.
+            refs_dir = os.path.join(tmp, "refs")
+            for digest in sources:
+                os.makedirs(os.path.join(refs_dir, digest))
+                open(os.path.join(refs_dir, digest, dst), "w").close()
+            self._inner.upload(refs_dir, REF_PREFIX, paths={f"{d}/{dst}" for d in sources})
+
+            # Blobs are checked for on every upload, even ones this process uploaded before: they
+            # may have been deleted since by garbage collection in another process.  Only checking
+            # after the refs are written makes it safe to skip uploading the blobs which exist.
+            missing: List[str] = []
+
+            def check_one(digest: str) -> None:
+                if not self._blob_exists(digest):
+                    missing.append(digest)
+
+            self._transfer("check", check_one, sorted(sources))
+
+            blobs_dir = os.path.join(tmp, "blobs")
+            for digest in missing:
+                os.makedirs(os.path.join(blobs_dir, digest))
+                link = os.path.join(blobs_dir, digest, _BLOB_NAME)
+                target = os.path.abspath(os.path.join(src, sources[digest]))
+                try:
+                    os.symlink(target, link)
+                except OSError:
+                    shutil.copyfile(target, link)
+            if missing:
+                self._inner.upload(
+                    blobs_dir, BLOB_PREFIX, paths={f"{d}/{_BLOB_NAME}" for d in missing}
+                )
+            logger.info(
+                f"Uploaded {len(missing)} new blobs; {len(sources) - len(missing)} of "
+                f"{len(sources)} unique files were already in storage"
+            )
+        finally:
+            util.rmtree_nfs_safe(tmp, ignore_errors=True)
+
+        # The manifest is written last; a checkpoint only exists once all its blobs do.
+        self._upload_manifest(dst, (files, dirs))
+
+    @common_util.preserve_random_state
+    def download(
+        self,
+        src: str,
+        dst: Union[str, os.PathLike],
+        selector: Optional[storage.Selector] = None,
+    ) -> None:
+        dst = os.fspath(dst)
+
+        def _selector(path: str) -> bool:
+            if _is_manifest_path(path):
+                return True
+            return selector is None or selector(path)
+
+        # This downloads the manifest of a content-addressed checkpoint, or the whole of a regular
+        # checkpoint.
+        self._inner.download(src, dst, selector=_selector)
+
+        manifest_dir = os.path.join(dst, MANIFEST_DIR)
+        if not os.path.isdir(manifest_dir):
+            return
+        (files, dirs), _ = _read_manifest_dir(manifest_dir)
+        util.rmtree_nfs_safe(manifest_dir, ignore_errors=False)
+
+        # Apply the selector here, not in the transfer threads, since selectors may coordinate
+        # with other workers and are not expected to be thread-safe.
+        for d in sorted(dirs):
+            if selector is None or selector(d):
+                os.makedirs(os.path.join(dst, d), exist_ok=True)
+        targets: Dict[str, List[str]] = {}
+        for rel_path, (digest, _) in sorted(files.items()):
+            if selector is None or selector(rel_path):
+                targets.setdefault(digest, []).append(rel_path)
+
+        logger.info(f"Downloading {len(targets)} blobs for checkpoint {src}")
+        staging = os.path.join(dst, ".det-blob-downloads")
+
+        def fetch_one(digest: str) -> None:
+            blob_dir = os.path.join(staging, digest)
+            self._inner.download(f"{BLOB_PREFIX}/{digest}", blob_dir)
+            blob = os.path.join(blob_dir, _BLOB_NAME)
+            first, *rest = targets[digest]
+            for rel_path in [*rest, first]:
+                path = os.path.join(dst, rel_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if rel_path == first:
+                    os.replace(blob, path)
+                else:
+                    shutil.copyfile(blob, path)
+
+        try:
+            self._transfer("download", fetch_one, sorted(targets))
+        finally:
+            util.rmtree_nfs_safe(staging, ignore_errors=True)
+
+    def _release_blob(self, storage_id: str, digest: str) -> None:
+        """Drop the ref from storage_id to a blob, and delete the blob if it was the last ref."""
+        with self._pending_releases_lock:
+            if self._pending_releases is not None:
+                self._pending_releases.setdefault(digest, set()).add(storage_id)
+                return
+        self._drop_refs(digest, [storage_id])
+
+    def _drop_refs(self, digest: str, storage_ids: List[str]) -> None:
+        remaining_refs = self._inner.delete(f"{REF_PREFIX}/{digest}", storage_ids)
+        if not remaining_refs:
+            logger.debug(f"Deleting unreferenced blob {digest}")
+            self._inner.delete(f"{BLOB_PREFIX}/{digest}", ["**/*"])
+
+    @contextlib.contextmanager
+    def batch_releases(self) -> Iterator[None]:
+        """
+        Defer releasing the blobs of checkpoints deleted inside the context until it exits, and then
+        drop every deleted checkpoint's ref to each blob at once.  Each blob's refs are then listed
+        and deleted once, rather than once per deleted checkpoint which shared the blob, which is
+        what makes deleting many checkpoints of one experiment fast.
+
+        Refs are still dropped after the checkpoints themselves are deleted, so a failure in between
+        only ever leaves blobs behind, never loses them.
+        """
+        with self._pending_releases_lock:
+            assert self._pending_releases is None, "batch_releases() is not reentrant"
+            self._pending_releases = {}
+        try:
+            yield
+        finally:
+            with self._pending_releases_lock:
+                pending, self._pending_releases = self._pending_releases, None
+            assert pending is not None
+            self._transfer(
+                "release", lambda d: self._drop_refs(d, sorted(pending[d])), sorted(pending)
+            )
+
+    @common_util.preserve_random_state
+    def delete(self, tgt: str, globs: List[str]) -> Dict[str, int]:
+        loaded = self._load_manifest(tgt)
+        if loaded is None:
+            return self._inner.delete(tgt, globs)
+        (files, dirs), part_names = loaded
+        logger.info(f"Deleting content-addressed checkpoint {tgt}")
+
+        if "**/*" in globs:
+            resources: Dict[str, int] = {}
+        else:
+            prefixed = {f"{tgt}/{k}": v[1] for k, v in files.items()}
+            prefixed.update({f"{tgt}/{d}": 0 for d in dirs})
+            remaining = self._apply_globs_to_resources(prefixed, tgt, globs)
+            resources = {k[len(tgt) + 1 :]: v for k, v in remaining.items()}
+
+        kept = {digest for rel_path, (digest, _) in files.items() if rel_path in resources}
+        released = {digest for digest, _ in files.values()} - kept
+
+        if resources:
+            # Write the new manifest before removing the old parts, so that a failure part way
+            # through never loses files which should have been kept.
+            self._upload_manifest(
+                tgt,
+                (
+                    {k: v for k, v in files.items() if k in resources},
+                    {d for d in dirs if d in resources},
+                ),
+            )
+            self._inner.delete(tgt, [f"{MANIFEST_DIR}/{name}" for name in part_names])
+        else:
+            self._inner.delete(tgt, ["**/*"])
+
+        self._transfer("release", lambda d: self._release_blob(tgt, d), sorted(released))
+        return resources
@@ -1,7 +1,7 @@
 import logging
 import os
 import tempfile
-from typing import Dict, List, Optional, Union, no_type_check
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, no_type_check
 
 import requests.exceptions
 import urllib3.exceptions
@@ -23,8 +23,8 @@ class GCSStorageManager(storage.CloudStorageManager):
 
     Batching is supported by the GCS API for deletion, however it is not used because
     of observed request failures. Batching is not used for uploading
-    or downloading files, because the GCS API does not support it. Upload/download
-    performance could be improved by using multiple clients in a multithreaded fashion.
+    or downloading files, because the GCS API does not support it. Instead, uploads, downloads,
+    and deletions are issued concurrently by the CloudStorageManager transfer engine.
 
     Authentication is currently only supported via the "Application
     Default Credentials" method in GCP [1]. Typical configuration:
@@ -52,6 +52,20 @@ class GCSStorageManager(storage.CloudStorageManager):
         self.bucket = self.client.bucket(bucket)
         self.prefix = normalize_prefix(prefix)
 
+    def _is_retryable(self, e: Exception) -> bool:
+        from google.api_core import exceptions as api_exceptions
+        from google.auth import exceptions as auth_exceptions
+
+        return not isinstance(
+            e,
+            (
+                auth_exceptions.GoogleAuthError,
+                api_exceptions.Unauthorized,
+                api_exceptions.Forbidden,
+                api_exceptions.NotFound,
+            ),
+        )
+
     def get_storage_prefix(self, storage_id: str) -> str:
         return os.path.join(self.prefix, storage_id)
 
@@ -64,23 +78,24 @@ class GCSStorageManager(storage.CloudStorageManager):
         prefix = self.get_storage_prefix(dst)
         logger.info(f"Uploading to GCS: {prefix}")
         upload_paths = paths if paths is not None else self._list_directory(src)
-        for rel_path in sorted(upload_paths):
+
+        from google.api_core import exceptions, retry
+
+        retry_network_errors = retry.Retry(
+            retry.if_exception_type(
+                ConnectionError,
+                exceptions.ServerError,
+                urllib3.exceptions.ProtocolError,
+                requests.exceptions.ConnectionError,
+            )
+        )
+
+        def upload_one(rel_path: str) -> None:
             blob_name = f"{prefix}/{rel_path}"
             blob = self.bucket.blob(blob_name)
 
             logger.debug(f"Uploading to GCS: {blob_name}")
 
-            from google.api_core import exceptions, retry
-
-            retry_network_errors = retry.Retry(
-                retry.if_exception_type(
-                    ConnectionError,
-                    exceptions.ServerError,
-                    urllib3.exceptions.ProtocolError,
-                    requests.exceptions.ConnectionError,
-                )
-            )
-
             if rel_path.endswith("/"):
                 # Create empty blobs for subdirectories. This ensures
                 # that empty directories are checkpointed correctly.
@@ -89,6 +104,8 @@ class GCSStorageManager(storage.CloudStorageManager):
                 abs_path = os.path.join(src, rel_path)
                 retry_network_errors(blob.upload_from_filename)(abs_path)
 
+        self._transfer("upload", upload_one, sorted(upload_paths))
+
     @util.preserve_random_state
     def download(
         self,
@@ -107,7 +124,8 @@ class GCSStorageManager(storage.CloudStorageManager):
         # Listing blobs with prefix set and no delimiter is equivalent to a recursive listing.  If
         # you include a `delimiter="/"` you will get only the file-like blobs inside of a
         # directory-like blob.
-        try:
+        def list_files() -> Iterator[Tuple[Any, str, storage.ByteRange]]:
+            nonlocal found
             for blob in self.bucket.list_blobs(prefix=path):
                 found = True
                 relname = os.path.relpath(blob.name, path)
@@ -126,9 +144,23 @@ class GCSStorageManager(storage.CloudStorageManager):
                     os.makedirs(_dst, exist_ok=True)
                     continue
 
-                logger.debug(f"Downloading from GCS: {blob.name}")
+                for byte_range in self._download_parts(blob.size, _dst):
+                    yield blob, _dst, byte_range
 
+        def download_one(item: Tuple[Any, str, storage.ByteRange]) -> None:
+            blob, _dst, byte_range = item
+            if byte_range is None:
+                logger.debug(f"Downloading from GCS: {blob.name}")
                 blob.download_to_filename(_dst)
+                return
+            start, end = byte_range
+            logger.debug(f"Downloading bytes {start}-{end} from GCS: {blob.name}")
+            with self._open_part(_dst, byte_range) as f:
+                # GCS byte ranges are inclusive.
+                blob.download_to_file(f, start=start, end=end - 1)
+
+        try:
+            self._transfer("download", download_one, list_files())
 
         except (
             auth_exceptions.GoogleAuthError,
@@ -156,8 +188,10 @@ class GCSStorageManager(storage.CloudStorageManager):
                     resources[obj.replace(f"{prefix}/", "")] = blob_name_to_size[obj]
                     del blob_name_to_size[obj]
 
-        for blob_name in blob_name_to_size:
+        def delete_one(blob_name: str) -> None:
             logger.debug(f"Deleting {blob_name} from GCS")
             blob_name_to_blob[blob_name].delete()
 
+        self._transfer("delete", delete_one, list(blob_name_to_size))
+
         return resources
@@ -1,8 +1,9 @@
 import logging
 import os
 import re
+import shutil
 import tempfile
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 import requests
 
@@ -69,9 +70,30 @@ class S3StorageManager(storage.CloudStorageManager):
                         "will not be uploaded in checkpoints."
                     )
 
+    def _is_retryable(self, e: Exception) -> bool:
+        import botocore
+
+        if isinstance(e, botocore.exceptions.NoCredentialsError):
+            return False
+        if isinstance(e, botocore.exceptions.ClientError):
+            code = e.response.get("Error", {}).get("Code")
+            # Missing objects are reported as NoSuchKey, or as a bare 404 for HEAD requests.
+            return code not in ("AccessDenied", "NoSuchBucket", "NoSuchKey", "404")
+        return True
+
     def get_storage_prefix(self, storage_id: str) -> str:
         return os.path.join(self.prefix, storage_id)
 
+    def _list_objects(self, prefix: str) -> Iterator[Tuple[str, int]]:
+        """
+        Yield the key and size of every object under the prefix.  Unlike the bucket resource, the
+        client is thread-safe, so many storage ids may be listed at once.
+        """
+        paginator = self.bucket.meta.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"], obj["Size"]
+
     @util.preserve_random_state
     def upload(
         self, src: Union[str, os.PathLike], dst: str, paths: Optional[storage.Paths] = None
@@ -80,7 +102,9 @@ class S3StorageManager(storage.CloudStorageManager):
         prefix = self.get_storage_prefix(dst)
         logger.info(f"Uploading to s3: prefix={prefix}")
         upload_paths = paths if paths is not None else self._list_directory(src)
-        for rel_path in sorted(upload_paths):
+        client = self.bucket.meta.client
+
+        def upload_one(rel_path: str) -> None:
             key_name = f"{prefix}/{rel_path}"
             logger.debug(f"Uploading {rel_path} to s3://{self.bucket_name}/{key_name}")
 
@@ -88,7 +112,7 @@ class S3StorageManager(storage.CloudStorageManager):
                 # Create empty S3 keys for each subdirectory to mimic what the S3 console does to
                 # represent empty directories.
                 if not self._use_minio_workaround:
-                    self.bucket.put_object(Key=key_name, Body=b"")
+                    client.put_object(Bucket=self.bucket_name, Key=key_name, Body=b"")
                 else:
                     # boto3 will puke on the following MinIO response if you ever create a
                     # directory by uploading an empty blob.  Uploading a normal file in the
@@ -98,7 +122,9 @@ class S3StorageManager(storage.CloudStorageManager):
                     pass
             else:
                 abs_path = os.path.join(src, rel_path)
-                self.bucket.upload_file(abs_path, key_name)
+                client.upload_file(abs_path, self.bucket_name, key_name)
+
+        self._transfer("upload", upload_one, sorted(upload_paths))
 
     @util.preserve_random_state
     def download(
@@ -113,12 +139,14 @@ class S3StorageManager(storage.CloudStorageManager):
         prefix = self.get_storage_prefix(src)
         logger.info(f"Downloading {prefix} from S3")
         found = False
+        client = self.bucket.meta.client
 
-        try:
-            for obj in self.bucket.objects.filter(Prefix=prefix):
+        def list_files() -> Iterator[Tuple[str, str, storage.ByteRange]]:
+            nonlocal found
+            for key, size in self._list_objects(prefix):
                 found = True
-                relname = os.path.relpath(obj.key, prefix)
-                if obj.key.endswith("/"):
+                relname = os.path.relpath(key, prefix)
+                if key.endswith("/"):
                     relname = os.path.join(relname, "")
 
                 if selector is not None and not selector(relname):
@@ -127,15 +155,31 @@ class S3StorageManager(storage.CloudStorageManager):
                 dst_dir = os.path.dirname(_dst)
                 os.makedirs(dst_dir, exist_ok=True)
 
-                logger.debug(f"Downloading s3://{self.bucket_name}/{obj.key} to {_dst}")
-
                 # Only create empty directory for keys that end with "/".
                 # See `upload` method for more context.
-                if obj.key.endswith("/"):
+                if key.endswith("/"):
                     os.makedirs(_dst, exist_ok=True)
                     continue
 
-                self.bucket.download_file(obj.key, _dst)
+                for byte_range in self._download_parts(size, _dst):
+                    yield key, _dst, byte_range
+
+        def download_one(item: Tuple[str, str, storage.ByteRange]) -> None:
+            key, _dst, byte_range = item
+            if byte_range is None:
+                logger.debug(f"Downloading s3://{self.bucket_name}/{key} to {_dst}")
+                client.download_file(self.bucket_name, key, _dst)
+                return
+            start, end = byte_range
+            logger.debug(f"Downloading bytes {start}-{end} of s3://{self.bucket_name}/{key}")
+            resp = client.get_object(
+                Bucket=self.bucket_name, Key=key, Range=f"bytes={start}-{end-1}"
+            )
+            with self._open_part(_dst, byte_range) as f:
+                shutil.copyfileobj(resp["Body"], f)
+
+        try:
+            self._transfer("download", download_one, list_files())
 
         except botocore.exceptions.ClientError as e:
             if e.response["Error"]["Code"] == "AccessDenied":
@@ -155,7 +199,7 @@ class S3StorageManager(storage.CloudStorageManager):
         prefix = self.get_storage_prefix(tgt)
         logger.info(f"Deleting {prefix} from S3")
 
-        objects = {obj.key: obj.size for obj in self.bucket.objects.filter(Prefix=prefix)}
+        objects = dict(self._list_objects(prefix))
 
         resources = {}
         if "**/*" not in globs:  # Partial delete case.
@@ -165,9 +209,13 @@ class S3StorageManager(storage.CloudStorageManager):
                     resources[obj.replace(f"{prefix}/", "")] = objects[obj]
                     del objects[obj]
 
-        # S3 delete_objects has a limit of 1000 objects.
-        for chunk in util.chunks([{"Key": o} for o in objects], 1000):
+        client = self.bucket.meta.client
+
+        def delete_chunk(chunk: Sequence[Dict[str, str]]) -> None:
             logger.debug(f"Deleting {len(chunk)} objects from S3")
-            self.bucket.delete_objects(Delete={"Objects": chunk})
+            client.delete_objects(Bucket=self.bucket_name, Delete={"Objects": chunk})
+
+        # S3 delete_objects has a limit of 1000 objects.
+        self._transfer("delete", delete_chunk, util.chunks([{"Key": o} for o in objects], 1000))
 
         return resources
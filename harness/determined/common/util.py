@@ -12,6 +12,7 @@ import time
 import warnings
 from typing import (
     IO,
+    TYPE_CHECKING,
     Any,
     Callable,
     Dict,
@@ -26,10 +27,11 @@ from typing import (
     overload,
 )
 
-import urllib3
-
 from determined.common import yaml
 
+if TYPE_CHECKING:
+    import urllib3
+
 # _yamls keeps a cache of yaml.YAML objects for different values of default_flow_style
 _yamls: Dict[Optional[bool], yaml.YAML] = {}
 
@@ -213,7 +215,9 @@ def get_config_path() -> pathlib.Path:
     return config_path.joinpath("determined")
 
 
-def get_max_retries_config() -> urllib3.util.retry.Retry:
+def get_max_retries_config() -> "urllib3.util.retry.Retry":
+    import urllib3
+
     # Allow overriding retry settings when necessary.
     # `DET_RETRY_CONFIG` env variable can contain `urllib3` `Retry` parameters,
     # encoded as JSON.
@@ -6,10 +6,14 @@ import json
 import logging
 import os
 import pathlib
+import queue
+import shutil
+import tempfile
+import threading
 import uuid
 from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
-from determined import core, tensorboard
+from determined import core, tensorboard, util
 from determined.common import api, storage
 from determined.common.api import bindings
 
@@ -168,6 +172,68 @@ def merge_resources(
     return merged, conflicts
 
 
+class _CheckpointUploadThread(threading.Thread):
+    """
+    Run checkpoint uploads (and the reports which follow them) in the background, in order.
+
+    At most max_in_flight uploads may be pending at once; submitting another blocks until one
+    finishes, which bounds the local disk used by checkpoints which have been written but not yet
+    uploaded.  The first failure is remembered and raised from the next call to submit() or flush().
+    """
+
+    def __init__(self, max_in_flight: int) -> None:
+        self._work_queue: queue.Queue = queue.Queue()
+        self._slots = threading.Semaphore(max(1, max_in_flight))
+        self._error: Optional[BaseException] = None
+
+        super().__init__(daemon=True, name="CheckpointUploadThread")
+
+    def run(self) -> None:
+        while True:
+            work = self._work_queue.get()
+
+            # None is the sentinel value to signal the thread to exit.
+            if work is None:
+                self._work_queue.task_done()
+                return
+
+            try:
+                # Once an upload has failed, skip the rest; they would be reported out of order.
+                if self._error is None:
+                    work()
+            except BaseException as e:
+                logger.error(f"Background checkpoint upload failed: {e}", exc_info=True)
+                self._error = e
+            finally:
+                self._slots.release()
+                self._work_queue.task_done()
+
+    def _check_error(self) -> None:
+        if self._error is not None:
+            err, self._error = self._error, None
+            raise RuntimeError("a background checkpoint upload failed") from err
+
+    def submit(self, work: Callable[[], None]) -> None:
+        self._check_error()
+        if not self._slots.acquire(blocking=False):
+            logger.info("Waiting for a previous checkpoint upload to finish")
+            self._slots.acquire()
+        self._work_queue.put(work)
+
+    def flush(self) -> None:
+        if self._work_queue.unfinished_tasks:
+            logger.info("Waiting for checkpoint uploads to finish")
+        self._work_queue.join()
+        self._check_error()
+
+    def close(self) -> None:
+        self._work_queue.put(None)
+        self.join(10)
+        while self.is_alive():
+            logger.info("Waiting for checkpoint uploads to finish")
+            self.join(10)
+
+
 class CheckpointContext:
     """
     ``CheckpointContext`` gives access to checkpoint-related features of a Determined cluster.
@@ -182,9 +248,14 @@ class CheckpointContext:
         allocation_id: Optional[str],
         tbd_sync_mode: core.TensorboardMode,
         tensorboard_manager: Optional[tensorboard.TensorboardManager],
+        max_async_uploads: int = 1,
+        flush_metrics: Optional[Callable[[], None]] = None,
     ) -> None:
         self._dist = dist
         self._storage_manager = storage_manager
+        self._max_async_uploads = max_async_uploads
+        self._upload_thread: Optional[_CheckpointUploadThread] = None
+        self._flush_metrics = flush_metrics
         self._session = session
         self._task_id = task_id
         self._allocation_id = allocation_id
@@ -200,6 +271,7 @@ class CheckpointContext:
         *,
         shard: bool = False,
         selector: Optional[Callable[[str], bool]] = None,
+        async_upload: bool = False,
     ) -> str:
         """
         ``upload()`` chooses a random ``storage_id``, then uploads the contents of ``ckpt_dir`` to
@@ -216,6 +288,11 @@ class CheckpointContext:
         Each worker may optionally provide a ``selector`` that accepts a path
         relative to the checkpoint root, and returns True for paths that should be uploaded.
 
+        When ``async_upload=True`` (only supported with ``shard=False``), the selected files are
+        copied to a temporary directory and ``upload()`` returns immediately, while the upload
+        happens in a background thread.  The checkpoint is only reported to the master once the
+        upload has finished, so it never appears before its files do.  See :meth:`flush`.
+
         Returns:  The ``storage_id`` for this checkpoint.
 
         Example:
@@ -242,8 +319,12 @@ class CheckpointContext:
                     "cannot call .upload(ckpt_dir=None, shard=False), which would result in doing "
                     "nothing at all"
                 )
-            return self._upload_single(ckpt_dir, metadata, selector=selector)
+            return self._upload_single(
+                ckpt_dir, metadata, selector=selector, async_upload=async_upload
+            )
         else:
+            if async_upload:
+                raise ValueError("async_upload=True is not supported with shard=True")
             storage_id = None
             if self._dist.rank == 0:
                 storage_id = str(uuid.uuid4())
@@ -258,10 +339,11 @@ class CheckpointContext:
         metadata: Optional[Dict[str, Any]] = None,
         *,
         selector: Optional[Callable[[str], bool]] = None,
+        async_upload: bool = False,
     ) -> str:
         logger.debug(
             f"Uploading content from checkpoint directory {ckpt_dir} to storage "
-            f"(metadata={metadata})"
+            f"(metadata={metadata}, async_upload={async_upload})"
         )
         storage_id = str(uuid.uuid4())
         # Write metadata first so we get it in resources.
@@ -273,8 +355,37 @@ class CheckpointContext:
             resources = {key: resources[key] for key in resources if selector(key)}
             paths = set(resources)
 
-        self._storage_manager.upload(src=ckpt_dir, dst=storage_id, paths=paths)
-        self._report_checkpoint(storage_id, resources, metadata)
+        if not async_upload:
+            self._storage_manager.upload(src=ckpt_dir, dst=storage_id, paths=paths)
+            self._report_checkpoint(storage_id, resources, metadata)
+            return storage_id
+
+        # The caller may modify or delete ckpt_dir as soon as we return, so upload a snapshot.
+        snapshot = tempfile.mkdtemp(prefix="det-ckpt-")
+        try:
+            for path in sorted(resources):
+                src, dst = os.path.join(ckpt_dir, path), os.path.join(snapshot, path)
+                if path.endswith("/"):
+                    os.makedirs(dst, exist_ok=True)
+                else:
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    shutil.copy2(src, dst)
+        except BaseException:
+            util.rmtree_nfs_safe(snapshot, ignore_errors=True)
+            raise
+
+        def _upload() -> None:
+            try:
+                self._storage_manager.upload(src=snapshot, dst=storage_id, paths=paths)
+            finally:
+                util.rmtree_nfs_safe(snapshot, ignore_errors=True)
+            self._report_checkpoint(storage_id, resources, metadata)
+
+        try:
+            self._submit_upload(_upload)
+        except BaseException:
+            util.rmtree_nfs_safe(snapshot, ignore_errors=True)
+            raise
         return storage_id
 
     def _upload_sharded(
@@ -471,7 +582,11 @@ class CheckpointContext:
 
     @contextlib.contextmanager
     def store_path(
-        self, metadata: Optional[Dict[str, Any]] = None, *, shard: bool = False
+        self,
+        metadata: Optional[Dict[str, Any]] = None,
+        *,
+        shard: bool = False,
+        async_upload: bool = False,
     ) -> Iterator[Tuple[pathlib.Path, str]]:
         """
         ``store_path()`` is a context manager which chooses a random path and prepares a directory
@@ -490,6 +605,11 @@ class CheckpointContext:
         When ``shard=True``, ``store_path()`` becomes a synchronization point between workers, so
         all workers must call store_path(), even workers which will not write any checkpoint files.
 
+        When ``async_upload=True`` (only supported with ``shard=False``), the context manager exits
+        as soon as the checkpoint files are written, and they are uploaded (and then reported to the
+        master) in a background thread.  Storage backends which write checkpoints in place, like
+        ``shared_fs``, have nothing to upload and are unaffected.  See :meth:`flush`.
+
         Example:
 
         .. code::
@@ -501,12 +621,14 @@ class CheckpointContext:
                print(f"done uploading checkpoint {storage_id}")
         """
         if not shard:
-            return self._store_path_single(metadata)
+            return self._store_path_single(metadata, async_upload=async_upload)
         else:
+            if async_upload:
+                raise ValueError("async_upload=True is not supported with shard=True")
             return self._store_path_sharded(metadata)
 
     def _store_path_single(
-        self, metadata: Optional[Dict[str, Any]] = None
+        self, metadata: Optional[Dict[str, Any]] = None, *, async_upload: bool = False
     ) -> Iterator[Tuple[pathlib.Path, str]]:
         logger.debug(f"Getting path for storage (metadata={metadata})")
         if self._dist.rank != 0:
@@ -516,12 +638,30 @@ class CheckpointContext:
             )
 
         storage_id = str(uuid.uuid4())
-        with self._storage_manager.store_path(storage_id) as path:
+        if not async_upload or self._storage_manager.store_path_is_direct_access():
+            with self._storage_manager.store_path(storage_id) as path:
+                yield path, storage_id
+                self._write_metadata_file(os.fspath(path), metadata or {})
+                resources = self._storage_manager._list_directory(path)
+
+            self._report_checkpoint(storage_id, resources, metadata)
+            return
+
+        path = self._storage_manager.pre_store_path(storage_id)
+        try:
             yield path, storage_id
             self._write_metadata_file(os.fspath(path), metadata or {})
             resources = self._storage_manager._list_directory(path)
 
-        self._report_checkpoint(storage_id, resources, metadata)
+            def _upload() -> None:
+                self._storage_manager.post_store_path(path, storage_id)
+                self._report_checkpoint(storage_id, resources, metadata)
+
+            self._submit_upload(_upload)
+        except BaseException:
+            # Until the upload is submitted, nothing else will remove the checkpoint files.
+            util.rmtree_nfs_safe(path, ignore_errors=True)
+            raise
 
     def _store_path_sharded(
         self, metadata: Optional[Dict[str, Any]] = None
@@ -588,6 +728,32 @@ class CheckpointContext:
 
         return storage_id
 
+    def _submit_upload(self, work: Callable[[], None]) -> None:
+        if self._upload_thread is None:
+            self._upload_thread = _CheckpointUploadThread(self._max_async_uploads)
+            self._upload_thread.start()
+        self._upload_thread.submit(work)
+
+    def flush(self) -> None:
+        """
+        Wait for every upload started with ``async_upload=True`` to finish and be reported to the
+        master.
+
+        Raises ``RuntimeError`` if any background upload failed since the last call to
+        ``flush()``.  Exiting the ``core.Context`` also waits for background uploads.
+        """
+        if self._upload_thread is not None:
+            self._upload_thread.flush()
+
+    def _close(self) -> None:
+        if self._upload_thread is None:
+            return
+        try:
+            self._upload_thread.flush()
+        finally:
+            self._upload_thread.close()
+            self._upload_thread = None
+
     def _merge_metadata(self, metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         all_metadata = self._dist.allgather(metadata or {})
         merged_metadata, conflicts = merge_metadata(all_metadata)
@@ -696,6 +862,10 @@ class CheckpointContext:
         resources = resources or {}
         metadata = metadata or {}
 
+        # Metrics reported before a checkpoint should reach the master before it does.
+        if self._flush_metrics is not None:
+            self._flush_metrics()
+
         if "steps_completed" not in metadata:
             raise ValueError(
                 "metadata for reported checkpoints, in the current implementation, requires a "
@@ -726,9 +896,12 @@ class DummyCheckpointContext(CheckpointContext):
         self,
         dist: core.DistributedContext,
         storage_manager: storage.StorageManager,
+        max_async_uploads: int = 1,
     ) -> None:
         self._dist = dist
         self._storage_manager = storage_manager
+        self._max_async_uploads = max_async_uploads
+        self._upload_thread = None
 
     def _report_checkpoint(
         self,
@@ -1,4 +1,5 @@
 import logging
+import os
 import pathlib
 import signal
 import sys
@@ -12,7 +13,7 @@ import appdirs
 import determined as det
 from determined import core, tensorboard
 from determined.common import api, constants, storage, util
-from determined.common.api import certs
+from determined.common.api import bindings, certs
 
 logger = logging.getLogger("determined.core")
 
@@ -78,6 +79,23 @@ class Context:
         exc_val: Optional[BaseException] = None,
         exc_tb: Optional[types.TracebackType] = None,
     ) -> None:
+        # Background checkpoint uploads and metrics reports talk to the master and sync
+        # tensorboard, so they must finish before anything else is closed.
+        close_error: Optional[Exception] = None
+        try:
+            self.checkpoint._close()
+        except Exception as e:
+            logger.exception("Failed to finish background checkpoint uploads")
+            close_error = e
+            if exc_type is None:
+                exc_type, exc_val, exc_tb = type(e), e, e.__traceback__
+        try:
+            self.train._close()
+        except Exception as e:
+            logger.exception("Failed to finish background metrics reports")
+            close_error = close_error or e
+            if exc_type is None:
+                exc_type, exc_val, exc_tb = type(e), e, e.__traceback__
         self.preempt.close()
         self.distributed.close()
         if self._tensorboard_manager is not None:
@@ -86,6 +104,9 @@ class Context:
             self._heartbeat.close(exc_type, exc_val, exc_tb)
         if self._log_shipper is not None:
             self._log_shipper.close(exc_type, exc_val, exc_tb)
+        # Don't mask an exception which was already raising.
+        if close_error is not None and exc_val is close_error:
+            raise close_error
 
     def __exit__(
         self,
@@ -139,12 +160,43 @@ def _get_storage_manager(
     raise TypeError("checkpoint_storage must be a string, dictionary, or None")
 
 
+def _cache_checkpoints(
+    storage_manager: storage.StorageManager, session: Optional[api.Session]
+) -> storage.StorageManager:
+    """
+    Put a node-local checkpoint cache in front of storage_manager, when the
+    DET_CHECKPOINT_CACHE_DIR environment variable is set.  DET_CHECKPOINT_CACHE_SIZE sets the size
+    of the cache, in bytes.
+    """
+    cache_dir = os.environ.get("DET_CHECKPOINT_CACHE_DIR")
+    if not cache_dir or storage_manager.store_path_is_direct_access():
+        return storage_manager
+    max_size = int(os.environ.get("DET_CHECKPOINT_CACHE_SIZE", storage.cached.DEFAULT_CACHE_SIZE))
+
+    def get_resources(storage_id: str) -> Optional[Dict[str, int]]:
+        assert session
+        try:
+            resp = bindings.get_GetCheckpoint(session, checkpointUuid=storage_id)
+        except api.errors.NotFoundException:
+            return None
+        return {k: int(v) for k, v in resp.checkpoint.resources.items()}
+
+    logger.info(f"caching checkpoints in {cache_dir}")
+    return storage.CachedStorageManager(
+        storage_manager,
+        cache_dir,
+        max_size,
+        get_resources=get_resources if session is not None else None,
+    )
+
+
 def _dummy_init(
     *,
     distributed: Optional[core.DistributedContext] = None,
     checkpoint_storage: Optional[Union[str, Dict[str, Any]]] = None,
     tensorboard_path: Optional[pathlib.Path] = None,
     preempt_mode: core.PreemptMode = core.PreemptMode.WorkersAskChief,
+    max_async_uploads: int = 1,
 ) -> Context:
     """
     Build a core.Context suitable for running off-cluster.  This is normally called by init()
@@ -160,7 +212,10 @@ def _dummy_init(
         base_path = appdirs.user_data_dir("determined")
         logger.info(f"no storage_manager provided; storing checkpoints in {base_path}")
         storage_manager = storage.SharedFSStorageManager(base_path)
-    checkpoint = core.DummyCheckpointContext(distributed, storage_manager)
+    storage_manager = _cache_checkpoints(storage_manager, None)
+    checkpoint = core.DummyCheckpointContext(
+        distributed, storage_manager, max_async_uploads=max_async_uploads
+    )
 
     train = core.DummyTrainContext(tensorboard_path)
     searcher = core.DummySearcherContext(distributed)
@@ -186,6 +241,8 @@ def init(
     checkpoint_storage: Optional[Union[str, Dict[str, Any]]] = None,
     preempt_mode: core.PreemptMode = core.PreemptMode.WorkersAskChief,
     tensorboard_mode: core.TensorboardMode = core.TensorboardMode.AUTO,
+    async_metrics: bool = False,
+    max_async_uploads: int = 1,
 ) -> Context:
     """
     ``core.init()`` builds a :class:`core.Context <determined.core.Context>` for use with the Core
@@ -211,16 +268,31 @@ def init(
             of the form ``s3://<bucket>[/<prefix>]`` (AWS) or ``gs://<bucket>[/<prefix>]`` (GCP).
             This should only be used when IAM permissions can be assumed. You may also pass a
             dictionary matching the ``checkpoint_storage`` field of the experiment config, with the
-            exception that ``type: shared_fs`` configs are not allowed.
+            exception that ``type: shared_fs`` configs are not allowed.  A dictionary may also set
+            ``content_addressed: true`` to store each unique file only once across checkpoints,
+            which saves storage and upload time when checkpoints share most of their files.
         tensorboard_mode (``core.TensorboardMode``, optional): Define how Tensorboard
             metrics and profiling data are retained. See
             :class:`~determined.core.TensorboardMode`` for more detail. Defaults to ``AUTO``.
+        async_metrics (``bool``, optional): Send training metrics to the master from a background
+            thread, so that reporting metrics does not wait for the master.  Reports are sent in
+            order, and are always flushed before validation metrics or checkpoints are reported,
+            and when the ``core.Context`` exits.  See ``core_context.train.flush()``.  Defaults to
+            ``False``.
+        max_async_uploads (``int``, optional): How many checkpoints saved with
+            ``async_upload=True`` may wait to be uploaded at once.  Saving another checkpoint waits
+            for one of them to finish uploading, which bounds the local disk used by checkpoints
+            that have not been uploaded yet.  Defaults to ``1``.
     """
+    if max_async_uploads < 1:
+        raise ValueError(f"max_async_uploads must be at least 1, not {max_async_uploads}")
+
     info = det.get_cluster_info()
     if info is None:
         return _dummy_init(
             distributed=distributed,
             checkpoint_storage=checkpoint_storage,
+            max_async_uploads=max_async_uploads,
         )
 
     # We are on the cluster.
@@ -268,6 +340,7 @@ def init(
             tensorboard_mode,
             tensorboard_manager,
             tbd_writer,
+            async_metrics=async_metrics,
         )
         units = core._parse_searcher_units(info.trial._config)
         searcher = core.SearcherContext(
@@ -287,12 +360,14 @@ def init(
 
         checkpoint = core.CheckpointContext(
             distributed,
-            storage_manager,
+            _cache_checkpoints(storage_manager, session),
             session,
             info.task_id,
             info.allocation_id,
             tensorboard_mode,
             tensorboard_manager,
+            max_async_uploads=max_async_uploads,
+            flush_metrics=train.flush,
         )
 
         preempt = core.PreemptContext(session, info.allocation_id, distributed, preempt_mode)
@@ -304,7 +379,10 @@ def init(
             base_path = appdirs.user_data_dir("determined")
             logger.info(f"no storage_manager provided; storing checkpoints in {base_path}")
             storage_manager = storage.SharedFSStorageManager(base_path)
-        checkpoint = core.DummyCheckpointContext(distributed, storage_manager)
+        storage_manager = _cache_checkpoints(storage_manager, session)
+        checkpoint = core.DummyCheckpointContext(
+            distributed, storage_manager, max_async_uploads=max_async_uploads
+        )
         preempt = core.DummyPreemptContext(distributed, preempt_mode)
 
     _install_stacktrace_on_sigusr1()
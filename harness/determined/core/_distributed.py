@@ -1,8 +1,9 @@
+import itertools
 import logging
 import os
 import socket
 import tempfile
-from typing import Any, List, Optional
+from typing import Any, Iterable, List, Optional, Tuple
 
 from determined import constants, ipc, util
 
@@ -30,6 +31,11 @@ class DistributedContext:
        are easy to use and which can be useful for coordinating work across workers, but it is not a
        replacement for the allgather/gather/broadcast operations in your particular distributed
        training framework.
+
+    When every machine has more than one worker, collectives are hierarchical: workers only talk
+    to the local chief of their machine, and only the local chiefs talk to the chief, so the chief
+    handles one message per machine rather than one per worker.  Pass ``hierarchical=False`` (on
+    every worker) to connect every worker to the chief directly instead.
     """
 
     def __init__(
@@ -46,6 +52,7 @@ class DistributedContext:
         pull_port: int = constants.INTER_TRAIN_PROCESS_COMM_PORT_2,
         port_offset: int = 0,
         force_tcp: bool = False,
+        hierarchical: bool = True,
     ) -> None:
         rank_args = (rank, size, local_rank, local_size, cross_rank, cross_size)
         if sum(x is not None for x in rank_args) not in (0, 6):
@@ -81,10 +88,12 @@ class DistributedContext:
             self._chief_ip = "127.0.0.1"
 
         self._closed = False
+        # Set by _init_ipc() once every worker has connected to its local chief.
+        self._hierarchical = False
 
-        self._init_ipc(force_tcp)
+        self._init_ipc(force_tcp, hierarchical)
 
-    def _init_ipc(self, force_tcp: bool) -> None:
+    def _init_ipc(self, force_tcp: bool, hierarchical: bool) -> None:
         if self.size < 2:
             # No broadcasting necessary.
             return
@@ -116,7 +125,7 @@ class DistributedContext:
         if self.local_size < 2:
             # If local size is less than 2, we don't need a local chief but still need to
             # participate in the global all gather, otherwise the other participants block forever.
-            _ = self.allgather(None)
+            all_local_chiefs = self.allgather(None)
         elif self._is_local_chief:
             pub_url = None
             pull_url = None
@@ -141,7 +150,7 @@ class DistributedContext:
 
             # Do a global allgather to initialize local clients on every node.
             local_chief = (self.cross_rank, pub_url, pull_url)
-            _ = self.allgather(local_chief)
+            all_local_chiefs = self.allgather(local_chief)
             self._local_chief_zmq.safe_start()
 
         else:
@@ -163,6 +172,23 @@ class DistributedContext:
             self._local_worker_zmq = ipc.ZMQBroadcastClient(pub_url, pull_url)
             self._local_worker_zmq.safe_start()
 
+        # Every worker sees the same all_local_chiefs, so every worker makes the same decision.  The
+        # chief must also be a local chief, since it is the root of both levels.
+        machines_with_local_chiefs = {x[0] for x in all_local_chiefs if x is not None}
+        if (
+            hierarchical
+            and self.cross_size > 1
+            and all_local_chiefs[0] is not None
+            and machines_with_local_chiefs == set(range(self.cross_size))
+        ):
+            self._hierarchical = True
+            # From now on, only local chiefs talk to the chief.  Other workers only talk to their
+            # local chief, so they have no more use for their connection to the chief.
+            if self._is_chief:
+                self._chief_zmq.set_num_connections(self.cross_size - 1)
+            elif not self._is_local_chief:
+                self._worker_zmq.close()
+
     @classmethod
     def from_horovod(cls, hvd: Any, chief_ip: Optional[str] = None) -> "DistributedContext":
         """
@@ -240,7 +266,7 @@ class DistributedContext:
         # Global broadcast server.
         if self._is_chief:
             self._chief_zmq.close()
-        else:
+        elif self._is_local_chief or not self._hierarchical:
             self._worker_zmq.close()
 
         if self.local_size < 2:
@@ -295,11 +321,15 @@ class DistributedContext:
         if self.size < 2:
             return [stuff]
         logger.debug(f"Worker {self.get_rank()} beginning zmq gather.")
-        if self._is_chief:
+        if self._hierarchical:
+            out = self._gather_to_chief(stuff)  # type: Optional[List]
+            # Synchronize, like below.
+            _ = self._broadcast_from_chief(None)
+        elif self._is_chief:
             worker_stuff_ranked = self._chief_zmq.gather()
             worker_stuff = [value for _, value in sorted(worker_stuff_ranked)]
             self._chief_zmq.broadcast(None)
-            out = [stuff, *worker_stuff]  # type: Optional[List]
+            out = [stuff, *worker_stuff]
         else:
             self._worker_zmq.send((self.get_rank(), stuff))
             # Synchronize with the chief so that there is no risk of accidentally calling send()
@@ -344,7 +374,9 @@ class DistributedContext:
         if self.size < 2:
             return [stuff]
         logger.debug(f"Worker {self.get_rank()} beginning zmq allgather.")
-        if self._is_chief:
+        if self._hierarchical:
+            all_stuff = self._broadcast_from_chief(self._gather_to_chief(stuff))  # type: List
+        elif self._is_chief:
             worker_stuff_ranked = self._chief_zmq.gather()
             worker_stuff = [value for _, value in sorted(worker_stuff_ranked)]
             all_stuff = [stuff, *worker_stuff]
@@ -385,12 +417,44 @@ class DistributedContext:
         """
         if self.size < 2:
             return stuff
-        if self._is_chief:
+        if self._hierarchical:
+            stuff = self._broadcast_from_chief(stuff)
+        elif self._is_chief:
             self._chief_zmq.broadcast(stuff)
         else:
             stuff = self._worker_zmq.recv()
         return stuff
 
+    def _gather_to_chief(self, stuff: Any) -> Optional[List]:
+        """
+        Gather to each local chief, then from each local chief to the chief.  The chief returns a
+        list of all stuff, in rank order, and all other workers return None.
+        """
+        if not self._is_local_chief:
+            self._local_worker_zmq.send((self.get_rank(), stuff))
+            return None
+        local_stuff_ranked = [(self.get_rank(), stuff), *self._local_chief_zmq.gather()]
+        if not self._is_chief:
+            self._worker_zmq.send(local_stuff_ranked)
+            return None
+        stuff_ranked: Iterable[Tuple[int, Any]] = itertools.chain(
+            local_stuff_ranked, *self._chief_zmq.gather()
+        )
+        return [value for _, value in sorted(stuff_ranked, key=lambda x: x[0])]
+
+    def _broadcast_from_chief(self, stuff: Any) -> Any:
+        """
+        Broadcast from the chief to each local chief, then from each local chief to its workers.
+        """
+        if self._is_chief:
+            self._chief_zmq.broadcast(stuff)
+        elif self._is_local_chief:
+            stuff = self._worker_zmq.recv()
+        else:
+            return self._local_worker_zmq.recv()
+        self._local_chief_zmq.broadcast(stuff)
+        return stuff
+
     def broadcast_local(self, stuff: Any = None) -> Any:
         """
         Every worker gets the ``stuff`` sent by the local chief.
@@ -1,7 +1,9 @@
 import enum
 import logging
 import pathlib
-from typing import Any, Callable, Dict, List, Optional, Set
+import queue
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
 
 import determined as det
 from determined import core, tensorboard
@@ -17,6 +19,124 @@ class EarlyExitReason(enum.Enum):
     USER_REQUESTED_STOP = "EXITED_REASON_USER_REQUESTED_STOP"
 
 
+class _MetricsReport(NamedTuple):
+    group: str
+    steps_completed: int
+    metrics: Dict[str, Any]
+    batch_metrics: Optional[List[Dict[str, Any]]]
+
+
+def _coalesce_reports(reports: List[_MetricsReport]) -> List[_MetricsReport]:
+    """
+    Merge each report into the previous report of the same group, if they are for the same
+    steps_completed.  Reports within a group stay in their original order.
+    """
+    merged: List[_MetricsReport] = []
+    # Index into merged of the latest report of each group.
+    latest: Dict[str, int] = {}
+    for r in reports:
+        i = latest.get(r.group)
+        if i is not None and merged[i].steps_completed == r.steps_completed:
+            prev = merged[i]
+            batch_metrics = prev.batch_metrics
+            if r.batch_metrics:
+                batch_metrics = (batch_metrics or []) + r.batch_metrics
+            merged[i] = prev._replace(
+                metrics={**prev.metrics, **r.metrics}, batch_metrics=batch_metrics
+            )
+        else:
+            latest[r.group] = len(merged)
+            merged.append(r)
+    return merged
+
+
+class _MetricsReportThread(threading.Thread):
+    """
+    Post metrics reports to the master in the background.
+
+    Reports made while a previous request is in flight are coalesced before posting, and the
+    tensorboard sync which follows reporting happens once per batch of reports rather than once per
+    report.  At most max_pending reports may be queued; reporting more blocks until the queue
+    drains.  flush() waits for the reports queued before it was called, but not for any queued
+    while it waits, since other threads may keep reporting.  The first failure is remembered and
+    raised from the next call to report() or flush().
+    """
+
+    def __init__(
+        self,
+        post: Callable[[_MetricsReport], None],
+        after_batch: Callable[[], None],
+        max_pending: int,
+    ) -> None:
+        self._post = post
+        self._after_batch = after_batch
+        self._work_queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._error: Optional[BaseException] = None
+        # How many items were queued, and how many of them have been handled.
+        self._queued = 0
+        self._handled = 0
+        self._handled_cond = threading.Condition()
+
+        super().__init__(daemon=True, name="MetricsReportThread")
+
+    def run(self) -> None:
+        while True:
+            batch = [self._work_queue.get()]
+            while True:
+                try:
+                    batch.append(self._work_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            reports = [r for r in batch if r is not None]
+            try:
+                # Once a report has failed, skip the rest.
+                if reports and self._error is None:
+                    for report in _coalesce_reports(reports):
+                        self._post(report)
+                    self._after_batch()
+            except BaseException as e:
+                logger.error(f"Background metrics report failed: {e}", exc_info=True)
+                self._error = e
+            finally:
+                with self._handled_cond:
+                    self._handled += len(batch)
+                    self._handled_cond.notify_all()
+
+            # None is the sentinel value to signal the thread to exit.
+            if len(reports) < len(batch):
+                return
+
+    def _check_error(self) -> None:
+        if self._error is not None:
+            err, self._error = self._error, None
+            raise RuntimeError("a background metrics report failed") from err
+
+    def _put(self, item: Optional[_MetricsReport]) -> None:
+        # Count the item before queueing it, so that it can never be handled before it is counted.
+        # The lock is not held while putting, which may block until the thread handles something.
+        with self._handled_cond:
+            self._queued += 1
+        self._work_queue.put(item)
+
+    def report(self, report: _MetricsReport) -> None:
+        self._check_error()
+        self._put(report)
+
+    def flush(self) -> None:
+        with self._handled_cond:
+            queued = self._queued
+            self._handled_cond.wait_for(lambda: self._handled >= queued)
+        self._check_error()
+
+    def close(self) -> None:
+        self._put(None)
+        self.join(10)
+        while self.is_alive():
+            logger.info("Waiting for metrics reports to finish")
+            self.join(10)
+
+
 class TrainContext:
     """
     ``TrainContext`` gives access to report training and validation metrics to the Determined master
@@ -33,6 +153,8 @@ class TrainContext:
         tensorboard_mode: core.TensorboardMode,
         tensorboard_manager: Optional[tensorboard.TensorboardManager],
         tbd_writer: Optional[tensorboard.BatchMetricWriter],
+        async_metrics: bool = False,
+        max_pending_reports: int = 1000,
     ) -> None:
         self._session = session
         self._trial_id = trial_id
@@ -44,6 +166,12 @@ class TrainContext:
         self._tensorboard_mode = tensorboard_mode
         self._tensorboard_manager = tensorboard_manager
         self._tbd_writer = tbd_writer
+        self._metrics_thread: Optional[_MetricsReportThread] = None
+        if async_metrics:
+            self._metrics_thread = _MetricsReportThread(
+                self._post_trial_metrics, self._sync_tensorboard, max_pending_reports
+            )
+            self._metrics_thread.start()
 
     def set_status(self, status: str) -> None:
         """
@@ -88,26 +216,67 @@ class TrainContext:
             serializable_metrics = self._get_serializable_metrics(metrics)
             reportable_metrics = {k: metrics[k] for k in serializable_metrics}
 
-        v1metrics = bindings.v1Metrics(avgMetrics=reportable_metrics, batchMetrics=batch_metrics)
+        # Write tensorboard metrics now (all metrics, not just json-serializable ones); they are
+        # uploaded by the tensorboard sync which follows reporting.
+        if self._tensorboard_mode == core.TensorboardMode.AUTO and self._tbd_writer:
+            if group == util._LEGACY_VALIDATION:
+                self._tbd_writer.on_validation_step_end(steps_completed, metrics)
+            elif group == util._LEGACY_TRAINING:
+                self._tbd_writer.on_train_step_end(steps_completed, metrics, batch_metrics)
+
+        report = _MetricsReport(
+            group,
+            steps_completed,
+            dict(reportable_metrics),
+            list(batch_metrics) if batch_metrics is not None else None,
+        )
+
+        # Validation metrics drive searcher and checkpoint GC decisions in the master, so they are
+        # always reported synchronously, after everything reported before them.
+        if self._metrics_thread is not None and group != util._LEGACY_VALIDATION:
+            self._metrics_thread.report(report)
+            return
+
+        self.flush()
+        self._post_trial_metrics(report)
+        self._sync_tensorboard()
+
+    def _post_trial_metrics(self, report: _MetricsReport) -> None:
+        v1metrics = bindings.v1Metrics(avgMetrics=report.metrics, batchMetrics=report.batch_metrics)
         v1TrialMetrics = bindings.v1TrialMetrics(
             metrics=v1metrics,
-            stepsCompleted=steps_completed,
+            stepsCompleted=report.steps_completed,
             trialId=self._trial_id,
             trialRunId=self._run_id,
         )
-        body = bindings.v1ReportTrialMetricsRequest(metrics=v1TrialMetrics, group=group)
+        body = bindings.v1ReportTrialMetricsRequest(metrics=v1TrialMetrics, group=report.group)
         bindings.post_ReportTrialMetrics(self._session, body=body, metrics_trialId=self._trial_id)
 
-        # Also sync tensorboard (all metrics, not just json-serializable ones).
+    def _sync_tensorboard(self) -> None:
         if self._tensorboard_mode == core.TensorboardMode.AUTO:
-            if self._tbd_writer:
-                if group == util._LEGACY_VALIDATION:
-                    self._tbd_writer.on_validation_step_end(steps_completed, metrics)
-                elif group == util._LEGACY_TRAINING:
-                    self._tbd_writer.on_train_step_end(steps_completed, metrics, batch_metrics)
             assert self._tensorboard_manager is not None
             self._tensorboard_manager.sync()
 
+    def flush(self) -> None:
+        """
+        Wait until all reported metrics have been sent to the master.
+
+        This only has an effect when ``core.init()`` was called with ``async_metrics=True``.  It is
+        called automatically before validation metrics or checkpoints are reported, and when the
+        ``core.Context`` exits.  Raises ``RuntimeError`` if a background report failed.
+        """
+        if self._metrics_thread is not None:
+            self._metrics_thread.flush()
+
+    def _close(self) -> None:
+        if self._metrics_thread is None:
+            return
+        try:
+            self._metrics_thread.flush()
+        finally:
+            self._metrics_thread.close()
+            self._metrics_thread = None
+
     def report_training_metrics(
         self,
         steps_completed: int,
@@ -261,6 +430,7 @@ class TrainContext:
 class DummyTrainContext(TrainContext):
     def __init__(self, tensorboard_path: Optional[pathlib.Path] = None) -> None:
         self._tbd_directory = tensorboard_path
+        self._metrics_thread = None
 
     def set_status(self, status: str) -> None:
         logger.info(f"status: {status}")
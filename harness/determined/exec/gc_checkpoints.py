@@ -2,11 +2,15 @@
 The entrypoint for the GC checkpoints job container.
 """
 import argparse
+import concurrent.futures
+import contextlib
 import json
 import logging
 import os
 import sys
-from typing import Any, Dict, List
+import threading
+import time
+from typing import Any, Dict, List, Optional
 
 import urllib3
 
@@ -17,6 +21,25 @@ from determined.common.api import bindings, certs
 
 logger = logging.getLogger("determined")
 
+# The default number of checkpoints deleted concurrently.  Each checkpoint's objects are already
+# deleted concurrently by cloud storage managers, so this only needs to be large enough to hide the
+# latency of listing each checkpoint.
+DEFAULT_GC_CONCURRENCY = 8
+
+# How often to log progress while deleting checkpoints, in seconds.
+PROGRESS_INTERVAL = 30
+
+
+class DeleteCheckpointsError(Exception):
+    """
+    Some checkpoints could not be deleted.  The resources of those which were deleted are kept, so
+    that the master can still be told about them.
+    """
+
+    def __init__(self, deleted: Dict[str, Dict[str, int]]) -> None:
+        super().__init__(f"failed to delete checkpoints ({len(deleted)} were deleted)")
+        self.deleted = deleted
+
 
 def patch_checkpoints(storage_ids_to_resources: Dict[str, Dict[str, int]]) -> None:
     info = det.ClusterInfo._from_file()
@@ -53,24 +76,75 @@ def patch_checkpoints(storage_ids_to_resources: Dict[str, Dict[str, int]]) -> No
 
 
 def delete_checkpoints(
-    manager: storage.StorageManager, to_delete: List[str], globs: List[str], dry_run: bool
+    manager: storage.StorageManager,
+    to_delete: List[str],
+    globs: List[str],
+    dry_run: bool,
+    concurrency: int = DEFAULT_GC_CONCURRENCY,
 ) -> Dict[str, Dict[str, int]]:
     """
-    Delete some of the checkpoints associated with a single experiment.
+    Delete some of the checkpoints associated with a single experiment, up to concurrency at once.
+
+    After the first checkpoint fails to be deleted, no more are started, and once the deletions in
+    flight finish, a DeleteCheckpointsError is raised with the resources of every checkpoint which
+    was deleted.
     """
     logger.info(f"Deleting {len(to_delete)} checkpoints")
 
     storage_id_to_resources: Dict[str, Dict[str, int]] = {}
-    for storage_id in to_delete:
-        if not dry_run:
-            logger.info(f"Deleting checkpoint {storage_id}")
-            try:
-                storage_id_to_resources[storage_id] = manager.delete(storage_id, globs)
-            except errors.CheckpointNotFound as e:
-                logger.warn(e)
-        else:
+    if dry_run:
+        for storage_id in to_delete:
             logger.info(f"Dry run: deleting checkpoint {storage_id}")
+        return storage_id_to_resources
 
+    # Set after the first failure, so that no new deletions are started.
+    failed = threading.Event()
+    lock = threading.Lock()
+    start = time.time()
+    last_report = start
+    done = 0
+
+    def delete_one(storage_id: str) -> None:
+        nonlocal done, last_report
+        if failed.is_set():
+            return
+        logger.info(f"Deleting checkpoint {storage_id}")
+        try:
+            storage_id_to_resources[storage_id] = manager.delete(storage_id, globs)
+        except errors.CheckpointNotFound as e:
+            logger.warning(e)
+        except Exception:
+            failed.set()
+            raise
+        with lock:
+            done += 1
+            now = time.time()
+            if now - last_report < PROGRESS_INTERVAL:
+                return
+            last_report = now
+        rate = done / (now - start)
+        logger.info(f"Deleted {done} of {len(to_delete)} checkpoints ({rate:.1f} checkpoints/s)")
+
+    first_failure: Optional[BaseException] = None
+    try:
+        with contextlib.ExitStack() as exit_stack:
+            if isinstance(manager, storage.ContentAddressedStorageManager):
+                # Release the blobs shared by the deleted checkpoints once, at the end.
+                exit_stack.enter_context(manager.batch_releases())
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                futures = [pool.submit(delete_one, storage_id) for storage_id in to_delete]
+                for future in concurrent.futures.as_completed(futures):
+                    e = future.exception()
+                    if e is not None:
+                        logger.error("Failed to delete checkpoint", exc_info=e)
+                        first_failure = first_failure or e
+            if first_failure is not None:
+                raise first_failure
+    except Exception as e:
+        raise DeleteCheckpointsError(storage_id_to_resources) from e
+
+    elapsed = time.time() - start
+    logger.info(f"Deleted {done} checkpoints in {elapsed:.1f}s")
     return storage_id_to_resources
 
 
@@ -133,6 +207,12 @@ def main(argv: List[str]) -> None:
         default=os.getenv("DET_DELETE_TENSORBOARDS", False),
         help="Delete Tensorboards from storage",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("DET_GC_CONCURRENCY", DEFAULT_GC_CONCURRENCY)),
+        help="How many checkpoints to delete at once",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -156,11 +236,21 @@ def main(argv: List[str]) -> None:
     globs = [s.strip() for s in args.globs]
 
     manager = storage.build(storage_config, container_path=constants.SHARED_FS_CONTAINER_PATH)
+    if not isinstance(manager, storage.ContentAddressedStorageManager):
+        # Checkpoints may have been written in content-addressed mode even if the experiment config
+        # does not say so (e.g. via core.init(checkpoint_storage=...)), and deleting them correctly
+        # requires releasing their blobs.  Regular checkpoints are deleted as usual.
+        manager = storage.ContentAddressedStorageManager(manager)
 
     if len(storage_ids) > 0:
-        storage_ids_to_resources = delete_checkpoints(
-            manager, storage_ids, globs, dry_run=args.dry_run
-        )
+        try:
+            storage_ids_to_resources = delete_checkpoints(
+                manager, storage_ids, globs, dry_run=args.dry_run, concurrency=args.concurrency
+            )
+        except DeleteCheckpointsError as e:
+            # Still tell the master about the checkpoints which were deleted.
+            patch_checkpoints(e.deleted)
+            raise
         patch_checkpoints(storage_ids_to_resources)
 
     if args.delete_tensorboards:
@@ -1,13 +1,13 @@
+import heapq
 import json
 import logging
 import os
-import queue
 import subprocess
 import sys
 import tempfile
 import threading
 import time
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, List, Set, Tuple
 
 import boto3
 import requests
@@ -22,9 +22,9 @@ TENSORBOARD_TRIGGER_READY_MSG = "TensorBoard contains metrics"
 TICK_INTERVAL = 1  # How many seconds to wait on each iteration of our check loop
 MAX_WAIT_TIME = 600  # How many seconds to wait for the first metric file to download
 TB_RESPONSE_WAIT_TIME = 300  # How many seconds to wait for TensorBoard to initially start up
-WORK_QUEUE_MAX_SIZE = 20  # Size of the threading work queue for fetching
 FULL_ITERATION_SLEEP_TIME = 20  # How long to wait between a full iteration run (in seconds)
-NUM_FETCH_THREADS = 5  # Number of fetching threads to run concurrently
+# Number of fetching threads to run concurrently, unless set by DET_TENSORBOARD_FETCH_THREADS
+DEFAULT_FETCH_THREADS = 5
 READY_SIGNAL_DELAY = 7  # How many seconds to wait before sending the ready signal
 
 logger = logging.getLogger("determined")
@@ -107,6 +107,19 @@ def raise_if_dead(p: subprocess.Popen) -> None:
         raise RuntimeError(f"Tensorboard process died, exit code({ret_code}).")
 
 
+def get_num_fetch_threads() -> int:
+    value = os.environ.get("DET_TENSORBOARD_FETCH_THREADS")
+    if value is None:
+        return DEFAULT_FETCH_THREADS
+    try:
+        num_threads = int(value)
+    except ValueError:
+        num_threads = 0
+    if num_threads < 1:
+        raise ValueError(f"DET_TENSORBOARD_FETCH_THREADS must be a positive integer, not {value!r}")
+    return num_threads
+
+
 def start_tensorboard(
     storage_config: Dict[str, Any],
     tb_version: str,
@@ -114,6 +127,7 @@ def start_tensorboard(
     add_tb_args: List[str],
 ) -> int:
     """Start Tensorboard and look for new files."""
+    num_fetch_threads = get_num_fetch_threads()
     with tempfile.TemporaryDirectory() as local_dir:
         # Get fetcher and perform initial fetch
         logger.debug(
@@ -129,7 +143,7 @@ def start_tensorboard(
         logger.debug(f"tensorboard args: {tb_args}")
         tensorboard_process = subprocess.Popen(tb_args)
         tb_fetch_manager = TBFetchManager()
-        work_queue: queue.Queue = queue.Queue(maxsize=WORK_QUEUE_MAX_SIZE)
+        work_queue = TBFetchQueue()
 
         iteration_thread = TBFetchIterationThread(
             fetcher=fetcher, work_queue=work_queue, daemon=True
@@ -141,7 +155,7 @@ def start_tensorboard(
                 new_file_callback=tb_fetch_manager.on_file_fetched,
                 daemon=True,
             )
-            for _ in range(NUM_FETCH_THREADS)
+            for _ in range(num_fetch_threads)
         ]
 
         with det.util.forward_signals(tensorboard_process):
@@ -213,8 +227,56 @@ class TBFetchManager:
             return self._num_fetched_files
 
 
+class TBFetchQueue:
+    """Queue of files to fetch, which hands out the most recently modified files first.
+
+    A file is queued at most once, and is never handed to two fetch threads at once: a file which
+    is modified again while it is being fetched is queued again once that fetch is done.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, str]] = []
+        self._mtimes: Dict[str, float] = {}
+        self._queued: Set[str] = set()
+        self._active: Set[str] = set()
+        self._requeue: Set[str] = set()
+
+    def put(self, filepath: str, mtime: float) -> None:
+        with self._cond:
+            queued_mtime = self._mtimes.get(filepath)
+            self._mtimes[filepath] = mtime
+            if filepath in self._active:
+                self._requeue.add(filepath)
+            elif filepath not in self._queued or mtime != queued_mtime:
+                # A file queued with an older mtime is pushed again at its new priority, and the
+                # entry with the older mtime is stale, so get() drops it when it reaches the top.
+                self._queued.add(filepath)
+                heapq.heappush(self._heap, (-mtime, filepath))
+                self._cond.notify()
+
+    def get(self) -> str:
+        with self._cond:
+            while True:
+                while not self._heap:
+                    self._cond.wait()
+                neg_mtime, filepath = heapq.heappop(self._heap)
+                if filepath in self._queued and -neg_mtime == self._mtimes[filepath]:
+                    break
+            self._queued.remove(filepath)
+            self._active.add(filepath)
+            return filepath
+
+    def task_done(self, filepath: str, retry: bool = False) -> None:
+        with self._cond:
+            self._active.remove(filepath)
+            if filepath in self._requeue or retry:
+                self._requeue.discard(filepath)
+                self.put(filepath, self._mtimes[filepath])
+
+
 class TBFetchIterationThread(threading.Thread):
-    """Thread to continuously iterate over the fetchers files and add them to a threading.Queue
+    """Thread to continuously iterate over the fetchers files and add them to a TBFetchQueue
 
     Note: We are making the assumption that there will only be one of these running per process.
     If we add more, then the base fetcher will need to support locking around the _file_records
@@ -224,7 +286,7 @@ class TBFetchIterationThread(threading.Thread):
     def __init__(
         self,
         fetcher: fetchers.Fetcher,
-        work_queue: queue.Queue,
+        work_queue: TBFetchQueue,
         *args: Any,
         **kwargs: Any,
     ) -> None:
@@ -236,7 +298,8 @@ class TBFetchIterationThread(threading.Thread):
         while True:
             try:
                 for filepath in self._fetcher.list_all_generator():
-                    self._work_queue.put(filepath, block=True)
+                    mtime = self._fetcher._file_records[filepath].timestamp()
+                    self._work_queue.put(filepath, mtime)
             except Exception as e:
                 logger.warning(
                     f"Failure listing TensorBoard files from {self._fetcher}. Error: {e}"
@@ -253,7 +316,7 @@ class TBFetchThread(threading.Thread):
     def __init__(
         self,
         fetcher: fetchers.Fetcher,
-        work_queue: queue.Queue,
+        work_queue: TBFetchQueue,
         new_file_callback: Callable,
         *args: Any,
         **kwargs: Any,
@@ -265,8 +328,8 @@ class TBFetchThread(threading.Thread):
 
     def run(self) -> None:
         while True:
+            filepath = self._work_queue.get()
             try:
-                filepath = self._work_queue.get(block=True)
                 self._fetcher._fetch(filepath, self._new_file_callback)
             except Exception as e:
                 logger.warning(
@@ -275,8 +338,9 @@ class TBFetchThread(threading.Thread):
                     exc_info=True,
                 )
                 # Put the failed filepath back onto the list
-                if filepath:
-                    self._work_queue.put(filepath, block=True)
+                self._work_queue.task_done(filepath, retry=True)
+            else:
+                self._work_queue.task_done(filepath)
 
 
 if __name__ == "__main__":
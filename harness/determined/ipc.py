@@ -1,9 +1,12 @@
+import io
 import logging
 import os
+import pickle
 import selectors
 import signal
 import socket
 import subprocess
+import sys
 import time
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
@@ -31,6 +34,57 @@ class _SerialMessage:
         self.payload = payload
 
 
+# Numpy arrays at least this large are sent as their own ZMQ frames instead of being copied into
+# the pickle stream.  Smaller arrays are cheaper to inline.
+_OUT_OF_BAND_MIN_BYTES = 1024
+
+
+class _MessagePickler(pickle.Pickler):
+    def reducer_override(self, obj: Any) -> Any:
+        # Don't import numpy here; if it has not been imported, there are no arrays to send.
+        # Another thread may be part way through importing it, in which case there are none yet.
+        ndarray = getattr(sys.modules.get("numpy"), "ndarray", None)
+        if ndarray is not None and type(obj) is ndarray:
+            if obj.nbytes >= _OUT_OF_BAND_MIN_BYTES and not obj.dtype.hasobject:
+                # Protocol 5 passes contiguous array data to buffer_callback, out-of-band.
+                return obj.__reduce_ex__(5)
+            return obj.__reduce_ex__(4)
+        return NotImplemented
+
+
+def _send_message(socket: Any, message: _SerialMessage) -> None:
+    """
+    Send a message as a multipart ZMQ message.
+
+    The first frame is a pickle of the message, which for large numpy arrays contains only a small
+    header (dtype, shape, and strides).  The array data follows as raw frames, so it is never copied
+    into or out of a pickle stream.
+    """
+    f = io.BytesIO()
+    buffers: List[pickle.PickleBuffer] = []
+    _MessagePickler(f, protocol=5, buffer_callback=buffers.append).dump(message)
+    if not buffers:
+        socket.send(f.getbuffer())
+        return
+    # Frames are copied into ZMQ on send, since the caller may modify its arrays after we return.
+    socket.send_multipart([f.getbuffer(), *buffers])
+
+
+def _recv_message(socket: Any) -> Any:
+    """
+    Receive a message from _send_message().  Out-of-band buffers are not copied; numpy arrays in
+    the message are backed directly by the (writable) received ZMQ frames.
+    """
+    import zmq
+
+    # The header is small, so it is cheapest to receive it as bytes.
+    header = socket.recv()
+    frames = []
+    while socket.getsockopt(zmq.RCVMORE):
+        frames.append(socket.recv(copy=False).buffer)
+    return pickle.loads(header, buffers=frames)
+
+
 class ZMQBroadcastServer:
     """
     Similar to ZMQServer except with broadcast/gather semantics on exactly two ports.
@@ -140,9 +194,15 @@ class ZMQBroadcastServer:
         Broadcast a message object to each connection.
         """
 
-        self._pub_socket.send_pyobj(_SerialMessage(self._send_serial, obj))
+        _send_message(self._pub_socket, _SerialMessage(self._send_serial, obj))
         self._send_serial += 1
 
+    def set_num_connections(self, num_connections: int) -> None:
+        """
+        Change how many messages each gather() waits for, after clients have stopped sending.
+        """
+        self._num_connections = num_connections
+
     def gather(self) -> List[Any]:
         out = [self._recv_one() for _ in range(self._num_connections)]
 
@@ -155,7 +215,7 @@ class ZMQBroadcastServer:
         Receive one _SerialMessage from the socket and confirm that it is in-order.
         """
 
-        obj = self._pull_socket.recv_pyobj()
+        obj = _recv_message(self._pull_socket)
 
         if not isinstance(obj, _SerialMessage):
             raise RuntimeError(f"non-_SerialMessage: {type(obj).__name__}")
@@ -219,10 +279,10 @@ class ZMQBroadcastClient:
     def send(self, obj: Any) -> None:
         message = _SerialMessage(self._send_serial, obj)
         self._send_serial += 1
-        self._push_socket.send_pyobj(message)
+        _send_message(self._push_socket, message)
 
     def recv(self) -> Any:
-        obj = self._sub_socket.recv_pyobj()
+        obj = _recv_message(self._sub_socket)
 
         if not isinstance(obj, _SerialMessage):
             raise RuntimeError(f"non-_SerialMessage: {type(obj).__name__}")
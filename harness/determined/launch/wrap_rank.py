@@ -16,7 +16,7 @@ import argparse
 import contextlib
 import io
 import os
-import re
+import select
 import subprocess
 import sys
 import threading
@@ -25,13 +25,14 @@ from typing import BinaryIO, Iterator, List
 import determined as det
 from determined import constants
 
-lineend = re.compile(rb"[\r\n]")
+# Read up to a full pipe's worth of output at a time.
+READ_SIZE = 64 * 1024
 
 
 # Duplicated in ship_logs.py.  If you find a bug here, fix it there too.
-def read_newlines_or_carriage_returns(fd: io.RawIOBase) -> Iterator[str]:
+def read_line_batches(fd: io.RawIOBase) -> Iterator[List[str]]:
     r"""
-    Read lines, delineated by either '\n' or '\r.
+    Read batches of lines, delineated by either '\n' or '\r.
 
     Unlike the default io.BufferedReader used in subprocess.Popen(bufsize=-1), we read until we
     encounter either '\n' or \r', and treat that as one line.
@@ -39,65 +40,85 @@ def read_newlines_or_carriage_returns(fd: io.RawIOBase) -> Iterator[str]:
     Specifically, io.BufferedReader doesn't handle tqdm progress bar outputs very well; it treats
     all of the '\r' outputs as one enormous line.
 
+    Rather than searching for one line break at a time, everything available is read and split
+    into lines at once, which matters for processes that write many lines per second.
+
     Args:
         fd: an unbuffered stdout or stderr from a subprocess.Popen.
 
     Yields:
-        A series of str, one per line.  Each line always ends with a '\n'.  Each line will be
-        broken to length io.DEFAULT_BUFFER_SIZE, even if the underlying io didn't have a linebreak.
+        A list of str per read, one per line.  Each line always ends with a '\n'.  Each line will
+        be broken to length io.DEFAULT_BUFFER_SIZE, even if the underlying io didn't have a
+        linebreak.  Invalid utf8 is replaced, rather than raising an error.
     """
     # Ship lines of length of DEFAULT_BUFFER_SIZE, including the terminating newline.
     limit = io.DEFAULT_BUFFER_SIZE - 1
-    nread = 0
-    chunks: List[bytes] = []
-
-    def oneline() -> str:
-        nonlocal nread
-        nonlocal chunks
-        out = b"".join(chunks).decode("utf8")
-        chunks = []
-        nread = 0
-        return out
+    partial = b""
 
     while True:
-        buf = fd.read(limit - nread)
+        buf = fd.read(READ_SIZE)
         if not buf:
             # EOF.
             break
 
-        # Extract all the lines from this buffer.
-        while buf:
-            m = lineend.search(buf)
-            if m is None:
-                # No line break here; just append to chunks.
-                chunks.append(buf)
-                nread += len(buf)
-                break
+        # Even if we find a '\r', emit a '\n'.
+        buf = (partial + buf).replace(b"\r", b"\n")
+        chunks = buf.split(b"\n")
+        # Whatever follows the last line break is the start of the next line.
+        partial = chunks.pop()
 
-            # Line break found!
-            start, end = m.span()
-            chunks.append(buf[:start])
-            # Even if we matched a '\r', emit a '\n'.
-            chunks.append(b"\n")
-            yield oneline()
-            # keep checking the rest of buf
-            buf = buf[end:]
-
-        # Detect if we reached our buffer limit.
-        if nread >= limit:
+        if max(map(len, chunks), default=0) < limit:
+            # No line is too long, so decode all the lines at once.
+            text = buf[: len(buf) - len(partial)].decode("utf8", errors="replace")
+            lines = [line + "\n" for line in text[:-1].split("\n")] if text else []
+        else:
+            lines = []
+            for chunk in chunks:
+                while len(chunk) >= limit:
+                    # Pretend we got a line break at the limit.
+                    lines.append(chunk[:limit].decode("utf8", errors="replace") + "\n")
+                    chunk = chunk[limit:]
+                lines.append(chunk.decode("utf8", errors="replace") + "\n")
+
+        # Detect if the next line already reached our limit.
+        while len(partial) >= limit:
             # Pretend we got a line anyway.
-            chunks.append(b"\n")
-            yield oneline()
+            lines.append(partial[:limit].decode("utf8", errors="replace") + "\n")
+            partial = partial[limit:]
+
+        if lines:
+            yield lines
 
     # One last line, maybe.
-    if chunks:
-        chunks.append(b"\n")
-        yield oneline()
+    if partial:
+        yield [partial.decode("utf8", errors="replace") + "\n"]
+
+
+def read_newlines_or_carriage_returns(fd: io.RawIOBase) -> Iterator[str]:
+    r"""
+    Read lines, delineated by either '\n' or '\r, one at a time.  See read_line_batches.
+    """
+    for lines in read_line_batches(fd):
+        yield from lines
 
 
 def forward_stream(src_stream: io.RawIOBase, dst_stream: BinaryIO, rank: str) -> None:
-    for line in read_newlines_or_carriage_returns(src_stream):
-        os.write(dst_stream.fileno(), f"[rank={rank}] {line}".encode("utf8"))
+    prefix = f"[rank={rank}] ".encode("utf8")
+    fd = dst_stream.fileno()
+    for lines in read_line_batches(src_stream):
+        # Write as many whole lines at once as can be written atomically, so that lines from other
+        # processes writing to the same pipe aren't mixed into them.
+        chunk: List[bytes] = []
+        size = 0
+        for line in lines:
+            data = prefix + line.encode("utf8")
+            if chunk and size + len(data) > select.PIPE_BUF:
+                os.write(fd, b"".join(chunk))
+                chunk = []
+                size = 0
+            chunk.append(data)
+            size += len(data)
+        os.write(fd, b"".join(chunk))
 
 
 def run_all(ts: List[threading.Thread]) -> None:
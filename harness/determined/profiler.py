@@ -1,3 +1,4 @@
+import array
 import contextlib
 import logging
 import queue
@@ -6,7 +7,19 @@ import time
 from datetime import datetime, timedelta, timezone
 from enum import Enum
 from types import TracebackType
-from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union, cast
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 import psutil
 
@@ -199,6 +212,168 @@ class Timing:
         )
 
 
+class _TimingRing:
+    """
+    A preallocated ring buffer of timings, written by one thread and drained by another.
+
+    Only the writing thread advances head and only the draining thread advances tail, so neither
+    needs a lock.  Timings recorded while the ring is full are dropped and counted.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        check.eq(capacity & (capacity - 1), 0, "capacity must be a power of two")
+        self.mask = capacity - 1
+        self.capacity = capacity
+        self.metric_ids = array.array("l", [0]) * capacity
+        self.batch_idxs = array.array("q", [0]) * capacity
+        self.starts = array.array("d", [0.0]) * capacity
+        self.durations = array.array("d", [0.0]) * capacity
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        # Start times of the timed regions this thread is currently in, innermost last.
+        self.open_starts = []  # type: List[float]
+        self.recorders = {}  # type: Dict[Tuple[str, bool], _TimingRecorder]
+        self.thread = threading.current_thread()
+
+    def drain(self) -> List[Tuple[int, int, float, float]]:
+        """Return (metric_id, batch_idx, start, duration) for each timing since the last drain."""
+        head = self.head
+        out = []
+        for n in range(self.tail, head):
+            i = n & self.mask
+            out.append((self.metric_ids[i], self.batch_idxs[i], self.starts[i], self.durations[i]))
+        self.tail = head
+        return out
+
+
+class _TimingRecorder:
+    """
+    The context manager returned by ProfilerAgent.record_timing() for one metric in one thread.
+    It is reused for every call, so recording a timing allocates nothing.
+    """
+
+    __slots__ = ("agent", "ring", "metric_id")
+
+    def __init__(self, agent: "ProfilerAgent", ring: _TimingRing, metric_id: int) -> None:
+        self.agent = agent
+        self.ring = ring
+        self.metric_id = metric_id
+
+    def __enter__(self) -> None:
+        self.ring.open_starts.append(time.perf_counter())
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], *_: Any) -> None:
+        ring = self.ring
+        if exc_type is not None:
+            # Like any code after the yield of a generator-based context manager, skip recording.
+            ring.open_starts.pop()
+            return
+        agent = self.agent
+        if agent.sync_timings and agent.sync_device:
+            agent.sync_device()
+        end = time.perf_counter()
+        start = ring.open_starts.pop()
+
+        head = ring.head
+        if head - ring.tail >= ring.capacity:
+            ring.dropped += 1
+            return
+        i = head & ring.mask
+        ring.metric_ids[i] = self.metric_id
+        ring.batch_idxs[i] = agent.current_batch_idx
+        ring.starts[i] = start
+        ring.durations[i] = end - start
+        # Publish the slot only after it is written.
+        ring.head = head + 1
+
+
+class _TimingRings:
+    """
+    The per-thread timing rings of a ProfilerAgent, and the (name, accumulate) of each metric id
+    they contain.
+
+    Timings are stored with time.perf_counter() start times, which are cheaper to read than the
+    wall clock, and converted to wall clock times when they are drained.
+    """
+
+    CAPACITY = 1 << 14
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._rings = []  # type: List[_TimingRing]
+        self._metrics = []  # type: List[Tuple[str, bool]]
+        self._metric_ids = {}  # type: Dict[Tuple[str, bool], int]
+        self._wall_clock_offset = time.time() - time.perf_counter()
+        self._dropped = 0
+        self._dropped_by_exited_threads = 0
+        # The batch being trained; accumulated timings for earlier batches are complete.
+        self.batch_idx = 0
+
+    def get(self) -> _TimingRing:
+        """Return the calling thread's ring."""
+        try:
+            return cast(_TimingRing, self._local.ring)
+        except AttributeError:
+            ring = self._local.ring = _TimingRing(self.CAPACITY)
+            with self._lock:
+                self._rings.append(ring)
+            return ring
+
+    def recorder(self, agent: "ProfilerAgent", name: str, accumulate: bool) -> _TimingRecorder:
+        """Return the calling thread's recorder for a metric."""
+        ring = self.get()
+        key = (name, accumulate)
+        recorder = ring.recorders.get(key)
+        if recorder is None:
+            with self._lock:
+                if key not in self._metric_ids:
+                    self._metric_ids[key] = len(self._metrics)
+                    self._metrics.append(key)
+                metric_id = self._metric_ids[key]
+            recorder = ring.recorders[key] = _TimingRecorder(agent, ring, metric_id)
+        return recorder
+
+    def drain(self) -> List[NamedMeasurement]:
+        """Collect the timings recorded by every thread since the last drain."""
+        with self._lock:
+            rings = list(self._rings)
+            metrics = list(self._metrics)
+
+        out = []
+        dropped = self._dropped_by_exited_threads
+        for ring in rings:
+            # Check first, so that a thread which has exited has no timings left after this drain.
+            exited = not ring.thread.is_alive()
+            for metric_id, batch_idx, start, duration in ring.drain():
+                name, accumulate = metrics[metric_id]
+                timestamp = datetime.fromtimestamp(start + self._wall_clock_offset, timezone.utc)
+                out.append(
+                    NamedMeasurement(
+                        metric_type=MetricType.TIMING,
+                        metric_name=name,
+                        timestamp=timestamp,
+                        batch_idx=batch_idx,
+                        value=duration,
+                        accumulated=accumulate,
+                    )
+                )
+            dropped += ring.dropped
+            if exited:
+                with self._lock:
+                    self._rings.remove(ring)
+                self._dropped_by_exited_threads += ring.dropped
+
+        if dropped > self._dropped:
+            logger.warning(
+                f"The profiler dropped {dropped - self._dropped} timings because they were "
+                "recorded faster than they could be collected."
+            )
+            self._dropped = dropped
+        return out
+
+
 class StartMessage:
     pass
 
@@ -231,6 +406,9 @@ def profiling_metrics_exist(master_url: str, trial_id: str) -> bool:
     return len(series_labels) > 0
 
 
+# Returned by record_timing() when timings are not being recorded.
+_NULL_CONTEXT = contextlib.nullcontext()
+
 SendBatchFnType = Callable[[str, List[TrialProfilerMetricsBatch]], None]
 CheckDataExistsFnType = Callable[[str, str], bool]
 
@@ -302,6 +480,10 @@ class ProfilerAgent:
 
         self.shutdown_lock = threading.Lock()
 
+        self._timing_rings = _TimingRings()
+        # Whether record_timing() records anything, cached since it is checked so often.
+        self._recording_timings = False
+
         # If the ProfilingAgent is disabled, don't waste resources by creating useless threads
         # or making API calls
         if self.is_enabled:
@@ -338,7 +520,7 @@ class ProfilerAgent:
                 queue.Queue()
             )  # type: """queue.Queue[Union[FinalizeBatchMessage, NamedMeasurement, StartMessage, ShutdownMessage]]""" # noqa: E501
             self.metrics_batcher_thread = MetricsBatcherThread(
-                trial_id, agent_id, self.metrics_batcher_queue, self.send_queue
+                trial_id, agent_id, self.metrics_batcher_queue, self.send_queue, self._timing_rings
             )
 
             self.sender_thread = ProfilerSenderThread(
@@ -438,6 +620,7 @@ class ProfilerAgent:
             return
 
         self.training = training
+        self._update_recording_timings()
         if not training:
             self.metrics_batcher_queue.put(FinalizeBatchMessage())
 
@@ -453,8 +636,9 @@ class ProfilerAgent:
         if self.sysmetrics_is_enabled:
             self.sys_metric_collector_thread.update_batch_idx(self.current_batch_idx)
 
-        if self.timings_is_enabled:
-            self.metrics_batcher_queue.put(FinalizeBatchMessage())
+        # Accumulated timings for earlier batches are complete now; the MetricsBatcherThread
+        # notices when it next drains the timing rings.
+        self._timing_rings.batch_idx = self.current_batch_idx
 
         # Check if we should start collecting metrics
         if not self.has_started and self.current_batch_idx >= self.begin_on_batch:
@@ -483,27 +667,26 @@ class ProfilerAgent:
             )
         )
 
-    @contextlib.contextmanager
     def record_timing(
         self, metric_name: str, accumulate: bool = False, requires_sync: bool = True
-    ) -> Iterator[None]:
+    ) -> ContextManager[None]:
+        """
+        Return a context manager that records how long its body takes, as a timing metric.
+
+        This is called around every step of every batch, so it is kept cheap: the context manager
+        for each metric is created once and reused, and timings are written to a preallocated
+        buffer for the calling thread, which the MetricsBatcherThread drains.
+        """
         if (
-            not self.is_enabled
-            or not self.timings_is_enabled
-            or not self.is_active
+            not self._recording_timings
             # Skip recording if this metric requires a sync to be valid and sync is disabled.
             or (not self.sync_timings and requires_sync)
         ):
-            yield
-            return
+            return _NULL_CONTEXT
+        return self._timing_rings.recorder(self, metric_name, accumulate)
 
-        timing = Timing(metric_name, self.current_batch_idx)
-        timing.start()
-        yield
-        if self.sync_timings and self.sync_device:
-            self.sync_device()
-        timing.end()
-        self.metrics_batcher_queue.put(timing.to_measurement(accumulate=accumulate))
+    def _update_recording_timings(self) -> None:
+        self._recording_timings = self.timings_is_enabled and self.is_active
 
     def cleanup_timer(self) -> None:
         if not self.is_enabled:
@@ -523,6 +706,7 @@ class ProfilerAgent:
 
         self.shutdown_timer.activate()
         self.has_started = True
+        self._update_recording_timings()
 
     def _end_collection(self) -> None:
         """
@@ -552,6 +736,7 @@ class ProfilerAgent:
             self.sender_thread.join()
 
             self.has_finished = True
+            self._update_recording_timings()
 
 
 class PreemptibleTimer(threading.Thread):
@@ -736,6 +921,7 @@ class MetricsBatcherThread(threading.Thread):
     """
 
     FLUSH_INTERVAL = 10  # How often to make API calls
+    DRAIN_INTERVAL = 0.5  # How often to collect timings from the timing rings
 
     def __init__(
         self,
@@ -743,10 +929,12 @@ class MetricsBatcherThread(threading.Thread):
         agent_id: str,
         inbound_queue: queue.Queue,
         send_queue: queue.Queue,
+        timing_rings: Optional[_TimingRings] = None,
     ) -> None:
         self.inbound_queue = inbound_queue
         self.send_queue = send_queue
-        self.accumulating_measurements = {}  # type: Dict[str, NamedMeasurement]
+        self.timing_rings = timing_rings
+        self.accumulating_measurements = {}  # type: Dict[Tuple[str, int], NamedMeasurement]
         self.metrics_batch = MetricBatch(trial_id, agent_id)
         super().__init__(daemon=True)
 
@@ -757,11 +945,41 @@ class MetricsBatcherThread(threading.Thread):
     def send_shutdown_signal(self) -> None:
         self.inbound_queue.put(ShutdownMessage())
 
+    def _add_measurement(self, m: NamedMeasurement) -> None:
+        if m.accumulated:
+            key = (m.id, m.batch_idx)
+            if key in self.accumulating_measurements:
+                self.accumulating_measurements[key].measurement += m.measurement
+            else:
+                self.accumulating_measurements[key] = m
+        else:
+            self.metrics_batch.append(m.metric_type, m.metric_name, m)
+
+    def _collect_timings(self, finalize: bool) -> None:
+        """
+        Collect timings from the timing rings.  Accumulated timings are summed until their batch is
+        complete, or until finalize=True.
+        """
+        if self.timing_rings is None:
+            return
+        # Read the batch idx first: every timing for an earlier batch has been recorded by then.
+        batch_idx = self.timing_rings.batch_idx
+        for m in self.timing_rings.drain():
+            self._add_measurement(m)
+        remaining = {}
+        for key, msr in self.accumulating_measurements.items():
+            if finalize or msr.batch_idx < batch_idx:
+                self.metrics_batch.append(msr.metric_type, msr.metric_name, msr)
+            else:
+                remaining[key] = msr
+        self.accumulating_measurements = remaining
+
     def _run(self) -> None:
         # Do nothing while we wait for a StartMessage
         while True:
             msg = self.inbound_queue.get()
             if isinstance(msg, StartMessage):
+                # Timings are only written to the timing rings after the StartMessage is sent.
                 break
             if isinstance(msg, ShutdownMessage):
                 return
@@ -772,29 +990,25 @@ class MetricsBatcherThread(threading.Thread):
         # Send metrics until we are told to shutdown.
         while True:
             deadline = time.time() + self.FLUSH_INTERVAL
-            for m in pop_until_deadline(self.inbound_queue, deadline):
-                if isinstance(m, ShutdownMessage):
-                    self.send_queue.put(self.metrics_batch.consume())
-                    return
-                elif isinstance(m, NamedMeasurement):
-                    if m.accumulated:
-                        if m.id in self.accumulating_measurements:
-                            self.accumulating_measurements[m.id].measurement += m.measurement
-                        else:
-                            self.accumulating_measurements[m.id] = m
+            while time.time() < deadline:
+                drain_deadline = min(deadline, time.time() + self.DRAIN_INTERVAL)
+                for m in pop_until_deadline(self.inbound_queue, drain_deadline):
+                    if isinstance(m, ShutdownMessage):
+                        self._collect_timings(finalize=False)
+                        self.send_queue.put(self.metrics_batch.consume())
+                        return
+                    elif isinstance(m, NamedMeasurement):
+                        self._add_measurement(m)
+                    elif isinstance(m, FinalizeBatchMessage):
+                        self._collect_timings(finalize=True)
                     else:
-                        self.metrics_batch.append(m.metric_type, m.metric_name, m)
-                elif isinstance(m, FinalizeBatchMessage):
-                    for msr in self.accumulating_measurements.values():
-                        self.metrics_batch.append(msr.metric_type, msr.metric_name, msr)
-                    self.accumulating_measurements = {}
-                else:
-                    logger.fatal(
-                        "ProfilerAgent.MetricsBatcherThread received a message "
-                        f"of unexpected type '{type(m)}' from the "
-                        "inbound_queue. This should never happen - there must "
-                        "be a bug in the code."
-                    )
+                        logger.fatal(
+                            "ProfilerAgent.MetricsBatcherThread received a message "
+                            f"of unexpected type '{type(m)}' from the "
+                            "inbound_queue. This should never happen - there must "
+                            "be a bug in the code."
+                        )
+                self._collect_timings(finalize=False)
 
             # Timeout met.
             if not self.metrics_batch.isempty():
@@ -1064,11 +1278,10 @@ class DummyProfilerAgent(ProfilerAgent):
     def __exit__(self, *_: Any) -> None:
         pass
 
-    @contextlib.contextmanager
     def record_timing(
         self, metric_name: str, accumulate: bool = False, requires_sync: bool = True
-    ) -> Iterator[None]:
-        yield
+    ) -> ContextManager[None]:
+        return _NULL_CONTEXT
 
     def set_training(self, training: bool) -> None:
         pass
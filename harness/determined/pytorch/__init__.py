@@ -3,6 +3,7 @@ from determined.pytorch._data import (
     DataLoader,
     TorchData,
     _Data,
+    _DevicePrefetcher,
     adapt_batch_sampler,
     data_length,
     to_device,
@@ -22,6 +23,8 @@ from determined.pytorch._metric_utils import (
     _prepare_metrics_reducers,
     _reduce_metrics,
     _convert_metrics_to_numpy,
+    _convert_batch_metrics_to_numpy,
+    _detach_metrics,
     _log_tb_metrics,
 )
 from determined.pytorch._experimental import PyTorchExperimentalContext
@@ -1,13 +1,20 @@
+import collections
+import concurrent.futures
+import contextlib
+import functools
 import logging
 from typing import (
     Any,
     Callable,
+    ContextManager,
+    Deque,
     Dict,
     Iterator,
     List,
     Optional,
     Sequence,
     Set,
+    Tuple,
     Type,
     TypeVar,
     Union,
@@ -348,13 +355,19 @@ def data_length(data: _Data) -> int:
 
 
 def to_device(
-    data: _Data, device: torch.device, warned_types: Optional[Set[Type]] = None
+    data: _Data,
+    device: torch.device,
+    warned_types: Optional[Set[Type]] = None,
+    non_blocking: bool = False,
 ) -> TorchData:
     """
     Accept np.ndarray, torch.Tensor, list, or dictionary. Recursively convert any ndarrays to
     tensors and call .to() on any tensors or data types that have custom serialization logic
     defined via a callable to() attribute.
 
+    With non_blocking, tensors are copied to a CUDA device asynchronously with respect to the host,
+    after being copied to pinned memory if they are not already in it.
+
     If the data cannot be moved to device, log a warning (only once per type) and return the
     original data.
     """
@@ -362,23 +375,310 @@ def to_device(
     if warned_types is None:
         warned_types = set()
 
-    if isinstance(data, dict):
-        return {k: to_device(v, device, warned_types) for k, v in data.items()}  # type: ignore
-    elif isinstance(data, list):
-        return [to_device(d, device, warned_types) for d in data]  # type: ignore
-    elif isinstance(data, tuple):
-        return tuple(to_device(d, device, warned_types) for d in data)  # type: ignore
-    elif isinstance(data, np.ndarray):
-        # Torch supports floats, complex floats, ints, uints, and bools as tensors.
-        # Those correspond to numpy dtype kinds: "f", "c", "i", "u", and "b", respectively.
-        # Do not attempt to convert any other kinds to tensors.
-        if data.dtype.kind in "fciub":
-            return torch.from_numpy(data).to(device)
-    elif hasattr(data, "to") and callable(data.to):  # type: ignore
-        return data.to(device)  # type: ignore
-
+    if _kind(type(data)) == _LEAF:
+        move = _leaf_mover(type(data))
+        return cast(TorchData, move(data, device, warned_types, non_blocking))
+
+    # Batches have the same structure step after step, so rather than walking the structure of
+    # each batch to find what to do with each item, flatten it and look up its plan.
+    signature, leaves = _flatten(data)
+    plan = _batch_plan(signature)
+    if plan.tensors_only and not non_blocking:
+        moved = [tensor.to(device) for tensor in leaves]
+    else:
+        moved = [
+            move(leaf, device, warned_types, non_blocking) for move, leaf in zip(plan.moves, leaves)
+        ]
+    return cast(TorchData, plan.rebuild(moved, signature))
+
+
+def _tensor_to_device(
+    tensor: torch.Tensor, device: torch.device, non_blocking: bool
+) -> torch.Tensor:
+    if not non_blocking or device.type != "cuda":
+        return tensor.to(device)
+    if tensor.device.type == "cpu" and not tensor.is_pinned():
+        # Copies from pageable memory are synchronous.
+        tensor = tensor.pin_memory()
+    return tensor.to(device, non_blocking=True)
+
+
+def _move_tensor(
+    data: torch.Tensor, device: torch.device, warned_types: Set[Type], non_blocking: bool
+) -> torch.Tensor:
+    return _tensor_to_device(data, device, non_blocking)
+
+
+def _move_ndarray(
+    data: np.ndarray, device: torch.device, warned_types: Set[Type], non_blocking: bool
+) -> Any:
+    # Torch supports floats, complex floats, ints, uints, and bools as tensors.
+    # Those correspond to numpy dtype kinds: "f", "c", "i", "u", and "b", respectively.
+    # Do not attempt to convert any other kinds to tensors.
+    if data.dtype.kind in "fciub":
+        return _tensor_to_device(torch.from_numpy(data), device, non_blocking)
+    return _not_moved(data, warned_types)
+
+
+def _move_other(
+    data: Any, device: torch.device, warned_types: Set[Type], non_blocking: bool
+) -> Any:
+    if hasattr(data, "to") and callable(data.to):
+        return data.to(device)
+    return _not_moved(data, warned_types)
+
+
+def _not_moved(data: Any, warned_types: Set[Type]) -> Any:
     if type(data) not in warned_types:
         warned_types.add(type(data))
         logger.warning(f"Was not able to move data item of type '{type(data).__name__}' to device.")
 
-    return data  # type:ignore
+    return data
+
+
+def _leaf_mover(cls: type) -> Callable[[Any, torch.device, Set[Type], bool], Any]:
+    if issubclass(cls, torch.Tensor):
+        return _move_tensor
+    if issubclass(cls, np.ndarray):
+        return _move_ndarray
+    return _move_other
+
+
+# How to_device() treats each type of data, by the first of these it is an instance of.
+_DICT, _LIST, _TUPLE, _LEAF = "dict", "list", "tuple", "leaf"
+_kinds: Dict[type, str] = {}
+
+
+def _kind(cls: type) -> str:
+    kind = _kinds.get(cls)
+    if kind is None:
+        if issubclass(cls, dict):
+            kind = _DICT
+        elif issubclass(cls, list):
+            kind = _LIST
+        elif issubclass(cls, tuple):
+            kind = _TUPLE
+        else:
+            kind = _LEAF
+        _kinds[cls] = kind
+    return kind
+
+
+def _leaves_only(types: Tuple[type, ...]) -> bool:
+    kinds = set(map(_kinds.get, types))
+    if None in kinds:
+        kinds = set(map(_kind, types))
+    return kinds <= {_LEAF}
+
+
+def _flatten(data: Any) -> Tuple[Tuple, List[Any]]:
+    """
+    Return the signature of the structure of the lists, tuples and dicts of data, and the leaves of
+    the structure in order.  Data with the same signature differs only in the values of its leaves.
+
+    The signature lists the containers of the structure in preorder, each with its kind, its keys
+    if it is a dict, and the types of its items.
+    """
+    signature = []
+    leaves = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        kind = _kind(type(node))
+        if kind == _LEAF:
+            leaves.append(node)
+            continue
+        if kind == _DICT:
+            keys = tuple(node)
+            items = list(node.values())
+        else:
+            keys = None
+            items = list(node)
+        types = tuple(map(type, items))
+        signature.append((kind, keys, types))
+        # Most containers hold only leaves, which need not be visited one by one.
+        if _leaves_only(types):
+            leaves.extend(items)
+        else:
+            stack.extend(reversed(items))
+    return tuple(signature), leaves
+
+
+class _BatchPlan:
+    """
+    How to move data with a given signature to device: the function which moves each leaf, chosen
+    by its type, and a program which rebuilds the structure from the moved leaves.
+
+    Keys which are equal but of different types, like 1 and True, give equal signatures, so dicts
+    are rebuilt with the keys in the signature of the data being moved rather than the plan's own.
+    """
+
+    def __init__(self, signature: Tuple) -> None:
+        self.moves: List[Callable[[Any, torch.device, Set[Type], bool], Any]] = []
+        # The steps to rebuild the structure, with every container built after its items.  Each
+        # step takes `count` values, either the next leaves (if `from_leaves`) or the last values
+        # built, and pushes them, or what `build` builds of them and the signature if it is not
+        # None.
+        self._program: List[Tuple[int, Optional[Callable[[List[Any], Tuple], Any]], bool]] = []
+        end = self._compile(signature, 0)
+        assert end == len(signature), signature
+        self.tensors_only = all(move is _move_tensor for move in self.moves)
+
+    def _compile(self, signature: Tuple, i: int) -> int:
+        """Compile the container at signature[i] and its items, returning the index after them."""
+        kind, _, types = signature[i]
+        build: Callable[[List[Any], Tuple], Any]
+        if kind == _DICT:
+            build = functools.partial(_build_dict, i)
+        else:
+            build = _build_list if kind == _LIST else _build_tuple
+        i += 1
+        if _leaves_only(types):
+            self.moves.extend(map(_leaf_mover, types))
+            self._program.append((len(types), build, True))
+            return i
+        for cls in types:
+            if _kind(cls) != _LEAF:
+                i = self._compile(signature, i)
+                continue
+            self.moves.append(_leaf_mover(cls))
+            if self._program and self._program[-1][1:] == (None, True):
+                # Push runs of leaves at once.
+                self._program[-1] = (self._program[-1][0] + 1, None, True)
+            else:
+                self._program.append((1, None, True))
+        self._program.append((len(types), build, False))
+        return i
+
+    def rebuild(self, leaves: List[Any], signature: Tuple) -> Any:
+        stack: List[Any] = []
+        pos = 0
+        for count, build, from_leaves in self._program:
+            if from_leaves:
+                values = leaves[pos : pos + count]
+                pos += count
+            else:
+                start = len(stack) - count
+                values = stack[start:]
+                del stack[start:]
+            if build is None:
+                stack.extend(values)
+            else:
+                stack.append(build(values, signature))
+        return stack[0]
+
+
+def _build_dict(index: int, values: List[Any], signature: Tuple) -> Dict:
+    return dict(zip(signature[index][1], values))
+
+
+def _build_list(values: List[Any], signature: Tuple) -> List:
+    return values
+
+
+def _build_tuple(values: List[Any], signature: Tuple) -> Tuple:
+    return tuple(values)
+
+
+# Batches usually have the same structure every step, so only a few plans are ever needed.
+@functools.lru_cache(maxsize=64)
+def _batch_plan(signature: Tuple) -> _BatchPlan:
+    return _BatchPlan(signature)
+
+
+def _tensors(data: Any) -> Iterator[torch.Tensor]:
+    """Yield every tensor in the lists, tuples and dicts of data."""
+    for leaf in _flatten(data)[1]:
+        if isinstance(leaf, torch.Tensor):
+            yield leaf
+
+
+class _DevicePrefetcher:
+    """
+    Iterates over the batches of another iterator, moved to device up to `depth` batches ahead of
+    time, so that moving each batch to device overlaps with training on the batches before it.
+
+    On CUDA devices, batches are copied with non-blocking copies on a separate stream, from pinned
+    memory; the copies are queued from the iterating thread, and the default stream only waits for
+    a batch's copies when the batch is returned.  On other devices, batches are moved by a
+    background thread.  `wait_timing`, if given, times how long each batch is waited for, which is
+    the part of moving it to device that did not overlap with anything else.
+    """
+
+    def __init__(
+        self,
+        iterator: Iterator[_Data],
+        device: torch.device,
+        depth: int,
+        warned_types: Optional[Set[Type]] = None,
+        wait_timing: Optional[Callable[[], ContextManager]] = None,
+    ) -> None:
+        self._iterator = iterator
+        self._device = torch.device(device)
+        self._depth = max(depth, 1)
+        self._warned_types = warned_types if warned_types is not None else set()
+        self._wait_timing = wait_timing or contextlib.nullcontext
+        self._in_flight: Deque[Any] = collections.deque()
+        self._exhausted = False
+        self._stream: Optional[torch.cuda.Stream] = None
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        if self._device.type == "cuda":
+            self._stream = torch.cuda.Stream(device=self._device)  # type: ignore
+        else:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="device-prefetch"
+            )
+
+    def __iter__(self) -> "_DevicePrefetcher":
+        return self
+
+    def _start(self, batch: _Data) -> Any:
+        if self._stream is None:
+            assert self._executor is not None
+            return self._executor.submit(to_device, batch, self._device, self._warned_types)
+        with torch.cuda.stream(self._stream):
+            on_device = to_device(batch, self._device, self._warned_types, non_blocking=True)
+            event = torch.cuda.Event()  # type: ignore
+            event.record(self._stream)
+        return on_device, event
+
+    def _finish(self, started: Any) -> TorchData:
+        if self._stream is None:
+            return cast(TorchData, started.result())
+        batch, event = started
+        stream = torch.cuda.current_stream(self._device)
+        stream.wait_event(event)
+        # The batch was allocated on the prefetch stream; keep its memory from being reused until
+        # the work queued on the current stream is done with it.
+        for tensor in _tensors(batch):
+            if tensor.device.type == "cuda":
+                tensor.record_stream(stream)
+        return cast(TorchData, batch)
+
+    def __next__(self) -> TorchData:
+        # Keep depth batches in flight besides the one returned.
+        while not self._exhausted and len(self._in_flight) <= self._depth:
+            try:
+                batch = next(self._iterator)
+            except StopIteration:
+                self._exhausted = True
+                break
+            self._in_flight.append(self._start(batch))
+        if not self._in_flight:
+            self.close()
+            raise StopIteration
+        with self._wait_timing():
+            return self._finish(self._in_flight.popleft())
+
+    def close(self) -> None:
+        """Stop prefetching and drop the batches prefetched so far."""
+        self._in_flight.clear()
+        self._exhausted = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __del__(self) -> None:
+        # Iteration may be abandoned, as when validation stops after one batch in test mode.
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -20,6 +20,8 @@ class PyTorchExperimentalContext:
         self._auto_amp = False
         self._data_repro_checks_disabled = False
         self._auto_to_device = True
+        self._defer_metrics_to_host = False
+        self._prefetch_to_device = 0
 
     def use_amp(self) -> None:
         """
@@ -84,3 +86,42 @@ class PyTorchExperimentalContext:
         """
         self._auto_to_device = False
         logger.info("disabled automatically moving data to device")
+
+    def defer_metrics_to_host(self) -> None:
+        """
+        Keep the tensor metrics returned by ``train_batch`` and ``evaluate_batch`` on device until
+        they are needed, rather than copying each batch's metrics to the host right away.
+
+        Normally, the PyTorchTrialController calls ``.cpu()`` on every tensor metric after every
+        batch, which blocks until all queued device work for that batch has finished.  With this
+        setting, metric tensors are only detached after each batch, and are stacked and copied to
+        the host once per metrics reporting period during training, and once per validation.  The
+        host no longer waits on the device between batches, which lets it queue up the next batch
+        while the current one is still running.
+
+        The detached metric tensors stay in device memory until the end of each period, and
+        ``samples_per_second`` no longer includes time spent waiting on the device after each
+        batch.  Metric values and reductions are otherwise unchanged.
+        """
+        self._defer_metrics_to_host = True
+        logger.info("deferred copying metrics to host")
+
+    def prefetch_to_device(self, batches: int = 2) -> None:
+        """
+        Move the next ``batches`` batches of training and validation data to device ahead of time,
+        while the current batch is being trained on or evaluated.
+
+        Normally, the PyTorchTrialController moves each batch to device right before passing it to
+        ``train_batch`` or ``evaluate_batch``, so that the copy does not overlap with any other
+        work.  With this setting, on CUDA devices, batches are copied on a separate CUDA stream
+        with non-blocking copies, from pinned memory; passing ``pin_memory=True`` to the
+        ``DataLoader`` pins batches in a background thread rather than in the training loop.  On
+        other devices, batches are moved by a background thread.  The ``to_device`` profiler
+        timing then only includes the time spent waiting for a batch whose copy has not finished.
+
+        Up to ``batches`` more batches are kept in device memory at once, and that many batches
+        are read from the data loader ahead of the one being trained on.  This has no effect if
+        ``disable_auto_to_device()`` is called.
+        """
+        self._prefetch_to_device = batches
+        logger.info(f"prefetching {batches} batches to device")
@@ -1,4 +1,6 @@
+import itertools
 import logging
+import operator
 from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 import numpy as np
@@ -26,37 +28,106 @@ def _process_combined_metrics_and_batches(
     return metrics_lists, list(all_num_batches)
 
 
+def _average_metric_batches(
+    process_batches: List[List[Any]], num_batches: int, is_array_metric: bool
+) -> List[Any]:
+    """Average one metric across processes, one batch at a time."""
+    averaged = []
+    for batch_idx in range(num_batches):
+        batch = [batches[batch_idx] for batches in process_batches]
+
+        np_batch = np.array(batch)
+        batch_avg = np.mean(np_batch[np_batch != None])  # noqa: E711
+        if is_array_metric:
+            batch_avg = np.array(batch_avg)
+        averaged.append(batch_avg)
+    return averaged
+
+
+def _average_metric_columns(
+    process_batches: List[List[Any]], num_batches: int, is_array_metric: bool
+) -> Optional[List[Any]]:
+    """
+    Average one metric across processes with a single vectorized reduction over a 2-D
+    batches x processes array.
+
+    Returns None when the values are not uniform enough to guarantee results identical to
+    _average_metric_batches(), which handles every other case.  Identical means identical types
+    and identical floating point rounding: rows are contiguous, so each row is reduced the same way
+    as a 1-D array of that batch would be, and missing (None) values are summed in process order
+    like the object arrays they produce in _average_metric_batches().
+    """
+    if any(len(batches) != num_batches for batches in process_batches):
+        return None
+    num_processes = len(process_batches)
+    values = list(itertools.chain.from_iterable(process_batches))
+    if not values:
+        return None
+    types = set(map(type, values))
+
+    if types <= {int, float} or (
+        len(types) == 1 and issubclass(next(iter(types)), (np.floating, np.integer))
+    ):
+        columns = np.array(process_batches)
+    elif types == {np.ndarray} and len(set(map(operator.attrgetter("dtype"), values))) == 1:
+        try:
+            columns = np.array(process_batches)
+        except ValueError:
+            # Arrays of different shapes.
+            return None
+    elif types == {float, type(None)}:
+        # Python floats with some missing values.  Batches with missing values become object
+        # arrays, which are summed sequentially, so add one process at a time.  Missing values
+        # become -0.0, the only value whose addition never changes a sum (even a sum of -0.0).
+        objects = np.array(process_batches, dtype=object)
+        present = objects != None  # noqa: E711
+        counts = present.sum(axis=0)
+        if not counts.all():
+            return None
+        padded = np.where(present, objects, -0.0).astype(np.float64)
+        sums = padded[0].copy()
+        for process_values in padded[1:]:
+            sums += process_values
+        averaged = sums / counts
+        # Batches without missing values are plain float64 arrays, reduced as rows below.
+        complete = counts == num_processes
+        averaged[complete] = np.mean(np.ascontiguousarray(padded.T[complete]), axis=1)
+        return list(averaged)
+    else:
+        return None
+
+    if columns.dtype.kind not in "biuf":
+        # e.g. python ints too large for int64.
+        return None
+
+    # columns is indexed [process, batch, ...]; make each batch a contiguous row, flattening the
+    # elements of array metrics in the same order that np.array(batch) would.
+    rows = np.ascontiguousarray(
+        columns.reshape(num_processes, num_batches, -1).transpose(1, 0, 2)
+    ).reshape(num_batches, -1)
+    averaged = np.mean(rows, axis=1)
+    if is_array_metric:
+        return [np.array(avg) for avg in averaged]
+    return list(averaged)
+
+
 def _average_training_metrics(
     combined_timeseries: Dict[str, Any], combined_num_batches: List[int]
 ) -> List[Dict[str, Any]]:
     """Average combined training metrics across GPUs"""
-    # If the value for a metric is a single-element array, the averaging process will
-    # change that into just the element. We record what metrics are single-element arrays
-    # so we can wrap them in an array later (for perfect compatibility with non-averaging
-    # codepath).
-    array_metrics = []
-    for metric_name in combined_timeseries.keys():
-        process_batches = combined_timeseries[metric_name]
-        if isinstance(process_batches[0][0], np.ndarray):
-            array_metrics.append(metric_name)
-
     num_batches = combined_num_batches[0]  # num_batches matches across data parallel ranks.
-    num_processes = len(combined_num_batches)
     averaged_metrics_timeseries = {}  # type: Dict[str, List]
 
-    for metric_name in combined_timeseries.keys():
-        averaged_metrics_timeseries[metric_name] = []
-        for batch_idx in range(num_batches):
-            batch = [
-                combined_timeseries[metric_name][process_idx][batch_idx]
-                for process_idx in range(num_processes)
-            ]
-
-            np_batch = np.array(batch)
-            batch_avg = np.mean(np_batch[np_batch != None])  # noqa: E711
-            if metric_name in array_metrics:
-                batch_avg = np.array(batch_avg)
-            averaged_metrics_timeseries[metric_name].append(batch_avg)
+    for metric_name, process_batches in combined_timeseries.items():
+        # If the value for a metric is a single-element array, the averaging process will
+        # change that into just the element. We record what metrics are single-element arrays
+        # so we can wrap them in an array later (for perfect compatibility with non-averaging
+        # codepath).
+        is_array_metric = isinstance(process_batches[0][0], np.ndarray)
+        averaged = _average_metric_columns(process_batches, num_batches, is_array_metric)
+        if averaged is None:
+            averaged = _average_metric_batches(process_batches, num_batches, is_array_metric)
+        averaged_metrics_timeseries[metric_name] = averaged
     return util._dict_to_list(averaged_metrics_timeseries)
 
 
@@ -134,6 +205,46 @@ def _convert_metrics_to_numpy(metrics: Dict[str, Any]) -> Dict[str, Any]:
     return metrics
 
 
+def _detach_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Detach tensor metrics from the autograd graph, without moving them off of their device.
+
+    The tensors are copied on their device, since detached tensors share storage with the original
+    ones, which the trial may still update in place (e.g. a running total) before the metrics are
+    copied to the host.
+    """
+    for metric_name, metric_val in metrics.items():
+        if isinstance(metric_val, torch.Tensor):
+            metrics[metric_name] = metric_val.detach().clone()
+    return metrics
+
+
+def _convert_batch_metrics_to_numpy(batch_metrics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert the tensors in a list of per-batch metrics to numpy, like calling
+    _convert_metrics_to_numpy() on each batch, but with one device-to-host transfer per metric
+    instead of one per batch.
+
+    The tensors of a metric are stacked on their device first; tensors which cannot be stacked
+    together (different devices, dtypes, or shapes) are transferred in separate groups.
+    """
+    # Map (metric name, device, dtype, shape) to the indices of batches with such a tensor.
+    groups: Dict[Tuple[str, Any, Any, Any], List[int]] = {}
+    for batch_idx, metrics in enumerate(batch_metrics):
+        for name, value in metrics.items():
+            if isinstance(value, torch.Tensor):
+                key = (name, value.device, value.dtype, value.shape)
+                groups.setdefault(key, []).append(batch_idx)
+
+    for (name, _, _, _), batch_idxs in groups.items():
+        stacked = torch.stack([batch_metrics[i][name].detach() for i in batch_idxs])
+        host = stacked.cpu().numpy()
+        for row, batch_idx in enumerate(batch_idxs):
+            # Index with an Ellipsis to get 0-d arrays rather than numpy scalars for 0-d tensors.
+            batch_metrics[batch_idx][name] = host[row, ...]
+    return batch_metrics
+
+
 def _reduce_metrics(
     context: det.core.DistributedContext,
     batch_metrics: List,
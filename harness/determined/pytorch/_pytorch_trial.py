@@ -199,6 +199,7 @@ class _PyTorchTrialController:
         max_length: Optional[TrainUnit],
         det_profiler: Optional[profiler.ProfilerAgent],
         global_batch_size: Optional[int],
+        async_checkpointing: bool = False,
     ) -> None:
         if not isinstance(trial_inst, PyTorchTrial):
             raise TypeError("PyTorchTrialController requires a PyTorchTrial.")
@@ -248,6 +249,7 @@ class _PyTorchTrialController:
         self.ckpt_policy = checkpoint_policy
         self.smaller_is_better = smaller_is_better
         self.global_batch_size = global_batch_size
+        self.async_checkpointing = async_checkpointing
 
         if self.searcher_unit == core.Unit.RECORDS:
             if self.global_batch_size is None:
@@ -322,6 +324,11 @@ class _PyTorchTrialController:
         # torch.backends.cudnn.benchmark = False
 
     def _aggregate_training_metrics(self, training_metrics: List[Dict]) -> Dict:
+        if self.context.experimental._defer_metrics_to_host:
+            # Tensor metrics were left on device after each batch; copy them all at once.
+            with self.prof.record_timing("from_device"):
+                training_metrics = pytorch._convert_batch_metrics_to_numpy(training_metrics)
+
         # Aggregate and reduce training metrics from all the training processes.
         if self.context.distributed.size > 1:
             with self.prof.record_timing("average_training_metrics"):
@@ -408,10 +415,9 @@ class _PyTorchTrialController:
                     "framework": f"torch-{torch.__version__}",
                     "format": "pickle",
                 }
-                with self.context._core.checkpoint.store_path(metadata) as (
-                    path,
-                    storage_id,
-                ):
+                with self.context._core.checkpoint.store_path(
+                    metadata, async_upload=self.async_checkpointing
+                ) as (path, storage_id):
                     self._save(path)
                     uuid = storage_id
             uuid = self.context.distributed.broadcast(uuid)
@@ -591,11 +597,12 @@ class _PyTorchTrialController:
             # We create it before loading state because we don't want the training_iterator
             # shuffling values after we load state.
             self.training_iterator = iter(self.training_loader)
-            self.training_enumerator = enumerate(
-                dataloader_next(self.prof, self.training_iterator), start=self.start_from_batch
-            )
+            training_batches = self._prefetch(dataloader_next(self.prof, self.training_iterator))
+            self.training_enumerator = enumerate(training_batches, start=self.start_from_batch)
 
             def cleanup_iterator() -> None:
+                if isinstance(training_batches, pytorch._DevicePrefetcher):
+                    training_batches.close()
                 # Explicitly trigger the training iterator's shutdown (which happens in __del__).
                 # See the rather long note in pytorch/torch/utils/data/dataloader.py.
                 del self.training_iterator
@@ -690,7 +697,13 @@ class _PyTorchTrialController:
             if not self._checkpoint_is_current():
                 self._checkpoint(already_exiting=True)
             raise e
-        return
+        self._flush_checkpoints()
+
+    def _flush_checkpoints(self) -> None:
+        # Wait for background checkpoint uploads, so that every checkpoint is reported to the
+        # master before the trial exits.
+        if self.is_chief and self.async_checkpointing:
+            self.core_context.checkpoint.flush()
 
     def _train_with_boundaries(
         self, training_enumerator: Iterator, train_boundaries: List[_TrainBoundary]
@@ -874,6 +887,24 @@ class _PyTorchTrialController:
             return False
         return self.context._should_communicate_and_update()
 
+    def _to_device_per_batch(self) -> bool:
+        """Whether each batch is moved to device right before it is used, rather than prefetched."""
+        experimental = self.context.experimental
+        return experimental._auto_to_device and experimental._prefetch_to_device <= 0
+
+    def _prefetch(self, batches: Iterator) -> Iterator:
+        """Wrap an iterator of batches to move them to device ahead of time, if configured to."""
+        experimental = self.context.experimental
+        if not experimental._auto_to_device or experimental._prefetch_to_device <= 0:
+            return batches
+        return pytorch._DevicePrefetcher(
+            batches,
+            self.context.device,
+            experimental._prefetch_to_device,
+            self.context._to_device_warned_types,
+            lambda: self.prof.record_timing("to_device", accumulate=True),
+        )
+
     def _train_batch(self, batch: pytorch.TorchData, epoch_idx: int, batch_idx: int) -> Dict:
         # Reset loss IDs for AMP
         self.context._loss_ids = {}
@@ -882,7 +913,7 @@ class _PyTorchTrialController:
         batch_start_time = time.time()
         self.prof.update_batch_idx(batch_idx)
 
-        if self.context.experimental._auto_to_device:
+        if self._to_device_per_batch():
             with self.prof.record_timing("to_device", accumulate=True):
                 batch = self.context.to_device(batch)  # type: ignore
 
@@ -917,14 +948,19 @@ class _PyTorchTrialController:
             for lr_scheduler in self.context.lr_schedulers:
                 self._auto_step_lr_scheduler_per_batch(batch_idx, lr_scheduler)
 
-        with self.prof.record_timing("from_device"):
-            for name, metric in training_metrics.items():
-                # Convert PyTorch metric values to NumPy, so that
-                # `det.util.encode_json` handles them properly without
-                # needing a dependency on PyTorch.
-                if isinstance(metric, torch.Tensor):
-                    metric = metric.cpu().detach().numpy()
-                training_metrics[name] = metric
+        if self.context.experimental._defer_metrics_to_host:
+            # Only detach here, so the host does not wait on the device after every batch.
+            # Metrics are copied to the host in _aggregate_training_metrics().
+            training_metrics = pytorch._detach_metrics(training_metrics)
+        else:
+            with self.prof.record_timing("from_device"):
+                for name, metric in training_metrics.items():
+                    # Convert PyTorch metric values to NumPy, so that
+                    # `det.util.encode_json` handles them properly without
+                    # needing a dependency on PyTorch.
+                    if isinstance(metric, torch.Tensor):
+                        metric = metric.cpu().detach().numpy()
+                    training_metrics[name] = metric
 
         batch_dur = time.time() - batch_start_time
         samples_per_second = self.trial.get_batch_length(batch) / batch_dur
@@ -969,8 +1005,9 @@ class _PyTorchTrialController:
             for callback in self.callbacks.values():
                 callback.on_validation_epoch_start()
 
-            for idx, batch in enumerate(iter(self.validation_loader)):
-                if self.context.experimental._auto_to_device:
+            validation_batches = self._prefetch(iter(self.validation_loader))
+            for idx, batch in enumerate(validation_batches):
+                if self._to_device_per_batch():
                     with self.prof.record_timing("to_device", accumulate=True):
                         batch = self.context.to_device(batch)
                 num_inputs += self.trial.get_batch_length(batch)
@@ -995,11 +1032,16 @@ class _PyTorchTrialController:
                         "metrics; "
                         f"got {vld_metrics}.",
                     )
-                # TODO: For performance perform -> cpu() only at the end of validation.
-                batch_metrics.append(pytorch._convert_metrics_to_numpy(vld_metrics))
+                if self.context.experimental._defer_metrics_to_host:
+                    batch_metrics.append(pytorch._detach_metrics(vld_metrics))
+                else:
+                    batch_metrics.append(pytorch._convert_metrics_to_numpy(vld_metrics))
                 if self.test_mode:
                     break
 
+            if self.context.experimental._defer_metrics_to_host:
+                batch_metrics = pytorch._convert_batch_metrics_to_numpy(batch_metrics)
+
             for callback in self.callbacks.values():
                 callback.on_validation_epoch_end(batch_metrics)
 
@@ -90,6 +90,7 @@ class Trainer:
         latest_checkpoint: Optional[str] = None,
         step_zero_validation: bool = False,
         test_mode: bool = False,
+        async_checkpointing: bool = False,
     ) -> None:
         """
         ``fit()`` trains a ``PyTorchTrial`` configured from the ``Trainer`` and handles
@@ -138,6 +139,11 @@ class Trainer:
                 training. Defaults to false.
             test_mode: Runs a minimal loop of training for testing and debugging purposes. Will
                 train and validate one batch. Defaults to false.
+            async_checkpointing: Upload checkpoints in a background thread, so that training can
+                continue while a checkpoint is uploaded to cloud checkpoint storage.  Each
+                checkpoint is reported to the master once its upload finishes, and training waits
+                for pending uploads before exiting.  ``on_checkpoint_upload_end`` callbacks are
+                called as soon as the upload is started. Defaults to false.
         """
         # Set defaults.
         if checkpoint_period is None:
@@ -208,6 +214,7 @@ class Trainer:
             max_length=max_length,
             det_profiler=self._det_profiler,
             global_batch_size=global_batch_size,
+            async_checkpointing=async_checkpointing,
         )
 
         trial_controller.run()
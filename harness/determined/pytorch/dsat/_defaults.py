@@ -61,6 +61,7 @@ AUTOTUNING_ARG_DEFAULTS = {
     "metric": "FLOPS_per_gpu",
     "random-seed": 42,
     "run-full-experiment": False,
+    "use-memory-model": False,
     "search-range-factor": 1.0,
     "divisor": 2,
     "min-binary-search-trials": 3,
@@ -1,5 +1,6 @@
 import argparse
 import copy
+import heapq
 import json
 import logging
 import pathlib
@@ -16,17 +17,29 @@ import numpy as np
 from determined import searcher
 from determined.experimental.client import create_experiment
 from determined.pytorch.dsat import _defaults, _utils
+from determined.pytorch.dsat._memory_model import DSATMemoryModel
 from determined.util import merge_dicts
 
 logger = logging.getLogger("determined.pytorch")
 
 
+class _Lineage:
+    """The Trials which share a lineage root, and how many of them are completed."""
+
+    def __init__(self) -> None:
+        self.trials: Set["DSATTrial"] = set()
+        self.num_completed = 0
+
+
 class DSATTrial:
     """Encapsulation of DeepSpeed Autotune Trials.
 
     Simple objects for handling all pertinent information and results for every created Trial.
     Contains basic lineage tracking in which each `DSATTrial` instance holds direct references to
     its immediate parent and children, along with various helper properties.
+
+    Changes to `metric`, `error` and `running` are reported to the lineage and to the
+    `DSATTrialTracker` the Trial is registered with, which keep indexes of them.
     """
 
     def __init__(
@@ -52,16 +65,20 @@ class DSATTrial:
 
         # Other attrs which are updated during training:
 
-        self.metric: Union[float, Dict[str, Any]] = {}
-        self.error = False
-        self.running = False
+        self._metric: Union[float, Dict[str, Any]] = {}
+        self._error = False
+        self._running = False
         self.children: Set["DSATTrial"] = set()
+        # The tracker which this Trial is registered with.
+        self._tracker: Optional["DSATTrialTracker"] = None
 
         # If a parent was specified, register the current Trial as the parent's child.
         if self.parent is not None:
             self.parent.children.add(self)
 
         self.lineage_root: DSATTrial = self if self.parent is None else self.parent.lineage_root
+        self._lineage: _Lineage = _Lineage() if self.parent is None else self.parent._lineage
+        self._lineage.trials.add(self)
 
         # The DS config json file may either be in the specified model directory or in the base of
         # the workdir, if it was added as an `--include` arg.
@@ -72,27 +89,62 @@ class DSATTrial:
 
         self._error_in_direct_history = False
 
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # Trials pickled by earlier versions stored these as plain attributes and were not indexed;
+        # `DSATTrialTracker.__setstate__` builds their lineages.
+        for name in ("metric", "error", "running"):
+            if name in state:
+                state[f"_{name}"] = state.pop(name)
+        state.setdefault("_tracker", None)
+        self.__dict__.update(state)
+
+    def _update(self, name: str, value: Any) -> None:
+        was_completed = self.completed
+        if self._tracker is not None:
+            self._tracker._unindex_trial(self)
+        setattr(self, name, value)
+        if self.completed != was_completed:
+            self._lineage.num_completed += 1 if self.completed else -1
+        if self._tracker is not None:
+            self._tracker._index_trial(self)
+
+    @property
+    def metric(self) -> Union[float, Dict[str, Any]]:
+        return self._metric
+
+    @metric.setter
+    def metric(self, metric: Union[float, Dict[str, Any]]) -> None:
+        self._update("_metric", metric)
+
+    @property
+    def error(self) -> bool:
+        return self._error
+
+    @error.setter
+    def error(self, error: bool) -> None:
+        self._update("_error", error)
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @running.setter
+    def running(self, running: bool) -> None:
+        self._update("_running", running)
+
     @property
     def completed(self) -> bool:
         return bool(self.error or self.metric)
 
     @property
     def lineage_set(self) -> Set["DSATTrial"]:
-        """Computes set of trials in lineage tree."""
-        root = self.lineage_root
-        trials_set = {root}
-        children = set(root.children)
-        while children:
-            random_child = children.pop()
-            trials_set.add(random_child)
-            children |= random_child.children
-        return trials_set
+        """Returns the set of trials in lineage tree."""
+        return set(self._lineage.trials)
 
     @property
     def num_completed_trials_in_lineage(self) -> int:
-        """Computes total number of trials in lineage tree."""
-        num_trials = sum(trial.completed for trial in self.lineage_set)
-        return num_trials
+        """Returns the total number of completed trials in lineage tree."""
+        return self._lineage.num_completed
 
     @property
     def error_in_direct_history(self) -> bool:
@@ -190,6 +242,7 @@ class DSATTrialTracker:
         self.start_profile_step = args.start_profile_step
         self.end_profile_step = args.end_profile_step
         self.zero_stages = set(args.zero_stages)
+        self.use_memory_model: bool = args.use_memory_model
 
         # Derived attributes
         self.slots_per_trial: int = self.exp_config["resources"]["slots_per_trial"]
@@ -205,6 +258,95 @@ class DSATTrialTracker:
 
         self._mem_per_gpu_per_stage: Optional[Dict[int, int]] = None
         self._approx_max_mbs_per_stage: Optional[Dict[int, int]] = None
+        self._memory_model: Optional[DSATMemoryModel] = None
+
+        self._build_indexes()
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state.setdefault("use_memory_model", False)
+        state.setdefault("_memory_model", None)
+        self.__dict__.update(state)
+        # Trackers pickled by earlier versions did not keep indexes.
+        if "_running_trials" not in state:
+            self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        """
+        Builds the indexes of registered Trials which are kept up to date as Trials change, so
+        that properties such as `running_trials` and `best_trials_by_stage` need not look at every
+        Trial.
+        """
+        # The order in which each Trial was registered, to break ties between equally good Trials.
+        self._registration_order: Dict[uuid.UUID, int] = {}
+        self._running_trials: Dict[uuid.UUID, DSATTrial] = {}
+        self._completed_trials: Dict[uuid.UUID, DSATTrial] = {}
+        self._completed_trials_by_hparams: Dict[str, Dict[uuid.UUID, DSATTrial]] = {}
+        self._num_completed_autotuning_trials = 0
+        self._num_errored_autotuning_trials = 0
+        # Heaps of (key, registration order, request_id) of Trials with a searcher metric, per
+        # stage, in which the smallest key is the best Trial.  Entries whose key no longer matches
+        # `_best_trial_keys` are stale, and are dropped when they reach the top of the heap.
+        self._best_trial_heaps: Dict[int, List[Tuple[float, int, uuid.UUID]]] = defaultdict(list)
+        self._best_trial_keys: Dict[uuid.UUID, float] = {}
+
+        lineages: Dict[DSATTrial, _Lineage] = {}
+        for trial in self._all_trials_dict.values():
+            if "_lineage" not in trial.__dict__:
+                lineage = lineages.setdefault(trial.lineage_root, _Lineage())
+                lineage.trials.add(trial)
+                lineage.num_completed += trial.completed
+                trial._lineage = lineage
+            self._registration_order[trial.request_id] = len(self._registration_order)
+            trial._tracker = self
+            self._index_trial(trial)
+
+    @staticmethod
+    def _hparams_key(hparams: Dict[str, Any]) -> str:
+        return json.dumps(hparams, sort_keys=True, default=str)
+
+    def _best_trial_key(self, trial: DSATTrial) -> Optional[float]:
+        """Returns the key of the Trial in `_best_trial_heaps`, if it has a searcher metric."""
+        if (
+            isinstance(trial, DSATModelProfileInfoTrial)
+            or not isinstance(trial.metric, dict)
+            or self.searcher_metric not in trial.metric
+        ):
+            return None
+        val = float(trial.metric[self.searcher_metric])
+        return val if self.smaller_is_better else -val
+
+    def _index_trial(self, trial: DSATTrial) -> None:
+        request_id = trial.request_id
+        if trial.running:
+            self._running_trials[request_id] = trial
+        if trial.completed:
+            self._completed_trials[request_id] = trial
+            self._completed_trials_by_hparams.setdefault(self._hparams_key(trial.hparams), {})[
+                request_id
+            ] = trial
+            if not isinstance(trial, DSATModelProfileInfoTrial):
+                self._num_completed_autotuning_trials += 1
+                self._num_errored_autotuning_trials += trial.error
+        key = self._best_trial_key(trial)
+        if key is not None:
+            self._best_trial_keys[request_id] = key
+            heapq.heappush(
+                self._best_trial_heaps[trial.stage],
+                (key, self._registration_order[request_id], request_id),
+            )
+
+    def _unindex_trial(self, trial: DSATTrial) -> None:
+        request_id = trial.request_id
+        self._running_trials.pop(request_id, None)
+        if self._completed_trials.pop(request_id, None) is not None:
+            hparams_key = self._hparams_key(trial.hparams)
+            del self._completed_trials_by_hparams[hparams_key][request_id]
+            if not self._completed_trials_by_hparams[hparams_key]:
+                del self._completed_trials_by_hparams[hparams_key]
+            if not isinstance(trial, DSATModelProfileInfoTrial):
+                self._num_completed_autotuning_trials -= 1
+                self._num_errored_autotuning_trials -= trial.error
+        self._best_trial_keys.pop(request_id, None)
 
     def __len__(self) -> int:
         return len(self._all_trials_dict)
@@ -219,7 +361,7 @@ class DSATTrialTracker:
         if isinstance(item, uuid.UUID):
             return item in self._all_trials_dict
         elif isinstance(item, DSATTrial):
-            return item in self._all_trials_dict.values()
+            return self._all_trials_dict.get(item.request_id) is item
         else:
             raise ValueError(
                 f"Expected a `uuid.UUID` or `DSATTrial` instance, instead received an object of"
@@ -281,12 +423,16 @@ class DSATTrialTracker:
         tracking all trials.
         """
         # Verify that the given trial was not previously completed.
-        for other_trial in self.completed_trials:
+        identical_trials = self._completed_trials_by_hparams.get(self._hparams_key(trial.hparams))
+        for other_trial in (identical_trials or {}).values():
             if trial.hparams == other_trial.hparams:
                 logger.warning(
                     f"Skipping attempt to queue Trial identical to {other_trial.request_id}"
                 )
         self._all_trials_dict[trial.request_id] = trial
+        self._registration_order[trial.request_id] = len(self._registration_order)
+        trial._tracker = self
+        self._index_trial(trial)
         self.queue.append(trial)
 
     def enforce_consistent_batch_config(self, hparams: Dict[str, Any]) -> None:
@@ -313,6 +459,8 @@ class DSATTrialTracker:
         to the `DSATTrial` instnace and updating early-stopping bookkeeping.
         """
         trial.metric = metric
+        if self._memory_model is not None:
+            self._observe(self._memory_model, trial)
 
         # The model info profiling run's metric will not contain the searcher metric key and should
         # not be counted against the early stopping criteria.
@@ -333,6 +481,19 @@ class DSATTrialTracker:
 
         trial.error = True
         trial.running = False
+        if self._memory_model is not None:
+            self._observe(self._memory_model, trial)
+
+    def report_trial_skipped(self, trial: DSATTrial) -> None:
+        """
+        Marks a queued Trial which is predicted to run out of memory as errored, without it having
+        run.  Skipped Trials are not used to fit the `memory_model`.
+        """
+        logger.info(
+            f"Skipping Trial {trial.request_id} (stage {trial.stage}, mbs {trial.mbs}):"
+            " predicted to run out of memory"
+        )
+        trial.error = True
 
     def _fetch_model_profile_info_data(self, param_name: str) -> int:
         assert (
@@ -429,6 +590,66 @@ class DSATTrialTracker:
             }
         return self._approx_max_mbs_per_stage
 
+    @property
+    def max_mbs_per_stage(self) -> Dict[int, int]:
+        """
+        Returns the largest train_micro_batch_size_per_gpu (mbs) predicted to fit in memory, per
+        stage: according to the `memory_model` when it is used, and otherwise approximately.
+        """
+        if not self.use_memory_model:
+            return self.approx_max_mbs_per_stage
+        return {stage: self.memory_model.max_mbs(stage) for stage in range(4)}
+
+    @property
+    def memory_model(self) -> DSATMemoryModel:
+        """
+        Returns the model of the memory use and searcher metric of each stage, fit to the Trials
+        which have run.  Only available after the `DSATModelProfileInfoTrial` has run.
+        """
+        if self._memory_model is None:
+            memory_model = DSATMemoryModel(
+                gpu_mem=self.gpu_mem,
+                base_mem_per_stage=self.mem_per_gpu_per_stage,
+                activation_mem=self.activation_mem_per_gpu,
+                smaller_is_better=self.smaller_is_better,
+            )
+            for trial in self.completed_trials:
+                self._observe(memory_model, trial)
+            self._memory_model = memory_model
+        return self._memory_model
+
+    @staticmethod
+    def _observe(memory_model: DSATMemoryModel, trial: DSATTrial) -> None:
+        if isinstance(trial, DSATModelProfileInfoTrial):
+            return
+        if trial.error:
+            # Errored Trials are presumed to have run out of memory.
+            memory_model.observe(trial.stage, trial.mbs, None)
+        elif trial.searcher_metric_val is not None:
+            memory_model.observe(trial.stage, trial.mbs, trial.searcher_metric_val)
+
+    def predicts_oom(self, trial: DSATTrial) -> bool:
+        """Returns whether the `memory_model` is used and predicts the Trial runs out of memory."""
+        if not self.use_memory_model or isinstance(trial, DSATModelProfileInfoTrial):
+            return False
+        return self.memory_model.predicts_oom(trial.stage, trial.mbs)
+
+    def sort_queue_by_predicted_metric(self) -> None:
+        """
+        Sorts the queue so that the Trials with the best predicted searcher metric come first,
+        after those whose metric cannot be predicted yet, keeping the queue order otherwise.
+        """
+
+        def predicted_metric_key(trial: DSATTrial) -> Tuple[bool, float]:
+            val = None
+            if not isinstance(trial, DSATModelProfileInfoTrial):
+                val = self.memory_model.predicted_metric(trial.stage, trial.mbs)
+            if val is None:
+                return False, 0.0
+            return True, val if self.smaller_is_better else -val
+
+        self.queue = deque(sorted(self.queue, key=predicted_metric_key))
+
     def _best_trial_fn(self, trials: Iterable["DSATTrial"]) -> Optional["DSATTrial"]:
         trials_with_searcher_metric = [
             trial
@@ -449,14 +670,18 @@ class DSATTrialTracker:
         )
         return best_trial
 
+    def _best_trial_for_stage(self, stage: int) -> Optional["DSATTrial"]:
+        heap = self._best_trial_heaps[stage]
+        while heap:
+            key, _, request_id = heap[0]
+            if self._best_trial_keys.get(request_id) == key:
+                return self._all_trials_dict[request_id]
+            heapq.heappop(heap)
+        return None
+
     @property
     def best_trials_by_stage(self) -> Dict[int, Optional["DSATTrial"]]:
-        _best_trials_by_stage: Dict[int, Optional["DSATTrial"]] = {}
-        for stage in range(4):
-            trials_to_check = [trial for _, trial in self if trial.stage == stage]
-            best_trial = self._best_trial_fn(trials_to_check)
-            _best_trials_by_stage[stage] = best_trial
-        return _best_trials_by_stage
+        return {stage: self._best_trial_for_stage(stage) for stage in range(4)}
 
     @property
     def best_trial(self) -> Optional["DSATTrial"]:
@@ -467,19 +692,19 @@ class DSATTrialTracker:
 
     @property
     def running_trials(self) -> List[DSATTrial]:
-        return [trial for _, trial in self if trial.running]
+        return list(self._running_trials.values())
 
     @property
     def completed_trials(self) -> List[DSATTrial]:
-        return [trial for _, trial in self if trial.completed]
+        return list(self._completed_trials.values())
 
     @property
     def num_running_trials(self) -> int:
-        return len(self.running_trials)
+        return len(self._running_trials)
 
     @property
     def num_completed_trials(self) -> int:
-        return len(self.completed_trials)
+        return len(self._completed_trials)
 
     @property
     def max_trials_queued(self) -> bool:
@@ -494,10 +719,8 @@ class DSATTrialTracker:
         model_profile_info_trial_failed = (
             self.model_profile_info_trial is not None and self.model_profile_info_trial.error
         )
-        every_autotuning_trial_failed = all(
-            trial.error
-            for _, trial in self
-            if trial.completed and not isinstance(trial, DSATModelProfileInfoTrial)
+        every_autotuning_trial_failed = (
+            self._num_errored_autotuning_trials == self._num_completed_autotuning_trials
         )
         return model_profile_info_trial_failed or every_autotuning_trial_failed
 
@@ -657,7 +880,22 @@ class BaseDSATSearchMethod(searcher.SearchMethod):
         self, searcher_state: searcher.SearcherState, request_id: uuid.UUID
     ) -> List[searcher.Operation]:
         new_ops_list: List[searcher.Operation] = []
-        if self.should_shutdown():
+        shutdown = self.should_shutdown()
+        if not shutdown:
+            if self.trial_tracker.use_memory_model:
+                self.trial_tracker.sort_queue_by_predicted_metric()
+            while self.trial_tracker.can_run_more_trials:
+                next_trial = self.choose_next_trial_from_queue()
+                if self.trial_tracker.predicts_oom(next_trial):
+                    # Skipped Trials count as completed, so the search may end once they are.
+                    shutdown = self.skip_trial(searcher_state, next_trial)
+                    if shutdown:
+                        break
+                    continue
+                next_trial.running = True
+                new_ops_list.extend(next_trial.create_and_val_ops)
+
+        if shutdown:
             if self.trial_tracker.best_trial is not None and self.args.run_full_experiment:
                 submitted_config = _utils.get_dict_from_yaml_or_json_path(self.args.config_path)
                 optimal_config = merge_dicts(
@@ -669,14 +907,28 @@ class BaseDSATSearchMethod(searcher.SearchMethod):
                 create_experiment(optimal_config, self.args.model_dir, self.args.include)
 
             new_ops_list.append(searcher.Shutdown(failure=self.trial_tracker.should_be_failure))
-        else:
-            while self.trial_tracker.can_run_more_trials:
-                next_trial = self.choose_next_trial_from_queue()
-                next_trial.running = True
-                new_ops_list.extend(next_trial.create_and_val_ops)
 
         return new_ops_list
 
+    def skip_trial(self, searcher_state: searcher.SearcherState, trial: DSATTrial) -> bool:
+        """
+        Completes a Trial which is predicted to run out of memory without running it, and queues
+        the Trials which would follow it having run out of memory.  Returns whether the search
+        should shut down, in which case no Trials are queued.
+        """
+        self.trial_tracker.report_trial_skipped(trial)
+        if self.should_shutdown():
+            return True
+        if not self.trial_tracker.max_trials_queued:
+            new_trials = self.get_trials_after_early_exit(
+                searcher_state=searcher_state,
+                last_trial=trial,
+                exited_reason=searcher.ExitedReason.ERRORED,
+            )
+            for new_trial in new_trials:
+                self.trial_tracker.queue_and_register_trial(new_trial)
+        return False
+
     def progress(self, searcher_state: searcher.SearcherState) -> float:
         progress = len(searcher_state.trials_closed) / self.trial_tracker.max_trials
         return progress
@@ -933,7 +1185,7 @@ class RandomDSATSearchMethod(BaseDSATSearchMethod):
             )
         # Otherwise choose the corresponding search data based on approximate computations
         else:
-            random_zero_stage_max_mbs = self.trial_tracker.approx_max_mbs_per_stage[zero_stage]
+            random_zero_stage_max_mbs = self.trial_tracker.max_mbs_per_stage[zero_stage]
             new_search_data = DSATSearchData(lo=1, hi=random_zero_stage_max_mbs)
 
         # Randomly choose the actual batch size.
@@ -1063,7 +1315,7 @@ class BinarySearchDSATSearchMethod(BaseDSATSearchMethod):
             {"zero_optimization": zero_optim_config},
         )
 
-        random_zero_stage_max_mbs = self.trial_tracker.approx_max_mbs_per_stage[zero_stage]
+        random_zero_stage_max_mbs = self.trial_tracker.max_mbs_per_stage[zero_stage]
 
         # The default `search_range_factor = 1.` value makes the ceiling coincide with
         # the predicted max mbs, but we give the user a handle to alter this range as needed.
@@ -1365,7 +1617,7 @@ class ASHADSATSearchMethod(BaseDSATSearchMethod):
             {"zero_optimization": zero_optim_config},
         )
 
-        random_zero_stage_max_mbs = self.trial_tracker.approx_max_mbs_per_stage[zero_stage]
+        random_zero_stage_max_mbs = self.trial_tracker.max_mbs_per_stage[zero_stage]
         lo = 1
         hi = int(random_zero_stage_max_mbs * self.search_range_factor)
         hi = max(hi, lo)
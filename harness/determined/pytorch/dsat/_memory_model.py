@@ -0,0 +1,147 @@
+import fractions
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class DSATMemoryModel:
+    """Predicts which micro batch sizes run out of memory, and how well they perform, per stage.
+
+    GPU memory use is modeled as `base_mem_per_stage[stage] + mbs * activation_mem`, where the base
+    memory comes from the model profile info run and the activation memory per sample, which is
+    the same for every stage, is calibrated against the Trials which have run: every Trial which
+    ran with a given mbs bounds the activation memory from above, and every Trial which ran out of
+    memory bounds it from below.  Trials which errored are assumed to have run out of memory.
+
+    The searcher metric of each stage is modeled as that of a step whose time grows linearly with
+    the mbs, fit to the Trials of that stage which ran: latency-like metrics (smaller is better)
+    are linear in the mbs, and throughput-like metrics (larger is better) are proportional to
+    `mbs / (a + b * mbs)`.
+    """
+
+    def __init__(
+        self,
+        gpu_mem: int,
+        base_mem_per_stage: Dict[int, int],
+        activation_mem: int,
+        smaller_is_better: bool,
+    ) -> None:
+        self.gpu_mem = gpu_mem
+        self.base_mem_per_stage = base_mem_per_stage
+        self.activation_mem = max(activation_mem, 1)
+        self.smaller_is_better = smaller_is_better
+        # The largest mbs which ran and the smallest which ran out of memory, per stage.
+        self._max_mbs_run: Dict[int, int] = {}
+        self._min_mbs_oom: Dict[int, int] = {}
+        # Bounds on the activation memory per sample: it is more than `_activation_mem_lo`, and at
+        # most `_activation_mem_hi`.
+        self._activation_mem_lo: Optional[fractions.Fraction] = None
+        self._activation_mem_hi: Optional[fractions.Fraction] = None
+        # The metrics of the Trials which ran, per stage and mbs.
+        self._metrics: Dict[int, Dict[int, List[float]]] = {}
+        # The fit of the metric of each stage, computed when first needed.
+        self._fits: Dict[int, Optional[Tuple[float, float]]] = {}
+
+    def _headroom(self, stage: int) -> int:
+        return self.gpu_mem - self.base_mem_per_stage[stage]
+
+    def observe(self, stage: int, mbs: int, metric: Optional[float]) -> None:
+        """Records a Trial which ran with the given metric, or ran out of memory if it is None."""
+        # Stages whose base memory alone exceeds the GPU memory are not modeled well enough to
+        # calibrate the activation memory with.
+        headroom = self._headroom(stage)
+        per_sample = fractions.Fraction(headroom, mbs) if headroom > 0 else None
+        if metric is None:
+            self._min_mbs_oom[stage] = min(mbs, self._min_mbs_oom.get(stage, mbs))
+            lo = self._activation_mem_lo
+            if per_sample is not None and (lo is None or per_sample > lo):
+                self._activation_mem_lo = per_sample
+        else:
+            self._max_mbs_run[stage] = max(mbs, self._max_mbs_run.get(stage, mbs))
+            hi = self._activation_mem_hi
+            if per_sample is not None and (hi is None or per_sample < hi):
+                self._activation_mem_hi = per_sample
+            self._metrics.setdefault(stage, {}).setdefault(mbs, []).append(metric)
+            self._fits.pop(stage, None)
+
+    @property
+    def _consistent(self) -> bool:
+        # Configurations differ in more than their stage and mbs, so the Trials which ran and
+        # which ran out of memory may contradict each other, in which case only the Trials of a
+        # stage are used to predict its memory use.
+        lo, hi = self._activation_mem_lo, self._activation_mem_hi
+        return lo is None or hi is None or lo < hi
+
+    def _clip_to_observed(self, stage: int, mbs: int) -> int:
+        if stage in self._min_mbs_oom:
+            mbs = min(mbs, self._min_mbs_oom[stage] - 1)
+        mbs = max(mbs, self._max_mbs_run.get(stage, 1))
+        return max(mbs, 1)
+
+    def max_mbs(self, stage: int) -> int:
+        """
+        Returns the best estimate of the largest mbs which fits in memory for the stage.  Before
+        any Trial has run, this is the estimate from the model profile info run alone.
+        """
+        if self._headroom(stage) <= 0:
+            return self._clip_to_observed(stage, 1)
+        activation_mem = fractions.Fraction(self.activation_mem)
+        if self._consistent:
+            if self._activation_mem_lo is not None:
+                activation_mem = max(activation_mem, self._activation_mem_lo)
+            if self._activation_mem_hi is not None:
+                activation_mem = min(activation_mem, self._activation_mem_hi)
+        mbs = math.floor(self._headroom(stage) / activation_mem)
+        if activation_mem == self._activation_mem_lo:
+            # Some Trial ran out of memory with exactly this much activation memory.
+            mbs = math.ceil(self._headroom(stage) / activation_mem) - 1
+        return self._clip_to_observed(stage, mbs)
+
+    def predicts_oom(self, stage: int, mbs: int) -> bool:
+        """
+        Returns whether running with the mbs is predicted to run out of memory.  Only Trials which
+        ran out of memory are taken as evidence, assuming the least activation memory consistent
+        with them, so that nothing is predicted to run out of memory before some Trial has.
+        """
+        if mbs <= self._max_mbs_run.get(stage, 0):
+            return False
+        if mbs >= self._min_mbs_oom.get(stage, mbs + 1):
+            return True
+        if self._activation_mem_lo is None or not self._consistent or self._headroom(stage) <= 0:
+            return False
+        return mbs * self._activation_mem_lo >= self._headroom(stage)
+
+    def predicted_metric(self, stage: int, mbs: int) -> Optional[float]:
+        """
+        Returns the predicted searcher metric of running the stage with the mbs, or None if the
+        stage has not run with at least two distinct mbs values.
+        """
+        if stage not in self._fits:
+            self._fits[stage] = self._fit(stage)
+        fit = self._fits[stage]
+        if fit is None:
+            return None
+        a, b = fit
+        if self.smaller_is_better:
+            return a * mbs + b
+        inverse = a / mbs + b
+        return 1 / inverse if inverse > 0 else None
+
+    def _fit(self, stage: int) -> Optional[Tuple[float, float]]:
+        """
+        Returns the least-squares fit (a, b) of `metric = a * mbs + b` for latency-like metrics, or
+        of `1 / metric = a / mbs + b` for throughput-like metrics.
+        """
+        metrics = self._metrics.get(stage, {})
+        if len(metrics) < 2:
+            return None
+        mbs = np.array(list(metrics.keys()), dtype=float)
+        values = np.array([np.mean(vals) for vals in metrics.values()], dtype=float)
+        if self.smaller_is_better:
+            a, b = np.polyfit(mbs, values, 1)
+        elif np.all(values > 0):
+            a, b = np.polyfit(1 / mbs, 1 / values, 1)
+        else:
+            return None
+        return float(a), float(b)
@@ -64,6 +64,12 @@ def get_base_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Run full-length experiment using best-found configuration after dsat completes",
     )
+    base_parser.add_argument(
+        "--use-memory-model",
+        action="store_true",
+        help="Skip trials predicted to run out of memory and run those predicted to perform best "
+        "first, using a model fit to the trials which have run",
+    )
     base_parser.add_argument(
         "-z",
         "--zero-stages",
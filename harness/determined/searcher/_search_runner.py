@@ -2,10 +2,13 @@ import json
 import logging
 import os
 import pickle
+import shutil
+import struct
 import time
 import uuid
+import zlib
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from typing import IO, Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 from determined import searcher
 from determined.common.api import bindings, errors
@@ -14,6 +17,39 @@ from determined.experimental import client
 EXPERIMENT_ID_FILE = "experiment_id.txt"
 logger = logging.getLogger("determined.searcher")
 
+# Each journal record is its length and CRC-32, followed by the record itself.
+_JOURNAL_RECORD_HEADER = struct.Struct("<II")
+
+
+def _append_journal_record(f: IO[bytes], record: bytes) -> None:
+    f.write(_JOURNAL_RECORD_HEADER.pack(len(record), zlib.crc32(record)) + record)
+    f.flush()
+
+
+def _read_journal(path: Path) -> List[bytes]:
+    """
+    Read every complete record from a journal, and truncate the journal after the last of them,
+    since a record which was only partly written when the searcher crashed was never committed.
+    """
+    if not path.exists():
+        return []
+    records = []
+    with path.open("r+b") as f:
+        data = f.read()
+        offset = 0
+        while offset + _JOURNAL_RECORD_HEADER.size <= len(data):
+            length, crc = _JOURNAL_RECORD_HEADER.unpack_from(data, offset)
+            start = offset + _JOURNAL_RECORD_HEADER.size
+            record = data[start : start + length]
+            if len(record) < length or zlib.crc32(record) != crc:
+                break
+            records.append(record)
+            offset = start + length
+        if offset < len(data):
+            logger.warning(f"Discarding {len(data) - offset} bytes of incomplete records in {path}")
+            f.truncate(offset)
+    return records
+
 
 class _ExperimentInactiveException(Exception):
     def __init__(self, exp_state: bindings.experimentv1State):
@@ -123,29 +159,34 @@ class SearchRunner:
         sleep_time: float = 1.0,
     ) -> None:
         experiment_is_active = True
+        # The API is implemented with long polling, so it returns as soon as there are events;
+        # only back off, up to sleep_time, while it returns without any events to handle.
+        delay = 0.0
         try:
             while experiment_is_active:
-                time.sleep(
-                    sleep_time
-                )  # we don't want to call long polling API more often than every second.
+                if delay:
+                    time.sleep(delay)
+                delay = min(max(2 * delay, 0.1), sleep_time)
                 events = self.get_events(session, experiment_id)
                 if not events:
                     continue
                 logger.info(json.dumps([SearchRunner._searcher_event_as_dict(e) for e in events]))
-                # the first event is an event we have already processed and told master about it
-                # however, we may not have saved the state after that event if we crashed
-                # after POSTing operations but before saving state
+                # Every event is handled before the operations for all of them are posted at once,
+                # triggered by the last of them.  If we crashed after saving the state, but before
+                # POSTing operations, the events up to the last one we saved are sent again, and we
+                # resubmit the operations saved with them.
                 last_event_id = self.state.last_event_id
-                first_event = True
+                last_event: Optional[bindings.v1SearcherEvent] = None
+                operations: List[searcher.Operation] = []
                 for event in events:
                     if (
-                        first_event
-                        and last_event_id != 0
+                        last_event_id != 0
                         and last_event_id >= event.id >= 0
                         and prior_operations is not None
                     ):
-                        logger.info(f"Resubmitting operations for event.id={event.id}")
-                        operations = prior_operations
+                        if last_event is None:
+                            logger.info(f"Resubmitting operations for event.id={last_event_id}")
+                            operations = list(prior_operations)
                     else:
                         if event.experimentInactive:
                             logger.info(
@@ -172,14 +213,19 @@ class SearchRunner:
                                 experiment_is_active = False
                             break
 
-                        operations = self._get_operations(event)
+                        operations.extend(self._get_operations(event))
 
-                        # save state
-                        self.state.last_event_id = event.id
-                        self.save_state(experiment_id, operations)
+                    last_event = event
+                prior_operations = None
 
-                    first_event = False
-                    self.post_operations(session, experiment_id, event, operations)
+                if last_event is None:
+                    continue
+                delay = 0.0
+                if last_event.id > last_event_id:
+                    # save state
+                    self.state.last_event_id = last_event.id
+                    self.save_state(experiment_id, operations)
+                self.post_operations(session, experiment_id, last_event, operations)
 
         except KeyboardInterrupt:
             print("Runner interrupted")
@@ -247,15 +293,33 @@ class LocalSearchRunner(SearchRunner):
     reacts to event notifications coming from the running experiments by forwarding
     them to event handler methods in your ``SearchMethod`` implementation and sending
     the returned operations back to the experiment.
+
+    The state of the search is saved in ``searcher_dir``, so that the search can be resumed if
+    the searcher process is restarted.  By default, a snapshot of the ``SearchMethod`` is saved
+    after every event.  If ``snapshot_interval`` is greater than 1, a snapshot is only saved every
+    ``snapshot_interval`` events, and the events in between are appended to a journal, which is
+    replayed through the ``SearchMethod`` when the search is resumed.  This requires a
+    ``SearchMethod`` to return the same operations, including the same trial request IDs, when
+    the same events are replayed after loading a snapshot.
     """
 
     def __init__(
         self,
         search_method: searcher.SearchMethod,
         searcher_dir: Optional[Path] = None,
+        snapshot_interval: int = 1,
     ):
         super().__init__(search_method)
         self.state_path = None
+        if snapshot_interval < 1:
+            raise ValueError(f"snapshot_interval must be at least 1, got {snapshot_interval}")
+        self.snapshot_interval = snapshot_interval
+        # The events handled since the state was last saved, and the operations for each of them,
+        # which are journaled by save_state().
+        self._events: List[Tuple[bindings.v1SearcherEvent, List[searcher.Operation]]] = []
+        # The event id of the latest snapshot, and the number of events journaled since.
+        self._snapshot_event_id: Optional[int] = None
+        self._journaled_events = 0
 
         self.searcher_dir = searcher_dir or Path.cwd()
         if not self.searcher_dir.exists():
@@ -313,6 +377,11 @@ class LocalSearchRunner(SearchRunner):
         self.run_experiment(experiment_id, session, operations)
         return experiment_id
 
+    def _get_operations(self, event: bindings.v1SearcherEvent) -> List[searcher.Operation]:
+        operations = super()._get_operations(event)
+        self._events.append((event, operations))
+        return operations
+
     def load_state(self, experiment_id: int) -> Tuple[int, List[searcher.Operation]]:
         experiment_searcher_dir = self._get_state_path(experiment_id)
         with experiment_searcher_dir.joinpath("event_id").open("r") as event_id_file:
@@ -324,10 +393,46 @@ class LocalSearchRunner(SearchRunner):
         )
         with state_path.joinpath("ops").open("rb") as f:
             operations = pickle.load(f)
+
+        # Replay the events handled since the snapshot.
+        self._journaled_events = 0
+        for record in _read_journal(experiment_searcher_dir.joinpath(f"journal_{last_event_id}")):
+            handled, operations = pickle.loads(record)
+            for event_json, event_operations in handled:
+                event = bindings.v1SearcherEvent.from_json(event_json)
+                replayed = self._get_operations(event)
+                if [op._to_searcher_operation().to_json() for op in replayed] != [
+                    op._to_searcher_operation().to_json() for op in event_operations
+                ]:
+                    raise RuntimeError(
+                        f"Replaying event {event.id} returned different operations than when it "
+                        "was handled; the SearchMethod must be deterministic to be used with "
+                        "snapshot_interval > 1"
+                    )
+                self.state.last_event_id = event.id
+                self._journaled_events += 1
+        self._events = []
+        self._snapshot_event_id = last_event_id
         return loaded_experiment_id, operations
 
     def save_state(self, experiment_id: int, operations: List[searcher.Operation]) -> None:
         experiment_searcher_dir = self._get_state_path(experiment_id)
+        events, self._events = self._events, []
+        if (
+            events
+            and self._snapshot_event_id is not None
+            and self._journaled_events + len(events) < self.snapshot_interval
+        ):
+            # Journal the events, the operations for each of them, and the operations to post,
+            # rather than saving a new snapshot.  They are committed once their record is
+            # completely written.
+            journal_path = experiment_searcher_dir.joinpath(f"journal_{self._snapshot_event_id}")
+            handled = [(event.to_json(), event_operations) for event, event_operations in events]
+            with journal_path.open("ab") as f:
+                _append_journal_record(f, pickle.dumps((handled, operations)))
+            self._journaled_events += len(events)
+            return
+
         state_path = experiment_searcher_dir.joinpath(f"event_{self.state.last_event_id}")
 
         if not state_path.exists():
@@ -340,6 +445,10 @@ class LocalSearchRunner(SearchRunner):
         )
         with state_path.joinpath("ops").open("wb") as ops_file:
             pickle.dump(operations, ops_file)
+        # The journal of this snapshot starts out empty.
+        journal_path = experiment_searcher_dir.joinpath(f"journal_{self.state.last_event_id}")
+        if journal_path.exists():
+            journal_path.unlink()
 
         # commit
         event_id_path = experiment_searcher_dir.joinpath("event_id")
@@ -347,6 +456,21 @@ class LocalSearchRunner(SearchRunner):
         with event_id_new_path.open("w") as f:
             f.write(str(self.state.last_event_id))
         os.replace(event_id_new_path, event_id_path)
+        self._snapshot_event_id = self.state.last_event_id
+        self._journaled_events = 0
+
+        # Remove older snapshots and their journals, which are no longer needed.
+        for path in experiment_searcher_dir.iterdir():
+            prefix, _, event_id = path.name.partition("_")
+            if (
+                prefix in ("event", "journal")
+                and event_id.isdigit()
+                and int(event_id) != self.state.last_event_id
+            ):
+                if path.is_dir():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
 
     def _get_state_path(self, experiment_id: int) -> Path:
         return self.searcher_dir.joinpath(f"exp_{experiment_id}")
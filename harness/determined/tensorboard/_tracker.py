@@ -0,0 +1,214 @@
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import pathlib
+import stat
+import struct
+import sys
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger("determined.tensorboard")
+
+# From <sys/inotify.h>.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+
+# struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """
+    A minimal inotify(7) binding, which reports the paths changed under the watched directories.
+    """
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: Dict[int, bytes] = {}
+
+    def watch(self, path: bytes) -> bool:
+        """Watch the directory at path, returning False if it no longer exists."""
+        wd = self._add_watch(self._fd, path, _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return False
+            raise OSError(err, os.strerror(err), path)
+        self._dirs[wd] = path
+        return True
+
+    def read(self) -> Iterator[Tuple[Optional[bytes], bytes, int]]:
+        """
+        Yield the (directory, name, mask) of every pending event, without blocking.  The directory
+        is None for events which are not about a watched directory, like IN_Q_OVERFLOW.
+        """
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, length = _EVENT.unpack_from(buf, offset)
+                offset += _EVENT.size
+                name = buf[offset : offset + length].rstrip(b"\0")
+                offset += length
+                directory = self._dirs.get(wd)
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                yield directory, name, mask
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class FileTracker:
+    """
+    FileTracker finds the files under a directory which are new, or whose modification time or size
+    changed, since they were last reported.
+
+    Where inotify is available, only the files which inotify reports as changed are stat'd.
+    Otherwise, or if inotify overflows, every file is stat'd and compared with an index of the
+    modification time and size of each file when it was last reported.
+
+    FileTracker is not thread-safe; TensorboardManager serializes its calls.
+    """
+
+    def __init__(self, base_path: pathlib.Path, use_inotify: bool = True) -> None:
+        self.base_path = base_path
+        self._base = os.fsencode(base_path)
+        # The (st_mtime_ns, st_size) of each file when it was last reported.
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self._inotify: Optional[_Inotify] = None
+        # inotify is only set up on first use, so that trackers which are never used hold no
+        # inotify instance (of which there are only fs.inotify.max_user_instances).
+        self._use_inotify = use_inotify and sys.platform.startswith("linux")
+        # Whether the whole directory must be scanned, rather than only what inotify reported.
+        self._rescan = True
+
+    def changed(self, selector: Callable[[pathlib.Path], bool]) -> List[pathlib.Path]:
+        """Return the selected files which are new or changed since they were last returned."""
+        if self._use_inotify:
+            self._use_inotify = False
+            try:
+                self._inotify = _Inotify()
+            except (AttributeError, OSError) as e:
+                logger.debug(f"inotify is unavailable, tracking files by scanning: {e}")
+
+        candidates: Set[bytes] = set()
+        if self._inotify is None or self._rescan:
+            self._scan_all(candidates)
+        else:
+            self._read_events(candidates)
+
+        changed = []
+        for path in candidates:
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._index.pop(path, None)
+                continue
+            key = (st.st_mtime_ns, st.st_size)
+            if self._index.get(path) == key or not stat.S_ISREG(st.st_mode):
+                continue
+            file = pathlib.Path(os.fsdecode(path))
+            if selector(file):
+                self._index[path] = key
+                changed.append(file)
+        return changed
+
+    def close(self) -> None:
+        self._use_inotify = False
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _scan_all(self, candidates: Set[bytes]) -> None:
+        # Until the directory exists and is watched, look for it every time.
+        self._rescan = not self._scan(self._base, candidates)
+        # Forget files which were removed.
+        for path in self._index.keys() - candidates:
+            del self._index[path]
+
+    def _scan(self, directory: bytes, candidates: Set[bytes]) -> bool:
+        """
+        Add every file under directory to candidates, watching each directory as it goes, and
+        return whether the directory exists.
+        """
+        if self._inotify is not None:
+            try:
+                # Watch before listing, so that no file created in between is missed.
+                if not self._inotify.watch(directory):
+                    return False
+            except OSError as e:
+                # Most likely, the limit on inotify watches (fs.inotify.max_user_watches) was hit.
+                logger.warning(f"Unable to watch {os.fsdecode(directory)}, scanning instead: {e}")
+                self.close()
+        try:
+            entries = list(os.scandir(directory))
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                self._scan(entry.path, candidates)
+            else:
+                candidates.add(entry.path)
+        return True
+
+    def _read_events(self, candidates: Set[bytes]) -> None:
+        assert self._inotify is not None
+        # Read every event first, since watching a new directory may fail and close inotify.
+        for directory, name, mask in list(self._inotify.read()):
+            if mask & IN_Q_OVERFLOW:
+                logger.debug("inotify queue overflowed, scanning for changed files")
+                self._rescan = True
+            elif directory is None:
+                continue
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if directory == self._base:
+                    # The directory may be recreated; find it again next time.
+                    self._rescan = True
+            elif mask & IN_ISDIR:
+                if mask & IN_MOVED_FROM:
+                    # The watches under a moved directory still report its old path; rescanning
+                    # updates them.
+                    self._rescan = True
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may have been written to the new directory before it was watched.
+                    self._scan(os.path.join(directory, name), candidates)
+            elif name:
+                candidates.add(os.path.join(directory, name))
+        if self._rescan:
+            self._scan_all(candidates)
@@ -9,6 +9,7 @@ from typing import Any, Callable, List
 
 from determined import tensorboard
 from determined.common import util
+from determined.tensorboard import _tracker
 
 logger = logging.getLogger("determined.tensorboard")
 
@@ -41,6 +42,13 @@ class TensorboardManager(metaclass=abc.ABCMeta):
         self.base_path = base_path
         self.sync_path = sync_path
         self.last_sync = 0.0
+        # Rather than stat every file on every sync, only look at files which changed.
+        self._tracker = _tracker.FileTracker(base_path)
+        # sync() is called from the main thread and from the background threads which report
+        # metrics and upload checkpoints, but the tracker is not thread-safe.  Held from finding
+        # the changed files through handing them off for upload, so that they are uploaded in the
+        # order they were found.
+        self._sync_lock = threading.RLock()
 
         self.upload_thread = None
         if async_upload:
@@ -74,9 +82,14 @@ class TensorboardManager(metaclass=abc.ABCMeta):
         self,
         selector: Callable[[pathlib.Path], bool],
     ) -> List[pathlib.Path]:
-        sync_start = time.time()
-        sync_paths = self.list_tb_files(self.last_sync, selector)
-        self.last_sync = sync_start
+        """
+        to_sync returns the selected files in the base_path directory and all sub-directories which
+        are new or modified since they were last returned.
+        """
+        with self._sync_lock:
+            sync_start = time.time()
+            sync_paths = self._tracker.changed(selector)
+            self.last_sync = sync_start
 
         return sync_paths
 
@@ -93,16 +106,19 @@ class TensorboardManager(metaclass=abc.ABCMeta):
         mangler: Callable[[pathlib.Path, int], pathlib.Path] = lambda p, __: p,
         rank: int = 0,
     ) -> None:
-        paths = self.to_sync(selector)
-        path_list = []
-        for path in paths:
-            relative_path = path.relative_to(self.base_path)
-            mangled_relative_path = mangler(relative_path, rank)
-            path_list.append(PathUploadInfo(path=path, mangled_relative_path=mangled_relative_path))
-        if self.upload_thread is not None and self.upload_thread.is_alive():
-            self.upload_thread.upload(path_list)
-        else:
-            util.preserve_random_state(self._sync_impl)(path_list)
+        with self._sync_lock:
+            paths = self.to_sync(selector)
+            path_list = []
+            for path in paths:
+                relative_path = path.relative_to(self.base_path)
+                mangled_relative_path = mangler(relative_path, rank)
+                path_list.append(
+                    PathUploadInfo(path=path, mangled_relative_path=mangled_relative_path)
+                )
+            if self.upload_thread is not None and self.upload_thread.is_alive():
+                self.upload_thread.upload(path_list)
+            else:
+                util.preserve_random_state(self._sync_impl)(path_list)
 
     @abc.abstractmethod
     def delete(self) -> None:
@@ -120,6 +136,8 @@ class TensorboardManager(metaclass=abc.ABCMeta):
             self.sync()
         if self.upload_thread is not None and self.upload_thread.is_alive():
             self.upload_thread.close()
+        with self._sync_lock:
+            self._tracker.close()
 
     def __enter__(self) -> "TensorboardManager":
         self.start()
@@ -1,8 +1,7 @@
-import datetime
 import logging
 import os
-import urllib
-from typing import Any, Callable, Dict, Generator, List
+import urllib.parse
+from typing import IO, Any, Dict, Generator, List, Optional
 
 from .base import Fetcher
 
@@ -13,6 +12,8 @@ class AzureFetcher(Fetcher):
     def __init__(self, storage_config: Dict[str, Any], storage_paths: List[str], local_dir: str):
         from azure.storage import blob
 
+        super().__init__(storage_config, storage_paths, local_dir)
+
         connection_string = storage_config.get("connection_string")
         container = storage_config.get("container")
         account_url = storage_config.get("account_url")
@@ -30,10 +31,6 @@ class AzureFetcher(Fetcher):
 
         self.container_name = container if not container.endswith("/") else container[:-1]
 
-        self.local_dir = local_dir
-        self.storage_paths = storage_paths
-        self._file_records = {}  # type: Dict[str, datetime.datetime]
-
     def _list(self, storage_path: str) -> Generator[str, None, None]:
         logger.debug(
             f"Listing keys in container: '{self.container_name}'"
@@ -44,22 +41,16 @@ class AzureFetcher(Fetcher):
 
         blobs = container.list_blobs(name_starts_with=prefix)
         for blob in blobs:
-            filepath, mtime = blob["name"], blob["last_modified"]
-            prev_mtime = self._file_records.get(filepath)
-
-            if prev_mtime is not None and prev_mtime >= mtime:
-                continue
-            self._file_records[filepath] = mtime
-            yield filepath
-
-    def _fetch(self, filepath: str, new_file_callback: Callable) -> None:
-        local_path = os.path.join(self.local_dir, self.container_name, filepath)
-        dir_path = os.path.dirname(local_path)
-        os.makedirs(dir_path, exist_ok=True)
-
-        with open(local_path, "wb") as local_file:
-            stream = self.client.get_blob_client(self.container_name, filepath).download_blob()
-            stream.readinto(local_file)
-
-        logger.debug(f"Downloaded file to local: {local_path}")
-        new_file_callback()
+            filepath = blob["name"]
+            if self._is_modified(filepath, blob["last_modified"], blob["size"]):
+                yield filepath
+
+    def _local_path(self, filepath: str) -> str:
+        return os.path.join(self.local_dir, self.container_name, filepath)
+
+    def _download(
+        self, filepath: str, local_file: IO[bytes], start: int, end: Optional[int]
+    ) -> None:
+        blob_client = self.client.get_blob_client(self.container_name, filepath)
+        length = None if end is None else end - start
+        blob_client.download_blob(offset=start or None, length=length).readinto(local_file)
@@ -1,34 +1,76 @@
 import abc
 import datetime
-from typing import Any, Callable, Dict, Generator, List
+import logging
+import os
+from typing import IO, Any, Callable, Dict, Generator, List, Optional
+
+logger = logging.getLogger("determined.tensorboard.fetchers")
+
+
+def _is_append_only(filepath: str) -> bool:
+    # TensorFlow only ever appends to an event file, until it closes it and starts a new one.
+    return ".tfevents." in os.path.basename(filepath)
 
 
 class Fetcher(metaclass=abc.ABCMeta):
     """Abstract base class for TensorBoard fetchers.
 
     Syncs TensorBoard files from remote file blob stores.
+
+    Event files are append-only, so once an event file has been fetched, only the bytes appended to
+    it since are fetched, and appended to the local copy.  Other files are fetched in full whenever
+    they change.
     """
 
     storage_paths: List[str]
+    local_dir: str
     _file_records: Dict[str, datetime.datetime] = {}
 
-    @abc.abstractmethod
     def __init__(self, storage_config: Dict[str, Any], storage_paths: List[str], local_dir: str):
-        pass
+        self.storage_paths = storage_paths
+        self.local_dir = local_dir
+        self._file_records = {}
+        # The size of each file when it was last listed, and how much of it has been fetched.
+        self._file_sizes: Dict[str, int] = {}
+        self._fetched_sizes: Dict[str, int] = {}
 
     @abc.abstractmethod
     def _list(self, storage_path: str) -> Generator[str, None, None]:
         """Iterates over the remote directory storage_path and yields any file that is new or
         has an updated timestamp from when it was last fetched.
 
+        Implementations call _is_modified() for each file listed.
+
         Arguments:
             storage_path (str): Path at a remote location to iterate over
-            new_file_callback (Callable, optional): Callback function that
-                is fired each time a new file is fetched
         """
         pass
 
     @abc.abstractmethod
+    def _local_path(self, filepath: str) -> str:
+        """Returns the path in the internal local_dir to fetch the remote filepath to."""
+        pass
+
+    @abc.abstractmethod
+    def _download(
+        self, filepath: str, local_file: IO[bytes], start: int, end: Optional[int]
+    ) -> None:
+        """Writes the bytes of the remote filepath from start up to end, or to the end of the file
+        if end is None, to local_file.
+        """
+        pass
+
+    def _is_modified(self, filepath: str, mtime: datetime.datetime, size: int) -> bool:
+        """Records the modification time and size of a listed file, and returns whether it is new
+        or modified since it was last listed.
+        """
+        prev_mtime = self._file_records.get(filepath)
+        if prev_mtime is not None and prev_mtime >= mtime:
+            return False
+        self._file_records[filepath] = mtime
+        self._file_sizes[filepath] = size
+        return True
+
     def _fetch(self, filepath: str, new_file_callback: Callable) -> None:
         """Performs actual file fetch from the remote filepath to the internal local_dir
 
@@ -37,7 +79,34 @@ class Fetcher(metaclass=abc.ABCMeta):
             new_file_callback (Callable, optional): Callback function that
                 is fired each time a new file is fetched
         """
-        pass
+        local_path = self._local_path(filepath)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+
+        size = self._file_sizes.get(filepath)
+        start = self._fetched_sizes.get(filepath, 0)
+        if (
+            size is None
+            or size < start
+            or not _is_append_only(filepath)
+            or not os.path.exists(local_path)
+        ):
+            # Not known to have been appended to since it was last fetched; fetch all of it.
+            start = 0
+        elif size == start:
+            # Modified, but with nothing appended; there is nothing more to fetch.
+            return
+
+        with open(local_path, "r+b" if start else "wb") as local_file:
+            local_file.seek(start)
+            local_file.truncate()
+            # Fetch whole files as they are now, but only as much of a file as was listed when
+            # fetching what was appended to it, so that it can be fetched from there next time.
+            self._download(filepath, local_file, start, size if start else None)
+            # Downloads in parts may not finish writing at the end of the file.
+            self._fetched_sizes[filepath] = local_file.seek(0, os.SEEK_END)
+
+        logger.debug(f"Fetched '{filepath}' from byte {start} to '{local_path}'")
+        new_file_callback()
 
     def list_all_generator(self) -> Generator[str, None, None]:
         """Iterates over all files that need to be fetched"""
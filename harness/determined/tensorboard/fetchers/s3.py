@@ -1,8 +1,8 @@
-import datetime
 import logging
 import os
+import shutil
 import urllib.parse
-from typing import Any, Callable, Dict, Generator, List
+from typing import IO, Any, Dict, Generator, List, Optional
 
 from .base import Fetcher
 
@@ -17,6 +17,8 @@ class S3Fetcher(Fetcher):
 
         from determined.common.storage import boto3_credential_manager
 
+        super().__init__(storage_config, storage_paths, local_dir)
+
         boto3_credential_manager.initialize_boto3_credential_providers()
         self.s3 = boto3.resource(
             "s3",
@@ -27,10 +29,6 @@ class S3Fetcher(Fetcher):
         self.client = self.s3.meta.client
         self.bucket_name = str(storage_config["bucket"])
 
-        self.local_dir = local_dir
-        self.storage_paths = storage_paths
-        self._file_records = {}  # type: Dict[str, datetime.datetime]
-
     def _list(self, storage_path: str) -> Generator[str, None, None]:
         logger.debug(
             f"Listing keys in bucket: '{self.bucket_name}' with storage_path: '{storage_path}'"
@@ -43,22 +41,21 @@ class S3Fetcher(Fetcher):
         for page in page_iterator:
             page_count += 1
             for s3_obj in page.get("Contents", []):
-                filepath, mdatetime = s3_obj["Key"], s3_obj["LastModified"]
-                prev_mdatetime = self._file_records.get(filepath)
-                if prev_mdatetime is not None and prev_mdatetime >= mdatetime:
-                    continue
-                self._file_records[filepath] = mdatetime
-                yield filepath
+                filepath = s3_obj["Key"]
+                if self._is_modified(filepath, s3_obj["LastModified"], s3_obj["Size"]):
+                    yield filepath
         if page_count > 1:
             logger.info(f"Fetched {page_count} number of list_objects_v2 pages")
 
-    def _fetch(self, filepath: str, new_file_callback: Callable) -> None:
-        local_path = os.path.join(self.local_dir, self.bucket_name, filepath)
-        dir_path = os.path.dirname(local_path)
-        os.makedirs(dir_path, exist_ok=True)
+    def _local_path(self, filepath: str) -> str:
+        return os.path.join(self.local_dir, self.bucket_name, filepath)
 
-        with open(local_path, "wb") as local_file:
+    def _download(
+        self, filepath: str, local_file: IO[bytes], start: int, end: Optional[int]
+    ) -> None:
+        if start == 0 and end is None:
             self.client.download_fileobj(self.bucket_name, filepath, local_file)
-
-        logger.debug(f"Downloaded s3 file to local: {local_path}")
-        new_file_callback()
+            return
+        byte_range = f"bytes={start}-{'' if end is None else end - 1}"
+        body = self.client.get_object(Bucket=self.bucket_name, Key=filepath, Range=byte_range)
+        shutil.copyfileobj(body["Body"], local_file)
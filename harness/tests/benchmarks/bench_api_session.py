@@ -0,0 +1,176 @@
+"""
+Measure bindings calls per second through an api.Session, which reuses pooled keep-alive
+connections, compared with a new connection per call, against a local stand-in master.
+
+Two workloads are measured: reporting training metrics (many small POSTs, as from a trial) and
+listing experiments page by page (GETs with larger responses, as from the CLI or SDK).  Calls are
+made from --threads threads sharing one Session.
+
+Usage (from the harness directory):
+
+    python -m tests.benchmarks.bench_api_session [--calls 500] [--threads 1 4] [--page-size 10]
+        [--tls]
+"""
+import argparse
+import contextlib
+import http.server
+import json
+import ssl
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import requests
+import urllib3
+
+from determined.common import api
+from determined.common.api import bindings, certs, request
+from tests.common import api_server
+
+
+class UnpooledSession(api.Session):
+    """The previous behavior: a new requests session, and so a new connection, for every call."""
+
+    def _do_request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        json: Any,
+        data: Optional[str],
+        headers: Optional[Dict[str, Any]],
+        timeout: Optional[int],
+        stream: bool,
+    ) -> requests.Response:
+        return request.do_request(
+            method,
+            self._master,
+            path,
+            params=params,
+            json=json,
+            data=data,
+            auth=self._auth,
+            cert=self._cert,
+            headers=headers,
+            timeout=timeout,
+            stream=stream,
+            max_retries=self._max_retries,
+        )
+
+
+@contextlib.contextmanager
+def run_master(page_size: int, tls: bool) -> Iterator[str]:
+    """Run a stand-in master which supports keep-alive, like the real one."""
+    experiment = api_server.sample_get_experiment().experiment.to_json()
+    experiments_page = json.dumps(
+        {
+            "experiments": [experiment] * page_size,
+            "pagination": {"offset": 0, "limit": page_size, "total": 10**6},
+        }
+    ).encode()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; don't let Nagle's algorithm delay the body.
+        disable_nagle_algorithm = True
+
+        def _respond(self, body: bytes) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            self._respond(experiments_page)
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self._respond(b"{}")
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("localhost", 0), Handler)
+    server.daemon_threads = True
+    if tls:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(
+            str(api_server.CERTS1["certfile"]), str(api_server.CERTS1["keyfile"])
+        )
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    thread = threading.Thread(target=server.serve_forever, args=[0.1], daemon=True)
+    thread.start()
+    try:
+        yield f"{'https' if tls else 'http'}://localhost:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def report_metrics(session: api.Session, i: int) -> None:
+    metrics = {f"metric_{k}": 0.1 * k for k in range(10)}
+    body = bindings.v1ReportTrialMetricsRequest(
+        group="training",
+        metrics=bindings.v1TrialMetrics(
+            metrics=bindings.v1Metrics(avgMetrics=metrics),
+            stepsCompleted=i,
+            trialId=1,
+            trialRunId=1,
+        ),
+    )
+    bindings.post_ReportTrialMetrics(session, body=body, metrics_trialId=1)
+
+
+def list_experiments(session: api.Session, i: int) -> None:
+    bindings.get_GetExperiments(session, offset=i * 10, limit=10)
+
+
+def run(
+    session: api.Session, call: Callable[[api.Session, int], None], calls: int, threads: int
+) -> float:
+    """Return calls per second."""
+
+    def worker(worker_idx: int) -> None:
+        for i in range(worker_idx, calls, threads):
+            call(session, i)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return calls / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+
+    if args.tls:
+        # The stand-in master's certificate is self-signed; skip verification, but not TLS.
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    cert = certs.Cert(noverify=True) if args.tls else None
+    workloads = {"metrics": report_metrics, "listing": list_experiments}
+
+    print(f"{'workload':>8} {'threads':>8} {'new conn (calls/s)':>19} {'pooled (calls/s)':>17}")
+    with run_master(args.page_size, args.tls) as master:
+        for name, call in workloads.items():
+            for threads in args.threads:
+                unpooled = run(UnpooledSession(master, None, None, cert), call, args.calls, threads)
+                session = api.Session(master, None, None, cert, pool_maxsize=threads)
+                try:
+                    pooled = run(session, call, args.calls, threads)
+                finally:
+                    session.close()
+                print(f"{name:>8} {threads:>8} {unpooled:>19.0f} {pooled:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Measure the startup time of common `det` commands, which is dominated by imports, with command
+modules imported lazily, compared with importing everything up front as `det` used to.
+
+Each command is run in a fresh python process, --repeats times, and the median wall time is
+reported, along with the time python spent in imports (from `python -X importtime`).  Commands
+which talk to the master are pointed at an address where nothing is listening.  Shell completion is
+measured as argcomplete runs it, with the command line in COMP_LINE.
+
+Usage (from the harness directory):
+
+    python -m tests.benchmarks.bench_cli_import [--repeats 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from determined.cli import top_arg_descriptions
+
+# (name, argv, shell completion line)
+COMMANDS: List[Tuple[str, List[str], Optional[str]]] = [
+    ("det --help", ["--help"], None),
+    ("det version", ["version"], None),
+    ("det experiment list --help", ["experiment", "list", "--help"], None),
+    ("complete `det exp`", [], "det exp"),
+    ("complete `det experiment l`", [], "det experiment l"),
+]
+
+# What `det` imported before every command, before command modules were imported lazily.
+EAGER_IMPORTS = [
+    "determined.core",
+    "determined._execution",
+    "determined.cli._util",
+    "OpenSSL.SSL",
+    "tabulate",
+    *top_arg_descriptions.command_modules,
+]
+
+SCRIPT = """
+import importlib
+import sys
+
+for module in sys.argv[1].split(","):
+    if module:
+        importlib.import_module(module)
+
+from determined.cli import cli
+
+cli.main(sys.argv[2:])
+"""
+
+
+def run(argv: List[str], comp_line: Optional[str], eager: bool) -> Tuple[float, float]:
+    """Return the wall time and the total import time of one run, in seconds."""
+    env: Dict[str, str] = {**os.environ, "DET_MASTER": "http://127.0.0.1:1"}
+    with tempfile.TemporaryDirectory() as tmp:
+        if comp_line is not None:
+            env.update(
+                _ARGCOMPLETE="1",
+                COMP_LINE=comp_line,
+                COMP_POINT=str(len(comp_line)),
+                _ARGCOMPLETE_STDOUT_FILENAME=os.path.join(tmp, "completions"),
+            )
+        imports = ",".join(EAGER_IMPORTS) if eager else ""
+        start = time.perf_counter()
+        p = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SCRIPT, imports, *argv],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        elapsed = time.perf_counter() - start
+
+    # Sum the cumulative times of top-level imports; lines look like:
+    #   import time:  self [us] | cumulative | imported package
+    import_us = 0
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            import_us += int(cumulative)
+    return elapsed, import_us / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'command':>28} {'eager wall (ms)':>16} {'eager imports':>14} "
+        f"{'lazy wall (ms)':>15} {'lazy imports':>13}"
+    )
+    for name, argv, comp_line in COMMANDS:
+        results = []
+        for eager in (True, False):
+            runs = [run(argv, comp_line, eager) for _ in range(args.repeats)]
+            results.append(statistics.median(r[0] for r in runs) * 1000)
+            results.append(statistics.median(r[1] for r in runs) * 1000)
+        print(
+            f"{name:>28} {results[0]:>16.0f} {results[1]:>14.0f} "
+            f"{results[2]:>15.0f} {results[3]:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Measure the latency of DistributedContext collectives against world size, with flat collectives
+(every worker talks to the chief) and hierarchical collectives (workers talk to their local chief,
+and local chiefs talk to the chief).
+
+Every rank is a separate process on this machine, and ranks are split into --local-size ranks per
+simulated machine.  The latency of one collective is measured from when the first rank enters it
+until the last rank leaves it, so results are only meaningful with roughly as many cpus as ranks;
+with fewer, they mostly measure scheduling.
+
+Usage (from the harness directory):
+
+    python -m tests.benchmarks.bench_collectives [--sizes 8 16 32 64] [--local-size 8]
+        [--iters 50]
+"""
+import argparse
+import multiprocessing
+import socket
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+from determined import core
+
+COLLECTIVES = ["gather", "allgather", "broadcast"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("", 0))
+        return int(s.getsockname()[1])
+
+
+def worker(
+    rank: int,
+    size: int,
+    local_size: int,
+    ports: Tuple[int, int],
+    hierarchical: bool,
+    iters: int,
+    results: Any,
+) -> None:
+    dist = core.DistributedContext(
+        rank=rank,
+        size=size,
+        local_rank=rank % local_size,
+        local_size=local_size,
+        cross_rank=rank // local_size,
+        cross_size=size // local_size,
+        chief_ip="localhost",
+        pub_port=ports[0],
+        pull_port=ports[1],
+        hierarchical=hierarchical,
+    )
+    try:
+        spans: Dict[str, List[Tuple[float, float]]] = {}
+        payload = {"rank": rank, "loss": 0.5, "batches": 100}
+        for name in COLLECTIVES:
+            fn = getattr(dist, name)
+            spans[name] = []
+            for _ in range(iters):
+                # Line the ranks up, so that one iteration does not overlap the next.
+                dist.allgather(None)
+                # time.monotonic() is comparable across processes.
+                start = time.monotonic()
+                fn(payload)
+                spans[name].append((start, time.monotonic()))
+        all_spans = dist.gather(spans)
+        if all_spans is not None:
+            latencies = {
+                name: statistics.median(
+                    max(s[name][i][1] for s in all_spans) - min(s[name][i][0] for s in all_spans)
+                    for i in range(iters)
+                )
+                for name in COLLECTIVES
+            }
+            results.put(latencies)
+    finally:
+        dist.close()
+
+
+def run(size: int, local_size: int, hierarchical: bool, iters: int) -> Dict[str, float]:
+    """Return the median latency of each collective, in seconds."""
+    results = multiprocessing.Queue()  # type: Any
+    ports = (free_port(), free_port())
+    procs = [
+        multiprocessing.Process(
+            target=worker, args=(rank, size, local_size, ports, hierarchical, iters, results)
+        )
+        for rank in range(size)
+    ]
+    for p in procs:
+        p.start()
+    try:
+        return results.get()  # type: ignore
+    finally:
+        for p in procs:
+            p.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--local-size", type=int, default=8)
+    parser.add_argument("--iters", type=int, default=50)
+    args = parser.parse_args()
+
+    print(
+        f"{'collective':>10} {'size':>5} {'machines':>9} {'flat (ms)':>10} "
+        f"{'hierarchical (ms)':>18} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        local_size = min(args.local_size, size)
+        assert size % local_size == 0, f"size {size} is not a multiple of {local_size}"
+        flat = run(size, local_size, False, args.iters)
+        hier = run(size, local_size, True, args.iters)
+        for name in COLLECTIVES:
+            print(
+                f"{name:>10} {size:>5} {size // local_size:>9} {flat[name] * 1000:>10.2f} "
+                f"{hier[name] * 1000:>18.2f} {flat[name] / hier[name]:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Measure the latency of DeepSpeed Autotune searcher callbacks over runs with thousands of trials.
+
+A random search over --trials trials is driven the way the search runner drives it, with every
+validation either completing with a random metric or, with probability --error-rate, exiting early
+as trials which run out of memory do.  The median and p99 latency of the searcher callbacks are
+reported for the first and last trials of the search, which only differ if bookkeeping grows with
+the number of trials.  The queries made of the trial tracker after every event are then timed,
+both from its indexes and by scanning every trial, as the tracker used to.
+
+Usage (from the harness directory):
+
+    python -m tests.benchmarks.bench_dsat_trial_tracker [--trials 5000] [--error-rate 0.2]
+"""
+import argparse
+import collections
+import functools
+import logging
+import pathlib
+import random
+import statistics
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from determined import searcher
+from determined.pytorch.dsat import DSATTrialTracker, RandomDSATSearchMethod, _utils
+from determined.pytorch.dsat._run_dsat import get_custom_dsat_exp_conf_from_args
+
+MODEL_DIR = (
+    pathlib.Path(__file__)
+    .resolve()
+    .parent.parent.joinpath("experiment", "fixtures", "deepspeed_autotune", "example_experiment")
+)
+
+MODEL_PROFILE_INFO_METRIC: Dict[str, Any] = {
+    "num_params": 60192808,
+    "trainable_num_params": 60192808,
+    "activation_mem_per_gpu": 1698283521,
+    "rank": 0,
+    "gpu_mem": 15843721216,
+}
+
+
+def run_search(trials: int, error_rate: float) -> Tuple[RandomDSATSearchMethod, List[float]]:
+    """Run a search, returning the search method and the latency of handling each closed trial."""
+    args = _utils.get_full_parser().parse_args(
+        [
+            "random",
+            str(MODEL_DIR.joinpath("deepspeed.yaml")),
+            str(MODEL_DIR),
+            "--max-trials",
+            str(trials),
+            "--max-concurrent-trials",
+            "16",
+        ]
+    )
+    args.experiment_id = 0
+    search_method = RandomDSATSearchMethod(
+        args=args, exp_config=get_custom_dsat_exp_conf_from_args(args)
+    )
+    searcher_state = searcher.SearcherState()
+    rng = random.Random(0)
+
+    latencies = []
+    pending: Deque[searcher.Operation] = collections.deque(
+        search_method.initial_operations(searcher_state)
+    )
+    while pending:
+        op = pending.popleft()
+        if isinstance(op, searcher.Shutdown):
+            break
+        if not isinstance(op, searcher.ValidateAfter):
+            continue
+        trial = search_method.trial_tracker[op.request_id]
+        start = time.perf_counter()
+        if trial.searcher_metric_name is None:
+            pending.extend(
+                search_method.on_validation_completed(
+                    searcher_state, op.request_id, MODEL_PROFILE_INFO_METRIC, op.length
+                )
+            )
+        elif rng.random() < error_rate:
+            pending.extend(
+                search_method.on_trial_exited_early(
+                    searcher_state, op.request_id, searcher.ExitedReason.ERRORED
+                )
+            )
+        else:
+            metric = {trial.searcher_metric_name: rng.uniform(1, 1000)}
+            pending.extend(
+                search_method.on_validation_completed(
+                    searcher_state, op.request_id, metric, op.length
+                )
+            )
+        searcher_state.trials_closed.add(op.request_id)
+        pending.extend(search_method.on_trial_closed(searcher_state, op.request_id))
+        latencies.append(time.perf_counter() - start)
+    return search_method, latencies
+
+
+def scan_queries(tracker: DSATTrialTracker) -> None:
+    """Answer the tracker's per-event queries by scanning every trial."""
+    trials = [trial for _, trial in tracker]
+    running = [trial for trial in trials if trial.running]
+    completed = [trial for trial in trials if trial.completed]
+    len(running), len(completed)
+    for stage in range(4):
+        in_stage = [
+            trial
+            for trial in completed
+            if trial.stage == stage and trial.searcher_metric_val is not None
+        ]
+        min(in_stage, key=lambda trial: trial.searcher_metric_val or 0.0, default=None)
+    all(trial.error for trial in completed if trial.searcher_metric_name)
+    for trial in completed[-16:]:
+        len([t for t in trial.lineage_root.lineage_set if t.completed])
+
+
+def indexed_queries(tracker: DSATTrialTracker) -> None:
+    """Answer the same queries from the tracker's indexes."""
+    tracker.running_trials
+    tracker.completed_trials
+    tracker.num_running_trials, tracker.num_completed_trials
+    tracker.best_trials_by_stage
+    tracker.should_be_failure
+    for trial in tracker.completed_trials[-16:]:
+        trial.num_completed_trials_in_lineage
+
+
+def median_latency(fn: Callable[[], Any], repeats: int) -> float:
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    return sorted(values)[min(len(values) - 1, int(q * len(values)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trials", type=int, default=5000)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    # Random search proposes many duplicate trials, each of which is logged.
+    logging.getLogger("determined.pytorch").setLevel(logging.ERROR)
+
+    start = time.perf_counter()
+    search_method, latencies = run_search(args.trials, args.error_rate)
+    elapsed = time.perf_counter() - start
+    tracker = search_method.trial_tracker
+    print(f"{len(tracker)} trials registered, {len(latencies)} closed in {elapsed:.1f}s")
+
+    window = max(1, len(latencies) // 10)
+    print(f"{'trials':>16} {'median (ms)':>12} {'p99 (ms)':>9}")
+    for name, part in (("first 10%", latencies[:window]), ("last 10%", latencies[-window:])):
+        p99 = percentile(part, 0.99) or 0.0
+        print(f"{name:>16} {statistics.median(part) * 1000:>12.3f} {p99 * 1000:>9.3f}")
+
+    print(f"{'queries':>16} {'median (ms)':>12}")
+    queries = (("scanning trials", scan_queries), ("indexed", indexed_queries))
+    for name, queries_fn in queries:
+        latency = median_latency(functools.partial(queries_fn, tracker), args.repeats)
+        print(f"{name:>16} {latency * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Compare the wire formats used by ipc.ZMQBroadcastServer and ipc.ZMQBroadcastClient for the
+allgather pattern of DistributedContext, with realistic training-metric payloads.
+
+The "pickle" format is the original one, where every message is a single pickled frame.  The
+"zero-copy" format is the current one, where large numpy arrays are sent as raw frames.
+
+Two measurements are made for each format:
+
+  - codec: send and receive the chief's broadcast of all gathered payloads over an in-process
+    socket pair.  This isolates serialization and copying costs from scheduling noise.
+  - allgather: a full allgather between the chief and ranks-1 worker processes.  This needs at
+    least as many cpus as ranks to be meaningful.
+
+Usage (from the harness directory):
+
+    python -m tests.benchmarks.bench_ipc [--ranks 8 16 32 64] [--batches 100 10000] [--iters 20]
+        [--skip-allgather]
+"""
+import argparse
+import contextlib
+import multiprocessing
+import statistics
+import time
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+from determined import ipc
+
+NUM_METRICS = 10
+
+
+@contextlib.contextmanager
+def wire_format(fmt: str) -> Iterator[None]:
+    """Patch ipc to use a wire format; worker processes forked meanwhile inherit the patch."""
+    if fmt != "pickle":
+        yield
+        return
+
+    def send_message(socket: Any, message: Any) -> None:
+        socket.send_pyobj(message)
+
+    def recv_message(socket: Any) -> Any:
+        return socket.recv_pyobj()
+
+    orig = ipc._send_message, ipc._recv_message
+    ipc._send_message, ipc._recv_message = send_message, recv_message
+    try:
+        yield
+    finally:
+        ipc._send_message, ipc._recv_message = orig
+
+
+def make_payload(rank: int, batches: int) -> Dict[str, Any]:
+    # One column of per-batch values per metric, like the training metrics of one rank.
+    rng = np.random.default_rng(rank)
+    return {f"metric_{i}": rng.random(batches, dtype=np.float32) for i in range(NUM_METRICS)}
+
+
+def client(pub_url: str, pull_url: str, batches: int, iters: int, rank: int) -> None:
+    payload = make_payload(rank, batches)
+    with ipc.ZMQBroadcastClient(pub_url, pull_url) as c:
+        c.safe_start()
+        for _ in range(iters):
+            c.recv()
+            c.send((rank, payload))
+            all_payloads = c.recv()
+            assert len(all_payloads) > rank
+            c.send(None)
+
+
+def run_codec(fmt: str, ranks: int, batches: int, iters: int) -> List[float]:
+    """Time sending and receiving the gathered payloads of every rank, per iteration."""
+    import zmq
+
+    gathered = [(rank, make_payload(rank, batches)) for rank in range(ranks)]
+    context = zmq.Context()
+    with wire_format(fmt), context.socket(zmq.PAIR) as a, context.socket(zmq.PAIR) as b:
+        a.bind("inproc://bench-ipc")
+        b.connect("inproc://bench-ipc")
+        times = []
+        for serial in range(iters):
+            start = time.perf_counter()
+            ipc._send_message(a, ipc._SerialMessage(serial, gathered))
+            ipc._recv_message(b)
+            times.append(time.perf_counter() - start)
+    context.term()
+    return times
+
+
+def run_allgather(fmt: str, ranks: int, batches: int, iters: int) -> List[float]:
+    """Time one allgather across ranks (the chief plus ranks-1 worker processes) per iteration."""
+    chief_payload = make_payload(0, batches)
+    with wire_format(fmt), ipc.ZMQBroadcastServer(num_connections=ranks - 1) as server:
+        pub_url = f"tcp://localhost:{server.get_pub_port()}"
+        pull_url = f"tcp://localhost:{server.get_pull_port()}"
+        procs = [
+            multiprocessing.Process(target=client, args=(pub_url, pull_url, batches, iters, rank))
+            for rank in range(1, ranks)
+        ]
+        for p in procs:
+            p.start()
+        try:
+            server.safe_start()
+            times = []
+            for _ in range(iters):
+                start = time.perf_counter()
+                server.broadcast(None)
+                gathered = [(0, chief_payload)] + server.gather()
+                server.broadcast(gathered)
+                # Wait for every worker to have received the result.
+                server.gather()
+                times.append(time.perf_counter() - start)
+        finally:
+            for p in procs:
+                p.join()
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ranks", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--batches", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--skip-allgather", action="store_true")
+    args = parser.parse_args()
+
+    benchmarks = [("codec", run_codec)]
+    if not args.skip_allgather:
+        benchmarks.append(("allgather", run_allgather))
+
+    print(
+        f"{'benchmark':>10} {'ranks':>6} {'batches':>8} {'pickle (ms)':>12} "
+        f"{'zero-copy (ms)':>15} {'speedup':>8}"
+    )
+    for name, fn in benchmarks:
+        for ranks in args.ranks:
+            for batches in args.batches:
+                results = {
+                    fmt: statistics.median(fn(fmt, ranks, batches, args.iters)) * 1000
+                    for fmt in ["pickle", "zero-copy"]
+                }
+                speedup = results["pickle"] / results["zero-copy"]
+                print(
+                    f"{name:>10} {ranks:>6} {batches:>8} {results['pickle']:>12.2f} "
+                    f"{results['zero-copy']:>15.2f} {speedup:>7.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
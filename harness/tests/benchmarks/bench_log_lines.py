@@ -0,0 +1,182 @@
+"""
+Measure how many lines of output per second wrap_rank.py and ship_logs.py can split and parse.
+
+--lines lines of output, a mix of plain lines, tqdm progress bars ending in '\\r', and lines with
+rank and level prefixes, are read from an in-memory stream, which like a busy pipe always has
+--read-size bytes to read.  The lines are split and parsed into structured logs the way the
+ship_logs.py Collector does, both one line at a time with a regex per rank and level and a
+timestamp formatted per line (as ship_logs.py used to), and with its batched line splitter and
+single-pass parser.  wrap_rank.py's rank prefixing is measured the same way.
+
+Usage (from the harness directory):
+
+    python -m tests.benchmarks.bench_log_lines [--lines 200000] [--repeats 5]
+"""
+import argparse
+import datetime
+import io
+import pathlib
+import random
+import re
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List
+
+from determined.launch import wrap_rank
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[3].joinpath("master/static/srv")))
+import ship_logs  # noqa: E402
+
+rank = re.compile(
+    r"(?P<space1> ?)\[rank=(?P<rank_id>([0-9]+))\](?P<space2> ?)(?P<log>.*)", flags=re.DOTALL
+)
+level = re.compile(
+    r"(?P<space1> ?)(?P<level>(DEBUG|INFO|WARNING|ERROR|CRITICAL)):(?P<space2> ?)(?P<log>.*)",
+    flags=re.DOTALL,
+)
+lineend = re.compile(rb"[\r\n]")
+
+
+def output(lines: int) -> bytes:
+    rng = random.Random(0)
+    out = []
+    for i in range(lines):
+        kind = rng.random()
+        if kind < 0.4:
+            out.append(f"[rank={i % 8}] INFO: step {i}: loss={rng.random():.4f}\n")
+        elif kind < 0.7:
+            out.append(f" {i % 100:>3}%|#####     | {i}/100000 [00:10<00:20, 812.34it/s]\r")
+        else:
+            out.append(f"epoch {i // 1000} batch {i} took {rng.random():.6f}s\n")
+    return "".join(out).encode("utf8")
+
+
+class Pipe(io.RawIOBase):
+    """Returns at most read_size bytes per read, like a pipe with a full buffer."""
+
+    def __init__(self, data: bytes, read_size: int) -> None:
+        self.data = memoryview(data)
+        self.read_size = read_size
+        self.offset = 0
+
+    def read(self, size: int = -1) -> bytes:
+        size = min(size, self.read_size)
+        buf = self.data[self.offset : self.offset + size].tobytes()
+        self.offset += len(buf)
+        return buf
+
+
+def read_per_line(fd: io.RawIOBase) -> Iterator[str]:
+    """The line splitter which wrap_rank.py and ship_logs.py used to share."""
+    limit = io.DEFAULT_BUFFER_SIZE - 1
+    nread = 0
+    chunks: List[bytes] = []
+
+    def oneline() -> str:
+        nonlocal nread
+        nonlocal chunks
+        out = b"".join(chunks).decode("utf8")
+        chunks = []
+        nread = 0
+        return out
+
+    while True:
+        buf = fd.read(limit - nread)
+        if not buf:
+            break
+        while buf:
+            m = lineend.search(buf)
+            if m is None:
+                chunks.append(buf)
+                nread += len(buf)
+                break
+            start, end = m.span()
+            chunks.append(buf[:start])
+            chunks.append(b"\n")
+            yield oneline()
+            buf = buf[end:]
+        if nread >= limit:
+            chunks.append(b"\n")
+            yield oneline()
+    if chunks:
+        chunks.append(b"\n")
+        yield oneline()
+
+
+def parse_per_line(fd: io.RawIOBase) -> int:
+    n = 0
+    for line in read_per_line(fd):
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        log: Dict[str, Any] = {"timestamp": now, "stdtype": "stdout"}
+        m = rank.match(line)
+        if m:
+            log["rank_id"] = int(m.group("rank_id"))
+            line = m.group("log")
+        m = level.match(line)
+        if m:
+            log["level"] = f"LOG_LEVEL_{m.group('level')}"
+            line = m.group("log")
+        log["log"] = line
+        n += 1
+    return n
+
+
+def parse_batched(fd: io.RawIOBase) -> int:
+    n = 0
+    timestamps = ship_logs.Timestamps()
+    for lines in ship_logs.read_line_batches(fd):
+        now = timestamps.now()
+        n += len([ship_logs.parse_log(line, now, "stdout") for line in lines])
+    return n
+
+
+def prefix_per_line(fd: io.RawIOBase) -> int:
+    n = 0
+    for line in read_per_line(fd):
+        f"[rank=0] {line}".encode("utf8")
+        n += 1
+    return n
+
+
+def prefix_batched(fd: io.RawIOBase) -> int:
+    n = 0
+    prefix = b"[rank=0] "
+    for lines in wrap_rank.read_line_batches(fd):
+        n += len([prefix + line.encode("utf8") for line in lines])
+    return n
+
+
+def lines_per_second(
+    fn: Callable[[io.RawIOBase], int], data: bytes, read_size: int, repeats: int
+) -> float:
+    rates = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        lines = fn(Pipe(data, read_size))
+        rates.append(lines / (time.perf_counter() - start))
+    return statistics.median(rates)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--read-size", type=int, default=64 * 1024)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    data = output(args.lines)
+    print(f"{args.lines} lines, {len(data) / 2**20:.1f} MiB")
+    print(f"{'':>22} {'lines/s':>10}")
+    for name, fn in (
+        ("ship_logs (per line)", parse_per_line),
+        ("ship_logs (batched)", parse_batched),
+        ("wrap_rank (per line)", prefix_per_line),
+        ("wrap_rank (batched)", prefix_batched),
+    ):
+        rate = lines_per_second(fn, data, args.read_size, args.repeats)
+        print(f"{name:>22} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
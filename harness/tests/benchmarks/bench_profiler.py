@@ -0,0 +1,119 @@
+"""
+Measure the per-call overhead of ProfilerAgent.record_timing() while the profiler is collecting
+timings, compared with the previous implementation (a Timing object and a queue.Queue.put() per
+call) and with the profiler disabled.
+
+Each iteration times a few regions with empty bodies, like one batch of PyTorchTrial training,
+and then moves on to the next batch.  Only cpu time spent in the training thread is counted: the
+work of the profiler's background threads is excluded, since in real training it overlaps with the
+training thread waiting for the GPU.
+
+Usage (from the harness directory):
+
+    python -m tests.benchmarks.bench_profiler [--batches 10000] [--repeats 3]
+"""
+import argparse
+import contextlib
+import queue
+import time
+from typing import Any, Callable, ContextManager, Iterator
+
+from determined import profiler
+
+REGIONS = [("to_device", True), ("train_batch", False), ("step_lr_schedulers", False)]
+
+
+def make_agent(enabled: bool) -> profiler.ProfilerAgent:
+    # Measuring system metrics only adds noise, and it falls behind while this benchmark holds the
+    # GIL, so take no measurements.
+    profiler.SysMetricCollectorThread.MEASUREMENT_INTERVAL = 3600
+    # With empty bodies, timings are recorded far faster than in real training; make room for them
+    # all, so that none are dropped.
+    profiler._TimingRings.CAPACITY = 1 << 17
+    agent = profiler.ProfilerAgent(
+        trial_id="1",
+        agent_id="agent",
+        master_url="http://localhost:8080",
+        profiling_is_enabled=enabled,
+        global_rank=0,
+        # The profiler is only enabled outside of training on ranks which collect system metrics.
+        local_rank=0,
+        begin_on_batch=0,
+        sync_timings=True,
+        send_batch_fn=lambda *_: None,
+        check_data_exists_fn=lambda *_: False,
+    )
+    agent.start()
+    agent.set_training(True)
+    agent.update_batch_idx(0)
+    return agent
+
+
+def make_legacy_record_timing(
+    agent: profiler.ProfilerAgent,
+) -> Callable[..., ContextManager[None]]:
+    """The record_timing() implementation this benchmark compares against."""
+    q = queue.Queue()  # type: queue.Queue
+
+    @contextlib.contextmanager
+    def record_timing(metric_name: str, accumulate: bool = False) -> Iterator[None]:
+        if not agent.is_enabled or not agent.timings_is_enabled or not agent.is_active:
+            yield
+            return
+        timing = profiler.Timing(metric_name, agent.current_batch_idx)
+        timing.start()
+        yield
+        timing.end()
+        q.put(timing.to_measurement(accumulate=accumulate))
+
+    return record_timing
+
+
+def run(agent: profiler.ProfilerAgent, record_timing: Any, batches: int) -> float:
+    """Return the mean training thread cpu time per record_timing() call, in seconds."""
+    start = time.thread_time()
+    for _ in range(batches):
+        for name, accumulate in REGIONS:
+            with record_timing(name, accumulate=accumulate):
+                pass
+        agent.update_batch_idx(agent.current_batch_idx + 1)
+    elapsed = time.thread_time() - start
+
+    # Subtract the cost of the loop and update_batch_idx(), which is the same for every variant.
+    start = time.thread_time()
+    for _ in range(batches):
+        for _ in REGIONS:
+            with profiler._NULL_CONTEXT:
+                pass
+        agent.update_batch_idx(agent.current_batch_idx + 1)
+    overhead = time.thread_time() - start
+    return max(elapsed - overhead, 0.0) / (batches * len(REGIONS))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batches", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    def best(agent: profiler.ProfilerAgent, record_timing: Any) -> float:
+        return min(run(agent, record_timing, args.batches) for _ in range(args.repeats))
+
+    results = []
+    agent = make_agent(enabled=True)
+    try:
+        results.append(("queue (previous)", best(agent, make_legacy_record_timing(agent))))
+        results.append(("ring buffer", best(agent, agent.record_timing)))
+    finally:
+        agent.end()
+
+    agent = make_agent(enabled=False)
+    results.append(("disabled", best(agent, agent.record_timing)))
+
+    print(f"{'record_timing':>18} {'ns/call':>8}")
+    for name, per_call in results:
+        print(f"{name:>18} {per_call * 1e9:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Measure how long it takes to read every page of a paginated API, with and without reading ahead.
+
+A listing of --records records, served --limit records per page by a fake master which takes
+--latency milliseconds to answer each request, is read with api.read_paginated one page at a time
+(as it used to be read) and with increasing concurrency.
+
+Usage (from the harness directory):
+
+    python -m tests.benchmarks.bench_read_paginated [--records 20000] [--latency 50]
+"""
+import argparse
+import statistics
+import time
+
+from determined.common import api
+from determined.common.api import bindings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=50, help="milliseconds per request")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    ids = list(range(args.records))
+
+    def get_with_offset(offset: int) -> bindings.v1ListWorkspacesBoundToRPResponse:
+        time.sleep(args.latency / 1000)
+        end = min(offset + args.limit, len(ids))
+        return bindings.v1ListWorkspacesBoundToRPResponse(
+            workspaceIds=ids[offset:end],
+            pagination=bindings.v1Pagination(
+                offset=offset, limit=args.limit, startIndex=offset, endIndex=end, total=len(ids)
+            ),
+        )
+
+    pages = -(-args.records // args.limit)
+    print(f"{args.records} records in {pages} pages, {args.latency:.0f}ms per request")
+    print(f"{'concurrency':>12} {'seconds':>8}")
+    for concurrency in (1, 2, 4, 8):
+        durations = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            resps = api.read_paginated(get_with_offset, concurrency=concurrency)
+            read = [i for r in resps for i in r.workspaceIds or []]
+            durations.append(time.perf_counter() - start)
+            assert read == ids
+        print(f"{concurrency:>12} {statistics.median(durations):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Measure how long it takes to find the TensorBoard files to sync, in a directory with many files.
+
+A directory of --files event and profiler files is created, spread over --dirs profiler run
+directories, and then --syncs times, a few files are appended to or created and the files to sync
+are found, as TensorboardManager.sync() does after every metrics report.  The median latency is
+reported for listing every file and comparing modification times with the last sync (as the
+manager used to), and for the file tracker, both scanning with its index and with inotify.
+
+Usage (from the harness directory):
+
+    python -m tests.benchmarks.bench_tensorboard_sync [--files 10000] [--dirs 100] [--syncs 20]
+"""
+import argparse
+import pathlib
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from determined.tensorboard import _tracker
+
+
+def selector(path: pathlib.Path) -> bool:
+    # TensorboardManager.sync() selects every file by default.
+    return True
+
+
+def populate(base_path: pathlib.Path, files: int, dirs: int) -> None:
+    base_path.joinpath("events.out.tfevents.1700000000.host").write_bytes(b"event")
+    for i in range(files - 1):
+        run = base_path.joinpath("plugins", "profile", f"run{i % dirs}")
+        run.mkdir(parents=True, exist_ok=True)
+        run.joinpath(f"host{i}.trace.json.gz").write_bytes(b"trace")
+
+
+def measure(
+    base_path: pathlib.Path, syncs: int, to_sync: Callable[[], List[pathlib.Path]]
+) -> float:
+    """Return the median latency of finding the files to sync, in seconds."""
+    to_sync()
+    events = base_path.joinpath("events.out.tfevents.1700000000.host")
+    latencies = []
+    for i in range(syncs):
+        with events.open("ab") as f:
+            f.write(b"event")
+        base_path.joinpath("plugins", "profile", "run0", f"new{i}.xplane.pb").write_bytes(b"pb")
+        start = time.perf_counter()
+        found = to_sync()
+        latencies.append(time.perf_counter() - start)
+        assert len(found) >= 2, found
+    return statistics.median(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--dirs", type=int, default=100)
+    parser.add_argument("--syncs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = pathlib.Path(tmp)
+        populate(base_path, args.files, args.dirs)
+
+        last_sync = 0.0
+
+        def list_since_last_sync() -> List[pathlib.Path]:
+            nonlocal last_sync
+            sync_start = time.time()
+            paths = [
+                file
+                for file in base_path.rglob("*")
+                if file.stat().st_mtime > last_sync and file.is_file() and selector(file)
+            ]
+            last_sync = sync_start
+            return paths
+
+        print(f"{args.files} files in {args.dirs} directories")
+        print(f"{'method':>20} {'latency (ms)':>13}")
+        latency = measure(base_path, args.syncs, list_since_last_sync)
+        print(f"{'rglob + stat':>20} {latency * 1000:>13.2f}")
+        for name, use_inotify in (("tracker (scan)", False), ("tracker (inotify)", True)):
+            tracker = _tracker.FileTracker(base_path, use_inotify=use_inotify)
+            latency = measure(base_path, args.syncs, lambda: tracker.changed(selector))
+            tracker.close()
+            print(f"{name:>20} {latency * 1000:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Measure how long pytorch.to_device() takes to move batches of different structures to device.
+
+Batches of small tensors, already on --device, are moved to it --iterations times, so that what is
+measured is the overhead of walking the structure of the batch rather than copying its tensors.
+The median time per batch is reported for the recursive to_device() which pytorch used to have,
+for to_device() with its batch plan cached, as it is every step after the first, and for
+to_device() compiling a new plan every time, as for batches whose structure changes every step.
+
+Usage (from the harness directory):
+
+    python -m tests.benchmarks.bench_to_device [--iterations 2000] [--device cpu]
+"""
+import argparse
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Type
+
+import numpy as np
+import torch
+
+from determined import pytorch
+from determined.pytorch import _data
+
+
+def to_device_recursive(
+    data: Any,
+    device: torch.device,
+    warned_types: Optional[Set[Type]] = None,
+    non_blocking: bool = False,
+) -> Any:
+    """The recursive to_device() which pytorch used to have."""
+    if warned_types is None:
+        warned_types = set()
+
+    if isinstance(data, dict):
+        return {
+            k: to_device_recursive(v, device, warned_types, non_blocking) for k, v in data.items()
+        }
+    elif isinstance(data, list):
+        return [to_device_recursive(d, device, warned_types, non_blocking) for d in data]
+    elif isinstance(data, tuple):
+        return tuple(to_device_recursive(d, device, warned_types, non_blocking) for d in data)
+    elif isinstance(data, np.ndarray):
+        if data.dtype.kind in "fciub":
+            return _data._tensor_to_device(torch.from_numpy(data), device, non_blocking)
+    elif isinstance(data, torch.Tensor):
+        return _data._tensor_to_device(data, device, non_blocking)
+    elif hasattr(data, "to") and callable(data.to):
+        return data.to(device)
+
+    if type(data) not in warned_types:
+        warned_types.add(type(data))
+    return data
+
+
+def to_device_uncached(data: Any, device: torch.device) -> Any:
+    _data._batch_plan.cache_clear()
+    return pytorch.to_device(data, device)
+
+
+def batches(device: torch.device) -> Dict[str, Any]:
+    def t() -> torch.Tensor:
+        return torch.zeros(4, device=device)
+
+    return {
+        "tensor": t(),
+        "(input, target)": (t(), t()),
+        "dict of 4": {k: t() for k in ("input_ids", "attention_mask", "labels", "weights")},
+        "dict of 8 lists of 64": {f"field{i}": [t() for _ in range(64)] for i in range(8)},
+        "list of 32 dicts of 4": [
+            {"boxes": t(), "labels": t(), "masks": t(), "image_id": t()} for _ in range(32)
+        ],
+    }
+
+
+def leaves(data: Any) -> int:
+    return len(_data._flatten(data)[1])
+
+
+def median_time(
+    fn: Callable[[Any, torch.device], Any], batch: Any, device: torch.device, iterations: int
+) -> float:
+    times: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(batch, device)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    print(f"{'batch':>22} {'leaves':>7} {'recursive (us)':>15} {'plan (us)':>10} {'uncached':>9}")
+    for name, batch in batches(device).items():
+        for fn in (to_device_recursive, pytorch.to_device):
+            assert leaves(fn(batch, device)) == leaves(batch)
+        recursive, plan, uncached = (
+            median_time(fn, batch, device, args.iterations) * 1e6
+            for fn in (to_device_recursive, pytorch.to_device, to_device_uncached)
+        )
+        print(f"{name:>22} {leaves(batch):>7} {recursive:>15.1f} {plan:>10.1f} {uncached:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,23 @@
+import contextlib
+import http.server
 import io
+import re
 import tarfile
+import threading
+import urllib.parse
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import pytest
 import responses
+from _pytest import monkeypatch
 from responses import matchers
 
+from determined import errors
 from determined.common import api
 from determined.common.experimental import Checkpoint
+from determined.common.experimental.checkpoint import _master_download
+from determined.common.experimental.checkpoint._checkpoint import CheckpointTrainingMetadata
 
 
 def get_long_str(approx_len: int) -> str:
@@ -84,3 +95,209 @@ def test_checkpoint_download_via_master(tmp_path: Path) -> None:
         checkpoint_path,
     )
     verify_test_checkpoint(checkpoint_path)
+
+
+class CheckpointFiles:
+    """What a fake master serves for a checkpoint, and the requests made of it."""
+
+    def __init__(self, files: Dict[str, bytes]) -> None:
+        self.files = files
+        self.archive: Optional[bytes] = None
+        self.serve_files = True
+        # Requests for these files are cut short the first time.
+        self.drop: List[str] = []
+        self.requests: List[Tuple[str, Optional[str]]] = []
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def fake_master(ckpt: CheckpointFiles) -> Iterator[api.Session]:
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            url = urllib.parse.urlparse(self.path)
+            if not url.path.endswith("/file"):
+                assert ckpt.archive is not None
+                self.reply(200, ckpt.archive)
+                return
+            name = urllib.parse.parse_qs(url.query)["path"][0]
+            byte_range = self.headers.get("Range")
+            with ckpt.lock:
+                ckpt.requests.append((name, byte_range))
+                drop = name in ckpt.drop
+                if drop:
+                    ckpt.drop.remove(name)
+            if not ckpt.serve_files or name not in ckpt.files:
+                self.reply(404, b'{"message": "not found"}')
+                return
+            data = ckpt.files[name]
+            if byte_range is None:
+                self.reply(200, data, drop=drop)
+                return
+            m = re.fullmatch(r"bytes=(\d+)-(\d*)", byte_range)
+            assert m, byte_range
+            start = int(m.group(1))
+            end = int(m.group(2)) + 1 if m.group(2) else len(data)
+            self.reply(206, data[start:end], drop=drop)
+
+        def reply(self, code: int, body: bytes, drop: bool = False) -> None:
+            self.send_response(code)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if drop:
+                # Send half of the body, and close the connection.
+                body = body[: len(body) // 2]
+                self.close_connection = True
+            self.wfile.write(body)
+            with ckpt.lock:
+                ckpt.bytes_sent += len(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("localhost", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, args=[0.1])
+    thread.start()
+    sess = api.Session(f"http://localhost:{server.server_address[1]}", None, None, None)
+    try:
+        yield sess
+    finally:
+        sess.close()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def checkpoint_files() -> Dict[str, bytes]:
+    return {
+        "metadata.json": b'{"format": "test"}',
+        "data.txt": b"This is mock data.",
+        "empty.txt": b"",
+        "lib/big-data.bin": bytes(range(256)) * 40,
+        "lib/math.py": b"def triple(x):\n  return x * 3",
+    }
+
+
+def resources(files: Dict[str, bytes]) -> Dict[str, str]:
+    res = {name: str(len(data)) for name, data in files.items()}
+    res["lib/"] = "0"
+    res["emptyDir/"] = "0"
+    return res
+
+
+def download(sess: api.Session, files: Dict[str, bytes], dst: Path) -> None:
+    # Download "lib/big-data.bin" in 10 parts.
+    _master_download.download(
+        sess, "uuid", resources(files), dst, retries=1, part_size=1024, multipart_threshold=4096
+    )
+
+
+def verify_files(files: Dict[str, bytes], dst: Path) -> None:
+    for name, data in files.items():
+        assert dst.joinpath(name).read_bytes() == data, name
+    assert dst.joinpath("emptyDir").is_dir()
+    assert not list(dst.glob("**/*.part*"))
+
+
+def test_checkpoint_download_files_via_master(tmp_path: Path) -> None:
+    ckpt = CheckpointFiles(checkpoint_files())
+    with fake_master(ckpt) as sess:
+        download(sess, ckpt.files, tmp_path)
+    verify_files(ckpt.files, tmp_path)
+
+    # The empty file needs no request, the big file is downloaded in parts, and metadata.json,
+    # whose presence means the checkpoint was downloaded, is downloaded last.
+    names = [name for name, _ in ckpt.requests]
+    assert sorted(set(names)) == ["data.txt", "lib/big-data.bin", "lib/math.py", "metadata.json"]
+    assert names.count("lib/big-data.bin") == 10
+    assert names[-1] == "metadata.json"
+    assert ckpt.bytes_sent == sum(len(data) for data in ckpt.files.values())
+
+
+def test_checkpoint_download_files_via_master_resumes(
+    tmp_path: Path, monkeypatch: monkeypatch.MonkeyPatch
+) -> None:
+    # Keep every byte received before a connection drops.
+    monkeypatch.setattr(_master_download, "CHUNK_SIZE", 1)
+    ckpt = CheckpointFiles(checkpoint_files())
+    files = ckpt.files
+    # An earlier download stopped partway through data.txt and the big file.
+    tmp_path.joinpath("lib").mkdir()
+    tmp_path.joinpath("lib/math.py").write_bytes(files["lib/math.py"])
+    tmp_path.joinpath("data.txt.partial").write_bytes(files["data.txt"][:5])
+    big = tmp_path.joinpath("lib/big-data.bin.partial")
+    big.write_bytes(files["lib/big-data.bin"][:3072] + bytes(len(files["lib/big-data.bin"]) - 3072))
+    tmp_path.joinpath("lib/big-data.bin.parts").write_text("0\n2048\n1024\n")
+
+    # Connections drop partway through the files, and are resumed too.
+    ckpt.drop = ["data.txt", "metadata.json"]
+    with fake_master(ckpt) as sess:
+        download(sess, files, tmp_path)
+    verify_files(files, tmp_path)
+
+    assert ("lib/math.py", None) not in ckpt.requests
+    assert ("data.txt", "bytes=5-") in ckpt.requests
+    assert ("data.txt", "bytes=11-") in ckpt.requests
+    assert ("metadata.json", "bytes=9-") in ckpt.requests
+    assert ("lib/big-data.bin", "bytes=0-1023") not in ckpt.requests
+    already_downloaded = len(files["lib/math.py"]) + 5 + 3072
+    assert ckpt.bytes_sent == sum(len(data) for data in files.values()) - already_downloaded
+
+
+def test_checkpoint_download_files_via_master_checks_sizes(tmp_path: Path) -> None:
+    ckpt = CheckpointFiles(checkpoint_files())
+    files = dict(ckpt.files, **{"data.txt": b"This data is longer than the master recorded."})
+    with fake_master(ckpt) as sess:
+        with pytest.raises(errors.ProxiedDownloadFailed, match="data.txt"):
+            download(sess, files, tmp_path)
+    # Not a complete checkpoint.
+    assert not tmp_path.joinpath("metadata.json").exists()
+
+
+def test_checkpoint_download_files_via_master_falls_back(tmp_path: Path) -> None:
+    checkpoint_path = tmp_path / "mock-checkpoint"
+    setup_mock_checkpoint(checkpoint_path)
+    ckpt = CheckpointFiles(checkpoint_files())
+    ckpt.archive = bytes(get_response_raw_tgz(checkpoint_path))
+    ckpt.serve_files = False
+
+    with fake_master(ckpt) as sess:
+        checkpoint = Checkpoint(sess, "uuid")
+        checkpoint.resources = resources(ckpt.files)
+        checkpoint._download_files_via_master(tmp_path / "uuid")
+    verify_test_checkpoint(tmp_path / "uuid")
+    assert not list(tmp_path.joinpath("uuid").glob("**/*.part*"))
+
+
+def test_checkpoint_download_files_via_master_content_addressed(tmp_path: Path) -> None:
+    # The master only serves the manifests of content-addressed checkpoints.
+    manifest = tmp_path / "mock-checkpoint" / ".det-manifests" / "part.json"
+    manifest.parent.mkdir(parents=True)
+    manifest.write_text('{"version": 1, "files": {}, "dirs": []}')
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w|gz") as tf:
+        tf.add(manifest, arcname=".det-manifests/part.json")
+    ckpt = CheckpointFiles({})
+    ckpt.archive = buf.getvalue()
+    ckpt.serve_files = False
+
+    with fake_master(ckpt) as sess:
+        checkpoint = Checkpoint(sess, "uuid")
+        with pytest.raises(errors.ProxiedDownloadFailed, match="content-addressed"):
+            checkpoint._download_files_via_master(tmp_path / "uuid")
+    assert not tmp_path.joinpath("uuid", ".det-manifests").exists()
+
+    # When the experiment config says so, nothing is downloaded at all.
+    checkpoint.training = CheckpointTrainingMetadata(
+        experiment_config={"checkpoint_storage": {"type": "s3", "content_addressed": True}},
+        experiment_id=1,
+        trial_id=1,
+        hparams={},
+        validation_metrics={},
+    )
+    with pytest.raises(errors.ProxiedDownloadFailed, match="content-addressed"):
+        checkpoint._download_files_via_master(tmp_path / "uuid2")
+    assert not tmp_path.joinpath("uuid2").exists()
@@ -1,6 +1,8 @@
+import importlib
 import inspect
 import io
 import os
+import subprocess
 import sys
 import tempfile
 import uuid
@@ -13,9 +15,10 @@ import pytest
 import requests
 import requests_mock
 
-from determined.cli import cli, command, render
+from determined.cli import cli, command, render, top_arg_descriptions
 from determined.common import constants, context
 from determined.common.api import bindings
+from determined.common.declarative_argparse import Cmd
 from tests.filetree import FileTree
 
 MINIMAL_CONFIG = '{"description": "test"}'
@@ -407,6 +410,83 @@ def test_cli_args_exist() -> None:
     assert e.value.code == 0
 
 
+def test_command_stubs_match_modules() -> None:
+    for module, stubs in top_arg_descriptions.command_modules.items():
+        cmds = importlib.import_module(module).args_description
+        assert [(c.name, c.help_str) for c in stubs] == [
+            (c.name, c.help_str) for c in cmds if isinstance(c, Cmd)
+        ], module
+
+
+# Run the CLI, then print which command modules were imported.  argcomplete exits with os._exit(),
+# so patch that before argcomplete is imported.
+LAZY_IMPORTS_SCRIPT = """
+import os
+import sys
+
+real_exit = os._exit
+
+
+def report(code=0):
+    print(" ".join(m for m in sys.modules if m.startswith("determined.cli.")))
+    sys.stdout.flush()
+    real_exit(code)
+
+
+os._exit = report
+from determined.cli import cli
+
+try:
+    cli.main(sys.argv[1:])
+except SystemExit:
+    pass
+report()
+"""
+
+
+@pytest.mark.parametrize(
+    "args,comp_line,completions,imported,not_imported",
+    [
+        (["--help"], None, None, [], ["experiment", "trial", "deploy", "render"]),
+        (["-m", "x", "t", "--help"], None, None, ["trial"], ["experiment", "notebook"]),
+        (["--mast=x", "rp", "list", "--help"], None, None, ["resource_pool"], ["experiment"]),
+        ([], "det exp", ["experiment"], [], ["experiment", "trial"]),
+        ([], "det --mast x experiment li", ["list", "list-checkpoints", "list-trials"], [], []),
+        ([], "det -u me 'tensorboard' ", ["help", "list", "open", "kill"], [], ["trial"]),
+    ],
+)
+def test_lazy_command_imports(
+    tmp_path: Path,
+    args: List[str],
+    comp_line: Optional[str],
+    completions: Optional[List[str]],
+    imported: List[str],
+    not_imported: List[str],
+) -> None:
+    env = dict(os.environ)
+    if comp_line is not None:
+        env.update(
+            _ARGCOMPLETE="1",
+            COMP_LINE=comp_line,
+            COMP_POINT=str(len(comp_line)),
+            _ARGCOMPLETE_STDOUT_FILENAME=str(tmp_path.joinpath("completions")),
+        )
+    p = subprocess.run(
+        [sys.executable, "-c", LAZY_IMPORTS_SCRIPT, *args],
+        env=env,
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+    modules = {m.split(".")[2] for m in p.stdout.splitlines()[-1].split()}
+    assert set(imported) <= modules
+    assert not set(not_imported) & modules
+
+    if completions is not None:
+        found = tmp_path.joinpath("completions").read_text().split("\x0b")
+        assert set(completions) <= {c.strip() for c in found}
+
+
 Case = namedtuple("Case", ["input", "output", "colors"])
 color_test_cases: List[Case] = [
     Case(1, "1", ["PRIMITIVES"]),
@@ -1,8 +1,11 @@
-from typing import List, NamedTuple
+import http.server
+import threading
+from typing import Any, Callable, List, NamedTuple, Set, Tuple
 
 import pytest
 
-from determined.common.api import request
+from determined.common import api
+from determined.common.api import bindings, request
 
 Case = NamedTuple("Case", [("base", str), ("path", str), ("expected", str)])
 
@@ -64,3 +67,142 @@ def gen_make_url_cases() -> List[Case]:
 def test_make_url(base: str, path: str, expected: str) -> None:
     actual = request.make_url(base, path)
     assert actual == expected, f"base: {base}, path: {path}"
+
+
+def test_session_reuses_connections() -> None:
+    clients: Set[Tuple[str, int]] = set()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            clients.add(self.client_address)
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("localhost", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, args=[0.1])
+    thread.start()
+    try:
+        session = api.Session(f"http://localhost:{server.server_address[1]}", None, None, None)
+        for _ in range(5):
+            session.get("/info")
+        assert len(clients) == 1
+
+        # Concurrent calls share the pool too, opening at most one connection per thread.
+        workers = [
+            threading.Thread(target=lambda: [session.get("/info") for _ in range(5)])
+            for _ in range(4)
+        ]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        assert len(clients) <= 4
+
+        # A closed session opens a new connection.
+        opened = len(clients)
+        session.close()
+        session.get("/info")
+        assert len(clients) == opened + 1
+        session.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+class Records:
+    """Serves pages of records the way the master does, tracking the requests in flight."""
+
+    def __init__(self, total: int, limit: int) -> None:
+        self.ids = list(range(total))
+        self.limit = limit
+        self.offsets: List[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        # Called with the offset of each request, to change the records while they are read.
+        self.on_request: Callable[[int], None] = lambda offset: None
+
+    def get(self, offset: int) -> bindings.v1ListWorkspacesBoundToRPResponse:
+        with self.lock:
+            self.offsets.append(offset)
+            self.on_request(offset)
+            ids = list(self.ids)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # Leave the time for other requests to be made meanwhile.
+        threading.Event().wait(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        total = len(ids)
+        start = offset if offset >= 0 else max(total + offset, 0)
+        end = min(start + self.limit, total)
+        return bindings.v1ListWorkspacesBoundToRPResponse(
+            workspaceIds=ids[start:end],
+            pagination=bindings.v1Pagination(
+                offset=offset, limit=self.limit, startIndex=start, endIndex=end, total=total
+            ),
+        )
+
+
+def read_ids(records: Records, **kwargs: Any) -> List[int]:
+    return [i for r in api.read_paginated(records.get, **kwargs) for i in r.workspaceIds or []]
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+@pytest.mark.parametrize("offset", [0, 25, -45])
+def test_read_paginated(concurrency: int, offset: int) -> None:
+    records = Records(103, 10)
+    assert read_ids(records, offset=offset, concurrency=concurrency) == records.ids[offset:]
+    assert len(records.offsets) == len(set(records.offsets))
+    assert 1 <= records.max_in_flight <= concurrency
+
+    # Only one page is read when asked for one.
+    records = Records(103, 10)
+    ids = read_ids(records, pages=api.PageOpts.single, concurrency=concurrency)
+    assert ids == records.ids[:10]
+    assert records.offsets == [0]
+
+
+def test_read_paginated_is_lazy_without_concurrency() -> None:
+    records = Records(30, 10)
+    resps = api.read_paginated(records.get)
+    next(resps)
+    assert records.offsets == [0]
+    next(resps)
+    assert records.offsets == [0, 10]
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+@pytest.mark.parametrize("change", ["add", "remove"])
+def test_read_paginated_while_records_change(concurrency: int, change: str) -> None:
+    records = Records(53, 10)
+    changed = False
+
+    def on_request(offset: int) -> None:
+        nonlocal changed
+        if offset >= 20 and not changed:
+            changed = True
+            if change == "add":
+                records.ids.extend(range(100, 113))
+            else:
+                del records.ids[:15]
+
+    records.on_request = on_request
+    ids = read_ids(records, concurrency=concurrency)
+    if change == "add":
+        # Records added at the end are all read.
+        assert ids == list(range(53)) + list(range(100, 113))
+    else:
+        # Some records are skipped, as when reading one page at a time, but none are read twice
+        # and reading goes on to the end.
+        assert ids == sorted(set(ids))
+        assert ids[-1] == 52
@@ -1,5 +1,6 @@
 import contextlib
 import pathlib
+import threading
 from typing import Any, Callable, Dict, Iterator, List, Optional
 from unittest import mock
 
@@ -7,6 +8,7 @@ import pytest
 import requests
 
 from determined import core
+from determined.common import storage
 from tests import parallel
 
 
@@ -145,6 +147,98 @@ def test_checkpoint_context(dummy: bool, mode: core.DownloadMode, tmp_path: path
             storage_manager.restore_path.reset_mock()
 
 
+class _BlockingStorageManager(storage.SharedFSStorageManager):
+    """A cloud-like storage manager whose uploads wait for permission to finish."""
+
+    def __init__(self, base_path: str) -> None:
+        super().__init__(base_path)
+        self.may_finish = threading.Event()
+        self.fail = False
+
+    def store_path_is_direct_access(self) -> bool:
+        return False
+
+    def upload(self, src: Any, dst: str, paths: Optional[storage.Paths] = None) -> None:
+        assert self.may_finish.wait(10)
+        if self.fail:
+            raise ValueError("upload failed")
+        super().upload(src, dst + "-uploaded", paths)
+
+    def post_store_path(self, src: Any, dst: str) -> None:
+        self.upload(src, dst)
+
+
+@pytest.mark.parametrize("method", ["upload", "store_path"])
+def test_async_upload(method: str, tmp_path: pathlib.Path) -> None:
+    storage_manager = _BlockingStorageManager(str(tmp_path.joinpath("storage")))
+    checkpoint_context = core.DummyCheckpointContext(
+        core.DummyDistributedContext(), storage_manager, max_async_uploads=2
+    )
+    reported = []
+    checkpoint_context._report_checkpoint = lambda storage_id, *_: reported.append(  # type: ignore
+        storage_id
+    )
+
+    ckpt_dir = tmp_path.joinpath("ckpt-dir")
+
+    def save(metadata: Dict[str, Any]) -> str:
+        if method == "upload":
+            ckpt_dir.mkdir(exist_ok=True)
+            ckpt_dir.joinpath("weights").write_text("weights")
+            storage_id = checkpoint_context.upload(ckpt_dir, metadata, async_upload=True)
+            # The checkpoint directory may be reused as soon as upload() returns.
+            ckpt_dir.joinpath("weights").write_text("overwritten")
+            return storage_id
+        with checkpoint_context.store_path(metadata, async_upload=True) as (path, storage_id):
+            path.joinpath("weights").write_text("weights")
+        return storage_id
+
+    storage_ids = [save({"steps_completed": i}) for i in range(2)]
+    # Uploads are still in progress, so nothing has been reported yet.
+    assert reported == []
+
+    storage_manager.may_finish.set()
+    checkpoint_context.flush()
+    assert reported == storage_ids
+    for storage_id in storage_ids:
+        uploaded = tmp_path.joinpath("storage", storage_id + "-uploaded")
+        assert uploaded.joinpath("weights").read_text() == "weights"
+        assert uploaded.joinpath("metadata.json").exists()
+
+    # A failed upload is never reported, and raises from the next flush().
+    storage_manager.fail = True
+    save({"steps_completed": 3})
+    with pytest.raises(RuntimeError, match="background checkpoint upload failed"):
+        checkpoint_context.flush()
+    assert reported == storage_ids
+
+    with pytest.raises(ValueError, match="shard=True"):
+        checkpoint_context.upload(ckpt_dir, shard=True, async_upload=True)
+    checkpoint_context._close()
+
+
+def test_async_store_path_failure(tmp_path: pathlib.Path) -> None:
+    storage_manager = _BlockingStorageManager(str(tmp_path.joinpath("storage")))
+    checkpoint_context = core.DummyCheckpointContext(
+        core.DummyDistributedContext(), storage_manager
+    )
+
+    # Files written before a failure are removed, rather than left behind unuploaded.
+    with pytest.raises(ValueError, match="save failed"):
+        with checkpoint_context.store_path(async_upload=True) as (path, _):
+            path.joinpath("weights").write_text("weights")
+            raise ValueError("save failed")
+    assert not path.exists()
+    checkpoint_context._close()
+
+
+def test_init_max_async_uploads(tmp_path: pathlib.Path) -> None:
+    with core.init(checkpoint_storage=str(tmp_path), max_async_uploads=3) as core_context:
+        assert core_context.checkpoint._max_async_uploads == 3
+    with pytest.raises(ValueError, match="max_async_uploads"):
+        core.init(max_async_uploads=0)
+
+
 @pytest.mark.parametrize(
     "resources,expected_merged,expected_conflicts",
     [
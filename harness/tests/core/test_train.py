@@ -0,0 +1,130 @@
+import threading
+from typing import Any, List, Tuple
+from unittest import mock
+
+import pytest
+
+from determined import core
+from determined.common import util
+from determined.common.api import bindings
+
+
+def make_train_context(async_metrics: bool) -> core.TrainContext:
+    return core.TrainContext(
+        mock.MagicMock(),
+        trial_id=1,
+        run_id=1,
+        exp_id=1,
+        distributed=core.DummyDistributedContext(),
+        tensorboard_mode=core.TensorboardMode.MANUAL,
+        tensorboard_manager=None,
+        tbd_writer=None,
+        async_metrics=async_metrics,
+    )
+
+
+def test_coalesce_reports() -> None:
+    reports = [
+        core._train._MetricsReport("training", 1, {"loss": 1}, [{"loss": 1}]),
+        core._train._MetricsReport("custom", 1, {"x": 1}, None),
+        core._train._MetricsReport("training", 1, {"acc": 1}, [{"acc": 1}]),
+        core._train._MetricsReport("training", 2, {"loss": 2}, None),
+        core._train._MetricsReport("training", 1, {"loss": 3}, None),
+    ]
+    assert core._train._coalesce_reports(reports) == [
+        core._train._MetricsReport("training", 1, {"loss": 1, "acc": 1}, [{"loss": 1}, {"acc": 1}]),
+        core._train._MetricsReport("custom", 1, {"x": 1}, None),
+        core._train._MetricsReport("training", 2, {"loss": 2}, None),
+        # Never merged into an earlier report, which would reorder the group.
+        core._train._MetricsReport("training", 1, {"loss": 3}, None),
+    ]
+
+
+def test_async_metrics() -> None:
+    posted: List[Tuple[str, int, Any]] = []
+    may_post = threading.Event()
+
+    def post(session: Any, body: bindings.v1ReportTrialMetricsRequest, **kwargs: Any) -> None:
+        assert may_post.wait(10)
+        posted.append((body.group, body.metrics.stepsCompleted, body.metrics.metrics.avgMetrics))
+
+    with mock.patch.object(bindings, "post_ReportTrialMetrics", side_effect=post):
+        train = make_train_context(async_metrics=True)
+        for i in range(3):
+            metrics = {"loss": i}
+            train.report_training_metrics(steps_completed=i, metrics=metrics)
+            # Reported metrics are copied, so the caller may reuse them.
+            metrics["loss"] = -1
+        train.report_metrics("custom", steps_completed=2, metrics={"x": 1})
+        # Reporting did not wait for the master.
+        assert posted == []
+
+        may_post.set()
+        # Validation metrics wait for everything reported before them.
+        train.report_validation_metrics(steps_completed=2, metrics={"val_loss": 1})
+        assert posted == [
+            (util._LEGACY_TRAINING, 0, {"loss": 0}),
+            (util._LEGACY_TRAINING, 1, {"loss": 1}),
+            (util._LEGACY_TRAINING, 2, {"loss": 2}),
+            ("custom", 2, {"x": 1}),
+            (util._LEGACY_VALIDATION, 2, {"val_loss": 1}),
+        ]
+        train._close()
+
+
+def test_async_metrics_flush_ignores_later_reports() -> None:
+    posted: List[int] = []
+    started = {1: threading.Event(), 2: threading.Event()}
+    release = {1: threading.Event(), 2: threading.Event()}
+
+    def post(session: Any, body: bindings.v1ReportTrialMetricsRequest, **kwargs: Any) -> None:
+        steps_completed = body.metrics.stepsCompleted
+        posted.append(steps_completed)
+        started[steps_completed].set()
+        assert release[steps_completed].wait(10)
+
+    with mock.patch.object(bindings, "post_ReportTrialMetrics", side_effect=post):
+        train = make_train_context(async_metrics=True)
+        assert train._metrics_thread
+        cond = train._metrics_thread._handled_cond
+        waiting = threading.Event()
+        wait_for = cond.wait_for
+
+        def wait_for_and_signal(*args: Any, **kwargs: Any) -> Any:
+            waiting.set()
+            return wait_for(*args, **kwargs)
+
+        train.report_training_metrics(steps_completed=1, metrics={"loss": 1})
+        assert started[1].wait(10)
+        with mock.patch.object(cond, "wait_for", side_effect=wait_for_and_signal):
+            flush = threading.Thread(target=train.flush)
+            flush.start()
+            assert waiting.wait(10)
+        # Keep reporting while the flush waits, as the main thread does while the checkpoint
+        # upload thread flushes metrics.  The flush must not wait for this report too.
+        train.report_training_metrics(steps_completed=2, metrics={"loss": 2})
+        release[1].set()
+        assert started[2].wait(10)
+        flush.join(10)
+        assert not flush.is_alive()
+
+        release[2].set()
+        train.flush()
+        assert posted == [1, 2]
+        train._close()
+
+
+def test_async_metrics_failure() -> None:
+    with mock.patch.object(bindings, "post_ReportTrialMetrics", side_effect=ValueError("no")):
+        train = make_train_context(async_metrics=True)
+        train.report_training_metrics(steps_completed=1, metrics={"loss": 1})
+        with pytest.raises(RuntimeError, match="background metrics report failed"):
+            train.flush()
+        # The failure is only raised once.
+        train.flush()
+        train._close()
+
+    with mock.patch.object(bindings, "post_ReportTrialMetrics", side_effect=ValueError("no")):
+        train = make_train_context(async_metrics=False)
+        with pytest.raises(ValueError, match="no"):
+            train.report_training_metrics(steps_completed=1, metrics={"loss": 1})
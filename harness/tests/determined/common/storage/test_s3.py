@@ -1,4 +1,5 @@
 import os
+import pathlib
 
 import boto3
 import moto
@@ -49,3 +50,28 @@ def test_download_simple_checkpoint(
     assert os.path.exists(downloaded_metadata_path)
     with open(downloaded_metadata_path, "r") as f:
         assert f.read() == metadata_payload
+
+
+@moto.mock_s3
+def test_concurrent_transfer_lifecycle(tmp_path: pathlib.Path) -> None:
+    boto3.client("s3").create_bucket(Bucket="test-bucket")
+    manager = storage.S3StorageManager(bucket="test-bucket", temp_dir=str(tmp_path))
+    manager.transfer_concurrency = 8
+
+    src = tmp_path.joinpath("src")
+    files = {f"shard-{i}/part-{j}.bin": f"{i}-{j}" for i in range(5) for j in range(20)}
+    for name, content in files.items():
+        src.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+        src.joinpath(name).write_text(content)
+
+    manager.upload(src, "ckpt")
+    dst = tmp_path.joinpath("dst")
+    manager.download("ckpt", dst)
+    for name, content in files.items():
+        assert dst.joinpath(name).read_text() == content
+
+    # More than 1000 keys exercises multiple concurrent delete_objects chunks.
+    for i in range(1100):
+        boto3.client("s3").put_object(Bucket="test-bucket", Key=f"ckpt/extra/{i}", Body=b"")
+    manager.delete("ckpt", ["**/*"])
+    assert list(manager.bucket.objects.filter(Prefix="ckpt")) == []
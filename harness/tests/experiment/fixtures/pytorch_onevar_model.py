@@ -155,6 +155,10 @@ class BaseOneVarTrial(pytorch.PyTorchTrial):
         self.checkpoint_callback = CheckpointCallback()
         if self.hparams.get("disable_dataset_reproducibility_checks"):
             self.context.experimental.disable_dataset_reproducibility_checks()
+        if self.hparams.get("defer_metrics_to_host"):
+            self.context.experimental.defer_metrics_to_host()
+        if self.hparams.get("prefetch_to_device"):
+            self.context.experimental.prefetch_to_device(self.hparams["prefetch_to_device"])
 
     def train_batch(
         self, batch: pytorch.TorchData, epoch_idx: int, batch_idx: int
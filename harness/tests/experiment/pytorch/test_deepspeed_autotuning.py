@@ -3,10 +3,12 @@ import copy
 import json
 import math
 import pathlib
+import pickle
 import shutil
 import tempfile
 from collections import deque
 from typing import Any, Deque, Dict, Generator, List, Mapping, Optional, Sequence, Tuple, cast
+from unittest import mock
 
 import pytest
 
@@ -24,6 +26,7 @@ from determined.pytorch.dsat import (
     get_hf_args_with_overwrites,
 )
 from determined.pytorch.dsat._dsat_search_method import ASHADSATSearchData, DSATSearchData
+from determined.pytorch.dsat._memory_model import DSATMemoryModel
 from determined.pytorch.dsat._run_dsat import (
     get_custom_dsat_exp_conf_from_args,
     get_search_method_class,
@@ -489,6 +492,54 @@ class TestDSATTrialTracker:
             assert trial_tracker.best_trial == popped_trial
             assert trial_tracker.best_trials_by_stage[popped_trial.stage] == popped_trial
 
+    @pytest.mark.timeout(5)
+    def test_indexes_match_trials(
+        self, basic_queue_and_trial_tracker: Tuple[List[DSATTrial], DSATTrialTracker]
+    ) -> None:
+        """
+        Verify that the indexes kept by the trial tracker match the state of its trials, as trials
+        are run, succeed, fail, and are changed again.
+        """
+        queued_trials, trial_tracker = basic_queue_and_trial_tracker
+
+        def assert_indexes_match(trial_tracker: DSATTrialTracker) -> None:
+            trials = [trial for _, trial in trial_tracker]
+            assert trial_tracker.running_trials == [t for t in trials if t.running]
+            assert set(trial_tracker.completed_trials) == {t for t in trials if t.completed}
+            for stage in range(4):
+                assert trial_tracker.best_trials_by_stage[stage] == trial_tracker._best_trial_fn(
+                    t for t in trials if t.stage == stage
+                )
+            assert trial_tracker.should_be_failure == all(
+                t.error
+                for t in trials
+                if t.completed and t != trial_tracker.model_profile_info_trial
+            )
+            for trial in trials:
+                assert trial.num_completed_trials_in_lineage == sum(
+                    t.completed for t in trial.lineage_set
+                )
+
+        metric_name = trial_tracker.searcher_metric
+        for idx, trial in enumerate(queued_trials):
+            trial.running = True
+            assert_indexes_match(trial_tracker)
+            if idx % 3 == 0:
+                trial_tracker.report_trial_early_exit(trial)
+            else:
+                # Repeat some metrics, so that ties are broken as before.
+                trial_tracker.update_trial_metric(trial, {metric_name: float(idx % 4)})
+            assert_indexes_match(trial_tracker)
+
+        # Trials may be changed again after completing.
+        queued_trials[1].metric = {metric_name: -1.0}
+        queued_trials[2].metric = {}
+        queued_trials[3].error = False
+        assert_indexes_match(trial_tracker)
+
+        # The indexes are saved with the trial tracker.
+        assert_indexes_match(pickle.loads(pickle.dumps(trial_tracker)))
+
 
 def search_state_and_method_builder(
     args: argparse.Namespace,
@@ -1872,6 +1923,218 @@ class TestASHADSATSearchMethod:
                 assert not search_method.lineage_completed_rung(trial, old_rung + 1)
 
 
+class TestDSATMemoryModel:
+    """
+    Testing the `DSATMemoryModel` predictions, with 100 bytes of GPU memory and an estimated 10
+    bytes of activation memory per sample.
+    """
+
+    @staticmethod
+    def memory_model(smaller_is_better: bool = False) -> DSATMemoryModel:
+        return DSATMemoryModel(
+            gpu_mem=100,
+            base_mem_per_stage={0: 60, 1: 40, 2: 30, 3: 20},
+            activation_mem=10,
+            smaller_is_better=smaller_is_better,
+        )
+
+    def test_estimates_before_any_trials(self) -> None:
+        memory_model = self.memory_model()
+        assert {stage: memory_model.max_mbs(stage) for stage in range(4)} == {
+            0: 4,
+            1: 6,
+            2: 7,
+            3: 8,
+        }
+        # Nothing is predicted to run out of memory before some Trial has.
+        assert not any(memory_model.predicts_oom(stage, 100) for stage in range(4))
+        assert memory_model.predicted_metric(1, 1) is None
+
+    def test_oom_calibrates_all_stages(self) -> None:
+        memory_model = self.memory_model()
+        # Running out of memory with an mbs of 5 in stage 1 means that each sample takes more than
+        # 60 / 5 = 12 bytes.
+        memory_model.observe(1, 5, None)
+        assert memory_model.predicts_oom(1, 5) and memory_model.predicts_oom(1, 6)
+        assert not memory_model.predicts_oom(1, 4)
+        assert memory_model.max_mbs(1) == 4
+        # So stage 3 runs out of memory from an mbs of 80 / 12, rounded up.
+        assert memory_model.predicts_oom(3, 7)
+        assert not memory_model.predicts_oom(3, 6)
+        assert memory_model.max_mbs(3) == 6
+
+        # Running with an mbs of 6 in stage 3 is consistent with that.
+        memory_model.observe(3, 6, 1.0)
+        assert memory_model.predicts_oom(3, 7)
+        assert memory_model.max_mbs(3) == 6
+
+    def test_contradicting_trials(self) -> None:
+        memory_model = self.memory_model()
+        # Each sample takes more than 60 / 3 = 20 bytes, but at most 80 / 5 = 16 bytes: the Trials
+        # must differ in more than stage and mbs, so only the Trials of each stage are used.
+        memory_model.observe(1, 3, None)
+        memory_model.observe(3, 5, 1.0)
+        assert memory_model.predicts_oom(1, 3)
+        assert not memory_model.predicts_oom(3, 8)
+        assert memory_model.max_mbs(0) == 4
+        assert memory_model.max_mbs(1) == 2
+        assert memory_model.max_mbs(3) == 8
+
+        # Trials which ran are never predicted to run out of memory.
+        memory_model.observe(3, 9, 1.0)
+        assert not memory_model.predicts_oom(3, 9)
+        assert memory_model.max_mbs(3) == 9
+
+    @pytest.mark.parametrize("smaller_is_better", [True, False])
+    def test_predicted_metric(self, smaller_is_better: bool) -> None:
+        memory_model = self.memory_model(smaller_is_better)
+
+        # Steps take 2 + mbs seconds.
+        def metric(mbs: int) -> float:
+            return 2 + mbs if smaller_is_better else mbs / (2 + mbs)
+
+        memory_model.observe(2, 1, metric(1))
+        assert memory_model.predicted_metric(2, 2) is None
+        memory_model.observe(2, 4, metric(4))
+        for mbs in range(1, 8):
+            predicted_metric = memory_model.predicted_metric(2, mbs)
+            assert predicted_metric is not None and math.isclose(predicted_metric, metric(mbs))
+        assert memory_model.predicted_metric(1, 2) is None
+
+
+def _run_search_with_max_mbs(
+    search_method: BaseDSATSearchMethod, max_mbs_per_stage: Dict[int, int]
+) -> List[Tuple[str, DSATTrial]]:
+    """
+    Runs the search to completion, with each Trial running out of memory if its mbs is larger than
+    `max_mbs_per_stage[stage]`, and returns the ("run", trial) and ("oom", trial) events in the
+    order in which Trials were run and reported to have run out of memory.
+    """
+    searcher_state = searcher.SearcherState()
+    events: List[Tuple[str, DSATTrial]] = []
+    ops: Deque[searcher.Operation] = deque()
+
+    def add_ops(new_ops: List[searcher.Operation]) -> None:
+        for op in new_ops:
+            if isinstance(op, searcher.ValidateAfter):
+                events.append(("run", search_method.trial_tracker[op.request_id]))
+        ops.extend(new_ops)
+
+    add_ops(search_method.initial_operations(searcher_state))
+    while ops:
+        op = ops.popleft()
+        if isinstance(op, searcher.Shutdown):
+            break
+        if not isinstance(op, searcher.ValidateAfter):
+            continue
+        trial = search_method.trial_tracker[op.request_id]
+        if trial.searcher_metric_name is None:
+            metric = MODEL_INFO_PROFILE_METRIC_FIXTURE
+        elif trial.mbs > max_mbs_per_stage[trial.stage]:
+            events.append(("oom", trial))
+            add_ops(
+                search_method.on_trial_exited_early(
+                    searcher_state, op.request_id, searcher.ExitedReason.ERRORED
+                )
+            )
+            metric = None
+        else:
+            metric = {trial.searcher_metric_name: float(trial.mbs)}
+        if metric is not None:
+            add_ops(
+                search_method.on_validation_completed(
+                    searcher_state, op.request_id, metric, op.length
+                )
+            )
+        searcher_state.trials_closed.add(op.request_id)
+        add_ops(search_method.on_trial_closed(searcher_state, op.request_id))
+    return events
+
+
+@pytest.mark.timeout(10)
+@pytest.mark.parametrize("search_method_name", ["random", "binary", "asha"])
+def test_memory_model_skips_predicted_oom(search_method_name: str) -> None:
+    # Trials run out of memory with an mbs above 4, while the estimates from the model profile info
+    # run are 7 or 8 for every stage.
+    max_mbs_per_stage = {1: 4, 2: 4, 3: 4}
+    num_oom_trials = {}
+    for use_memory_model in (False, True):
+        args = copy.deepcopy(DEFAULT_ARGS_DICT[search_method_name])
+        args.max_trials = 32
+        # Later Trials are only chosen with the benefit of what earlier ones found when fewer run
+        # concurrently.
+        args.max_concurrent_trials = 4
+        args.use_memory_model = use_memory_model
+        search_method = get_search_method_class(search_method_name)(
+            args=args, exp_config=DEFAULT_CUSTOM_DSAT_EXP_CONFIG_DICT[search_method_name]
+        )
+        events = _run_search_with_max_mbs(search_method, max_mbs_per_stage)
+        trials_run = {trial for event, trial in events if event == "run"}
+        num_oom_trials[use_memory_model] = sum(1 for event, _ in events if event == "oom")
+        skipped_trials = [
+            t for _, t in search_method.trial_tracker if t.error and t not in trials_run
+        ]
+        if not use_memory_model:
+            assert not skipped_trials
+            continue
+
+        # Once a Trial has run out of memory, no Trial with as large an mbs in its stage is run.
+        min_oom_mbs_per_stage: Dict[int, int] = {}
+        for event, trial in events:
+            min_oom_mbs = min_oom_mbs_per_stage.get(trial.stage, trial.mbs + 1)
+            if event == "run":
+                assert trial.mbs < min_oom_mbs
+            else:
+                min_oom_mbs_per_stage[trial.stage] = min(trial.mbs, min_oom_mbs)
+        # Skipped Trials count towards `max_trials`.
+        assert search_method.trial_tracker.num_completed_trials == args.max_trials
+        # The model is saved with the trial tracker, and has found the largest mbs of each stage.
+        trial_tracker = pickle.loads(pickle.dumps(search_method.trial_tracker))
+        for stage, max_mbs in max_mbs_per_stage.items():
+            assert trial_tracker.max_mbs_per_stage[stage] == max_mbs
+
+    assert num_oom_trials[True] < num_oom_trials[False]
+
+
+@pytest.mark.timeout(10)
+def test_on_trial_closed_checks_shutdown_once() -> None:
+    args = copy.deepcopy(DEFAULT_ARGS_DICT["random"])
+    args.max_trials = 32
+    args.max_concurrent_trials = 4
+    args.use_memory_model = True
+    search_method = get_search_method_class("random")(
+        args=args, exp_config=DEFAULT_CUSTOM_DSAT_EXP_CONFIG_DICT["random"]
+    )
+    on_trial_closed = search_method.on_trial_closed
+    should_shutdown = search_method.should_shutdown
+    shutdowns: List[bool] = []
+    closes_with_skips = 0
+
+    def record_should_shutdown() -> bool:
+        shutdowns.append(should_shutdown())
+        return shutdowns[-1]
+
+    def checked_on_trial_closed(*args: Any, **kwargs: Any) -> List[searcher.Operation]:
+        nonlocal closes_with_skips
+        shutdowns.clear()
+        with mock.patch.object(
+            search_method, "skip_trial", wraps=search_method.skip_trial
+        ) as skip_trial:
+            ops = on_trial_closed(*args, **kwargs)
+        closes_with_skips += bool(skip_trial.call_count)
+        # should_shutdown() logs why the search is shutting down, which is only done once.
+        assert shutdowns.count(True) <= 1
+        # It is only called again after skipping a Trial, which may complete the search.
+        assert len(shutdowns) == 1 + skip_trial.call_count
+        return ops
+
+    with mock.patch.object(
+        search_method, "should_shutdown", side_effect=record_should_shutdown
+    ), mock.patch.object(search_method, "on_trial_closed", side_effect=checked_on_trial_closed):
+        _run_search_with_max_mbs(search_method, {1: 4, 2: 4, 3: 4})
+    assert closes_with_skips > 0
+
+
 class TestHFConfigOverwriting:
     @pytest.mark.timeout(5)
     def test_overwritten_args(self) -> None:
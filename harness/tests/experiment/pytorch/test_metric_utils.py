@@ -85,6 +85,72 @@ def test_average_training_metrics() -> None:
     assert averaged_metrics == expected_metrics
 
 
+def _metric_values(kind: str, num: int, rng: np.random.Generator) -> List[Any]:
+    values = rng.normal(size=num) * 1000
+    if kind == "float":
+        return [float(v) for v in values]
+    if kind == "float_with_none":
+        return [None if rng.random() < 0.3 else float(v) for v in values]
+    if kind == "int":
+        return [int(v) for v in values]
+    if kind == "float32":
+        return list(values.astype(np.float32))
+    if kind == "float16":
+        return list(values.astype(np.float16))
+    if kind == "scalar_array":
+        return [np.array(v, dtype=np.float32) for v in values]
+    if kind == "single_element_array":
+        return [np.array([v]) for v in values]
+    if kind == "array":
+        return [np.array([v, -v, 2 * v], dtype=np.float32) for v in values]
+    if kind == "mixed":
+        return [np.float32(v) if i % 2 else float(v) for i, v in enumerate(values)]
+    raise ValueError(kind)
+
+
+def _assert_identical(a: Any, b: Any) -> None:
+    assert type(a) is type(b), (a, b)
+    if isinstance(a, (np.ndarray, np.generic)):
+        assert a.dtype == b.dtype and np.shape(a) == np.shape(b)
+        assert a.tobytes() == b.tobytes(), (a, b)
+    else:
+        assert a == b
+
+
+@pytest.mark.parametrize("num_processes", [2, 3, 8, 9, 64])
+@pytest.mark.parametrize(
+    "kind",
+    [
+        "float",
+        "float_with_none",
+        "int",
+        "float32",
+        "float16",
+        "scalar_array",
+        "single_element_array",
+        "array",
+        "mixed",
+    ],
+)
+def test_average_training_metrics_vectorized(num_processes: int, kind: str) -> None:
+    # The vectorized averaging must produce exactly the types and values (to the bit) of
+    # averaging one batch at a time.
+    rng = np.random.default_rng(num_processes)
+    num_batches = 20
+    process_batches = [_metric_values(kind, num_batches, rng) for _ in range(num_processes)]
+    if process_batches[0][0] is None:
+        process_batches[0][0] = 1.0
+    is_array_metric = isinstance(process_batches[0][0], np.ndarray)
+
+    expected = metric_utils._average_metric_batches(process_batches, num_batches, is_array_metric)
+    averaged = metric_utils._average_training_metrics(
+        {"metric": process_batches}, [num_batches] * num_processes
+    )
+    assert len(averaged) == num_batches
+    for batch_metrics, expected_avg in zip(averaged, expected):
+        _assert_identical(batch_metrics["metric"], expected_avg)
+
+
 def test_prepare_metric_reducers() -> None:
     metrics_dict = {"loss1": 1, "loss2": 2}
 
@@ -113,3 +179,43 @@ def test_convert_metrics_to_numpy() -> None:
     metrics = {"loss1": 1, "loss2": torch.tensor(2)}
     converted_metrics = metric_utils._convert_metrics_to_numpy(metrics)
     assert converted_metrics == {"loss1": 1, "loss2": np.array(2)}
+
+
+def test_convert_batch_metrics_to_numpy() -> None:
+    def make_batches() -> List[Dict[str, Any]]:
+        torch.manual_seed(0)
+        return [
+            {
+                "loss": torch.rand(()),
+                # Shapes and dtypes vary between batches, which must be stacked separately.
+                "preds": torch.rand(3 if i % 3 else 2),
+                "count": torch.tensor(i) if i % 2 else torch.tensor(float(i)),
+                "plain": i,
+                "grad": torch.rand((), requires_grad=True) * 2,
+            }
+            for i in range(7)
+        ]
+
+    expected = [
+        metric_utils._convert_metrics_to_numpy(metric_utils._detach_metrics(m))
+        for m in make_batches()
+    ]
+    converted = metric_utils._convert_batch_metrics_to_numpy(make_batches())
+
+    assert len(converted) == len(expected)
+    for got, want in zip(converted, expected):
+        assert got.keys() == want.keys()
+        assert got["plain"] == want["plain"]
+        for name in ("loss", "preds", "count", "grad"):
+            assert isinstance(got[name], np.ndarray), (name, type(got[name]))
+            assert got[name].dtype == want[name].dtype
+            assert got[name].shape == want[name].shape
+            assert np.array_equal(got[name], want[name])
+
+
+def test_detach_metrics_copies() -> None:
+    total = torch.zeros(())
+    detached = metric_utils._detach_metrics({"total": total})
+    # A running total updated after it was reported does not change the reported value.
+    total += 1
+    assert detached["total"].item() == 0
@@ -1,6 +1,9 @@
 # type: ignore
+import collections
+import contextlib
 import logging
 import queue
+import threading
 import typing
 from logging import handlers
 
@@ -9,7 +12,7 @@ import pytest
 import torch
 
 import determined as det
-from determined.pytorch import data_length, samplers, to_device
+from determined.pytorch import _data, _DevicePrefetcher, data_length, samplers, to_device
 
 
 def make_dataset() -> torch.utils.data.Dataset:
@@ -216,6 +219,56 @@ def test_to_device() -> None:
     assert np.array_equal(to_device(np.array([0, 1, 2]), "cpu"), np.array([0, 1, 2]))
 
 
+def test_to_device_structures() -> None:
+    Pair = collections.namedtuple("Pair", ["a", "b"])
+
+    def batch(i: int) -> typing.Any:
+        return {
+            "ids": [np.array([i, i + 1]), torch.tensor([i])],
+            "nested": (collections.OrderedDict(x=torch.tensor(float(i))), [], "str", [[i]]),
+            "pair": Pair(np.array(["s"]), torch.tensor([i, i])),
+            "empty": {},
+        }
+
+    def expected(i: int) -> typing.Any:
+        return {
+            "ids": [torch.tensor([i, i + 1]), torch.tensor([i])],
+            "nested": ({"x": torch.tensor(float(i))}, [], "str", [[i]]),
+            "pair": (np.array(["s"]), torch.tensor([i, i])),
+            "empty": {},
+        }
+
+    def assert_same(actual: typing.Any, expected: typing.Any) -> None:
+        assert type(actual) is type(expected)
+        if isinstance(expected, dict):
+            assert list(actual) == list(expected)
+            for k in expected:
+                assert_same(actual[k], expected[k])
+        elif isinstance(expected, (list, tuple)):
+            assert len(actual) == len(expected)
+            for a, e in zip(actual, expected):
+                assert_same(a, e)
+        elif isinstance(expected, (torch.Tensor, np.ndarray)):
+            assert np.array_equal(actual, expected)
+        else:
+            assert actual == expected
+
+    _data._batch_plan.cache_clear()
+    for i in range(3):
+        assert_same(to_device(batch(i), "cpu", set()), expected(i))
+    # Every batch had the same structure, so it was only planned once.
+    info = _data._batch_plan.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+    assert_same(to_device([batch(3), (batch(4),)], "cpu", set()), [expected(3), (expected(4),)])
+    assert _data._batch_plan.cache_info().misses == 2
+
+    # Equal keys of different types share a plan, but each batch keeps its own keys.
+    for key in (1, True, 1.0, (1,), (True,)):
+        moved = to_device({key: torch.tensor([0])}, "cpu", set())
+        assert repr(list(moved)) == repr([key])
+
+
 @pytest.mark.parametrize("dedup_between_calls", [True, False])
 def test_to_device_warnings(dedup_between_calls) -> None:
     # Capture warning logs as elements in a queue.
@@ -235,3 +288,49 @@ def test_to_device_warnings(dedup_between_calls) -> None:
     finally:
         # Restore logging as it was before.
         logger.removeHandler(handler)
+
+
+def test_device_prefetcher() -> None:
+    pulled = []
+
+    def batches() -> typing.Iterator[typing.Any]:
+        for i in range(5):
+            pulled.append(i)
+            yield {"x": np.full(3, i, dtype=np.float32), "y": [torch.tensor([i]), "label"]}
+
+    threads = set()
+
+    @contextlib.contextmanager
+    def wait_timing() -> typing.Iterator[None]:
+        threads.add(threading.get_ident())
+        yield
+
+    prefetcher = _DevicePrefetcher(
+        batches(), torch.device("cpu"), depth=2, warned_types=set(), wait_timing=wait_timing
+    )
+    first = next(prefetcher)
+    # The next batches are read and moved to device ahead of time.
+    assert pulled == [0, 1, 2]
+    assert isinstance(first["x"], torch.Tensor)
+    assert torch.equal(first["x"], torch.zeros(3))
+
+    rest = list(prefetcher)
+    assert [int(b["x"][0]) for b in rest] == [1, 2, 3, 4]
+    assert [b["y"][1] for b in rest] == ["label"] * 4
+    assert threads == {threading.get_ident()}
+    # Exhausting the prefetcher stops its thread.
+    assert prefetcher._executor is None
+    with pytest.raises(StopIteration):
+        next(prefetcher)
+
+
+def test_device_prefetcher_errors() -> None:
+    def batches() -> typing.Iterator[typing.Any]:
+        yield [torch.zeros(1)]
+        raise ValueError("bad batch")
+
+    prefetcher = _DevicePrefetcher(batches(), torch.device("cpu"), depth=4)
+    # Errors reading batches are raised when reading ahead.
+    with pytest.raises(ValueError, match="bad batch"):
+        next(prefetcher)
+    prefetcher.close()
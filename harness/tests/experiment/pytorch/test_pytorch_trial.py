@@ -126,6 +126,69 @@ class TestPyTorchTrial:
         for metric in metrics:
             assert "mse" in metric
 
+    def test_defer_metrics_to_host(self, tmp_path: pathlib.Path) -> None:
+        results = []
+        for defer in (False, True):
+            trial, trial_controller = pytorch_utils.create_trial_and_trial_controller(
+                trial_class=pytorch_onevar_model.OneVarTrialWithTrainingMetrics,
+                hparams={**self.hparams, "defer_metrics_to_host": defer},
+                trial_seed=self.trial_seed,
+                tensorboard_path=tmp_path.joinpath(f"tensorboard-{defer}"),
+            )
+            val_metrics = trial_controller._validate()
+
+            _, training_metrics = trial_controller._train_with_boundaries(
+                training_enumerator=enumerate(trial_controller.training_iterator),
+                train_boundaries=[
+                    pytorch._TrainBoundary(
+                        step_type=pytorch._TrainBoundaryType.TRAIN, unit=pytorch.Batch(10)
+                    )
+                ],
+            )
+            if defer:
+                # Metrics stay tensors until the end of the reporting period.
+                assert all(isinstance(m["loss"], torch.Tensor) for m in training_metrics)
+            metrics = trial_controller._aggregate_training_metrics(training_metrics)
+            results.append((metrics, val_metrics))
+
+        (train_eager, val_eager), (train_deferred, val_deferred) = results
+        assert train_deferred["avg_metrics"] == pytest.approx(train_eager["avg_metrics"], abs=0)
+        for eager, deferred in zip(train_eager["batch_metrics"], train_deferred["batch_metrics"]):
+            assert deferred.keys() == eager.keys()
+            for k in eager:
+                assert np.array_equal(deferred[k], eager[k])
+        assert val_deferred.keys() == val_eager.keys()
+        for k in val_eager:
+            assert np.array_equal(val_deferred[k], val_eager[k])
+
+    def test_prefetch_to_device(self, tmp_path: pathlib.Path) -> None:
+        results = []
+        for prefetch in (0, 2):
+            trial, trial_controller = pytorch_utils.create_trial_and_trial_controller(
+                trial_class=pytorch_onevar_model.OneVarTrialWithTrainingMetrics,
+                hparams={**self.hparams, "prefetch_to_device": prefetch},
+                trial_seed=self.trial_seed,
+                tensorboard_path=tmp_path.joinpath(f"tensorboard-{prefetch}"),
+            )
+            val_metrics = trial_controller._validate()
+
+            batches = trial_controller._prefetch(trial_controller.training_iterator)
+            assert isinstance(batches, pytorch._DevicePrefetcher) == bool(prefetch)
+            _, training_metrics = trial_controller._train_with_boundaries(
+                training_enumerator=enumerate(batches),
+                train_boundaries=[
+                    pytorch._TrainBoundary(
+                        step_type=pytorch._TrainBoundaryType.TRAIN, unit=pytorch.Batch(10)
+                    )
+                ],
+            )
+            metrics = trial_controller._aggregate_training_metrics(training_metrics)
+            results.append((metrics, val_metrics))
+
+        (train_plain, val_plain), (train_prefetched, val_prefetched) = results
+        assert train_prefetched["avg_metrics"] == train_plain["avg_metrics"]
+        assert val_prefetched == val_plain
+
     def test_nonscalar_validation(self, tmp_path: pathlib.Path) -> None:
         tensorboard_path = tmp_path.joinpath("tensorboard")
 
@@ -1,3 +1,4 @@
+import io
 import subprocess
 import sys
 import textwrap
@@ -40,3 +41,27 @@ def test_split_on_new_lines_or_carriage_returns() -> None:
     p.stdin.write(b"\n")
     p.stdin.flush()
     assert p.wait() == 0
+
+
+class Reads(io.RawIOBase):
+    """Returns each of the given bytes from a separate read, like a pipe would."""
+
+    def __init__(self, *reads: bytes) -> None:
+        self.reads = list(reads)
+
+    def read(self, size: int = -1) -> bytes:
+        return self.reads.pop(0) if self.reads else b""
+
+
+def test_read_line_batches() -> None:
+    limit = io.DEFAULT_BUFFER_SIZE - 1
+    reads = Reads(b"1\n2\r3", b"\r\n\n", b"x" * (limit + 1), b"y" * (2 * limit) + b"\nz")
+    assert list(wrap_rank.read_line_batches(reads)) == [
+        # The line split across reads is only yielded once it is complete.
+        ["1\n", "2\n"],
+        ["3\n", "\n", "\n"],
+        # Lines are broken at the limit, even before the rest of the line is read.
+        ["x" * limit + "\n"],
+        ["x" + "y" * (limit - 1) + "\n", "y" * limit + "\n", "y\n"],
+        ["z\n"],
+    ]
@@ -0,0 +1,150 @@
+import contextlib
+import os
+import pathlib
+import tempfile
+import uuid
+from typing import Any, Dict, Iterator, Optional
+from unittest import mock
+
+import pytest
+
+from determined.common import storage
+from tests.storage import util
+
+
+class CountingStorageManager(storage.SharedFSStorageManager):
+    """A SharedFSStorageManager which counts downloads, like a remote storage backend would do."""
+
+    downloads = 0
+
+    def download(self, *args: Any, **kwargs: Any) -> None:
+        self.downloads += 1
+        super().download(*args, **kwargs)
+
+    @contextlib.contextmanager
+    def restore_path(
+        self, src: str, selector: Optional[storage.Selector] = None
+    ) -> Iterator[pathlib.Path]:
+        # Download to a temporary directory, instead of yielding the files in storage directly.
+        with tempfile.TemporaryDirectory() as dst:
+            self.download(src, dst, selector)
+            yield pathlib.Path(dst)
+
+
+@pytest.fixture()
+def inner(tmp_path: pathlib.Path) -> CountingStorageManager:
+    return CountingStorageManager(str(tmp_path.joinpath("storage")))
+
+
+def make_manager(
+    inner: storage.StorageManager,
+    tmp_path: pathlib.Path,
+    max_size: int = 10**6,
+    resources: Optional[Dict[str, Dict[str, int]]] = None,
+) -> storage.CachedStorageManager:
+    get_resources = None if resources is None else resources.get
+    return storage.CachedStorageManager(
+        inner, str(tmp_path.joinpath("cache")), max_size, get_resources=get_resources
+    )
+
+
+def upload_checkpoint(manager: storage.StorageManager, tmp_path: pathlib.Path) -> str:
+    storage_id = str(uuid.uuid4())
+    ckpt = tmp_path.joinpath(f"ckpt-{storage_id}")
+    util.create_checkpoint(ckpt)
+    manager.upload(ckpt, storage_id)
+    return storage_id
+
+
+def test_checkpoint_lifecycle(inner: CountingStorageManager, tmp_path: pathlib.Path) -> None:
+    util.run_storage_lifecycle_test(make_manager(inner, tmp_path))
+
+
+def test_cache_hits(inner: CountingStorageManager, tmp_path: pathlib.Path) -> None:
+    manager = make_manager(inner, tmp_path)
+    storage_id = upload_checkpoint(manager, tmp_path)
+
+    for i in range(3):
+        with manager.restore_path(storage_id) as path:
+            util.validate_checkpoint(path, util.EXPECTED_FILES)
+        dst = tmp_path.joinpath(f"dst{i}")
+        manager.download(storage_id, dst)
+        util.validate_checkpoint(dst, util.EXPECTED_FILES)
+    assert inner.downloads == 1
+
+    # Partial downloads are served from the cache too.
+    dst = tmp_path.joinpath("partial")
+    manager.download(storage_id, dst, selector=lambda p: p.startswith("subdir/"))
+    expected = {k: v for k, v in util.EXPECTED_FILES.items() if k.startswith("subdir/")}
+    util.validate_checkpoint(dst, expected)
+    assert inner.downloads == 1
+
+    # A new manager, e.g. in another trial on the same node, shares the cache.
+    with make_manager(inner, tmp_path).restore_path(storage_id) as path:
+        util.validate_checkpoint(path, util.EXPECTED_FILES)
+    assert inner.downloads == 1
+
+
+def test_integrity_checks(inner: CountingStorageManager, tmp_path: pathlib.Path) -> None:
+    resources: Dict[str, Dict[str, int]] = {}
+    manager = make_manager(inner, tmp_path, resources=resources)
+    storage_id = upload_checkpoint(manager, tmp_path)
+    resources[storage_id] = inner._list_directory(os.path.join(inner._base_path, storage_id))
+
+    with manager.restore_path(storage_id) as path:
+        # Files modified in the cache are detected.
+        path.joinpath("root.txt").write_text("oops")
+    with manager.restore_path(storage_id) as path:
+        util.validate_checkpoint(path, util.EXPECTED_FILES)
+    assert inner.downloads == 2
+
+    # So are cached files which no longer match the master's record of the checkpoint.
+    resources[storage_id]["root.txt"] += 1
+    with mock.patch("logging.Logger.warning"):
+        manager.download(storage_id, tmp_path.joinpath("dst"))
+    assert inner.downloads == 3
+
+
+def test_store_path(inner: CountingStorageManager, tmp_path: pathlib.Path) -> None:
+    resources: Dict[str, Dict[str, int]] = {}
+    manager = make_manager(inner, tmp_path, resources=resources)
+    storage_id = str(uuid.uuid4())
+    with manager.store_path(storage_id) as path:
+        util.create_checkpoint(path)
+    resources[storage_id] = inner._list_directory(os.path.join(inner._base_path, storage_id))
+
+    # Stored checkpoints are cached, once the master's resources confirm they are complete.
+    with manager.restore_path(storage_id) as path:
+        util.validate_checkpoint(path, util.EXPECTED_FILES)
+    assert inner.downloads == 0
+
+    # Without the master, the checkpoint might have been only one shard of a sharded checkpoint.
+    storage_id = str(uuid.uuid4())
+    manager = make_manager(inner, tmp_path)
+    with manager.store_path(storage_id) as path:
+        util.create_checkpoint(path)
+    with manager.restore_path(storage_id) as path:
+        util.validate_checkpoint(path, util.EXPECTED_FILES)
+    assert inner.downloads == 1
+
+
+def test_eviction(inner: CountingStorageManager, tmp_path: pathlib.Path) -> None:
+    ckpt_size = sum(len(v) for v in util.EXPECTED_FILES.values() if v is not None)
+    manager = make_manager(inner, tmp_path, max_size=2 * ckpt_size)
+    first, second, third = (upload_checkpoint(manager, tmp_path) for _ in range(3))
+
+    manager.download(first, tmp_path.joinpath("first"))
+    manager.download(second, tmp_path.joinpath("second"))
+    # Use the first checkpoint again, so that the second is the least recently used.
+    os.utime(os.path.join(manager._base_path, second, "record.json"), (0, 0))
+    with manager.restore_path(first):
+        manager.download(third, tmp_path.joinpath("third"))
+    assert inner.downloads == 3
+    assert sorted(e[1] for e in manager._entries()) == sorted([first, third])
+
+    # Checkpoints in use are never evicted, even when that means not caching another.
+    with manager.restore_path(first), manager.restore_path(third):
+        manager.download(second, tmp_path.joinpath("second-again"))
+        util.validate_checkpoint(tmp_path.joinpath("second-again"), util.EXPECTED_FILES)
+    assert sorted(e[1] for e in manager._entries()) == sorted([first, third])
+    assert not os.listdir(os.path.join(manager._base_path, ".tmp"))
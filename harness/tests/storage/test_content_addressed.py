@@ -0,0 +1,176 @@
+import os
+import pathlib
+import uuid
+from typing import Any, Set
+
+import boto3
+import moto
+import pytest
+
+from determined import errors
+from determined.common import storage
+from determined.common.storage import content_addressed
+from tests.storage import util
+
+
+@pytest.fixture()
+def inner(tmp_path: pathlib.Path) -> storage.SharedFSStorageManager:
+    return storage.SharedFSStorageManager(str(tmp_path.joinpath("storage")))
+
+
+@pytest.fixture()
+def manager(
+    inner: storage.SharedFSStorageManager, tmp_path: pathlib.Path
+) -> storage.ContentAddressedStorageManager:
+    return storage.ContentAddressedStorageManager(inner, temp_dir=str(tmp_path.joinpath("tmp")))
+
+
+def list_blobs(inner: storage.SharedFSStorageManager) -> Set[str]:
+    blobs_dir = os.path.join(inner._base_path, content_addressed.BLOB_PREFIX)
+    return set(os.listdir(blobs_dir)) if os.path.exists(blobs_dir) else set()
+
+
+def test_checkpoint_lifecycle(manager: storage.ContentAddressedStorageManager) -> None:
+    util.run_storage_lifecycle_test(manager)
+
+
+def test_deduplication(
+    manager: storage.ContentAddressedStorageManager,
+    inner: storage.SharedFSStorageManager,
+    tmp_path: pathlib.Path,
+) -> None:
+    ckpt = tmp_path.joinpath("ckpt")
+    util.create_checkpoint(ckpt)
+    manager.upload(ckpt, "first")
+    # root.txt, file1.txt and file2.txt.
+    assert len(list_blobs(inner)) == 3
+
+    # Only the changed file results in a new blob.
+    ckpt.joinpath("root.txt").write_text("changed root file")
+    manager.upload(ckpt, "second")
+    assert len(list_blobs(inner)) == 4
+
+    # A fresh manager (e.g. in a new trial) also finds existing blobs.
+    fresh = storage.ContentAddressedStorageManager(inner, temp_dir=str(tmp_path.joinpath("tmp")))
+    with mock_upload_counter(inner) as counter:
+        fresh.upload(ckpt, "third")
+    assert len(list_blobs(inner)) == 4
+    assert counter.blobs == 0
+
+    # Deleting a checkpoint only deletes blobs which no other checkpoint references.
+    manager.delete("first", ["**/*"])
+    assert len(list_blobs(inner)) == 3
+    manager.delete("second", ["**/*"])
+    assert len(list_blobs(inner)) == 3
+    with manager.restore_path("third") as path:
+        expected = dict(util.EXPECTED_FILES)
+        expected["root.txt"] = "changed root file"
+        util.validate_checkpoint(path, expected)
+    manager.delete("third", ["**/*"])
+    assert list_blobs(inner) == set()
+
+    with pytest.raises(errors.CheckpointNotFound):
+        manager.download("third", tmp_path.joinpath("gone"))
+
+
+def test_blob_deleted_by_another_process(
+    manager: storage.ContentAddressedStorageManager,
+    inner: storage.SharedFSStorageManager,
+    tmp_path: pathlib.Path,
+) -> None:
+    ckpt = tmp_path.joinpath("ckpt")
+    util.create_checkpoint(ckpt)
+    manager.upload(ckpt, "first")
+
+    # Checkpoint GC runs in another process, and deletes the last ref to every blob.
+    gc = storage.ContentAddressedStorageManager(inner, temp_dir=str(tmp_path.joinpath("gc")))
+    gc.delete("first", ["**/*"])
+    assert list_blobs(inner) == set()
+
+    # The uploading process must not assume that the blobs it uploaded before still exist.
+    manager.upload(ckpt, "second")
+    assert len(list_blobs(inner)) == 3
+    dst = tmp_path.joinpath("dst")
+    manager.download("second", dst)
+    util.validate_checkpoint(dst, util.EXPECTED_FILES)
+
+
+def test_partial_delete(
+    manager: storage.ContentAddressedStorageManager,
+    inner: storage.SharedFSStorageManager,
+    tmp_path: pathlib.Path,
+) -> None:
+    ckpt = tmp_path.joinpath("ckpt")
+    util.create_checkpoint(ckpt)
+    manager.upload(ckpt, "ckpt")
+
+    resources = manager.delete("ckpt", ["subdir/**"])
+    assert resources == {"root.txt": len("root file"), "empty_dir/": 0}
+    assert len(list_blobs(inner)) == 1
+
+    dst = tmp_path.joinpath("dst")
+    manager.download("ckpt", dst)
+    util.validate_checkpoint(dst, {"root.txt": "root file", "empty_dir/": None})
+
+
+def test_regular_checkpoints(
+    manager: storage.ContentAddressedStorageManager,
+    inner: storage.SharedFSStorageManager,
+    tmp_path: pathlib.Path,
+) -> None:
+    # Checkpoints written without content addressing can be read and deleted through the wrapper.
+    storage_id = str(uuid.uuid4())
+    with inner.store_path(storage_id) as path:
+        util.create_checkpoint(path)
+
+    dst = tmp_path.joinpath("dst")
+    manager.download(storage_id, dst)
+    util.validate_checkpoint(dst, util.EXPECTED_FILES)
+    manager.delete(storage_id, ["**/*"])
+    assert storage_id not in os.listdir(inner._base_path)
+
+
+def test_build() -> None:
+    config = {"type": "shared_fs", "host_path": "/host_path", "content_addressed": True}
+    manager = storage.build(config, container_path=None)
+    assert isinstance(manager, storage.ContentAddressedStorageManager)
+    assert isinstance(manager._inner, storage.SharedFSStorageManager)
+
+
+@moto.mock_s3
+def test_s3_lifecycle(tmp_path: pathlib.Path) -> None:
+    boto3.client("s3").create_bucket(Bucket="test-bucket")
+    inner = storage.S3StorageManager(bucket="test-bucket", temp_dir=str(tmp_path))
+    manager = storage.ContentAddressedStorageManager(inner, temp_dir=str(tmp_path))
+    util.run_storage_lifecycle_test(manager)
+
+    # Deleting every checkpoint cleans up every blob and ref.
+    for obj in inner.bucket.objects.all():
+        obj.delete()
+    ckpt = tmp_path.joinpath("ckpt")
+    util.create_checkpoint(ckpt)
+    manager.upload(ckpt, "first")
+    manager.upload(ckpt, "second")
+    manager.delete("first", ["**/*"])
+    manager.delete("second", ["**/*"])
+    assert list(inner.bucket.objects.all()) == []
+
+
+class mock_upload_counter:
+    def __init__(self, inner: storage.StorageManager) -> None:
+        self.inner = inner
+        self.blobs = 0
+
+    def __enter__(self) -> "mock_upload_counter":
+        self.orig = self.inner.upload
+
+        def upload(src: Any, dst: str, paths: Any = None) -> None:
+            if dst == content_addressed.BLOB_PREFIX:
+                self.blobs += len(paths)
+            self.orig(src, dst, paths)
+
+        self.inner.upload = upload  # type: ignore
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.inner.upload = self.orig  # type: ignore
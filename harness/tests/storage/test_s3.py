@@ -3,9 +3,12 @@ import logging
 import os
 import uuid
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
+from unittest import mock
 
+import boto3
 import botocore.exceptions
+import moto
 import pytest
 
 from determined.common import storage
@@ -182,3 +185,79 @@ def test_live_s3_sharded_store_restore(require_secrets: bool, tmp_path: Path) ->
             tmp_path_storage = tmp_path.joinpath(f"storage_{pex.distributed.rank}")
             storage_manager = get_live_manager(require_secrets, tmp_path_storage, None)
             util.run_storage_store_restore_sharded_test(pex, storage_manager, clean_up)
+
+
+@moto.mock_s3
+def test_s3_ranged_download(tmp_path: Path) -> None:
+    boto3.client("s3").create_bucket(Bucket=BUCKET_NAME)
+    manager = storage.S3StorageManager(bucket=BUCKET_NAME, temp_dir=str(tmp_path))
+    manager.multipart_threshold = 1000
+    manager.part_size = 300
+
+    ckpt = tmp_path.joinpath("ckpt")
+    ckpt.mkdir()
+    big = os.urandom(2500)
+    ckpt.joinpath("big.bin").write_bytes(big)
+    ckpt.joinpath("small.bin").write_bytes(b"small")
+    manager.upload(ckpt, "ckpt")
+
+    client = manager.bucket.meta.client
+    ranges: List[str] = []
+    get_object = client.get_object
+
+    def record_get_object(**kwargs: Any) -> Any:
+        if "Range" in kwargs:
+            ranges.append(kwargs["Range"])
+        return get_object(**kwargs)
+
+    dst = tmp_path.joinpath("dst")
+    with mock.patch.object(client, "get_object", side_effect=record_get_object):
+        manager.download("ckpt", dst)
+
+    assert dst.joinpath("big.bin").read_bytes() == big
+    assert dst.joinpath("small.bin").read_bytes() == b"small"
+    # Only the large file was downloaded in parts, and its last part is short.
+    assert sorted(ranges, key=lambda r: int(r.split("=")[1].split("-")[0])) == [
+        f"bytes={start}-{min(start + 300, 2500) - 1}" for start in range(0, 2500, 300)
+    ]
+
+
+@moto.mock_s3
+def test_s3_missing_key_not_retried(tmp_path: Path) -> None:
+    boto3.client("s3").create_bucket(Bucket=BUCKET_NAME)
+    manager = storage.S3StorageManager(bucket=BUCKET_NAME, temp_dir=str(tmp_path))
+    client = manager.bucket.meta.client
+    # GetObject reports NoSuchKey; HeadObject has no body, so only a bare 404.
+    for method in (client.get_object, client.head_object):
+        with pytest.raises(botocore.exceptions.ClientError) as e:
+            method(Bucket=BUCKET_NAME, Key="missing")
+        assert not manager._is_retryable(e.value)
+
+
+@moto.mock_s3
+def test_tensorboard_fetcher_s3_appended(tmp_path: Path) -> None:
+    boto3.client("s3").create_bucket(Bucket=BUCKET_NAME)
+    fetcher = S3Fetcher({"bucket": BUCKET_NAME}, ["tb"], str(tmp_path))
+    key = "tb/events.out.tfevents.1700000000.host"
+    local_path = tmp_path.joinpath(BUCKET_NAME, key)
+
+    ranges: List[Optional[str]] = []
+    get_object = fetcher.client.get_object
+
+    def record_get_object(**kwargs: Any) -> Any:
+        ranges.append(kwargs.get("Range"))
+        return get_object(**kwargs)
+
+    def sync(content: bytes) -> None:
+        fetcher.client.put_object(Bucket=BUCKET_NAME, Key=key, Body=content)
+        # S3 modification times have a resolution of a second; don't wait for them to change.
+        fetcher._file_records.clear()
+        with mock.patch.object(fetcher.client, "get_object", side_effect=record_get_object):
+            for filepath in fetcher.list_all_generator():
+                fetcher._fetch(filepath, lambda: None)
+        assert local_path.read_bytes() == content
+
+    sync(b"event1")
+    ranges.clear()
+    sync(b"event1event2")
+    assert ranges == ["bytes=6-11"]
@@ -1,5 +1,8 @@
+import collections
 import os
-from typing import Optional
+import pathlib
+import threading
+from typing import Any, Dict, Optional
 from unittest import mock
 
 import pytest
@@ -139,3 +142,66 @@ def test_shared_fs_shortcut_dict() -> None:
     shortcut = {"type": "shared_fs", "base_path": "test_base_path"}
     with pytest.raises(ValueError):
         _ = core._context._get_storage_manager(checkpoint_storage=shortcut)
+
+
+class _FakeCloudStorageManager(storage.CloudStorageManager):
+    def upload(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def download(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def delete(self, *args: Any, **kwargs: Any) -> Dict[str, int]:
+        return {}
+
+    def _is_retryable(self, e: Exception) -> bool:
+        return not isinstance(e, PermissionError)
+
+
+def test_cloud_transfer_retries(tmp_path: pathlib.Path) -> None:
+    manager = _FakeCloudStorageManager(str(tmp_path))
+    manager.transfer_concurrency = 4
+    attempts: collections.Counter = collections.Counter()
+    lock = threading.Lock()
+
+    def flaky(item: int) -> None:
+        with lock:
+            attempts[item] += 1
+            if attempts[item] < 2:
+                raise ConnectionError("flaky")
+
+    with mock.patch("time.sleep"):
+        manager._transfer("upload", flaky, range(10))
+    assert attempts == {i: 2 for i in range(10)}
+
+
+def test_cloud_transfer_reports_failures(tmp_path: pathlib.Path) -> None:
+    manager = _FakeCloudStorageManager(str(tmp_path))
+    manager.transfer_concurrency = 1
+    calls = []
+
+    def deny(item: int) -> None:
+        calls.append(item)
+        if item == 3:
+            raise PermissionError("denied")
+
+    with pytest.raises(PermissionError, match="denied"):
+        manager._transfer("download", deny, range(100))
+    # Non-retryable errors are not retried, and the remaining items are skipped.
+    assert calls.count(3) == 1
+    assert len(calls) < 100
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [(None, 16), ("4", 4), ("0", 16), ("-2", 16), ("x", 16)],
+)
+def test_cloud_transfer_concurrency_from_env(
+    tmp_path: pathlib.Path, value: Optional[str], expected: int
+) -> None:
+    env = {} if value is None else {"DET_STORAGE_TRANSFER_CONCURRENCY": value}
+    with mock.patch.dict(os.environ, env):
+        if value is None:
+            os.environ.pop("DET_STORAGE_TRANSFER_CONCURRENCY", None)
+        manager = _FakeCloudStorageManager(str(tmp_path))
+    assert manager.transfer_concurrency == expected
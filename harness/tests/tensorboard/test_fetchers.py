@@ -0,0 +1,114 @@
+import os
+import pathlib
+from typing import Any, List, Optional, Tuple
+from unittest import mock
+
+import pytest
+
+from determined.exec import tensorboard
+from determined.tensorboard.fetchers.shared import SharedFSFetcher
+
+
+def sync(fetcher: SharedFSFetcher) -> List[Tuple[str, int, Optional[int]]]:
+    """Fetch every new or modified file, and return the (file name, start, end) of each download."""
+    downloads = []
+    download = fetcher._download
+
+    def record_download(filepath: str, local_file: Any, start: int, end: Optional[int]) -> None:
+        downloads.append((os.path.basename(filepath), start, end))
+        download(filepath, local_file, start, end)
+
+    with mock.patch.object(fetcher, "_download", side_effect=record_download):
+        for filepath in fetcher.list_all_generator():
+            fetcher._fetch(filepath, lambda: None)
+    return sorted(downloads)
+
+
+def test_fetch_appended_bytes(tmp_path: pathlib.Path) -> None:
+    storage_dir = tmp_path.joinpath("storage")
+    local_dir = tmp_path.joinpath("local")
+    storage_dir.mkdir()
+    events = storage_dir.joinpath("events.out.tfevents.1700000000.host")
+    config = storage_dir.joinpath("projector_config.pbtxt")
+    fetcher = SharedFSFetcher({}, [str(storage_dir)], str(local_dir))
+    mtime = 1700000000
+
+    def write(path: pathlib.Path, content: bytes, mode: str = "wb") -> None:
+        nonlocal mtime
+        with path.open(mode) as f:
+            f.write(content)
+        # Don't depend on the resolution of the filesystem's modification times.
+        mtime += 1
+        os.utime(path, (mtime, mtime))
+
+    def local(path: pathlib.Path) -> bytes:
+        return local_dir.joinpath(str(path).lstrip("/")).read_bytes()
+
+    write(events, b"event1")
+    write(config, b"config1")
+    assert sync(fetcher) == [(events.name, 0, None), (config.name, 0, None)]
+    assert local(events) == b"event1" and local(config) == b"config1"
+
+    # Only what was appended to an event file is fetched.
+    write(events, b"event2", "ab")
+    write(config, b"config2")
+    assert sync(fetcher) == [(events.name, 6, 12), (config.name, 0, None)]
+    assert local(events) == b"event1event2" and local(config) == b"config2"
+
+    # Unmodified files are not fetched at all.
+    assert sync(fetcher) == []
+
+    # Event files which did not grow are fetched in full, in case they were rewritten.
+    write(events, b"event")
+    assert sync(fetcher) == [(events.name, 0, None)]
+    assert local(events) == b"event"
+
+    # As are event files whose local copy was removed.
+    write(events, b"3", "ab")
+    os.remove(local_dir.joinpath(str(events).lstrip("/")))
+    assert sync(fetcher) == [(events.name, 0, None)]
+    assert local(events) == b"event3"
+
+
+def test_fetch_queue() -> None:
+    work_queue = tensorboard.TBFetchQueue()
+    work_queue.put("old", 1)
+    work_queue.put("new", 3)
+    work_queue.put("mid", 2)
+    work_queue.put("old", 4)
+
+    # The most recently modified files come first, by their latest mtime.
+    assert work_queue.get() == "old"
+    assert work_queue.get() == "new"
+
+    # A file modified while it is being fetched is queued again only once that fetch is done.
+    work_queue.put("new", 5)
+    work_queue.put("newest", 6)
+    assert work_queue.get() == "newest"
+    work_queue.task_done("new")
+    work_queue.task_done("newest")
+    assert work_queue.get() == "new"
+
+    # Failed fetches are retried.
+    work_queue.task_done("new", retry=True)
+    assert work_queue.get() == "new"
+    assert work_queue.get() == "mid"
+
+    # The entry "old" was first queued with is stale, so it is never handed out again.
+    work_queue.put("last", 0)
+    assert work_queue.get() == "last"
+    assert not work_queue._heap
+
+
+def test_num_fetch_threads() -> None:
+    with mock.patch.dict(os.environ):
+        os.environ.pop("DET_TENSORBOARD_FETCH_THREADS", None)
+        assert tensorboard.get_num_fetch_threads() == tensorboard.DEFAULT_FETCH_THREADS
+
+        os.environ["DET_TENSORBOARD_FETCH_THREADS"] = "8"
+        assert tensorboard.get_num_fetch_threads() == 8
+
+        for value in ("0", "-1", "two", ""):
+            os.environ["DET_TENSORBOARD_FETCH_THREADS"] = value
+            with pytest.raises(ValueError, match="must be a positive integer"):
+                tensorboard.get_num_fetch_threads()
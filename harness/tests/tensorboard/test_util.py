@@ -1,10 +1,15 @@
+import os
 import pathlib
+import shutil
+import threading
+from typing import List, Set
+from unittest import mock
 
 import pytest
 
 import determined as det
 from determined import tensorboard
-from determined.tensorboard import SharedFSTensorboardManager
+from determined.tensorboard import SharedFSTensorboardManager, _tracker
 
 BASE_PATH = pathlib.Path(__file__).resolve().parent.joinpath("fixtures")
 
@@ -146,3 +151,119 @@ test_data = [
 def test_get_rank_aware_path(path: str, rank: int, expected: str) -> None:
     actual = tensorboard.util.get_rank_aware_path(pathlib.Path(path), rank)
     assert pathlib.Path(expected) == actual, (expected, actual)
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_file_tracker(tmp_path: pathlib.Path, use_inotify: bool) -> None:
+    base_path = tmp_path.joinpath("tensorboard")
+    tracker = _tracker.FileTracker(base_path, use_inotify=use_inotify)
+    mtime = 1700000000
+
+    def write(path: pathlib.Path, content: bytes, mode: str = "wb") -> None:
+        nonlocal mtime
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open(mode) as f:
+            f.write(content)
+        # Don't depend on the resolution of the filesystem's modification times.
+        mtime += 1
+        os.utime(path, (mtime, mtime))
+
+    def changed() -> Set[pathlib.Path]:
+        return set(tracker.changed(lambda p: p.suffix != ".txt"))
+
+    try:
+        # The directory may not exist until something is written to it.
+        assert changed() == set()
+        events = base_path.joinpath("events.out.tfevents.1")
+        write(events, b"event1")
+        write(base_path.joinpath("no_show.txt"), b"text")
+        assert changed() == {events}
+        assert changed() == set()
+
+        # Files which grew, and files in new directories, are reported.
+        trace = base_path.joinpath("plugins", "profile", "run1", "host.trace.json.gz")
+        write(events, b"event2", "ab")
+        write(trace, b"trace")
+        assert changed() == {events, trace}
+
+        # As are files which were rewritten, or touched.
+        write(trace, b"TRACE")
+        assert changed() == {trace}
+        mtime += 1
+        os.utime(events, (mtime, mtime))
+        assert changed() == {events}
+
+        # Files which are removed and written again are reported again.
+        shutil.rmtree(base_path)
+        assert changed() == set()
+        write(events, b"event1")
+        assert changed() == {events}
+    finally:
+        tracker.close()
+
+
+def test_sync_changed_files(tmp_path: pathlib.Path) -> None:
+    base_path = tmp_path.joinpath("tensorboard")
+    base_path.mkdir()
+    storage_path = tmp_path.joinpath("storage")
+    sync_path = pathlib.Path("sync")
+    events = base_path.joinpath("events.out.tfevents.1")
+    events.write_bytes(b"event1")
+
+    with SharedFSTensorboardManager(
+        str(storage_path), base_path, sync_path, async_upload=False
+    ) as manager:
+        manager.sync()
+        assert storage_path.joinpath(sync_path, events.name).read_bytes() == b"event1"
+        with mock.patch.object(manager, "_sync_impl") as sync_impl:
+            manager.sync()
+            sync_impl.assert_called_once_with([])
+
+        with events.open("ab") as f:
+            f.write(b"event2")
+        manager.sync()
+        assert storage_path.joinpath(sync_path, events.name).read_bytes() == b"event1event2"
+
+
+def test_sync_from_many_threads(tmp_path: pathlib.Path) -> None:
+    base_path = tmp_path.joinpath("tensorboard")
+    base_path.mkdir()
+    storage_path = tmp_path.joinpath("storage")
+    sync_path = pathlib.Path("sync")
+    inotify_instances = []
+
+    class CountingInotify(_tracker._Inotify):
+        def __init__(self) -> None:
+            super().__init__()
+            inotify_instances.append(self)
+
+    # Metrics and checkpoints are reported from background threads, which sync too.
+    threads = 8
+    barrier = threading.Barrier(threads)
+    errors: List[Exception] = []
+
+    def sync(i: int) -> None:
+        try:
+            barrier.wait(10)
+            for j in range(20):
+                base_path.joinpath(f"events.out.tfevents.{i}").write_bytes(b"event" * (j + 1))
+                manager.sync()
+        except Exception as e:
+            errors.append(e)
+
+    with mock.patch.object(_tracker, "_Inotify", CountingInotify):
+        with SharedFSTensorboardManager(
+            str(storage_path), base_path, sync_path, async_upload=False
+        ) as manager:
+            workers = [threading.Thread(target=sync, args=(i,)) for i in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            manager.sync()
+
+    assert errors == []
+    assert len(inotify_instances) <= 1
+    for i in range(threads):
+        name = f"events.out.tfevents.{i}"
+        assert storage_path.joinpath(sync_path, name).read_bytes() == b"event" * 20
@@ -1,6 +1,15 @@
+import contextlib
 import tempfile
+import uuid
 from pathlib import Path
+from typing import Dict, Iterator, List
+from unittest import mock
 
+import pytest
+
+from determined import searcher
+from determined.common.api import bindings
+from tests import search_methods
 from tests.custom_search_mocks import MockMasterSearchRunner, SimulateMaster
 from tests.search_methods import ASHASearchMethod, RandomSearchMethod
 
@@ -39,3 +48,157 @@ def test_run_asha_batches_exp_mock_master(tmp_path: Path) -> None:
     assert len(search_runner.state.trials_closed) == len(
         search_method.asha_search_state.closed_trials
     )
+
+
+class DeterministicSearchMethod(RandomSearchMethod):
+    """A RandomSearchMethod whose request ids and hyperparameters depend only on its state."""
+
+    def sample_params(self) -> Dict[str, int]:
+        return {"global_batch_size": 10 + self.created_trials}
+
+    @contextlib.contextmanager
+    def _deterministic_request_ids(self) -> Iterator[None]:
+        # RandomSearchMethod creates a trial before counting it.
+        def uuid4() -> uuid.UUID:
+            return uuid.UUID(int=self.created_trials + 1)
+
+        with mock.patch.object(search_methods.uuid, "uuid4", side_effect=uuid4):
+            yield
+
+    def initial_operations(self, state: searcher.SearcherState) -> List[searcher.Operation]:
+        with self._deterministic_request_ids():
+            return super().initial_operations(state)
+
+    def on_trial_closed(
+        self, state: searcher.SearcherState, request_id: uuid.UUID
+    ) -> List[searcher.Operation]:
+        with self._deterministic_request_ids():
+            return super().on_trial_closed(state, request_id)
+
+
+def run_search(
+    search_method: searcher.SearchMethod, searcher_dir: Path, snapshot_interval: int
+) -> searcher.SearcherState:
+    mock_master_obj = SimulateMaster(metric=1.0)
+    search_runner = MockMasterSearchRunner(
+        search_method, mock_master_obj, searcher_dir, snapshot_interval
+    )
+    search_runner.run(exp_config={}, context_dir="", includes=None)
+    return search_runner.state
+
+
+def load_search(
+    search_method: searcher.SearchMethod, searcher_dir: Path, snapshot_interval: int
+) -> searcher.SearcherState:
+    search_runner = searcher.LocalSearchRunner(search_method, searcher_dir, snapshot_interval)
+    search_runner.load_state(4)
+    return search_runner.state
+
+
+def assert_same_search(state: searcher.SearcherState, loaded: searcher.SearcherState) -> None:
+    assert loaded.last_event_id == state.last_event_id
+    assert loaded.trials_created == state.trials_created
+    assert loaded.trials_closed == state.trials_closed
+    assert loaded.trial_progress == state.trial_progress
+
+
+def test_journaled_search_state(tmp_path: Path) -> None:
+    search_method = DeterministicSearchMethod(5, 2, 500)
+    state = run_search(search_method, tmp_path, snapshot_interval=1000)
+    state_dir = tmp_path.joinpath("exp_4")
+    assert {p.name for p in state_dir.iterdir()} == {"event_0", "event_id", "journal_0"}
+
+    # Events since the snapshot are replayed when the search is resumed.
+    resumed_method = DeterministicSearchMethod(5, 2, 500)
+    assert_same_search(state, load_search(resumed_method, tmp_path, snapshot_interval=1000))
+    assert resumed_method.created_trials == search_method.created_trials == 5
+    assert resumed_method.closed_trials == search_method.closed_trials == 5
+
+    # A record which was only partly written was never committed.
+    journal = state_dir.joinpath("journal_0")
+    committed_size = journal.stat().st_size
+    with journal.open("ab") as f:
+        f.write(b"\x10\x00\x00\x00partial")
+    assert_same_search(
+        state, load_search(DeterministicSearchMethod(5, 2, 500), tmp_path, snapshot_interval=1000)
+    )
+    assert journal.stat().st_size == committed_size
+
+    with journal.open("r+b") as f:
+        f.truncate(committed_size - 1)
+    loaded = load_search(DeterministicSearchMethod(5, 2, 500), tmp_path, snapshot_interval=1000)
+    assert loaded.last_event_id < state.last_event_id
+
+
+def test_journaled_search_state_snapshots(tmp_path: Path) -> None:
+    search_method = DeterministicSearchMethod(5, 2, 500)
+    state = run_search(search_method, tmp_path, snapshot_interval=3)
+
+    # Only the latest snapshot and its journal are kept.
+    names = {p.name for p in tmp_path.joinpath("exp_4").iterdir()}
+    snapshots = {name for name in names if name.startswith("event_") and name != "event_id"}
+    assert len(snapshots) == 1
+    assert names - snapshots <= {"event_id", snapshots.pop().replace("event_", "journal_")}
+    assert_same_search(
+        state, load_search(DeterministicSearchMethod(5, 2, 500), tmp_path, snapshot_interval=3)
+    )
+
+
+def test_journaled_search_state_nondeterministic(tmp_path: Path) -> None:
+    run_search(RandomSearchMethod(5, 2, 500), tmp_path, snapshot_interval=1000)
+    with pytest.raises(RuntimeError, match="must be deterministic"):
+        load_search(RandomSearchMethod(5, 2, 500), tmp_path, snapshot_interval=1000)
+
+
+def test_batched_operations(tmp_path: Path) -> None:
+    search_method = RandomSearchMethod(5, 2, 500)
+    mock_master_obj = SimulateMaster(metric=1.0)
+    search_runner = MockMasterSearchRunner(search_method, mock_master_obj, tmp_path)
+    with mock.patch.object(
+        mock_master_obj, "handle_post_operations", wraps=mock_master_obj.handle_post_operations
+    ) as handle_post_operations:
+        search_runner.run(exp_config={}, context_dir="", includes=None)
+
+    # The operations for all the events returned at once are posted at once.
+    assert search_runner.state.last_event_id == mock_master_obj.events_count - 1
+    assert handle_post_operations.call_count < search_runner.state.last_event_id / 2
+    assert len(search_runner.state.trials_created) == 5
+    assert len(search_runner.state.trials_closed) == 5
+
+
+def test_resubmit_batched_operations(tmp_path: Path) -> None:
+    mock_master_obj = SimulateMaster(metric=1.0)
+    search_runner = MockMasterSearchRunner(RandomSearchMethod(5, 2, 500), mock_master_obj, tmp_path)
+    handle_post_operations = mock_master_obj.handle_post_operations
+
+    # Crash after saving the state for several events, before posting their operations.
+    def crash_on_batch(
+        event: bindings.v1SearcherEvent, operations: List[searcher.Operation]
+    ) -> None:
+        if len(mock_master_obj.events_queue) > 1:
+            raise KeyboardInterrupt
+        handle_post_operations(event, operations)
+
+    with mock.patch.object(mock_master_obj, "handle_post_operations", side_effect=crash_on_batch):
+        search_runner.run(exp_config={}, context_dir="", includes=None)
+    saved_event_id = search_runner.state.last_event_id
+    assert saved_event_id > 1
+    assert [e.id for e in mock_master_obj.events_queue][-1] == saved_event_id
+
+    # The resumed searcher resubmits the operations for all of them.
+    search_method = RandomSearchMethod(5, 2, 500)
+    resumed_runner = searcher.LocalSearchRunner(search_method, tmp_path)
+    with mock.patch.object(
+        resumed_runner, "get_events", side_effect=lambda *_: mock_master_obj.handle_get_events()
+    ), mock.patch.object(
+        resumed_runner,
+        "post_operations",
+        side_effect=lambda _, __, event, ops: handle_post_operations(event, ops),
+    ):
+        _, operations = resumed_runner.load_state(4)
+        resumed_runner.run_experiment(4, mock.Mock(), operations, sleep_time=0.0)
+
+    assert search_method.created_trials == 5
+    assert len(resumed_runner.state.trials_created) == 5
+    assert len(resumed_runner.state.trials_closed) == 5
+    assert resumed_runner.state.experiment_completed
@@ -1,12 +1,16 @@
 import os
 import pathlib
 import uuid
-from typing import Any, List
+from typing import Any, Dict, List
+from unittest import mock
 
+import boto3
+import moto
 import pytest
 
 from determined.common import storage
-from determined.exec.gc_checkpoints import delete_checkpoints
+from determined.common.storage.content_addressed import BLOB_PREFIX, MANIFEST_DIR, REF_PREFIX
+from determined.exec.gc_checkpoints import DeleteCheckpointsError, delete_checkpoints
 from tests.storage import util as storage_util
 
 
@@ -36,3 +40,63 @@ def test_delete_checkpoints(manager: storage.StorageManager, to_delete: List[str
 def test_dry_run(manager: storage.StorageManager, to_delete: List[str]) -> None:
     delete_checkpoints(manager, to_delete, ["**/*.dontmatchanything", "**/*"], dry_run=True)
     assert len(os.listdir(manager._base_path)) == len(to_delete)
+
+
+def test_delete_checkpoints_failure(manager: storage.StorageManager) -> None:
+    to_delete = ["first", "broken", "never-started"]
+    for storage_id in to_delete:
+        with manager.store_path(storage_id) as path:
+            storage_util.create_checkpoint(path)
+
+    delete = manager.delete
+
+    def fail_on_broken(storage_id: str, globs: List[str]) -> Dict[str, int]:
+        if storage_id == "broken":
+            raise RuntimeError("broken")
+        return delete(storage_id, globs)
+
+    with mock.patch.object(manager, "delete", side_effect=fail_on_broken):
+        with pytest.raises(DeleteCheckpointsError) as e:
+            delete_checkpoints(manager, to_delete, ["**/*"], dry_run=False, concurrency=1)
+
+    # The checkpoint which was deleted is still reported, and no more were started after a failure.
+    assert e.value.deleted == {"first": {}}
+    assert sorted(os.listdir(manager._base_path)) == ["broken", "never-started"]
+
+
+def test_delete_content_addressed_checkpoints(tmp_path: pathlib.Path) -> None:
+    inner = storage.SharedFSStorageManager(str(tmp_path.joinpath("storage")))
+    manager = storage.ContentAddressedStorageManager(inner, temp_dir=str(tmp_path.joinpath("tmp")))
+    ckpt = tmp_path.joinpath("ckpt")
+    storage_util.create_checkpoint(ckpt)
+    to_delete = [str(uuid.uuid4()) for _ in range(10)]
+    for storage_id in to_delete:
+        manager.upload(ckpt, storage_id)
+
+    with mock.patch.object(inner, "delete", wraps=inner.delete) as inner_delete:
+        delete_checkpoints(manager, to_delete, ["**/*"], dry_run=False, concurrency=4)
+
+    # The refs to each of the three blobs shared by every checkpoint are dropped all at once.
+    refs = [c for c in inner_delete.call_args_list if c.args[0].startswith(REF_PREFIX)]
+    assert len(refs) == 3, refs
+    assert all(sorted(c.args[1]) == sorted(to_delete) for c in refs), refs
+    assert os.listdir(os.path.join(inner._base_path, BLOB_PREFIX)) == []
+
+
+@moto.mock_s3
+def test_delete_regular_checkpoint_lists_once(tmp_path: pathlib.Path) -> None:
+    boto3.client("s3").create_bucket(Bucket="bucket")
+    inner = storage.S3StorageManager(bucket="bucket", temp_dir=str(tmp_path.joinpath("tmp")))
+    # Checkpoint GC always deletes through a ContentAddressedStorageManager.
+    manager = storage.ContentAddressedStorageManager(inner, temp_dir=str(tmp_path.joinpath("tmp")))
+    ckpt = tmp_path.joinpath("ckpt")
+    storage_util.create_checkpoint(ckpt)
+    inner.upload(ckpt, "regular")
+
+    with mock.patch.object(inner, "_list_objects", wraps=inner._list_objects) as list_objects:
+        delete_checkpoints(manager, ["regular"], ["**/*"], dry_run=False)
+
+    # Looking for a manifest only lists the manifest directory, so the checkpoint is listed once.
+    prefixes = sorted(c.args[0] for c in list_objects.call_args_list)
+    assert prefixes == ["regular", f"regular/{MANIFEST_DIR}"], prefixes
+    assert list(inner._list_objects("regular")) == []
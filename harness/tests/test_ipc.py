@@ -1,12 +1,16 @@
 import abc
 import itertools
 import multiprocessing
+import pickle
 import sys
 import textwrap
 import time
 import traceback
+import types
 from typing import Any, List, Optional, cast
+from unittest import mock
 
+import numpy as np
 import pytest
 
 import determined as det
@@ -117,7 +121,10 @@ def test_broadcast_server_client() -> None:
 @pytest.mark.parametrize("cross_size", [1, 4])
 @pytest.mark.parametrize("local_size", [1, 4])
 @pytest.mark.parametrize("force_tcp", [False, True])
-def test_distributed_context(cross_size: int, local_size: int, force_tcp: bool) -> None:
+@pytest.mark.parametrize("hierarchical", [False, True])
+def test_distributed_context(
+    cross_size: int, local_size: int, force_tcp: bool, hierarchical: bool
+) -> None:
     size = cross_size * local_size
 
     # Make sure `make test` doesn't hang on macbook's default values.  Avoid skipping on linux
@@ -143,8 +150,13 @@ def test_distributed_context(cross_size: int, local_size: int, force_tcp: bool)
                 cross_size=pex.cross_size,
                 chief_ip="localhost",
                 force_tcp=force_tcp,
+                hierarchical=hierarchical,
             )
 
+        # Collectives are only hierarchical when there are machines with several workers.
+        expect_hierarchical = hierarchical and cross_size > 1 and local_size > 1
+        assert [c._hierarchical for c in contexts] == [expect_hierarchical] * size
+
         # Perform a broadcast.
         results = pex.run(lambda: contexts[pex.rank].broadcast(pex.rank))  # type: ignore
         assert results == [0] * size, "not all threads ran broadcast correctly"
@@ -187,6 +199,49 @@ def test_distributed_context(cross_size: int, local_size: int, force_tcp: bool)
             context.close()
 
 
+def test_distributed_context_numpy() -> None:
+    size = 3
+    with parallel.Execution(size) as pex:
+
+        @pex.run
+        def results() -> List[Any]:
+            payload = {
+                "rank": pex.rank,
+                # Large enough to be sent out-of-band.
+                "big": np.full((64, 32), pex.rank, dtype=np.float32),
+                "small": np.array([pex.rank], dtype=np.int64),
+                "strided": np.arange(4096, dtype=np.int16)[::2],
+                "fortran": np.asfortranarray(np.arange(1024.0).reshape(32, 32)),
+                "objects": np.array(["a", None], dtype=object),
+            }
+            return pex.distributed.allgather(payload)
+
+    for gathered in results:
+        for rank, payload in enumerate(gathered):
+            assert payload["rank"] == rank
+            assert payload["big"].dtype == np.float32 and payload["big"].shape == (64, 32)
+            assert (payload["big"] == rank).all()
+            # Received arrays are backed by the received message, but are still writable.
+            payload["big"] += 1
+            assert payload["small"].tolist() == [rank]
+            assert payload["strided"].tolist() == list(range(0, 4096, 2))
+            assert payload["fortran"].flags.f_contiguous
+            assert (payload["fortran"] == np.arange(1024.0).reshape(32, 32)).all()
+            assert payload["objects"].tolist() == ["a", None]
+
+
+def test_send_message_numpy_importing() -> None:
+    class Socket:
+        def send(self, data: Any) -> None:
+            self.data = bytes(data)
+
+    socket = Socket()
+    # numpy is in sys.modules, without ndarray, while another thread is importing it.
+    with mock.patch.dict(sys.modules, {"numpy": types.ModuleType("numpy")}):
+        ipc._send_message(socket, ipc._SerialMessage(0, [1, "two"]))
+    assert pickle.loads(socket.data).payload == [1, "two"]
+
+
 class TestPIDServer:
     @staticmethod
     def _worker_proc(
@@ -0,0 +1,105 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from determined import profiler
+from determined.common.api import TrialProfilerMetricsBatch
+
+
+def make_agent(sent: List[TrialProfilerMetricsBatch]) -> profiler.ProfilerAgent:
+    return profiler.ProfilerAgent(
+        trial_id="1",
+        agent_id="agent",
+        master_url="http://localhost:8080",
+        profiling_is_enabled=True,
+        global_rank=0,
+        local_rank=0,
+        begin_on_batch=1,
+        sync_timings=True,
+        send_batch_fn=lambda _, batches: sent.extend(batches),
+        check_data_exists_fn=lambda *_: False,
+    )
+
+
+def test_record_timing() -> None:
+    sent: List[TrialProfilerMetricsBatch] = []
+    start = datetime.now(timezone.utc)
+    with make_agent(sent) as agent:
+        agent.set_training(True)
+        for batch_idx in range(4):
+            agent.update_batch_idx(batch_idx)
+            for _ in range(2):
+                with agent.record_timing("to_device", accumulate=True):
+                    time.sleep(0.001)
+            with agent.record_timing("train_batch", requires_sync=False):
+                with agent.record_timing("step", requires_sync=False):
+                    pass
+
+            def record_in_thread() -> None:
+                with agent.record_timing("thread"):
+                    pass
+
+            thread = threading.Thread(target=record_in_thread)
+            thread.start()
+            thread.join()
+
+            with pytest.raises(ValueError):
+                with agent.record_timing("failed"):
+                    raise ValueError()
+        agent.set_training(False)
+
+    timings: Dict[str, List[Tuple[int, float, str]]] = {}
+    for batch in sent:
+        if batch.labels["metricType"] != profiler.MetricType.TIMING.value:
+            continue
+        timings.setdefault(batch.labels["name"], []).extend(
+            zip(batch.batches, batch.values, batch.timestamps)
+        )
+
+    # Timings are only recorded from begin_on_batch on.
+    assert sorted(timings) == ["step", "thread", "to_device", "train_batch"]
+    for name, values in timings.items():
+        assert sorted(v[0] for v in values) == [1, 2, 3], name
+        for _, value, timestamp in values:
+            assert start <= datetime.fromisoformat(timestamp) <= datetime.now(timezone.utc)
+            assert value >= 0
+    # Accumulated timings are summed per batch.
+    assert all(value >= 0.002 for _, value, _ in timings["to_device"])
+    # Nested timings are matched with the right start time.
+    step = {batch_idx: value for batch_idx, value, _ in timings["step"]}
+    assert all(value >= step[batch_idx] for batch_idx, value, _ in timings["train_batch"])
+
+
+def test_timing_ring_full() -> None:
+    rings = profiler._TimingRings()
+    rings.CAPACITY = 4
+    agent: Any = type("Agent", (), {"sync_timings": False, "current_batch_idx": 7})()
+    recorder = rings.recorder(agent, "x", False)
+    assert rings.recorder(agent, "x", False) is recorder
+
+    for _ in range(6):
+        with recorder:
+            pass
+    measurements = rings.drain()
+    assert [(m.metric_name, m.batch_idx) for m in measurements] == [("x", 7)] * 4
+    assert rings.get().dropped == 2
+
+    # Draining makes room again.
+    with recorder:
+        pass
+    assert len(rings.drain()) == 1
+
+    # Rings of exited threads are dropped once they have been drained.
+    def record_in_thread() -> None:
+        with rings.recorder(agent, "y", False):
+            pass
+
+    thread = threading.Thread(target=record_in_thread)
+    thread.start()
+    thread.join()
+    assert len(rings._rings) == 2
+    assert [m.metric_name for m in rings.drain()] == ["y"]
+    assert len(rings._rings) == 1
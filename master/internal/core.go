@@ -1160,6 +1160,7 @@ func (m *Master) Run(ctx context.Context, gRPCLogInitDone chan struct{}) error {
 
 	checkpointsGroup := m.echo.Group("/checkpoints")
 	checkpointsGroup.GET("/:checkpoint_uuid", m.getCheckpoint)
+	checkpointsGroup.GET("/:checkpoint_uuid/file", m.getCheckpointFile)
 
 	searcherGroup := m.echo.Group("/searcher")
 	searcherGroup.POST("/preview", api.Route(m.getSearcherPreview))
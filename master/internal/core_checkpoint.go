@@ -7,6 +7,10 @@ import (
 	"fmt"
 	"io"
 	"net/http"
+	"os"
+	"path"
+	"strconv"
+	"strings"
 
 	"github.com/pkg/errors"
 
@@ -131,6 +135,32 @@ func (m *Master) getCheckpointImpl(
 	return nil
 }
 
+// canGetCheckpointContents returns an error for the response if the current user may not download
+// the contents of the checkpoint, either through its experiment or through a model.
+func (m *Master) canGetCheckpointContents(c echo.Context, checkpointUUID string) error {
+	curUser := c.(*detContext.DetContext).MustGetUser()
+	errE := m.canDoActionOnCheckpoint(c.Request().Context(), curUser, checkpointUUID,
+		expauth.AuthZProvider.Get().CanGetExperimentArtifacts)
+	if errE != nil {
+		errM := m.canDoActionOnCheckpointThroughModel(c.Request().Context(), curUser, checkpointUUID)
+		if errM != nil {
+			s, ok := status.FromError(errE)
+			if !ok {
+				return errE
+			}
+			switch s.Code() {
+			case codes.NotFound:
+				return echo.NewHTTPError(http.StatusNotFound, s.Message())
+			case codes.PermissionDenied:
+				return echo.NewHTTPError(http.StatusForbidden, s.Message())
+			default:
+				return fmt.Errorf(s.Message())
+			}
+		}
+	}
+	return nil
+}
+
 //	@Summary	Get a checkpoint's contents in a tgz or zip file.
 //	@Tags		Checkpoints
 //	@ID			get-checkpoint
@@ -163,26 +193,130 @@ func (m *Master) getCheckpoint(c echo.Context) error {
 				args.CheckpointUUID, err))
 	}
 
-	curUser := c.(*detContext.DetContext).MustGetUser()
-	errE := m.canDoActionOnCheckpoint(c.Request().Context(), curUser, args.CheckpointUUID,
-		expauth.AuthZProvider.Get().CanGetExperimentArtifacts)
-	if errE != nil {
-		errM := m.canDoActionOnCheckpointThroughModel(c.Request().Context(), curUser, args.CheckpointUUID)
-		if errM != nil {
-			s, ok := status.FromError(errE)
-			if !ok {
-				return errE
-			}
-			switch s.Code() {
-			case codes.NotFound:
-				return echo.NewHTTPError(http.StatusNotFound, s.Message())
-			case codes.PermissionDenied:
-				return echo.NewHTTPError(http.StatusForbidden, s.Message())
-			default:
-				return fmt.Errorf(s.Message())
-			}
-		}
+	if err := m.canGetCheckpointContents(c, args.CheckpointUUID); err != nil {
+		return err
 	}
 	c.Response().Header().Set(echo.HeaderContentType, mimeType)
 	return m.getCheckpointImpl(c.Request().Context(), id, mimeType, c.Response())
 }
+
+// parseByteRange parses a Range header with a single byte range, like "bytes=100-199" or
+// "bytes=100-", into the offset and length of the range. The length is -1 for ranges which go to
+// the end of the file, including when there is no Range header.
+func parseByteRange(header string) (int64, int64, error) {
+	if header == "" {
+		return 0, -1, nil
+	}
+	spec := strings.TrimPrefix(header, "bytes=")
+	if spec == header || strings.Contains(spec, ",") {
+		return 0, 0, fmt.Errorf("only a single byte range is supported: %q", header)
+	}
+	first, last, ok := strings.Cut(spec, "-")
+	if !ok {
+		return 0, 0, fmt.Errorf("invalid byte range: %q", header)
+	}
+	offset, err := strconv.ParseInt(first, 10, 64)
+	if err != nil || offset < 0 {
+		return 0, 0, fmt.Errorf("invalid byte range: %q", header)
+	}
+	if last == "" {
+		return offset, -1, nil
+	}
+	end, err := strconv.ParseInt(last, 10, 64)
+	if err != nil || end < offset {
+		return 0, 0, fmt.Errorf("invalid byte range: %q", header)
+	}
+	return offset, end - offset + 1, nil
+}
+
+//	@Summary	Get the contents of a single file in a checkpoint, or a byte range of them.
+//	@Tags		Checkpoints
+//	@ID			get-checkpoint-file
+//	@Produce	application/octet-stream
+//	@Param		checkpoint_uuid	path	string	true	"Checkpoint UUID"
+//	@Param		path			query	string	true	"Path of the file within the checkpoint"
+//	@Param		Range			header	string	false	"A single byte range, like bytes=100-"
+//	@Success	200				{}		string	""
+//	@Success	206				{}		string	""
+//	@Router		/checkpoints/{checkpoint_uuid}/file [get]
+//
+// Read why this line exists on the comment on getAggregatedResourceAllocation in core.go.
+func (m *Master) getCheckpointFile(c echo.Context) error {
+	args := struct {
+		CheckpointUUID string `path:"checkpoint_uuid"`
+		Path           string `query:"path"`
+	}{}
+	if err := api.BindArgs(&args, c); err != nil {
+		return echo.NewHTTPError(http.StatusBadRequest, "invalid arguments: "+err.Error())
+	}
+	id, err := uuid.Parse(args.CheckpointUUID)
+	if err != nil {
+		return echo.NewHTTPError(http.StatusBadRequest,
+			fmt.Sprintf("unable to parse checkpoint UUID %s: %s",
+				args.CheckpointUUID, err))
+	}
+	// Cleaning the path as if it were absolute keeps it within the checkpoint.
+	filePath := strings.TrimPrefix(path.Clean("/"+args.Path), "/")
+	if filePath == "" {
+		return echo.NewHTTPError(http.StatusBadRequest, "a file path is required")
+	}
+	rangeHeader := c.Request().Header.Get("Range")
+	offset, length, err := parseByteRange(rangeHeader)
+	if err != nil {
+		return echo.NewHTTPError(http.StatusRequestedRangeNotSatisfiable, err.Error())
+	}
+
+	if err := m.canGetCheckpointContents(c, args.CheckpointUUID); err != nil {
+		return err
+	}
+	storageConfig, err := m.getCheckpointStorageConfig(id)
+	switch {
+	case err != nil:
+		return echo.NewHTTPError(http.StatusInternalServerError,
+			fmt.Sprintf("unable to retrieve experiment config for checkpoint %s: %s",
+				id.String(), err.Error()))
+	case storageConfig == nil:
+		return api.NotFoundErrs("checkpoint", id.String(), false)
+	}
+
+	ctx := c.Request().Context()
+	r, size, err := checkpoints.OpenFile(ctx, id.String(), storageConfig, filePath, offset, length)
+	switch {
+	case err != nil && errors.Is(err, os.ErrNotExist):
+		return echo.NewHTTPError(http.StatusNotFound,
+			fmt.Sprintf("file %s not found in checkpoint %s", filePath, id.String()))
+	case err != nil:
+		return echo.NewHTTPError(http.StatusInternalServerError,
+			fmt.Sprintf("unable to download %s from checkpoint %s: %s",
+				filePath, id.String(), err.Error()))
+	}
+	defer func() {
+		_ = r.Close()
+	}()
+
+	header := c.Response().Header()
+	header.Set("Accept-Ranges", "bytes")
+	if offset > 0 && offset >= size {
+		header.Set("Content-Range", fmt.Sprintf("bytes */%d", size))
+		return echo.NewHTTPError(http.StatusRequestedRangeNotSatisfiable,
+			fmt.Sprintf("range %s is past the end of %s, which is %d bytes",
+				rangeHeader, filePath, size))
+	}
+	header.Set(echo.HeaderContentType, echo.MIMEOctetStream)
+	code := http.StatusOK
+	end := size
+	// A range of an empty file can only be the whole file.
+	if rangeHeader != "" && size > 0 {
+		if length >= 0 && offset+length < size {
+			end = offset + length
+		}
+		header.Set("Content-Range", fmt.Sprintf("bytes %d-%d/%d", offset, end-1, size))
+		code = http.StatusPartialContent
+	}
+	header.Set(echo.HeaderContentLength, strconv.FormatInt(end-offset, 10))
+	c.Response().WriteHeader(code)
+	// Once the status is sent, errors can only cut the response short, which clients detect from
+	// its Content-Length, and resume from where it stopped.
+	_, err = io.Copy(c.Response(), r)
+	return err
+}
@@ -0,0 +1,34 @@
+package internal
+
+import (
+	"testing"
+
+	"github.com/stretchr/testify/require"
+)
+
+func TestParseByteRange(t *testing.T) {
+	cases := []struct {
+		header string
+		offset int64
+		length int64
+	}{
+		{"", 0, -1},
+		{"bytes=0-", 0, -1},
+		{"bytes=100-", 100, -1},
+		{"bytes=100-199", 100, 100},
+		{"bytes=5-5", 5, 1},
+	}
+	for _, tc := range cases {
+		offset, length, err := parseByteRange(tc.header)
+		require.NoError(t, err, tc.header)
+		require.Equal(t, tc.offset, offset, tc.header)
+		require.Equal(t, tc.length, length, tc.header)
+	}
+
+	for _, header := range []string{
+		"bytes=-100", "bytes=0-9,20-29", "bytes=9-0", "bytes=a-", "items=0-9", "bytes=0",
+	} {
+		_, _, err := parseByteRange(header)
+		require.Error(t, err, header)
+	}
+}
@@ -1,9 +1,11 @@
 package grpcutil
 
 import (
+	"compress/gzip"
 	"context"
 	"crypto/tls"
 	"fmt"
+	"net/http"
 	"runtime/debug"
 
 	grpcmiddleware "github.com/grpc-ecosystem/go-grpc-middleware"
@@ -29,6 +31,10 @@ import (
 
 const jsonPretty = "application/json+pretty"
 
+// maxTaskLogsBodyBytes caps the decompressed size of a batch of task logs, like the gRPC message
+// size limit of the gateway, so that a small gzipped body can't expand without bound.
+const maxTaskLogsBodyBytes = 1 << 27
+
 var (
 	grpcLogger   = logrus.New()
 	grpcLogEntry = logrus.NewEntry(grpcLogger)
@@ -139,6 +145,30 @@ func RegisterHTTPProxy(ctx context.Context, e *echo.Echo, port int, cert *tls.Ce
 		return nil
 	}
 	apiV1 := e.Group("/api/v1")
+	// Accept the gzipped batches of task logs from ship_logs.py.
+	apiV1.POST("/task/logs", handler, middleware.RemoveTrailingSlash(), decompressTaskLogs)
 	apiV1.Any("/*", handler, middleware.RemoveTrailingSlash())
 	return nil
 }
+
+// decompressTaskLogs decompresses gzipped request bodies, failing the request once the body
+// decompresses to more than maxTaskLogsBodyBytes.
+func decompressTaskLogs(next echo.HandlerFunc) echo.HandlerFunc {
+	return func(c echo.Context) error {
+		request := c.Request()
+		if request.Header.Get(echo.HeaderContentEncoding) != "gzip" {
+			return next(c)
+		}
+		body := request.Body
+		defer body.Close()
+		gz, err := gzip.NewReader(body)
+		if err != nil {
+			return echo.NewHTTPError(http.StatusBadRequest, "invalid gzipped request body")
+		}
+		defer gz.Close()
+		request.Body = http.MaxBytesReader(c.Response(), gz, maxTaskLogsBodyBytes)
+		request.Header.Del(echo.HeaderContentEncoding)
+		request.ContentLength = -1
+		return next(c)
+	}
+}
@@ -57,6 +57,42 @@ func NewDownloader(
 	}
 }
 
+// OpenFile opens the file at path within the checkpoint for reading length bytes from offset, or
+// to the end of the file if length is negative, and returns it with the size of the whole file.
+// If the file does not exist, the error wraps os.ErrNotExist.
+//
+//   - id: the UUID string of the checkpoint
+//   - storageConfig: the CheckpointStorageConfig
+//   - path: the path of the file, relative to the checkpoint
+func OpenFile(
+	ctx context.Context,
+	id string,
+	storageConfig *expconf.CheckpointStorageConfig,
+	path string,
+	offset int64,
+	length int64,
+) (io.ReadCloser, int64, error) {
+	prefix := ""
+	switch storage := storageConfig.GetUnionMember().(type) {
+	case expconf.S3Config:
+		if storage.Prefix() != nil {
+			prefix = *storage.Prefix()
+		}
+		return s3.OpenRange(ctx, storage.Bucket(),
+			strings.TrimLeft(prefix+"/"+id+"/"+path, "/"), offset, length)
+	case expconf.GCSConfig:
+		if storage.Prefix() != nil {
+			prefix = *storage.Prefix()
+		}
+		return gcs.OpenRange(ctx, storage.Bucket(),
+			strings.TrimLeft(prefix+"/"+id+"/"+path, "/"), offset, length)
+	default:
+		return nil, 0,
+			fmt.Errorf("checkpoint download via master is not supported for %s",
+				storageConfig2Str(storage))
+	}
+}
+
 func storageConfig2Str(config any) string {
 	switch config.(type) {
 	case expconf.AzureConfig:
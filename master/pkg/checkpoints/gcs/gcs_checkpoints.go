@@ -2,11 +2,17 @@ package gcs
 
 import (
 	"context"
+	"errors"
 	"fmt"
+	"io"
+	"net/http"
+	"os"
 	"strings"
+	"sync"
 
 	"cloud.google.com/go/storage"
 	"github.com/docker/go-units"
+	"google.golang.org/api/googleapi"
 	"google.golang.org/api/iterator"
 
 	"github.com/determined-ai/determined/master/pkg/checkpoints/archive"
@@ -82,6 +88,55 @@ func (d *GCSDownloader) download(ctx context.Context) error {
 	return nil
 }
 
+// rangeClient is the client that OpenRange reads with, which is shared by every request.
+var (
+	rangeClientMu sync.Mutex
+	rangeClient   *storage.Client
+)
+
+func getRangeClient() (*storage.Client, error) {
+	rangeClientMu.Lock()
+	defer rangeClientMu.Unlock()
+	if rangeClient == nil {
+		// The client outlives the request which creates it, along with its credentials.
+		client, err := storage.NewClient(context.Background())
+		if err != nil {
+			return nil, err
+		}
+		rangeClient = client
+	}
+	return rangeClient, nil
+}
+
+// OpenRange opens the object at name for reading length bytes from offset, or to the end of the
+// object if length is negative. It also returns the size of the whole object. If offset is at or
+// past the end of the object, nothing is read. If the object does not exist, the error wraps
+// os.ErrNotExist.
+func OpenRange(
+	ctx context.Context, bucket string, name string, offset int64, length int64,
+) (io.ReadCloser, int64, error) {
+	client, err := getRangeClient()
+	if err != nil {
+		return nil, 0, err
+	}
+	object := client.Bucket(bucket).Object(name)
+	r, err := object.NewRangeReader(ctx, offset, length)
+	var gerr *googleapi.Error
+	switch {
+	case errors.Is(err, storage.ErrObjectNotExist):
+		return nil, 0, fmt.Errorf("%s: %w", name, os.ErrNotExist)
+	case errors.As(err, &gerr) && gerr.Code == http.StatusRequestedRangeNotSatisfiable:
+		attrs, err := object.Attrs(ctx)
+		if err != nil {
+			return nil, 0, err
+		}
+		return http.NoBody, attrs.Size, nil
+	case err != nil:
+		return nil, 0, err
+	}
+	return r, r.Attrs.Size, nil
+}
+
 // Download downloads the checkpoint.
 func (d *GCSDownloader) Download(ctx context.Context) error {
 	if err := d.download(ctx); err != nil {
@@ -4,9 +4,14 @@ import (
 	"context"
 	"fmt"
 	"io"
+	"net/http"
+	"os"
+	"strconv"
 	"strings"
+	"sync"
 
 	"github.com/aws/aws-sdk-go/aws"
+	"github.com/aws/aws-sdk-go/aws/awserr"
 	"github.com/aws/aws-sdk-go/aws/session"
 	"github.com/aws/aws-sdk-go/service/s3"
 	"github.com/aws/aws-sdk-go/service/s3/s3manager"
@@ -52,6 +57,84 @@ func GetS3BucketRegion(ctx context.Context, bucket string) (string, error) {
 	return *out.LocationConstraint, nil
 }
 
+// rangeClients caches the client for each bucket that OpenRange reads from, so that each
+// request doesn't have to look up the region of the bucket again.
+var (
+	rangeClientsMu sync.Mutex
+	rangeClients   = map[string]*s3.S3{}
+)
+
+func rangeClient(ctx context.Context, bucket string) (*s3.S3, error) {
+	rangeClientsMu.Lock()
+	defer rangeClientsMu.Unlock()
+	if client, ok := rangeClients[bucket]; ok {
+		return client, nil
+	}
+
+	region, err := GetS3BucketRegion(ctx, bucket)
+	if err != nil {
+		return nil, err
+	}
+	sess, err := session.NewSession(&aws.Config{
+		Region: &region,
+	})
+	if err != nil {
+		return nil, err
+	}
+	client := s3.New(sess)
+	rangeClients[bucket] = client
+	return client, nil
+}
+
+// OpenRange opens the object at key for reading length bytes from offset, or to the end of the
+// object if length is negative. It also returns the size of the whole object. If offset is at or
+// past the end of the object, nothing is read. If the object does not exist, the error wraps
+// os.ErrNotExist.
+func OpenRange(
+	ctx context.Context, bucket string, key string, offset int64, length int64,
+) (io.ReadCloser, int64, error) {
+	client, err := rangeClient(ctx, bucket)
+	if err != nil {
+		return nil, 0, err
+	}
+
+	byteRange := fmt.Sprintf("bytes=%d-", offset)
+	if length >= 0 {
+		byteRange += strconv.FormatInt(offset+length-1, 10)
+	}
+	out, err := client.GetObjectWithContext(ctx, &s3.GetObjectInput{
+		Bucket: &bucket,
+		Key:    &key,
+		Range:  &byteRange,
+	})
+	if aerr, ok := err.(awserr.Error); ok && aerr.Code() == s3.ErrCodeNoSuchKey {
+		return nil, 0, fmt.Errorf("%s: %w", key, os.ErrNotExist)
+	} else if ok && aerr.Code() == "InvalidRange" {
+		// S3 rejects ranges which start at or past the end of the object.
+		head, err := client.HeadObjectWithContext(ctx, &s3.HeadObjectInput{
+			Bucket: &bucket,
+			Key:    &key,
+		})
+		if err != nil {
+			return nil, 0, err
+		}
+		return http.NoBody, aws.Int64Value(head.ContentLength), nil
+	} else if err != nil {
+		return nil, 0, err
+	}
+
+	// The size of the whole object follows the slash in "bytes 0-99/1000".
+	size := aws.Int64Value(out.ContentLength)
+	if out.ContentRange != nil {
+		total := (*out.ContentRange)[strings.LastIndex(*out.ContentRange, "/")+1:]
+		if size, err = strconv.ParseInt(total, 10, 64); err != nil {
+			_ = out.Body.Close()
+			return nil, 0, fmt.Errorf("unexpected Content-Range %q: %w", *out.ContentRange, err)
+		}
+	}
+	return out.Body, size, nil
+}
+
 // S3Downloader implements downloading a checkpoint from S3
 // and sends it to the client in an archive file.
 type S3Downloader struct {
@@ -22,24 +22,31 @@ ship_logs.py will read environment variables set by the master to obtain its con
 isn't intended to be useful in any non-managed environments.
 """
 
+import base64
+import collections
 import datetime
+import gzip
+import http.client
 import io
 import json
 import logging
 import os
 import queue
 import re
+import shutil
 import signal
 import socket
 import ssl
 import subprocess
 import sys
+import tempfile
 import threading
 import time
 import traceback
 import urllib.error
+import urllib.parse
 import urllib.request
-from typing import Any, Dict, Iterator, List, NamedTuple, Optional, cast
+from typing import Any, Deque, Dict, Iterator, List, NamedTuple, Optional, Union, cast
 
 # Duplicated from determined/__init__.py.  It's nice to keep them in sync.
 LOG_FORMAT = "%(levelname)s: [%(process)s] %(name)s: %(message)s"
@@ -47,21 +54,13 @@ LOG_FORMAT = "%(levelname)s: [%(process)s] %(name)s: %(message)s"
 
 # Example log message given below.
 # 2022-05-12 16:32:48,757:gc_checkpoints: [rank=0] INFO: Determined checkpoint GC, ...
-# Below regex is used to extract the rank field from the log message.
-# Excluding empty spaces this regex matches rank in the above example as [rank=0]
-# Using the DOTALL flag means we keep the newline at the end of the pattern.
-rank = re.compile(
-    r"(?P<space1> ?)\[rank=(?P<rank_id>([0-9]+))\](?P<space2> ?)(?P<log>.*)", flags=re.DOTALL
+# Below regex is used to extract the rank field and the message severity from the log message in a
+# single pass.  Excluding empty spaces and delimiters, this regex matches rank in the above example
+# as [rank=0] and message severity level as INFO.  Either may be missing, in which case the regex
+# still matches, but only the fields which were found are set.
+prefix = re.compile(
+    r"(?: ?\[rank=(?P<rank_id>[0-9]+)\] ?)?(?: ?(?P<level>DEBUG|INFO|WARNING|ERROR|CRITICAL): ?)?"
 )
-# Below regex is used to extract the message severity from the log message.
-# Excluding empty spaces and delimiter(:) this regex matches message severity level in the above
-# example as INFO.
-# Using the DOTALL flag means we keep the newline at the end of the pattern.
-level = re.compile(
-    r"(?P<space1> ?)(?P<level>(DEBUG|INFO|WARNING|ERROR|CRITICAL)):(?P<space2> ?)(?P<log>.*)",
-    flags=re.DOTALL,
-)
-lineend = re.compile(rb"[\r\n]")
 
 
 # Interval at which to force a flush.
@@ -73,9 +72,23 @@ SHIPPER_FAILURE_BACKOFF_SECONDS = 1
 # Max size of the log buffer before forcing a flush.
 LOG_BATCH_MAX_SIZE = 1000
 
-# Max size of the shipping queue before we start to apply backpressure by blocking sends. We would
-# only hit this if we got underwater by three full batches while trying to ship a batch.
-SHIP_QUEUE_MAX_SIZE = 3 * LOG_BATCH_MAX_SIZE
+# Max number of batches waiting to be shipped that are kept in memory.  We would only hit this if we
+# got underwater by three full batches while trying to ship a batch, after which further batches
+# are spilled to disk.
+SHIP_QUEUE_MAX_BATCHES = 3
+
+# Max size of the (compressed) batches spilled to disk while the master is slow or unreachable,
+# after which logs are dropped rather than applying backpressure to the child process.
+SHIP_SPILL_MAX_BYTES = 256 * 1024 * 1024
+
+# Logs are repetitive enough that the fastest gzip compression level compresses them well.
+SHIPPER_COMPRESS_LEVEL = 1
+
+# Timeout of each request to the master, so a hung connection can't stop shipping.
+SHIPPER_HTTP_TIMEOUT = 60
+
+# The fields which are set per log, which the task metadata can't override.
+LOG_FIELDS = {"timestamp", "stdtype", "rank_id", "level", "log"}
 
 
 class DoneMsg(NamedTuple):
@@ -88,10 +101,14 @@ class DoneMsg(NamedTuple):
     exit_code: Optional[int] = None
 
 
+# Read up to a full pipe's worth of output at a time.
+READ_SIZE = 64 * 1024
+
+
 # Duplicated in wrap_rank.py.  If you find a bug here, fix it there too.
-def read_newlines_or_carriage_returns(fd: io.RawIOBase) -> Iterator[str]:
+def read_line_batches(fd: io.RawIOBase) -> Iterator[List[str]]:
     r"""
-    Read lines, delineated by either '\n' or '\r.
+    Read batches of lines, delineated by either '\n' or '\r.
 
     Unlike the default io.BufferedReader used in subprocess.Popen(bufsize=-1), we read until we
     encounter either '\n' or \r', and treat that as one line.
@@ -99,67 +116,112 @@ def read_newlines_or_carriage_returns(fd: io.RawIOBase) -> Iterator[str]:
     Specifically, io.BufferedReader doesn't handle tqdm progress bar outputs very well; it treats
     all of the '\r' outputs as one enormous line.
 
+    Rather than searching for one line break at a time, everything available is read and split
+    into lines at once, which matters for processes that write many lines per second.
+
     Args:
         fd: an unbuffered stdout or stderr from a subprocess.Popen.
 
     Yields:
-        A series of str, one per line.  Each line always ends with a '\n'.  Each line will be
-        broken to length io.DEFAULT_BUFFER_SIZE, even if the underlying io didn't have a linebreak.
+        A list of str per read, one per line.  Each line always ends with a '\n'.  Each line will
+        be broken to length io.DEFAULT_BUFFER_SIZE, even if the underlying io didn't have a
+        linebreak.  Invalid utf8 is replaced, rather than raising an error.
     """
     # Ship lines of length of DEFAULT_BUFFER_SIZE, including the terminating newline.
     limit = io.DEFAULT_BUFFER_SIZE - 1
-    nread = 0
-    chunks: List[bytes] = []
-
-    def oneline():
-        nonlocal nread
-        nonlocal chunks
-        out = b"".join(chunks).decode("utf8")
-        chunks = []
-        nread = 0
-        return out
+    partial = b""
 
     while True:
-        buf = fd.read(limit - nread)
+        buf = fd.read(READ_SIZE)
         if not buf:
             # EOF.
             break
 
-        # Extract all the lines from this buffer.
-        while buf:
-            m = lineend.search(buf)
-            if m is None:
-                # No line break here; just append to chunks.
-                chunks.append(buf)
-                nread += len(buf)
-                break
+        # Even if we find a '\r', emit a '\n'.
+        buf = (partial + buf).replace(b"\r", b"\n")
+        chunks = buf.split(b"\n")
+        # Whatever follows the last line break is the start of the next line.
+        partial = chunks.pop()
 
-            # Line break found!
-            start, end = m.span()
-            chunks.append(buf[:start])
-            # Even if we matched a '\r', emit a '\n'.
-            chunks.append(b"\n")
-            yield oneline()
-            # keep checking the rest of buf
-            buf = buf[end:]
-
-        # Detect if we reached our buffer limit.
-        if nread >= limit:
+        if max(map(len, chunks), default=0) < limit:
+            # No line is too long, so decode all the lines at once.
+            text = buf[: len(buf) - len(partial)].decode("utf8", errors="replace")
+            lines = [line + "\n" for line in text[:-1].split("\n")] if text else []
+        else:
+            lines = []
+            for chunk in chunks:
+                while len(chunk) >= limit:
+                    # Pretend we got a line break at the limit.
+                    lines.append(chunk[:limit].decode("utf8", errors="replace") + "\n")
+                    chunk = chunk[limit:]
+                lines.append(chunk.decode("utf8", errors="replace") + "\n")
+
+        # Detect if the next line already reached our limit.
+        while len(partial) >= limit:
             # Pretend we got a line anyway.
-            chunks.append(b"\n")
-            yield oneline()
+            lines.append(partial[:limit].decode("utf8", errors="replace") + "\n")
+            partial = partial[limit:]
+
+        if lines:
+            yield lines
 
     # One last line, maybe.
-    if chunks:
-        chunks.append(b"\n")
-        yield oneline()
+    if partial:
+        yield [partial.decode("utf8", errors="replace") + "\n"]
+
+
+def read_newlines_or_carriage_returns(fd: io.RawIOBase) -> Iterator[str]:
+    r"""
+    Read lines, delineated by either '\n' or '\r, one at a time.  See read_line_batches.
+    """
+    for lines in read_line_batches(fd):
+        yield from lines
+
+
+class Timestamps:
+    """
+    Timestamps formats the current time in utc, in the same isoformat as datetime does, but only
+    formats the date and time of day once per second.
+    """
+
+    def __init__(self) -> None:
+        self.second = -1
+        self.prefix = ""
+
+    def now(self) -> str:
+        now = time.time()
+        second = int(now)
+        if second != self.second:
+            self.second = second
+            self.prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self.prefix}.{int((now - second) * 1000000):06d}+00:00"
+
+
+def parse_log(line: str, timestamp: str, stdtype: str) -> Dict[str, Any]:
+    """
+    Build a structured log out of a line, extracting its rank and level, if any.
+    """
+    log: Dict[str, Any] = {"timestamp": timestamp, "stdtype": stdtype}
+    m = prefix.match(line)
+    # Most lines have neither, in which case nothing was matched.
+    if m and m.end():
+        rank_id, found = m.group("rank_id", "level")
+        if rank_id is not None:
+            log["rank_id"] = int(rank_id)
+        if found is not None:
+            log["level"] = f"LOG_LEVEL_{found}"
+        line = line[m.end() :]
+    log["log"] = line
+    return log
 
 
 class Collector(threading.Thread):
     """
     Collector is the thread that reads and parses lines from stdout or stderr.
 
-    It will pass structured data to the logq, and will send a message on doneq when it finishes.
+    It will pass lists of structured logs to the logq, one per read, and will send a message on
+    doneq when it finishes.
+    The task metadata is only added to each log by the Shipper, when it serializes a batch.
     """
 
     def __init__(
@@ -167,14 +229,12 @@ class Collector(threading.Thread):
         fd: io.RawIOBase,
         stdtype: str,
         emit_stdout_logs: bool,
-        metadata: Dict[str, Any],
         logq: queue.Queue,
         doneq: queue.Queue,
     ) -> None:
         super().__init__()
         self.fd = fd
         self.stdtype = stdtype
-        self.metadata = {"stdtype": self.stdtype, **metadata}
         self.logq = logq
         self.doneq = doneq
 
@@ -196,37 +256,20 @@ class Collector(threading.Thread):
             self.logq.put(None)
 
     def _run(self) -> None:
-        for line in read_newlines_or_carriage_returns(self.fd):
-            # Capture the timestamp as soon as the line is collected.
-            now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        timestamps = Timestamps()
+        for lines in read_line_batches(self.fd):
+            # Capture the timestamp as soon as the lines are collected.
+            now = timestamps.now()
 
             if self.dup_io:
-                print(line, file=self.dup_io, flush=True, end="")
+                print("".join(lines), file=self.dup_io, flush=True, end="")
 
             if self.shipper_died:
                 # Keep draining logs so process doesn't block on stdout or stderr, but don't bother
                 # queuing the logs we capture.
                 continue
 
-            log: Dict[str, Any] = {"timestamp": now, **self.metadata}
-
-            m = rank.match(line)
-            if m:
-                try:
-                    log["rank_id"] = int(m.group("rank_id"))
-                    line = m.group("log")
-                except ValueError:
-                    pass
-
-            m = level.match(line)
-            if m:
-                found = m.group("level")
-                log["level"] = f"LOG_LEVEL_{found}"
-                line = m.group("log")
-
-            log["log"] = line
-
-            self.logq.put(log)
+            self.logq.put([parse_log(line, now, self.stdtype) for line in lines])
 
 
 def override_verify_name(ctx: ssl.SSLContext, verify_name: str) -> ssl.SSLContext:
@@ -241,9 +284,96 @@ def override_verify_name(ctx: ssl.SSLContext, verify_name: str) -> ssl.SSLContex
     return cast(ssl.SSLContext, VerifyNameOverride())
 
 
+class SpillQueue:
+    """
+    SpillQueue is a FIFO of gzipped batches of logs waiting to be shipped, which never blocks puts.
+
+    The first max_memory batches waiting are kept in memory.  Later batches are spilled to files in
+    a temporary directory, up to max_spill_bytes, after which batches are dropped.  That way, a slow
+    or unreachable master can never block the Collectors, and through them, the child process.
+    """
+
+    def __init__(self, max_memory: int, max_spill_bytes: int) -> None:
+        self.max_memory = max_memory
+        self.max_spill_bytes = max_spill_bytes
+        self.cond = threading.Condition()
+        # Each batch is either its data, in memory, or the path of the file it was spilled to.
+        self.batches: Deque[Union[bytes, str]] = collections.deque()
+        self.in_memory = 0
+        self.spilled_bytes = 0
+        self.spill_dir: Optional[str] = None
+        self.nspilled = 0
+        self.closed = False
+
+    def put(self, data: bytes) -> bool:
+        """
+        Queue a batch, returning False if it was dropped because the spill files are full.
+        """
+        with self.cond:
+            if self.in_memory < self.max_memory:
+                self.in_memory += 1
+                self.batches.append(data)
+            elif self.spilled_bytes + len(data) <= self.max_spill_bytes:
+                try:
+                    self.batches.append(self.spill(data))
+                except OSError:
+                    logging.error("failed to spill logs to disk", exc_info=True)
+                    return False
+                self.spilled_bytes += len(data)
+            else:
+                return False
+            self.cond.notify()
+            return True
+
+    def spill(self, data: bytes) -> str:
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="ship_logs-")
+        path = os.path.join(self.spill_dir, str(self.nspilled))
+        self.nspilled += 1
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def get(self) -> Optional[bytes]:
+        """
+        Pop the oldest batch, waiting for one if necessary, or return None once closed and empty.
+        """
+        with self.cond:
+            while not self.batches and not self.closed:
+                self.cond.wait()
+            if not self.batches:
+                return None
+            batch = self.batches.popleft()
+            if isinstance(batch, bytes):
+                self.in_memory -= 1
+                return batch
+        with open(batch, "rb") as f:
+            data = f.read()
+        os.remove(batch)
+        with self.cond:
+            self.spilled_bytes -= len(data)
+        return data
+
+    def close(self) -> None:
+        """
+        Wake up get() once the queue is empty; no more batches may be put after this.
+        """
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def cleanup(self) -> None:
+        if self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
 class Shipper(threading.Thread):
     """
-    Shipper reads structured logs from logq and ships them to the determined-master.
+    Shipper reads lists of structured logs from logq and ships them to the determined-master.
+
+    Logs are gathered into gzipped batches, which a separate sender thread ships over a keep-alive
+    connection, so that gathering the next batch is never held up by shipping the last one.  Batches
+    wait to be shipped in a SpillQueue.
 
     It will send a message on doneq when it finishes.
     """
@@ -254,6 +384,7 @@ class Shipper(threading.Thread):
         token: str,
         cert_name: str,
         cert_file: str,
+        metadata: Dict[str, Any],
         logq: queue.Queue,
         doneq: queue.Queue,
         daemon: bool,
@@ -262,6 +393,22 @@ class Shipper(threading.Thread):
         self.logq = logq
         self.doneq = doneq
 
+        # The metadata is the same for every log, so serialize it once, as the tail of a json object
+        # which is appended to each serialized log.
+        self.metadata_json = (
+            "".join(
+                f", {json.dumps(k)}: {json.dumps(v)}"
+                for k, v in metadata.items()
+                if k not in LOG_FIELDS
+            )
+            + "}"
+        )
+
+        self.batches = SpillQueue(SHIP_QUEUE_MAX_BATCHES, SHIP_SPILL_MAX_BYTES)
+        self.send_error: Optional[Exception] = None
+        # How many logs were dropped since the last batch that was queued.
+        self.dropped = 0
+
         # TODO(rb): Switch to DET_USER_TOKEN when the user token passed into a container isn't
         # limited to expire in 7 days, and then set `Authorization: Bearer $token` here instead.
         self.headers = {"Grpc-Metadata-x-allocation-token": f"Bearer {token}"}
@@ -299,6 +446,55 @@ class Shipper(threading.Thread):
                     # Override hostname verification
                     self.context = override_verify_name(self.context, cert_name)
 
+        self.logs_target = urllib.parse.urlsplit(self.logs_url).path
+        self.proxy_headers: Dict[str, str] = {}
+        self.conn = self.connection()
+
+    def connection(self) -> http.client.HTTPConnection:
+        """
+        Create the connection which every batch is shipped over, through the proxy that urllib would
+        use, if any.  http.client only connects on the first request, and reconnects on the next
+        request after the connection is closed.
+        """
+        url = urllib.parse.urlsplit(self.base_url)
+        host = url.hostname or ""
+        port = url.port
+        proxy = urllib.request.getproxies().get(url.scheme)
+        if proxy and urllib.request.proxy_bypass(url.netloc):
+            proxy = None
+
+        tunnel = None
+        proxy_headers = {}
+        if proxy:
+            proxy_url = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+            if proxy_url.username is not None:
+                creds = ":".join(
+                    urllib.parse.unquote(part or "")
+                    for part in (proxy_url.username, proxy_url.password)
+                )
+                auth = base64.b64encode(creds.encode("utf8")).decode("ascii")
+                proxy_headers["Proxy-Authorization"] = f"Basic {auth}"
+            if url.scheme == "https":
+                # Tunnel through the proxy, so that tls is still end-to-end.
+                tunnel = (host, port)
+            else:
+                # Ask the proxy for the full url, authenticating every request.
+                self.logs_target = self.logs_url
+                self.proxy_headers = proxy_headers
+            host = proxy_url.hostname or ""
+            port = proxy_url.port or 80
+
+        conn: http.client.HTTPConnection
+        if url.scheme == "https":
+            conn = http.client.HTTPSConnection(
+                host, port, timeout=SHIPPER_HTTP_TIMEOUT, context=self.context
+            )
+            if tunnel is not None:
+                conn.set_tunnel(*tunnel, headers=proxy_headers)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=SHIPPER_HTTP_TIMEOUT)
+        return conn
+
     def run(self) -> None:
         try:
             self._run()
@@ -308,8 +504,21 @@ class Shipper(threading.Thread):
             self.doneq.put(DoneMsg("shipper", error=None))
 
     def _run(self) -> None:
+        sender = threading.Thread(target=self.send_batches, daemon=True)
+        sender.start()
+        try:
+            self.queue_batches()
+        finally:
+            self.batches.close()
+        sender.join()
+        self.batches.cleanup()
+        self.conn.close()
+        if self.send_error is not None:
+            raise self.send_error
+
+    def queue_batches(self) -> None:
         eofs = 0
-        while eofs < 2:
+        while eofs < 2 and self.send_error is None:
             logs: List[Dict[str, Any]] = []
             deadline = time.time() + SHIPPER_FLUSH_INTERVAL
             # Pop logs until both collectors close, or we fill up a batch, or we hit the deadline.
@@ -321,66 +530,110 @@ class Shipper(threading.Thread):
                     break
 
                 try:
-                    log = self.logq.get(timeout=timeout)
+                    collected = self.logq.get(timeout=timeout)
                 except queue.Empty:
                     # We hit the timeout.
                     break
 
-                if log is None:
+                if collected is None:
                     eofs += 1
                     continue
 
-                logs.append(log)
+                logs.extend(collected)
 
-            if not logs:
-                continue
+            # Collectors queue every line from a read together, which may overfill a batch.
+            for start in range(0, len(logs), LOG_BATCH_MAX_SIZE):
+                self.queue_batch(logs[start : start + LOG_BATCH_MAX_SIZE])
 
-            data = json.dumps({"logs": logs}).encode("utf8")
+    def queue_batch(self, logs: List[Dict[str, Any]]) -> None:
+        nlogs = len(logs)
+        if self.dropped:
+            now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            msg = f"ship_logs.py dropped {self.dropped} logs while the master was unreachable\n"
+            notice = {
+                "timestamp": now,
+                "log": msg,
+                "level": "LOG_LEVEL_WARNING",
+                "stdtype": "stderr",
+            }
+            logs.insert(0, notice)
+
+        if self.batches.put(self.encode(logs)):
+            self.dropped = 0
+        else:
+            if not self.dropped:
+                logging.error("too many logs waiting to be shipped, dropping logs")
+            self.dropped += nlogs
 
-            # Try to ship for about ten minutes.
-            backoffs = [0, 1, 5, 10, 15, 15, 15, 15, 15, 15, 15, 60, 60, 60, 60, 60, 60, 60, 60, 60]
+    def send_batches(self) -> None:
+        # Try to ship each batch for about ten minutes.
+        backoffs = [0, 1, 5, 10, 15, 15, 15, 15, 15, 15, 15, 60, 60, 60, 60, 60, 60, 60, 60, 60]
+        try:
+            while True:
+                data = self.batches.get()
+                if data is None:
+                    return
+                self.ship(data, backoffs)
+        except Exception as e:
+            self.send_error = e
 
-            self.ship(data, backoffs)
+    def encode(self, logs: List[Dict[str, Any]]) -> bytes:
+        """
+        Serialize a batch of logs, with the metadata added to each log, into a gzipped POST body.
+        """
+        body = ", ".join(json.dumps(log)[:-1] + self.metadata_json for log in logs)
+        data = f'{{"logs": [{body}]}}'.encode("utf8")
+        return gzip.compress(data, compresslevel=SHIPPER_COMPRESS_LEVEL)
 
     def ship(self, data: bytes, backoffs: List[int]) -> None:
         for delay in backoffs:
             time.sleep(delay)
             try:
-                req = urllib.request.Request(self.logs_url, data, self.headers, method="POST")
-                try:
-                    with urllib.request.urlopen(req, context=self.context) as resp:
-                        respbody = resp.read()
-                except urllib.error.URLError as e:
-                    # urllib stacktraces are awful, so see if we can interpret what happened.
-                    # Note that we've already connected successfully to the master so failures here
-                    # are likely related to master crashing or the network breaking or something to
-                    # that effect.
-                    if isinstance(e, urllib.error.HTTPError):
-                        raise RuntimeError(
-                            f"POST logs returned status code: {e.code} and reason: {e.reason}, "
-                            "is the master healthy?"
-                        ) from None
-                    elif isinstance(e.reason, ConnectionRefusedError):
-                        raise RuntimeError(
-                            "The connection to {self.master_url} was refused, is master down?"
-                        )
-                    raise
-
-                if resp.getcode() != 200:
-                    raise RuntimeError(
-                        f"ship logs failed: status code {resp.get_code()}, body:\n---\n"
-                        + respbody.decode("utf8")
-                    )
-
+                self.post_logs(data)
                 # Shipped successfully
                 return
-
             except Exception:
                 logging.error("failed to ship logs to master", exc_info=True)
 
         raise RuntimeError("failed to connect to master for too long, giving up")
 
-    def ship_special(self, msg: str, metadata: Dict[str, str], emit_stdout_logs: bool) -> None:
+    def post_logs(self, data: bytes) -> None:
+        headers = {
+            **self.headers,
+            **self.proxy_headers,
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+        }
+        # The master or a proxy may have closed an idle keep-alive connection, in which case we
+        # reconnect right away, without waiting for a backoff.
+        for retry in (True, False):
+            reused = self.conn.sock is not None
+            try:
+                self.conn.request("POST", self.logs_target, data, headers)
+                resp = self.conn.getresponse()
+                respbody = resp.read()
+            except ConnectionRefusedError:
+                self.conn.close()
+                # Note that we've already connected successfully to the master so failures here
+                # are likely related to master crashing or the network breaking or something to
+                # that effect.
+                raise RuntimeError(
+                    f"The connection to {self.master_url} was refused, is master down?"
+                ) from None
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                if retry and reused:
+                    continue
+                raise
+
+            if resp.status != 200:
+                raise RuntimeError(
+                    f"POST logs returned status code: {resp.status} and reason: {resp.reason}, "
+                    "is the master healthy?\n---\n" + respbody.decode("utf8", errors="replace")
+                )
+            return
+
+    def ship_special(self, msg: str, emit_stdout_logs: bool) -> None:
         """
         Ship a special message, probably from failing to start the child process.
         """
@@ -398,11 +651,10 @@ class Shipper(threading.Thread):
                     "log": line,
                     "level": "ERROR",
                     "stdtype": "stderr",
-                    **metadata,
                 }
             )
 
-        data = json.dumps({"logs": logs}).encode("utf8")
+        data = self.encode(logs)
 
         # Try to ship for about 30 seconds.
         backoffs = [0, 1, 5, 10, 15]
@@ -526,14 +778,14 @@ def main(
     # is not allowed to keep a task container alive too long after the child process has exited.  We
     # want to guarantee that we exit about DET_LOG_WAIT_TIME seconds after the child process exits.
     #
-    # However, interruping a synchronous HTTP call form urllib is nearly impossible; even if you
-    # were to select() until the underlying file descriptor had something to read before calling
-    # Request.read(), there are many buffered readers in there and most likely multiple os.read()
-    # calls would occur and you'd be blocking anyway.
+    # However, interruping a synchronous HTTP call from http.client is nearly impossible; even if
+    # you were to select() until the underlying file descriptor had something to read before
+    # calling HTTPResponse.read(), there are many buffered readers in there and most likely multiple
+    # os.read() calls would occur and you'd be blocking anyway.
     #
     # So as an easy workaround, we set daemon=True and just exit the process if it's not done on
     # time.
-    shipper = Shipper(master_url, token, cert_name, cert_file, logq, doneq, daemon=True)
+    shipper = Shipper(master_url, token, cert_name, cert_file, metadata, logq, doneq, daemon=True)
     shipper_timed_out = False
 
     shipper.assert_master_is_reachable()
@@ -545,17 +797,17 @@ def main(
             cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0
         )
     except FileNotFoundError:
-        shipper.ship_special(f"FileNotFoundError executing {cmd}", metadata, emit_stdout_logs)
+        shipper.ship_special(f"FileNotFoundError executing {cmd}", emit_stdout_logs)
         # 127 is the standard bash exit code for file-not-found.
         return 127
     except PermissionError:
         # Unable to read or to execute the command.
-        shipper.ship_special(f"PermissionError executing {cmd}", metadata, emit_stdout_logs)
+        shipper.ship_special(f"PermissionError executing {cmd}", emit_stdout_logs)
         # 126 is the standard bash exit code for permission failure.
         return 126
     except Exception:
         msg = f"unexpected failure executing {cmd}:\n" + traceback.format_exc()
-        shipper.ship_special(msg, metadata, emit_stdout_logs)
+        shipper.ship_special(msg, emit_stdout_logs)
         # 80 is the exit code we use to signal "ship_logs.py failed"
         return 80
 
@@ -581,8 +833,8 @@ def main(
         ]:
             signal.signal(sig, signal_passthru)
 
-        stdout = Collector(p.stdout, "stdout", emit_stdout_logs, metadata, logq, doneq)
-        stderr = Collector(p.stderr, "stderr", emit_stdout_logs, metadata, logq, doneq)
+        stdout = Collector(p.stdout, "stdout", emit_stdout_logs, logq, doneq)
+        stderr = Collector(p.stderr, "stderr", emit_stdout_logs, logq, doneq)
 
         stdout.start()
         stdout_started = True